@@ -1,35 +1,36 @@
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, Response, request, jsonify, session, send_from_directory, url_for
 from flask_cors import CORS
-import joblib
 import sys
 import os
-import os
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 model_dir = os.path.join(BASE_DIR, "backend", "ml", "models")
 encoders_dir = os.path.join(BASE_DIR, "backend", "ml", "encoders")
 
+import hashlib
 import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from backend.api.routes.auth import register_routes
 from backend.api.routes.api import calculate_eco_score
-
-
-import pandas as pd
-from backend.scrapers.amazon.scrape_amazon_titles import (
-    scrape_amazon_product_page,
-    estimate_origin_country,
-    resolve_brand_origin,
-    save_brand_locations
-)
-from backend.scrapers.amazon.scrape_amazon_titles import haversine, origin_hubs, uk_hub
+from backend.ml.encoders.lookup import normalize_feature
+from backend.ml.prediction.registry import model_registry
+from backend.utils.cache import TieredCache
+from backend.scrapers.common.driver_pool import pool_stats
+from backend.data.storage.event_log import EventLog
+from backend.data.storage.aggregates import DashboardAggregates
+from backend.data.storage.job_queue import BLOCKED, DONE, FAILED, TERMINAL, JobQueue, public_view
+from backend.scrapers.amazon.fetcher import ScrapeBlocked
+from backend.utils.logging.logger import begin_request, current_timer, get_logger, metrics, span
+
+# pandas, pgeocode and the scraper module are imported where they are used;
+# gunicorn.conf.py calls warm_up() in the master so workers share them.
 
 import csv
 import re
+from functools import lru_cache
 import numpy as np
-import pgeocode
 
 # === Load Flask ===
 #   app = Flask(__name__)
@@ -55,9 +56,76 @@ CORS(app,
 
 register_routes(app)
 
+log = get_logger("api")
+
+
+# === Request timing ===
+# Every request gets a timer; span() blocks below add their phase to it, and the
+# totals land in /metrics and the Server-Timing header. See backend.utils.logging.logger.
+def request_route():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@app.before_request
+def start_request_timer():
+    begin_request(request.headers.get("X-Profile"))
+
+
+@app.after_request
+def finish_request_timer(response):
+    timer = current_timer()
+    if timer is not None:
+        response.headers.update(timer.finish(request_route(), request.method, response.status_code))
+    return response
+
+
+@app.teardown_request
+def abandon_request_timer(error=None):
+    # after_request is skipped when a view raises; still count the request
+    timer = current_timer()
+    if timer is not None:
+        timer.finish(request_route(), request.method, 500)
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """This process's counters and latency histograms in Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+
+# Append-only NDJSON logs; the old JSON arrays are imported on first start
+SUBMISSION_FILE = "submitted_predictions.ndjson"
+FEEDBACK_FILE = os.path.join("ml_model", "user_feedback.ndjson")
+submission_log = EventLog(SUBMISSION_FILE, legacy_json="submitted_predictions.json")
+feedback_log = EventLog(FEEDBACK_FILE, legacy_json=os.path.join("ml_model", "user_feedback.json"))
+
 
+def stream_json_array(records):
+    """Serialise records as one JSON array, a record at a time."""
+    yield "["
+    for i, record in enumerate(records):
+        yield ("," if i else "") + json.dumps(record, ensure_ascii=False)
+    yield "]"
 
-SUBMISSION_FILE = "submitted_predictions.json"
+
+DATASET_PATH = os.path.join(BASE_DIR, "common", "data", "csv", "eco_dataset.csv")
+
+
+def compact_json(obj):
+    """obj serialised exactly as jsonify() sends it."""
+    return app.json.dumps(obj, separators=(",", ":")) + "\n"
+
+
+dashboard_aggregates = DashboardAggregates(DATASET_PATH, submission_log, compact_json)
+
+
+def conditional_json(body, etag):
+    """JSON response the dashboard can revalidate with If-None-Match (304 when unchanged)."""
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route("/admin/submissions")
@@ -66,11 +134,7 @@ def get_submissions():
     if not user or user.get("role") != "admin":
         return jsonify({"error": "Unauthorized"}), 401
 
-    if not os.path.exists(SUBMISSION_FILE):
-        return jsonify([])
-
-    with open(SUBMISSION_FILE, "r", encoding="utf-8") as f:
-        return jsonify(json.load(f))
+    return Response(stream_json_array(submission_log.records()), mimetype="application/json")
 
 
 
@@ -81,220 +145,124 @@ def update_submission():
         return jsonify({"error": "Unauthorized"}), 401
 
     item = request.json
-    with open(SUBMISSION_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    for i, row in enumerate(data):
-        if row["title"] == item["title"]:
-            data[i] = item
-            break
-    with open(SUBMISSION_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+
+    def replace_first(rows):
+        replaced = False
+        for row in rows:
+            if not replaced and row.get("title") == item["title"]:
+                replaced = True
+                row = item
+            yield row
+
+    submission_log.rewrite(replace_first)
     return jsonify({"status": "success"})
 
 
 
 def log_submission(product):
-    path = "submitted_predictions.json"
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                try:
-                    data = json.load(f)
-                except json.JSONDecodeError as e:
-                    print(f"⚠️ JSON decode error in {path}: {e}. Starting fresh.")
-                    data = []
-        else:
-            data = []
-        data.append(product)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"✅ Logged submission: {product.get('title', 'Unknown')}")
-    except Exception as e:
-        print(f"❌ Failed to log submission: {e}")
-        
-def load_material_co2_data():
     try:
-        import pandas as pd
-        df = pd.read_csv(os.path.join(model_dir, "defra_material_intensity.csv")) 
-        return {str(row["material"]).lower(): float(row["co2_per_kg"]) for _, row in df.iterrows()}
+        with span("log"):
+            submission_log.append(product)
+        log.debug("✅ Logged submission: %s", product.get('title', 'Unknown'))
     except Exception as e:
-        print(f"⚠️ Could not load CO₂ map: {e}")
-        return {}
+        log.error("❌ Failed to log submission: %s", e)
+
+
+def warm_up():
+    """
+    Load the model bundle and heavy imports up front. Called from the gunicorn
+    master (preload_app) so forked workers share the memory copy-on-write.
+    """
+    import pandas
+    import pgeocode
+    import backend.scrapers.amazon.scrape_amazon_titles
+    dashboard_aggregates.refresh()
+    return model_registry.preload()
 
-material_co2_map = load_material_co2_data()
+
+def request_json():
+    """
+    The body parsed as JSON whatever its Content-Type, or None when it doesn't
+    parse. Matches the ASGI app's read_json, so both modes answer bad bodies alike.
+    """
+    return request.get_json(force=True, silent=True)
 
 
 @app.route("/predict", methods=["POST"])
 def predict_eco_score():
-    
-    print("📩 /predict endpoint was hit via POST")  # debug
+    log.debug("📩 /predict endpoint was hit via POST")
     try:
-        data = request.get_json()
-        product = data  # ensure it's always defined
-        material = normalize_feature(data.get("material"), "Other")
-        weight = float(data.get("weight") or 0.0)
-        # Estimate default transport from distance if none provided
-        user_transport = data.get("transport")
-        origin_km = float(product.get("distance_origin_to_uk", 0) or 0)
-
-        # Heuristic fallback: choose mode by distance
-        def guess_transport_by_distance(km):
-            if km > 7000:
-                return "Ship"
-            elif km > 2000:
-                return "Air"
-            else:
-                return "Land"
-
-        # === Determine transport mode based on distance (default + override)
-        override_transport = normalize_feature(data.get("override_transport_mode"), None)
-
-        def determine_transport_mode(distance_km):
-            if distance_km < 1500:
-                return "Truck", 0.15
-            elif distance_km < 6000:
-                return "Ship", 0.03
-            else:
-                return "Air", 0.5
-            
-        origin_distance_km = float(data.get("distance_origin_to_uk") or 0)
-        origin = normalize_feature(data.get("origin"), "Other")
+        with span("parse"):
+            data = request_json()
+        body, status = predict_response(data)
+        return jsonify(body), status
+    except Exception as e:
+        log.error("❌ Error in /predict: %s", e)
+        return jsonify({"error": str(e)}), 500
 
-        default_mode, default_emission_factor = determine_transport_mode(origin_distance_km)
 
-        if override_transport in ["Truck", "Ship", "Air"]:
-            transport = override_transport
-            print(f"🚛 User override mode: {transport}")
+def predict_response(data):
+    """Score one /predict payload: (body, status). Shared with the ASGI app."""
+    if data is None:
+        return {"error": "Invalid JSON in request"}, 400
+    try:
+        with span("parse"):
+            inputs = extract_predict_inputs(data)
+        bundle = model_registry.get()
+        model, label_table, feature_builder = bundle.model, bundle.label_table, bundle.feature_builder
+
+        material = inputs["material"]
+        weight = inputs["weight"]
+        transport = inputs["transport"]
+        recyclability = inputs["recyclability"]
+        origin = inputs["origin"]
+
+        if inputs["transport_overridden"]:
+            log.debug("🚛 User override mode: %s", transport)
         else:
-            transport = default_mode
-            print(f"📦 Default transport mode applied: {transport}")
-
-        print(f"🚛 Final transport used: {transport} (user selected: {user_transport})")
-
-        recyclability = normalize_feature(data.get("recyclability"), "Medium")
-
-        # === Encode features
-        material_encoded = safe_encode(material, material_encoder, "Other")
-        transport_encoded = safe_encode(transport, transport_encoder, "Land")
-        recycle_encoded = safe_encode(recyclability, recycle_encoder, "Medium")
-        origin_encoded = safe_encode(origin, origin_encoder, "Other")
-
-        # === Bin weight (for 6th feature)
-        def bin_weight(w):
-            if w < 0.5:
-                return 0
-            elif w < 2:
-                return 1
-            elif w < 10:
-                return 2
-            else:
-                return 3
-
-        weight_bin_encoded = bin_weight(weight)
-
-        weight_log = np.log1p(weight)
-
-        # === Prepare enhanced features for 11-feature model
-        try:
-            # Infer additional features from title if available
-            title = data.get("title", "")
-            title_lower = title.lower()
-            
-            # Packaging type inference
-            if any(x in title_lower for x in ["bottle", "jar", "can"]):
-                packaging_type = "bottle"
-            elif any(x in title_lower for x in ["box", "pack", "carton"]):
-                packaging_type = "box"
-            else:
-                packaging_type = "other"
-            
-            # Size category inference
-            if weight > 2.0:
-                size_category = "large"
-            elif weight > 0.5:
-                size_category = "medium"
-            else:
-                size_category = "small"
-            
-            # Quality level inference
-            if any(x in title_lower for x in ["premium", "pro", "professional", "deluxe"]):
-                quality_level = "premium"
-            elif any(x in title_lower for x in ["basic", "standard", "regular"]):
-                quality_level = "standard"
-            else:
-                quality_level = "standard"
-            
-            # Pack size (number of items)
-            pack_size = 1
-            for num_word in ["2 pack", "3 pack", "4 pack", "5 pack", "6 pack", "8 pack", "10 pack", "12 pack"]:
-                if num_word in title_lower:
-                    pack_size = int(num_word.split()[0])
-                    break
-            
-            # Material confidence
-            material_confidence = 0.8 if material != "Other" else 0.3
-            
-            # Try to encode enhanced features if available
-            if packaging_type_encoder and size_category_encoder and quality_level_encoder:
-                packaging_encoded = safe_encode(packaging_type, packaging_type_encoder, "box")
-                size_encoded = safe_encode(size_category, size_category_encoder, "medium") 
-                quality_encoded = safe_encode(quality_level, quality_level_encoder, "standard")
-                
-                # Use 11-feature model
-                X = [[
-                    material_encoded,           # 1
-                    transport_encoded,          # 2
-                    recycle_encoded,           # 3
-                    origin_encoded,            # 4
-                    weight_log,                # 5
-                    weight_bin_encoded,        # 6
-                    packaging_encoded,         # 7
-                    size_encoded,              # 8
-                    quality_encoded,           # 9
-                    pack_size,                 # 10
-                    material_confidence        # 11
-                ]]
-                print(f"🔧 Using 11-feature enhanced model for prediction")
-            else:
-                raise Exception("Enhanced encoders not available")
-                
-        except Exception as e:
-            print(f"⚠️ Enhanced features failed: {e}, falling back to 6 features")
-            # Fallback to 6-feature model
-            X = [[
-                material_encoded,
-                transport_encoded,
-                recycle_encoded,
-                origin_encoded,
-                weight_log,
-                weight_bin_encoded
-            ]]
+            log.debug("📦 Default transport mode applied: %s", transport)
+
+        log.debug("🚛 Final transport used: %s (user selected: %s)", transport, data.get('transport'))
+
+        # === Build the feature vector (shared with /predict/batch and /estimate_emissions)
+        with span("encode"):
+            features = feature_builder.encode(inputs)
+            X = feature_builder.as_matrix([features])
+        log.debug("🔧 Using %s-feature model for prediction", feature_builder.n_features)
+
+        material_encoded = features["material_encoded"]
+        transport_encoded = features["transport_encoded"]
+        recycle_encoded = features["recyclability_encoded"]
+        origin_encoded = features["origin_encoded"]
+        weight_log = features["weight_log"]
+        weight_bin_encoded = features["weight_bin_encoded"]
         
         if model is None:
-            return jsonify({"error": "Model not available - please check server logs"}), 500
+            return {"error": "Model not available - please check server logs"}, 500
             
-        prediction = model.predict(X)
-        decoded_score = label_encoder.inverse_transform([prediction[0]])[0]
+        # One pass over the trees: the label is the argmax of the probabilities
+        with span("predict"):
+            proba = model.predict_proba(X) if hasattr(model, "predict_proba") else None
+            prediction = [int(np.argmax(proba[0]))] if proba is not None else model.predict(X)
+        decoded_score = label_table.decode(prediction[0])
 
-        print("🧠 Predicted Label:", decoded_score)
+        log.debug("🧠 Predicted Label: %s", decoded_score)
         
         confidence = 0.0
-        if hasattr(model, "predict_proba"):
-            proba = model.predict_proba(X)
-            print("🧪 predict_proba output:", proba)
-            print("🎯 Raw predict_proba values:", proba[0])  # <=== ADD THIS HERE
+        if proba is not None:
+            log.debug("🎯 Raw predict_proba values: %s", proba[0])
 
             best_index = int(np.argmax(proba[0]))
-            best_label = label_encoder.inverse_transform([best_index])[0]
+            best_label = label_table.decode(best_index)
             confidence = round(float(proba[0][best_index]) * 100, 1)
 
-            print(f"🧠 Most confident class: {best_label} with {confidence}%")
+            log.debug("🧠 Most confident class: %s with %s%%", best_label, confidence)
 
                 
         # === Feature Importance (optional)
         try:
             global_importance = model.feature_importances_
-            print(f"🔍 Feature importance array length: {len(global_importance)}")
+            log.debug("🔍 Feature importance array length: %s", len(global_importance))
             
             # Safely calculate local impact for available features
             local_impact = {}
@@ -310,7 +278,7 @@ def predict_eco_score():
             else:
                 local_impact = {"note": "Feature importance not available for this model"}
         except Exception as impact_error:
-            print(f"⚠️ Feature importance calculation failed: {impact_error}")
+            log.warning("⚠️ Feature importance calculation failed: %s", impact_error)
             local_impact = {"error": "Could not calculate feature impact"}
 
         # === Log the prediction
@@ -328,7 +296,7 @@ def predict_eco_score():
         })
 
         # === Return JSON response
-        return jsonify({
+        return {
             "predicted_label": decoded_score,
             "confidence": f"{confidence}%",
             "raw_input": {
@@ -347,104 +315,218 @@ def predict_eco_score():
                 "weight_bin": to_python_type(weight_bin_encoded)
             },
             "feature_impact": local_impact
-        })
+        }, 200
 
     except Exception as e:
-        print(f"❌ Error in /predict: {e}")
-        return jsonify({"error": str(e)}), 500
+        log.error("❌ Error in /predict: %s", e)
+        return {"error": str(e)}, 500
 
 
-# === Load Model and Encoders ===
+# === Shared /predict input preparation ===
+def determine_predict_transport_mode(distance_km):
+    if distance_km < 1500:
+        return "Truck", 0.15
+    elif distance_km < 6000:
+        return "Ship", 0.03
+    else:
+        return "Air", 0.5
 
-# Load the enhanced XGBoost model with error handling
-model = None
-try:
-    import xgboost as xgb
-    model = xgb.XGBClassifier()
-    model.load_model(os.path.join(model_dir, "xgb_model.json"))
-    print("✅ Loaded enhanced XGBoost model")
-except Exception as e:
-    print(f"⚠️ Failed to load XGBoost model: {e}")
-    print("🔄 Falling back to joblib for compatibility...")
+
+def extract_predict_inputs(data):
+    """
+    Normalise a single /predict payload into the raw inputs FeatureBuilder expects.
+    Shared by /predict and /predict/batch so both score products identically.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Each product must be a JSON object")
+
+    material = normalize_feature(data.get("material"), "Other")
+    weight = float(data.get("weight") or 0.0)
+    origin = normalize_feature(data.get("origin"), "Other")
+    recyclability = normalize_feature(data.get("recyclability"), "Medium")
+
+    # === Determine transport mode based on distance (default + override)
+    origin_distance_km = float(data.get("distance_origin_to_uk") or 0)
+    override_transport = normalize_feature(data.get("override_transport_mode"), None)
+    default_mode, _ = determine_predict_transport_mode(origin_distance_km)
+    transport_overridden = override_transport in ["Truck", "Ship", "Air"]
+    transport = override_transport if transport_overridden else default_mode
+
+    return {
+        "title": data.get("title", "Manual Submission"),
+        "material": material,
+        "weight": weight,
+        "transport": transport,
+        "transport_overridden": transport_overridden,
+        "recyclability": recyclability,
+        "origin": origin,
+    }
+
+
+def parse_batch_payload(raw, mimetype):
+    """
+    Read /predict/batch input as either a JSON array (optionally wrapped in
+    {"products": [...]}) or NDJSON. Returns (products, errors) where errors are
+    per-line decode failures keyed by their position in the batch.
+    """
+    raw = raw or ""
+    stripped = raw.lstrip()
+
+    if mimetype not in ("application/x-ndjson", "application/jsonl") and stripped[:1] in ("[", "{"):
+        try:
+            payload = json.loads(raw)
+            if isinstance(payload, dict):
+                payload = payload.get("products", [payload])
+            if isinstance(payload, list):
+                return payload, []
+        except json.JSONDecodeError:
+            # A single-object body that fails to parse may still be NDJSON
+            if stripped[:1] == "[":
+                raise
+
+    products, errors = [], []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            products.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            errors.append({"index": len(products), "error": f"Invalid JSON: {e}"})
+            products.append(None)
+    return products, errors
+
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_eco_score_batch():
+    """
+    Score many products in one request. Every column is encoded in a single
+    vectorised pass and the model runs one predict_proba over the whole matrix;
+    labels are the argmax of that output. Bad rows are reported individually
+    instead of failing the batch.
+    """
+    body, status = predict_batch_response(request.get_data(as_text=True), request.mimetype)
+    return jsonify(body), status
+
+
+def predict_batch_response(raw, mimetype):
+    """Score a /predict/batch body: (body, status). Shared with the ASGI app."""
     try:
-        # Try loading the pickled model without XGBoost dependency
-        import pickle
-        with open(os.path.join(model_dir, "eco_model.pkl"), 'rb') as f:
-            model = pickle.load(f)
-        print("✅ Loaded fallback model via pickle")
-    except Exception as e2:
+        with span("parse"):
+            products, errors = parse_batch_payload(raw, mimetype)
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON: {e}"}, 400
+
+    bundle = model_registry.get()
+    model, label_table, feature_builder = bundle.model, bundle.label_table, bundle.feature_builder
+    if model is None:
+        return {"error": "Model not available - please check server logs"}, 500
+
+    failed = {e["index"] for e in errors}
+    rows, row_indices = [], []
+    with span("parse"):
+        for i, product in enumerate(products):
+            if i in failed:
+                continue
+            try:
+                rows.append(extract_predict_inputs(product))
+                row_indices.append(i)
+            except Exception as e:
+                errors.append({"index": i, "error": str(e)})
+
+    results = [None] * len(products)
+    if rows:
         try:
-            model = joblib.load(os.path.join(model_dir, "eco_model.pkl"))
-            print("✅ Loaded fallback model via joblib")
-        except Exception as e3:
-            print(f"❌ Failed to load any model: {e3}")
-            print("🔄 Creating simple fallback model...")
-            
-            # Create a simple fallback model class
-            class FallbackModel:
-                def predict(self, X):
-                    # Simple rule-based prediction based on features
-                    material_score = X[0][0] / 10.0  # Material encoded value
-                    weight_score = min(X[0][4], 3.0)  # Weight log
-                    transport_score = X[0][1] / 3.0   # Transport encoded
-                    
-                    # Simple scoring logic
-                    total_score = (material_score + weight_score + transport_score) / 3
-                    
-                    if total_score < 0.3:
-                        return [0]  # A+
-                    elif total_score < 0.5:
-                        return [1]  # A
-                    elif total_score < 0.7:
-                        return [2]  # B
-                    elif total_score < 0.9:
-                        return [3]  # C
-                    elif total_score < 1.2:
-                        return [4]  # D
-                    elif total_score < 1.5:
-                        return [5]  # E
-                    else:
-                        return [6]  # F
-                
-                def predict_proba(self, X):
-                    # Return mock probabilities
-                    pred = self.predict(X)[0]
-                    proba = [0.1] * 7  # 7 classes
-                    proba[pred] = 0.7  # High confidence for predicted class
-                    return [proba]
-                
-                @property
-                def feature_importances_(self):
-                    # Mock feature importances for 6 or 11 features
-                    return [0.25, 0.20, 0.15, 0.15, 0.15, 0.10]  # 6 features
-            
-            model = FallbackModel()
-            print("✅ Created fallback rule-based model")
-
-# Load basic encoders
-material_encoder = joblib.load("backend/ml/ml_model/encoders/material_encoder.pkl")
-print("🧩 Loaded material encoder classes:", material_encoder.classes_)
-
-transport_encoder = joblib.load(os.path.join(encoders_dir, "transport_encoder.pkl"))
-recycle_encoder = joblib.load(os.path.join(encoders_dir, "recycle_encoder.pkl"))
-label_encoder = joblib.load(os.path.join(encoders_dir, "label_encoder.pkl"))
-origin_encoder = joblib.load(os.path.join(encoders_dir, "origin_encoder.pkl"))
-
-# Load enhanced encoders for 11-feature model
-try:
-    packaging_type_encoder = joblib.load(os.path.join(encoders_dir, "packaging_type_encoder.pkl"))
-    size_category_encoder = joblib.load(os.path.join(encoders_dir, "size_category_encoder.pkl"))
-    quality_level_encoder = joblib.load(os.path.join(encoders_dir, "quality_level_encoder.pkl"))
-    print("✅ Loaded enhanced encoders for 11-feature model")
-except Exception as e:
-    print(f"⚠️ Could not load enhanced encoders: {e}")
-    # Set to None so we can check later
-    packaging_type_encoder = None
-    size_category_encoder = None
-    quality_level_encoder = None
-
-valid_scores = list(label_encoder.classes_)
-print("✅ Loaded label classes:", valid_scores)
+            with span("encode"):
+                X = feature_builder.transform_many(rows)
+            with span("predict"):
+                proba = np.asarray(model.predict_proba(X), dtype=float)
+            best = proba.argmax(axis=1)
+            labels = label_table.decode_many(best)
+            confidences = np.round(proba[np.arange(len(best)), best] * 100, 1)
+        except Exception as e:
+            log.error("❌ Error in /predict/batch: %s", e)
+            return {"error": str(e)}, 500
+
+        for row, i, label, confidence in zip(rows, row_indices, labels, confidences):
+            results[i] = {
+                "index": i,
+                "title": row["title"],
+                "predicted_label": str(label),
+                "confidence": f"{float(confidence)}%",
+                "raw_input": {
+                    "material": row["material"],
+                    "weight": row["weight"],
+                    "transport": row["transport"],
+                    "recyclability": row["recyclability"],
+                    "origin": row["origin"]
+                }
+            }
+
+    log.info("📦 /predict/batch scored %s products (%s errors)", len(rows), len(errors))
+    return {
+        "count": len(products),
+        "scored": len(rows),
+        "results": [r for r in results if r is not None],
+        "errors": sorted(errors, key=lambda e: e["index"])
+    }, 200
+
+
+# === Product cache ===
+# Scraped products keyed by ASIN. Only the postcode-dependent distance and
+# transport maths in /estimate_emissions is recomputed per request.
+product_cache = TieredCache("product")
+
+
+def is_cacheable_product(product):
+    """Mock products returned when Chrome can't launch must not be cached."""
+    return bool(product) and "Fallback" not in str(product.get("title", ""))
+
+
+def scrape_product(url):
+    """Scrape a product page and fill in a guessed material when the page has none."""
+    from backend.scrapers.amazon.scrape_amazon_titles import scrape_amazon_product_page
+    from backend.scrapers.amazon.guess_material import smart_guess_material
+
+    log.info("🔍 Scraping URL: %s", url)
+    product = scrape_amazon_product_page(url)
+    if not product:
+        return product
+
+    # Debug what the scraper returned
+    if log.debug_enabled:
+        log.debug("🔍 DEBUG: Scraper returned:")
+        for key, value in product.items():
+            log.debug("  %s: %s", key, value)
+        log.debug("🔍 END DEBUG")
+
+    material = product.get("material_type")
+    if not material or material.lower() in ["unknown", "other", ""]:
+        guessed = smart_guess_material(product.get("title", ""))
+        if guessed:
+            log.debug("🧠 Fallback guessed material: %s", guessed)
+            material = guessed.title()
+    product["material_type"] = material
+    return product
+
+
+@lru_cache(maxsize=1)
+def get_uk_geocoder():
+    import pgeocode
+    return pgeocode.Nominatim("gb")
+
+
+@lru_cache(maxsize=4096)
+def postcode_coordinates(postcode):
+    """(lat, lon) for a UK postcode, or None if it can't be resolved."""
+    location = get_uk_geocoder().query_postal_code(postcode)
+    if location.empty or location.latitude is None:
+        return None
+    return location.latitude, location.longitude
+
+
+# === Model and Encoders ===
+# Loaded lazily (or preloaded by gunicorn) through backend.ml.prediction.registry;
+# routes take one bundle per request so a hot-swap never mixes artifact versions.
 
 
 @app.route("/all-model-metrics", methods=["GET"])
@@ -511,20 +593,10 @@ def ml_audit_report():
         
         # 2. Dataset analysis
         try:
-            dataset_path = os.path.join(BASE_DIR, "common", "data", "csv", "eco_dataset.csv")
-            if os.path.exists(dataset_path):
-                df = pd.read_csv(dataset_path)
-                
-                # Analyze dataset characteristics
-                unique_materials = df["material"].nunique() if "material" in df.columns else 0
-                unique_origins = df["origin"].nunique() if "origin" in df.columns else 0
-                score_distribution = df["true_eco_score"].value_counts().to_dict() if "true_eco_score" in df.columns else {}
-                
+            analysis = dashboard_aggregates.dataset_analysis()
+            if analysis is not None:
                 audit_report["dataset_analysis"] = {
-                    "total_samples": len(df),
-                    "unique_materials": unique_materials,
-                    "unique_origins": unique_origins,
-                    "score_distribution": score_distribution,
+                    **analysis,
                     "data_quality_issues": [
                         "Limited product diversity (mostly water bottles)",
                         "May contain synthetic/generated data",
@@ -613,38 +685,19 @@ def ml_audit_report():
             "dissertation_quality": "Strong technical foundation with room for expansion"
         }
         
-        return jsonify(audit_report)
+        body = compact_json(audit_report)
+        return conditional_json(body, hashlib.sha1(body.encode()).hexdigest())
         
     except Exception as e:
         return jsonify({"error": f"ML audit failed: {str(e)}"}), 500
 
     
-# === Load CO2 Map ===
-def load_material_co2_data():
-    try:
-        df = pd.read_csv(os.path.join(model_dir, "defra_material_intensity.csv"))
-        return dict(zip(df["material"], df["co2_per_kg"]))
-    except Exception as e:
-        print(f"⚠️ Could not load DEFRA data: {e}")
-        return {}
-
-material_co2_map = load_material_co2_data()
-
 # === Helpers ===
-def normalize_feature(value, default):
-    clean = str(value or default).strip().title()
-    return default if clean.lower() == "unknown" else clean
-
-def safe_encode(value, encoder, default):
-    value = normalize_feature(value, default)
-    if value not in encoder.classes_:
-        print(f"⚠️ '{value}' not in encoder classes. Defaulting to '{default}'.")
-        value = default
-    return encoder.transform([value])[0]
-
 @app.route("/api/feature-importance")
 def get_feature_importance():
     try:
+        bundle = model_registry.get()
+        model, feature_builder = bundle.model, bundle.feature_builder
         if model is None:
             return jsonify({"error": "Model not available"}), 500
             
@@ -657,7 +710,9 @@ def get_feature_importance():
         ]
         
         # Handle both 11-feature and 6-feature models
-        if len(importances) == 11:
+        if len(importances) == feature_builder.n_features:
+            feature_names = feature_builder.display_names
+        elif len(importances) == 11:
             feature_names = features
         else:
             feature_names = ["Material", "Transport", "Recyclability", "Origin", "Weight (log)", "Weight Category"][:len(importances)]
@@ -724,15 +779,9 @@ def fuzzy_match_origin(origin):
 @app.route("/api/eco-data", methods=["GET"])
 def fetch_eco_dataset():
     try:
-        dataset_path = os.path.join(BASE_DIR, "common", "data", "csv", "eco_dataset.csv")
-        #print("📁 Trying to read:", dataset_path)
-        df = pd.read_csv(dataset_path)
-        #print("✅ Loaded:", df.shape)
-        #print("🧪 Columns:", df.columns.tolist())
-        df = df.dropna(subset=["material", "true_eco_score", "co2_emissions"])
-        return jsonify(df.to_dict(orient="records"))
+        return conditional_json(*dashboard_aggregates.body("eco_data"))
     except Exception as e:
-        print(f"❌ Failed to return eco dataset: {e}")
+        log.error("❌ Failed to return eco dataset: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -741,116 +790,25 @@ def fetch_eco_dataset():
 @app.route("/insights", methods=["GET"])
 def insights_dashboard():
     try:
-        # Load the logged data
-        dataset_path = os.path.join(BASE_DIR, "common", "data", "csv", "eco_dataset.csv")
-        df = pd.read_csv(dataset_path)
-        print("🔍 Dataset path:", dataset_path)
-        print("✅ Exists?", os.path.exists(dataset_path))
-
-
-        df = df.dropna(subset=["material", "true_eco_score", "co2_emissions"])  # Clean
-
-        # Keep only the needed fields
-        insights = df[["material", "true_eco_score", "co2_emissions"]]
-        insights = insights.head(1000)  # Limit for frontend performance
-
-        return jsonify(insights.to_dict(orient="records"))
+        # Cleaned rows (material, true_eco_score, co2_emissions), limited for frontend performance
+        return conditional_json(*dashboard_aggregates.body("insights"))
     except Exception as e:
-        print(f"❌ Failed to serve insights: {e}")
+        log.error("❌ Failed to serve insights: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/dashboard-metrics", methods=["GET"])
 def get_dashboard_metrics():
     """
-    Enhanced dashboard metrics combining real data from multiple sources
-    Replaces placeholder values with actual aggregated statistics
+    Enhanced dashboard metrics combining real data from multiple sources:
+    the main dataset plus every submitted prediction, kept up to date by
+    dashboard_aggregates instead of being recomputed per request
     """
     try:
-        metrics = {
-            "total_products": 0,
-            "total_materials": 0,
-            "total_predictions": 0,
-            "score_distribution": {},
-            "material_distribution": {},
-            "recent_activity": 0
-        }
-        
-        # 1. Load main dataset
-        try:
-            dataset_path = os.path.join(BASE_DIR, "common", "data", "csv", "eco_dataset.csv")
-            if os.path.exists(dataset_path):
-                df = pd.read_csv(dataset_path)
-                df_clean = df.dropna(subset=["material", "true_eco_score"])
-                
-                metrics["total_products"] += len(df_clean)
-                
-                # Material distribution from dataset
-                material_counts = df_clean["material"].value_counts().to_dict()
-                for material, count in material_counts.items():
-                    metrics["material_distribution"][material] = metrics["material_distribution"].get(material, 0) + count
-                
-                # Score distribution from dataset
-                score_counts = df_clean["true_eco_score"].value_counts().to_dict()
-                for score, count in score_counts.items():
-                    metrics["score_distribution"][score] = metrics["score_distribution"].get(score, 0) + count
-                    
-                print(f"📊 Loaded {len(df_clean)} records from main dataset")
-        except Exception as e:
-            print(f"⚠️ Could not load main dataset: {e}")
-        
-        # 2. Load submitted predictions
-        try:
-            if os.path.exists(SUBMISSION_FILE):
-                with open(SUBMISSION_FILE, "r", encoding="utf-8") as f:
-                    submissions = json.load(f)
-                
-                metrics["total_predictions"] = len(submissions)
-                metrics["recent_activity"] = len([s for s in submissions if s])  # Non-empty submissions
-                
-                # Add submission data to distributions
-                for submission in submissions:
-                    if isinstance(submission, dict):
-                        # Material distribution from submissions
-                        material = submission.get("raw_input", {}).get("material", "Unknown")
-                        if material != "Unknown":
-                            metrics["material_distribution"][material] = metrics["material_distribution"].get(material, 0) + 1
-                        
-                        # Score distribution from submissions
-                        predicted_label = submission.get("predicted_label", "Unknown")
-                        if predicted_label != "Unknown":
-                            metrics["score_distribution"][predicted_label] = metrics["score_distribution"].get(predicted_label, 0) + 1
-                
-                print(f"📊 Loaded {len(submissions)} submitted predictions")
-        except Exception as e:
-            print(f"⚠️ Could not load submissions: {e}")
-        
-        # 3. Calculate totals
-        metrics["total_materials"] = len(metrics["material_distribution"])
-        
-        # 4. Convert to frontend-friendly format
-        dashboard_data = {
-            "stats": {
-                "total_products": metrics["total_products"],
-                "total_materials": metrics["total_materials"], 
-                "total_predictions": metrics["total_predictions"],
-                "recent_activity": metrics["recent_activity"]
-            },
-            "score_distribution": [
-                {"name": score, "value": count} 
-                for score, count in sorted(metrics["score_distribution"].items())
-            ],
-            "material_distribution": [
-                {"name": material, "value": count}
-                for material, count in sorted(metrics["material_distribution"].items(), key=lambda x: x[1], reverse=True)[:10]
-            ]
-        }
-        
-        print(f"✅ Dashboard metrics compiled: {metrics['total_products']} products, {metrics['total_materials']} materials")
-        return jsonify(dashboard_data)
+        return conditional_json(*dashboard_aggregates.body("dashboard"))
         
     except Exception as e:
-        print(f"❌ Dashboard metrics error: {e}")
+        log.error("❌ Dashboard metrics error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -858,24 +816,13 @@ def get_dashboard_metrics():
 def save_feedback():
     try:
         data = request.get_json()
-        feedback_dir = os.path.join("ml_model", "user_feedback.json")
-        print("Received feedback:", data)
-        # Append to file
-        import json
-        existing = []
-        if os.path.exists(feedback_dir):
-            with open(feedback_dir, "r") as f:
-                existing = json.load(f)
-
-        existing.append(data)
-
-        with open(feedback_dir, "w") as f:
-            json.dump(existing, f, indent=2)
+        log.debug("Received feedback: %s", data)
+        feedback_log.append(data)
 
         return jsonify({"message": "✅ Feedback saved!"}), 200
 
     except Exception as e:
-        print(f"❌ Feedback error: {e}")
+        log.error("❌ Feedback error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -909,382 +856,390 @@ def map_score_to_grade(score):
         return "F"
 
 
-@app.route("/estimate_emissions", methods=["POST", "OPTIONS"])
-def estimate_emissions():
-    print("🔔 Route hit: /estimate_emissions")
-    
-    # Handle preflight OPTIONS request
-    if request.method == "OPTIONS":
-        response = jsonify({})
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-        return response
+# === Estimate jobs ===
+# ESTIMATE_ASYNC=1 makes every POST /estimate_emissions asynchronous; otherwise
+# clients opt in per request with "async": true or a Prefer: respond-async header.
+ESTIMATE_ASYNC = os.environ.get("ESTIMATE_ASYNC", "0") == "1"
+job_queue = JobQueue()
 
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Missing JSON in request"}), 400
 
-    # Convert numpy types to Python native types for JSON serialization
-    def convert_numpy_types(obj):
-        if hasattr(obj, 'item'):
-            return obj.item()
-        elif isinstance(obj, (np.integer, np.int32, np.int64)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float32, np.float64)):
-            return float(obj)
-        return obj
+def convert_numpy_types(obj):
+    """Convert numpy types to Python native types for JSON serialization"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    elif isinstance(obj, (np.integer, np.int32, np.int64)):
+        return int(obj)
+    elif isinstance(obj, (np.floating, np.float32, np.float64)):
+        return float(obj)
+    return obj
 
-    try:
-        url = data.get("amazon_url")
-        postcode = data.get("postcode")
-        include_packaging = data.get("include_packaging", True)
-        override_mode = data.get("override_transport_mode")
 
-        # Validate inputs
-        if not url or not postcode:
-            return jsonify({"error": "Missing URL or postcode"}), 400
+def estimate_params(data):
+    return {
+        "amazon_url": data.get("amazon_url"),
+        "postcode": data.get("postcode"),
+        "include_packaging": data.get("include_packaging", True),
+        "override_transport_mode": data.get("override_transport_mode"),
+    }
 
-        # Scrape product with debugging
-        from backend.scrapers.amazon.scrape_amazon_titles import scrape_amazon_product_page, haversine, origin_hubs, uk_hub
-        print(f"🔍 Scraping URL: {url}")
-        product = scrape_amazon_product_page(url)
-        
-        # Debug what the scraper returned
-        print("🔍 DEBUG: Scraper returned:")
-        for key, value in product.items():
-            print(f"  {key}: {value}")
-        print("🔍 END DEBUG")
-        
-        from backend.scrapers.amazon.guess_material import smart_guess_material
-
-        material = product.get("material_type")
-        if not material or material.lower() in ["unknown", "other", ""]:
-            guessed = smart_guess_material(product.get("title", ""))
-            if guessed:
-                print(f"🧠 Fallback guessed material: {guessed}")
-                material = guessed.title()
-        product["material_type"] = material
-
-        if not product:
-            return jsonify({"error": "Could not fetch product"}), 500
-
-        # Get user coordinates from postcode
-        import pgeocode
-        geo = pgeocode.Nominatim("gb")
-        location = geo.query_postal_code(postcode)
-        if location.empty or location.latitude is None:
-            return jsonify({"error": "Invalid postcode"}), 400
-
-        user_lat, user_lon = location.latitude, location.longitude
-
-        # Get origin coordinates
-        origin_country = product.get("brand_estimated_origin", "Other")
-        origin_coords = origin_hubs.get(origin_country, uk_hub)
-
-        # Distance calculations
-        origin_distance_km = round(haversine(origin_coords["lat"], origin_coords["lon"], user_lat, user_lon), 1)
-        uk_distance_km = round(haversine(uk_hub["lat"], uk_hub["lon"], user_lat, user_lon), 1)
-
-        print(f"🌍 Distances → origin: {origin_distance_km} km | UK hub: {uk_distance_km} km")
-
-        # Use weight
-        raw_weight = product.get("raw_product_weight_kg") or 0.5
-        weight = float(raw_weight)
-        if include_packaging:
-            weight *= 1.05
-
-        # Transport mode logic with geographic considerations
-        def determine_transport_mode(distance_km, origin_country="Unknown"):
-            # Special cases for water crossings to UK
-            water_crossing_countries = ["Ireland", "France", "Germany", "Netherlands", "Belgium", "Denmark", 
-                                      "Sweden", "Norway", "Finland", "Spain", "Italy", "Poland"]
-            
-            if origin_country in water_crossing_countries:
-                if distance_km < 500:
-                    return "Truck", 0.15  # Channel tunnel or short ferry
-                elif distance_km < 3000:
-                    return "Ship", 0.03   # Ferry or cargo ship
-                else:
-                    return "Air", 0.5     # Long distance air
-            
-            # Standard logic for other routes
-            if distance_km < 1500:
-                return "Truck", 0.15
-            elif distance_km < 6000:
-                return "Ship", 0.03
+
+def fetch_estimate_product(url):
+    """(product, cache_status): the cached scrape for the URL's ASIN, else a fresh one."""
+    from backend.scrapers.amazon.scrape_amazon_titles import extract_asin
+    asin = extract_asin(url)
+    with span("scrape"):
+        if asin:
+            product, cache_status = product_cache.get_or_fetch(
+                asin, lambda: scrape_product(url), cacheable=is_cacheable_product
+            )
+            log.debug("🗃️ Product cache %s for ASIN %s", cache_status, asin)
+            return product, cache_status
+        return scrape_product(url), "bypass"
+
+
+def estimate_response(product, cache_status, params):
+    """Score a scraped product for one request's postcode and options: (body, status)."""
+    from backend.scrapers.amazon.scrape_amazon_titles import haversine, origin_hubs, uk_hub
+
+    postcode = params["postcode"]
+    include_packaging = params["include_packaging"]
+    override_mode = params["override_transport_mode"]
+
+    if not product:
+        return {"error": "Could not fetch product"}, 500
+    # Cached entries are shared between requests
+    product = dict(product)
+
+    # Get user coordinates from postcode
+    with span("geocode"):
+        coordinates = postcode_coordinates(str(postcode).strip().upper())
+    if coordinates is None:
+        return {"error": "Invalid postcode"}, 400
+
+    user_lat, user_lon = coordinates
+
+    # Get origin coordinates
+    origin_country = product.get("brand_estimated_origin", "Other")
+    origin_coords = origin_hubs.get(origin_country, uk_hub)
+
+    # Distance calculations
+    origin_distance_km = round(haversine(origin_coords["lat"], origin_coords["lon"], user_lat, user_lon), 1)
+    uk_distance_km = round(haversine(uk_hub["lat"], uk_hub["lon"], user_lat, user_lon), 1)
+
+    log.debug("🌍 Distances → origin: %s km | UK hub: %s km", origin_distance_km, uk_distance_km)
+
+    # Use weight
+    raw_weight = product.get("raw_product_weight_kg") or 0.5
+    weight = float(raw_weight)
+    if include_packaging:
+        weight *= 1.05
+
+    # Transport mode logic with geographic considerations
+    def determine_transport_mode(distance_km, origin_country="Unknown"):
+        # Special cases for water crossings to UK
+        water_crossing_countries = ["Ireland", "France", "Germany", "Netherlands", "Belgium", "Denmark", 
+                                  "Sweden", "Norway", "Finland", "Spain", "Italy", "Poland"]
+
+        if origin_country in water_crossing_countries:
+            if distance_km < 500:
+                return "Truck", 0.15  # Channel tunnel or short ferry
+            elif distance_km < 3000:
+                return "Ship", 0.03   # Ferry or cargo ship
             else:
-                return "Air", 0.5
+                return "Air", 0.5     # Long distance air
+
+        # Standard logic for other routes
+        if distance_km < 1500:
+            return "Truck", 0.15
+        elif distance_km < 6000:
+            return "Ship", 0.03
+        else:
+            return "Air", 0.5
 
-        default_mode, default_emission_factor = determine_transport_mode(origin_distance_km, origin_country)
+    default_mode, default_emission_factor = determine_transport_mode(origin_distance_km, origin_country)
 
-        modes = {
-            "Air": 0.5,
-            "Ship": 0.03,
-            "Truck": 0.15
+    modes = {
+        "Air": 0.5,
+        "Ship": 0.03,
+        "Truck": 0.15
+    }
+
+    if override_mode in modes:
+        transport_mode = override_mode
+        emission_factor = modes[override_mode]
+        log.debug("🚚 Override transport mode used: %s", transport_mode)
+    else:
+        transport_mode = default_mode
+        emission_factor = default_emission_factor
+        log.debug("📦 Auto-detected transport mode used: %s", transport_mode)
+
+    carbon_kg = round(weight * emission_factor * (origin_distance_km / 1000), 2)
+
+    eco_score_rule = calculate_eco_score(
+        carbon_kg,
+        product.get("recyclability", "Medium"),
+        origin_distance_km,
+        weight
+    )
+
+    eco_score_rule_local = calculate_eco_score_local_only(
+        carbon_kg,
+        product.get("recyclability", "Medium"),
+        weight
+    )
+
+
+
+    # === RULE-BASED Prediction (Your Original Method)
+    eco_score_rule_based = calculate_eco_score(
+        carbon_kg,
+        product.get("recyclability", "Medium"),
+        origin_distance_km,
+        weight
+    )
+
+    # === ENHANCED ML Prediction (New Method)
+    ml_features_used = None
+    try:
+        bundle = model_registry.get()
+        model, label_table, feature_builder = bundle.model, bundle.label_table, bundle.feature_builder
+        material = product.get("material_type", "Other")
+        recyclability = product.get("recyclability", "Medium")
+        origin = origin_country
+
+        # === Normalize and build the shared feature vector for ML
+        material = normalize_feature(material, "Other")
+        recyclability = normalize_feature(recyclability, "Medium")
+        origin = normalize_feature(origin, "Other")
+
+        with span("encode"):
+            features = feature_builder.encode({
+                "title": product.get("title", ""),
+                "material": material,
+                "weight": weight,
+                "transport": transport_mode,
+                "recyclability": recyclability,
+                "origin": origin,
+            })
+            X = feature_builder.as_matrix([features])
+
+        # Show the features for transparency
+        if log.debug_enabled:
+            log.debug("🔧 Using %s features for ML prediction:", feature_builder.n_features)
+            for name, value in zip(feature_builder.display_names, features.values()):
+                log.debug("   %s: %s", name, value)
+
+        # Store features for response (convert numpy types)
+        ml_features_used = {
+            "feature_count": feature_builder.n_features,
+            "features": [
+                {"name": name, "value": convert_numpy_types(value)}
+                for name, value in zip(feature_builder.display_names, features.values())
+            ]
         }
 
-        if override_mode in modes:
-            transport_mode = override_mode
-            emission_factor = modes[override_mode]
-            print(f"🚚 Override transport mode used: {transport_mode}")
-        else:
-            transport_mode = default_mode
-            emission_factor = default_emission_factor
-            print(f"📦 Auto-detected transport mode used: {transport_mode}")
+        # ML Prediction
+        if model is None:
+            raise Exception("Model not available")
 
-        carbon_kg = round(weight * emission_factor * (origin_distance_km / 1000), 2)
-        
-        eco_score_rule = calculate_eco_score(
-            carbon_kg,
-            product.get("recyclability", "Medium"),
-            origin_distance_km,
-            weight
-        )
-        
-        eco_score_rule_local = calculate_eco_score_local_only(
-            carbon_kg,
-            product.get("recyclability", "Medium"),
-            weight
-        )
-        
+        with span("predict"):
+            proba = model.predict_proba(X) if hasattr(model, "predict_proba") else None
+            prediction = int(np.argmax(proba[0])) if proba is not None else model.predict(X)[0]
+        eco_score_ml = label_table.decode(prediction)
 
+        confidence = 0.0
+        if proba is not None:
+            confidence = round(float(np.max(proba[0])) * 100, 1)
 
-        # === RULE-BASED Prediction (Your Original Method)
-        eco_score_rule_based = calculate_eco_score(
-            carbon_kg,
-            product.get("recyclability", "Medium"),
-            origin_distance_km,
-            weight
-        )
-        
-        # === ENHANCED ML Prediction (New Method)
-        ml_features_used = None
-        try:
-            material = product.get("material_type", "Other")
-            recyclability = product.get("recyclability", "Medium")
-            origin = origin_country
-
-            # === Normalize and encode for ML
-            material = normalize_feature(material, "Other")
-            recyclability = normalize_feature(recyclability, "Medium")
-            origin = normalize_feature(origin, "Other")
-            transport = transport_mode
-
-            material_encoded = safe_encode(material, material_encoder, "Other")
-            transport_encoded = safe_encode(transport, transport_encoder, "Land")
-            recycle_encoded = safe_encode(recyclability, recycle_encoder, "Medium")
-            origin_encoded = safe_encode(origin, origin_encoder, "Other")
-
-            # === Enhanced features for ML (11 features total)
-            weight_log = np.log1p(weight)
-            weight_bin_encoded = 2 if weight > 0.5 else 1 if weight > 0.1 else 0
-            
-            # Infer additional features from product data
-            title_lower = product.get("title", "").lower()
-            
-            # Packaging type inference
-            if any(x in title_lower for x in ["bottle", "jar", "can"]):
-                packaging_type = "bottle"
-            elif any(x in title_lower for x in ["box", "pack", "carton"]):
-                packaging_type = "box"
-            else:
-                packaging_type = "other"
-            
-            # Size category inference
-            if weight > 2.0:
-                size_category = "large"
-            elif weight > 0.5:
-                size_category = "medium"
-            else:
-                size_category = "small"
-            
-            # Quality level inference
-            if any(x in title_lower for x in ["premium", "pro", "professional", "deluxe"]):
-                quality_level = "premium"
-            elif any(x in title_lower for x in ["basic", "standard", "regular"]):
-                quality_level = "standard"
-            else:
-                quality_level = "standard"
-            
-            # Pack size (number of items)
-            pack_size = 1
-            for num_word in ["2 pack", "3 pack", "4 pack", "5 pack", "6 pack", "8 pack", "10 pack", "12 pack"]:
-                if num_word in title_lower:
-                    pack_size = int(num_word.split()[0])
-                    break
-            
-            # Material confidence (based on how specific the material type is)
-            material_confidence = 0.8 if material != "Other" else 0.3
-            
-            # Load enhanced encoders
-            try:
-                # Check if enhanced encoders are available
-                if packaging_type_encoder and size_category_encoder and quality_level_encoder:
-                    # Try to encode the enhanced features
-                    packaging_encoded = safe_encode(packaging_type, packaging_type_encoder, "box")
-                    size_encoded = safe_encode(size_category, size_category_encoder, "medium") 
-                    quality_encoded = safe_encode(quality_level, quality_level_encoder, "standard")
-                    
-                    # Build the full feature vector (11 features as expected by the model)
-                    X = [[
-                        material_encoded,           # 1
-                        transport_encoded,          # 2
-                        recycle_encoded,           # 3
-                        origin_encoded,            # 4
-                        weight_log,                # 5
-                        weight_bin_encoded,        # 6
-                        packaging_encoded,         # 7
-                        size_encoded,              # 8
-                        quality_encoded,           # 9
-                        pack_size,                 # 10
-                        material_confidence        # 11
-                    ]]
-                    
-                    # Show the 11 features for transparency
-                    feature_names = [
-                        "Material Type", "Transport Mode", "Recyclability", "Origin Country",
-                        "Weight (log)", "Weight Category", "Packaging Type", "Size Category", 
-                        "Quality Level", "Pack Size", "Material Confidence"
-                    ]
-                    feature_values = [
-                        material_encoded, transport_encoded, recycle_encoded, origin_encoded,
-                        weight_log, weight_bin_encoded, packaging_encoded, size_encoded,
-                        quality_encoded, pack_size, material_confidence
-                    ]
-                    
-                    print(f"🔧 Using 11 enhanced features for ML prediction:")
-                    for name, value in zip(feature_names, feature_values):
-                        print(f"   {name}: {value}")
-                    
-                    print(f"🔧 Final feature vector: {X[0]}")
-                    
-                    # Store features for response (convert numpy types)
-                    ml_features_used = {
-                        "feature_count": 11,
-                        "features": [{"name": name, "value": convert_numpy_types(value)} for name, value in zip(feature_names, feature_values)]
+        log.debug("✅ ML Score: %s (%s%%)", eco_score_ml, confidence)
+        log.debug("🔧 Rule-based Score: %s", eco_score_rule_based)
+
+    except Exception as e:
+        log.warning("⚠️ ML prediction failed: %s", e)
+        eco_score_ml = "N/A"
+        confidence = None
+
+
+    # Assemble response
+    return {
+        "title": product.get("title"),
+        "cache_status": cache_status,
+        "data": {
+            "attributes": {
+                "carbon_kg": convert_numpy_types(carbon_kg),
+                "weight_kg": convert_numpy_types(round(weight, 2)),
+                "raw_product_weight_kg": convert_numpy_types(round(raw_weight, 2)),
+                "origin": origin_country,
+                "origin_source": product.get("origin_source", "brand_db"),
+
+                # Distance fields
+                "intl_distance_km": convert_numpy_types(origin_distance_km),
+                "uk_distance_km": convert_numpy_types(uk_distance_km),
+                "distance_from_origin_km": convert_numpy_types(origin_distance_km),
+                "distance_from_uk_hub_km": convert_numpy_types(uk_distance_km),
+
+                # Product features
+                "dimensions_cm": product.get("dimensions_cm"),
+                "material_type": product.get("material_type"),
+
+                "recyclability": product.get("recyclability"),
+                "recyclability_percentage": convert_numpy_types(product.get("recyclability_percentage", 30)),
+                "recyclability_description": product.get("recyclability_description", "Assessment pending"),
+
+                # Transport details
+                "transport_mode": transport_mode,
+                "default_transport_mode": default_mode,
+                "selected_transport_mode": override_mode or None,
+                "emission_factors": modes,
+
+                # Scoring - BOTH Methods for Comparison
+                "eco_score_ml": eco_score_ml,
+                "eco_score_ml_confidence": convert_numpy_types(confidence) if confidence else None,
+                "eco_score_rule_based": eco_score_rule_based,
+                "eco_score_rule_based_local_only": eco_score_rule_local,
+
+                # Method Comparison
+                "method_agreement": "Yes" if eco_score_ml == eco_score_rule_based else "No",
+                "prediction_methods": {
+                    "ml_prediction": {
+                        "score": eco_score_ml,
+                        "confidence": f"{confidence}%" if confidence else "N/A",
+                        "method": "Enhanced XGBoost (11 features)",
+                        "features_used": ml_features_used
+                    },
+                    "rule_based_prediction": {
+                        "score": eco_score_rule_based,
+                        "confidence": "80%",  # Rule-based has fixed confidence
+                        "method": "Traditional Heuristic Rules"
                     }
-                else:
-                    raise Exception("Enhanced encoders not available")
-                
-            except Exception as enc_error:
-                print(f"⚠️ Enhanced encoder error: {enc_error}, falling back to 6 features")
-                # Fallback to original 6 features
-                X = [[
-                    material_encoded,
-                    transport_encoded,
-                    recycle_encoded,
-                    origin_encoded,
-                    weight_log,
-                    weight_bin_encoded
-                ]]
-                
-                # Store fallback features for response
-                fallback_feature_names = [
-                    "Material Type", "Transport Mode", "Recyclability", "Origin Country",
-                    "Weight (log)", "Weight Category"
-                ]
-                fallback_feature_values = [
-                    material_encoded, transport_encoded, recycle_encoded, origin_encoded,
-                    weight_log, weight_bin_encoded
-                ]
-                ml_features_used = {
-                    "feature_count": 6,
-                    "features": [{"name": name, "value": convert_numpy_types(value)} for name, value in zip(fallback_feature_names, fallback_feature_values)]
-                }
+                },
 
-            # ML Prediction
-            if model is None:
-                raise Exception("Model not available")
-            
-            prediction = model.predict(X)[0]
-            eco_score_ml = label_encoder.inverse_transform([prediction])[0]
 
-            confidence = 0.0
-            if hasattr(model, "predict_proba"):
-                proba = model.predict_proba(X)
-                confidence = round(float(np.max(proba[0])) * 100, 1)
+                # Misc
+                "trees_to_offset": round(carbon_kg / 20, 1)
+            }
+        }
+    }, 200
 
-            print(f"✅ ML Score: {eco_score_ml} ({confidence}%)")
-            print(f"🔧 Rule-based Score: {eco_score_rule_based}")
 
+def run_estimate_jobs(jobs):
+    """
+    Job handler for estimate_emissions. Every job in a batch is for the same
+    ASIN, so the product is scraped once and scored for each job's postcode.
+    """
+    try:
+        product, cache_status = fetch_estimate_product(jobs[0]["payload"]["amazon_url"])
+    except ScrapeBlocked as e:
+        return [(BLOCKED, str(e))] * len(jobs)
+
+    outcomes = []
+    for job in jobs:
+        try:
+            body, status = estimate_response(product, cache_status, job["payload"])
+            outcomes.append((DONE, body) if status == 200 else (FAILED, body["error"]))
         except Exception as e:
-            print(f"⚠️ ML prediction failed: {e}")
-            eco_score_ml = "N/A"
-            confidence = None
-
-
-        # Assemble response
-        return jsonify({
-            "title": product.get("title"),
-            "data": {
-                "attributes": {
-                    "carbon_kg": convert_numpy_types(carbon_kg),
-                    "weight_kg": convert_numpy_types(round(weight, 2)),
-                    "raw_product_weight_kg": convert_numpy_types(round(raw_weight, 2)),
-                    "origin": origin_country,
-                    "origin_source": product.get("origin_source", "brand_db"),
-
-                    # Distance fields
-                    "intl_distance_km": convert_numpy_types(origin_distance_km),
-                    "uk_distance_km": convert_numpy_types(uk_distance_km),
-                    "distance_from_origin_km": convert_numpy_types(origin_distance_km),
-                    "distance_from_uk_hub_km": convert_numpy_types(uk_distance_km),
-
-                    # Product features
-                    "dimensions_cm": product.get("dimensions_cm"),
-                    "material_type": product.get("material_type"),
-                    
-                    "recyclability": product.get("recyclability"),
-                    "recyclability_percentage": convert_numpy_types(product.get("recyclability_percentage", 30)),
-                    "recyclability_description": product.get("recyclability_description", "Assessment pending"),
-
-                    # Transport details
-                    "transport_mode": transport_mode,
-                    "default_transport_mode": default_mode,
-                    "selected_transport_mode": override_mode or None,
-                    "emission_factors": modes,
-
-                    # Scoring - BOTH Methods for Comparison
-                    "eco_score_ml": eco_score_ml,
-                    "eco_score_ml_confidence": convert_numpy_types(confidence) if confidence else None,
-                    "eco_score_rule_based": eco_score_rule_based,
-                    "eco_score_rule_based_local_only": eco_score_rule_local,
-                    
-                    # Method Comparison
-                    "method_agreement": "Yes" if eco_score_ml == eco_score_rule_based else "No",
-                    "prediction_methods": {
-                        "ml_prediction": {
-                            "score": eco_score_ml,
-                            "confidence": f"{confidence}%" if confidence else "N/A",
-                            "method": "Enhanced XGBoost (11 features)",
-                            "features_used": ml_features_used
-                        },
-                        "rule_based_prediction": {
-                            "score": eco_score_rule_based,
-                            "confidence": "80%",  # Rule-based has fixed confidence
-                            "method": "Traditional Heuristic Rules"
-                        }
-                    },
+            log.error("❌ Estimate job %s failed: %s", job['id'], e)
+            outcomes.append((FAILED, str(e)))
+    return outcomes
 
 
-                    # Misc
-                    "trees_to_offset": round(carbon_kg / 20, 1)
-                }
-            }
-        })
+job_queue.register("estimate_emissions", run_estimate_jobs)
 
 
+def wants_async(data):
+    return bool(data.get("async", ESTIMATE_ASYNC)) or "respond-async" in request.headers.get("Prefer", "")
+
+
+def submit_estimate(params, callback_url=None):
+    """
+    Queue an estimate job: (job, coalesced). An identical request already in
+    flight is answered with its job; its callback_url is the first submitter's.
+    Raises ValueError for a bad callback_url.
+    """
+    from backend.scrapers.amazon.scrape_amazon_titles import extract_asin
+    asin = extract_asin(params["amazon_url"])
+    dedupe_key = json.dumps([
+        asin or params["amazon_url"],
+        str(params["postcode"]).strip().upper(),
+        bool(params["include_packaging"]),
+        params["override_transport_mode"],
+    ])
+    return job_queue.submit(
+        "estimate_emissions", params, dedupe_key=dedupe_key,
+        group_key=asin or params["amazon_url"], callback_url=callback_url,
+    )
+
+
+def enqueue_estimate(params, callback_url=None):
+    """202 with the job (coalesced: true when it was already in flight)."""
+    try:
+        job, coalesced = submit_estimate(params, callback_url)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    status_url = url_for("get_job", job_id=job["id"])
+    response = jsonify({**public_view(job), "coalesced": coalesced, "status_url": status_url})
+    response.headers["Location"] = status_url
+    return response, 202
+
+
+@app.route("/estimate_emissions", methods=["POST", "OPTIONS"])
+def estimate_emissions():
+    log.debug("🔔 Route hit: /estimate_emissions")
+    
+    # Handle preflight OPTIONS request
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+        return response
+
+    with span("parse"):
+        data = request_json()
+    if not data:
+        return jsonify({"error": "Missing JSON in request"}), 400
+
+    try:
+        params = estimate_params(data)
+
+        # Validate inputs
+        if not params["amazon_url"] or not params["postcode"]:
+            return jsonify({"error": "Missing URL or postcode"}), 400
+
+        if wants_async(data):
+            return enqueue_estimate(params, data.get("callback_url"))
+
+        # Scrape product, or reuse the cached scrape for this ASIN
+        product, cache_status = fetch_estimate_product(params["amazon_url"])
+        body, status = estimate_response(product, cache_status, params)
+        return jsonify(body), status
+
+    except ScrapeBlocked as e:
+        log.warning("🛑 Scrape blocked in estimate_emissions: %s", e)
+        return jsonify({"error": str(e), "status": BLOCKED}), 503
     except Exception as e:
-        print(f"❌ Uncaught error in estimate_emissions: {e}")
+        log.error("❌ Uncaught error in estimate_emissions: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Poll an estimate job: queued | running, then done (with result), failed or blocked."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    response = jsonify(public_view(job))
+    if job["status"] not in TERMINAL:
+        response.headers["Retry-After"] = "2"
+    return response
+
+
 @app.route("/test_post", methods=["POST"])
 def test_post():
     try:
         data = request.get_json()
-        print("✅ Received test POST:", data)
+        log.debug("✅ Received test POST: %s", data)
         return jsonify({"message": "Success", "you_sent": data}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1295,6 +1250,58 @@ def health():
     return jsonify({"status": "✅ Server is up"}), 200
 
 
+def loaded_scraper():
+    # Only report once a scrape has imported the scraper; don't pull Selenium in just for stats
+    return sys.modules.get("backend.scrapers.amazon.scrape_amazon_titles") or sys.modules.get("scrape_amazon_titles")
+
+
+def scraper_fetch_stats():
+    fetcher = getattr(loaded_scraper(), "product_fetcher", None)
+    return fetcher.stats() if fetcher else None
+
+
+def brand_origin_cache_stats():
+    memo = getattr(loaded_scraper(), "brand_origin_memo", None)
+    return memo.stats() if memo else None
+
+
+@app.route("/health/detail")
+def health_detail():
+    """Model registry state: bundle version, per-artifact load time and RSS growth."""
+    return jsonify(health_report()), 200
+
+
+def health_report():
+    return {
+        "status": "✅ Server is up",
+        "models": model_registry.health(),
+        "product_cache": product_cache.stats(),
+        "driver_pools": pool_stats(),
+        "product_fetcher": scraper_fetch_stats(),
+        "brand_origin_cache": brand_origin_cache_stats(),
+        "event_logs": {"submissions": submission_log.stats(), "feedback": feedback_log.stats()},
+        "dashboard_aggregates": dashboard_aggregates.stats(),
+        "job_queue": job_queue.stats(),
+    }
+
+
+def cache_and_queue_metrics():
+    """/metrics families read from the product cache and job queue at scrape time."""
+    cache = product_cache.stats()
+    jobs = job_queue.stats()["jobs"]
+    return [
+        ("api_product_cache_lookups_total", "counter", "Product cache lookups by outcome",
+         [({"state": state}, cache[state]) for state in ("hit", "stale", "miss") if state in cache]),
+        ("api_product_cache_entries", "gauge", "Products held in this process's cache",
+         [({}, cache["size"])]),
+        ("api_jobs", "gauge", "Estimate jobs in the queue database by status",
+         [({"status": status}, count) for status, count in jobs.items()]),
+    ]
+
+
+metrics.add_collector(cache_and_queue_metrics)
+
+
 
 @app.route("/")
 def home():
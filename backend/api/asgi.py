@@ -0,0 +1,221 @@
+"""
+ASGI serving mode: FastAPI in front of the Flask app.
+
+Under gunicorn's sync workers every request holds a worker process until it
+finishes. One /estimate_emissions waiting on a scrape therefore blocks a worker
+for seconds, and a few idle extension connections can tie up the whole pool.
+This app serves the hot routes on an event loop:
+
+    POST /predict, /predict/batch   model calls run on a dedicated thread pool
+                                    (ASGI_MODEL_THREADS); the loop only parses
+                                    and serialises
+    POST /estimate_emissions        the scrape is awaited on a worker thread,
+                                    with at most ASGI_SCRAPE_THREADS at once per
+                                    process; requests waiting for a slot cost a
+                                    coroutine, not a thread or a process.
+                                    "async": true queues a job as in Flask
+    GET  /jobs/<id>, /health, /health/detail
+
+The handlers are the same functions the Flask routes call (predict_response,
+estimate_response, ...), and responses are serialised by Flask's JSON
+provider, so both modes return identical bodies. Everything else (/api/*,
+auth, admin, dashboards, static files) is passed to the Flask app unchanged
+through a WSGI bridge. backend.api.app:app under gunicorn keeps working as
+before.
+
+    uvicorn backend.api.asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+The model bundle is loaded when each process starts (lifespan). Compare the
+two modes with tools/benchmarks/bench_asgi.py.
+
+Native routes are timed like the Flask ones (Server-Timing header, /metrics,
+which Flask serves for both). The X-Profile sampler is Flask-only: here a
+request's work hops between the loop and pool threads.
+"""
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # starlette's bridge (deprecated there in favour of a2wsgi)
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from backend.api import app as flask_module
+from backend.data.storage.job_queue import BLOCKED, TERMINAL, public_view
+from backend.scrapers.amazon.fetcher import ScrapeBlocked
+from backend.utils.logging.logger import begin_request, get_logger, span
+
+ASGI_MODEL_THREADS = int(os.environ.get("ASGI_MODEL_THREADS", str(os.cpu_count() or 1)))
+ASGI_SCRAPE_THREADS = int(os.environ.get("ASGI_SCRAPE_THREADS", "16"))
+# ASGI_WARM_UP=0 skips loading the model bundle at startup (it then loads on first use)
+ASGI_WARM_UP = os.environ.get("ASGI_WARM_UP", "1") != "0"
+
+log = get_logger("asgi")
+model_executor = ThreadPoolExecutor(ASGI_MODEL_THREADS, thread_name_prefix="asgi-model")
+_scrape_limiter = None
+
+
+def scrape_limiter():
+    # A CapacityLimiter belongs to the event loop it is first used on
+    global _scrape_limiter
+    if _scrape_limiter is None:
+        _scrape_limiter = anyio.CapacityLimiter(ASGI_SCRAPE_THREADS)
+    return _scrape_limiter
+
+
+async def run_model(fn, *args):
+    """CPU-bound work (encoding, predict_proba) on the model pool."""
+    # run_in_executor doesn't carry contextvars (the request timer) over; anyio's to_thread does
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(model_executor, context.run, fn, *args)
+
+
+async def run_scrape(fn, *args):
+    """A scrape on a worker thread, at most ASGI_SCRAPE_THREADS at once."""
+    return await anyio.to_thread.run_sync(fn, *args, limiter=scrape_limiter())
+
+
+async def run_io(fn, *args):
+    """
+    Short blocking I/O (SQLite job reads and writes, health stats) on anyio's
+    default thread limiter, so polls and submits don't queue behind scrapes.
+    """
+    return await anyio.to_thread.run_sync(fn, *args)
+
+
+def json_response(body, status=200, headers=None):
+    # Same bytes as jsonify(): Flask's provider sorts keys and handles dates
+    return Response(flask_module.compact_json(body), status_code=status, headers=headers,
+                    media_type="application/json")
+
+
+async def read_json(request):
+    """The body as JSON, or None when it doesn't parse (as app.request_json)."""
+    try:
+        with span("parse"):
+            return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if ASGI_WARM_UP:
+        bundle = await run_model(flask_module.warm_up)
+        log.info("✅ ASGI worker %s ready with model bundle v%s", os.getpid(), bundle.version)
+    yield
+    model_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="DSP Environmental Tracker API", lifespan=lifespan, docs_url=None, redoc_url=None)
+
+# Same policy as the Flask app's CORS(); this middleware also answers preflights for the Flask routes
+app.add_middleware(
+    CORSMiddleware,
+    allow_origin_regex=".*",
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+)
+
+
+@app.middleware("http")
+async def time_request(request: Request, call_next):
+    timer = begin_request()
+    try:
+        response = await call_next(request)
+    except Exception:
+        route = request.scope.get("route")
+        timer.finish(route.path if isinstance(route, APIRoute) else "unmatched", request.method, 500)
+        raise
+    # Requests passed to Flask are timed by its own hooks
+    route = request.scope.get("route")
+    if isinstance(route, APIRoute):
+        response.headers.update(timer.finish(route.path, request.method, response.status_code))
+    return response
+
+
+@app.post("/predict")
+async def predict(request: Request):
+    data = await read_json(request)
+    try:
+        body, status = await run_model(flask_module.predict_response, data)
+    except Exception as e:
+        log.error("❌ Error in /predict: %s", e)
+        body, status = {"error": str(e)}, 500
+    return json_response(body, status)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    raw = (await request.body()).decode("utf-8", errors="replace")
+    mimetype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body, status = await run_model(flask_module.predict_batch_response, raw, mimetype)
+    return json_response(body, status)
+
+
+@app.post("/estimate_emissions")
+async def estimate_emissions(request: Request):
+    data = await read_json(request)
+    if not data:
+        return json_response({"error": "Missing JSON in request"}, 400)
+
+    try:
+        params = flask_module.estimate_params(data)
+        if not params["amazon_url"] or not params["postcode"]:
+            return json_response({"error": "Missing URL or postcode"}, 400)
+
+        asynchronous = data.get("async", flask_module.ESTIMATE_ASYNC) \
+            or "respond-async" in request.headers.get("prefer", "")
+        if asynchronous:
+            try:
+                job, coalesced = await run_io(flask_module.submit_estimate, params, data.get("callback_url"))
+            except ValueError as e:
+                return json_response({"error": str(e)}, 400)
+            status_url = app.url_path_for("get_job", job_id=job["id"])
+            return json_response({**public_view(job), "coalesced": coalesced, "status_url": status_url},
+                                 202, headers={"Location": status_url})
+
+        product, cache_status = await run_scrape(flask_module.fetch_estimate_product, params["amazon_url"])
+        body, status = await run_model(flask_module.estimate_response, product, cache_status, params)
+        return json_response(body, status)
+
+    except ScrapeBlocked as e:
+        log.warning("🛑 Scrape blocked in estimate_emissions: %s", e)
+        return json_response({"error": str(e), "status": BLOCKED}, 503)
+    except Exception as e:
+        log.error("❌ Uncaught error in estimate_emissions: %s", e)
+        return json_response({"error": str(e)}, 500)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_io(flask_module.job_queue.get, job_id)
+    if job is None:
+        return json_response({"error": "Unknown job"}, 404)
+    headers = {"Retry-After": "2"} if job["status"] not in TERMINAL else None
+    return json_response(public_view(job), headers=headers)
+
+
+@app.get("/health")
+async def health():
+    return json_response({"status": "✅ Server is up"})
+
+
+@app.get("/health/detail")
+async def health_detail():
+    return json_response(await run_io(flask_module.health_report))
+
+
+# Every other route is the Flask app's
+app.mount("/", WSGIMiddleware(flask_module.app))
@@ -1,12 +1,11 @@
-import json
 import csv
 
-input_path = "priority_products.json"
+from backend.data.storage.product_store import PRODUCT_DB_PATH, open_store
+
 output_path = "eco_dataset.csv"
 
-# Load product data
-with open(input_path, "r", encoding="utf-8") as f:
-    products = json.load(f)
+# Load product data (priority_products.json is imported on first use)
+products = open_store(PRODUCT_DB_PATH).products("priority")
 
 fields = ["material", "weight", "transport", "recyclability", "origin", "true_eco_score"]
 
@@ -2,11 +2,11 @@
 Amazon Dataset Expansion for Environmental Impact Training
 Scales up your existing Amazon scraping infrastructure
 """
+import numpy as np
 import pandas as pd
 import json
 import csv
 import random
-import time
 from pathlib import Path
 from typing import List, Dict
 import sys
@@ -16,6 +16,99 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.insert(0, project_root)
 
+from backend.data.storage.datasets import iter_dataset, write_dataset
+
+# Category-based defaults for simulated products
+CATEGORY_DEFAULTS = {
+    "electronics": {
+        "materials": ["Plastic", "Aluminum", "Steel"],
+        "weight_range": (0.1, 5.0),
+        "transport": "Air",
+        "origins": ["China", "South Korea", "Japan"]
+    },
+    "home_kitchen": {
+        "materials": ["Plastic", "Glass", "Steel", "Wood"],
+        "weight_range": (0.2, 3.0),
+        "transport": "Ship",
+        "origins": ["China", "Germany", "UK"]
+    },
+    "clothing": {
+        "materials": ["Cotton", "Polyester", "Other"],
+        "weight_range": (0.1, 2.0),
+        "transport": "Ship",
+        "origins": ["China", "Bangladesh", "Vietnam"]
+    },
+    "health_beauty": {
+        "materials": ["Plastic", "Glass", "Paper"],
+        "weight_range": (0.05, 1.0),
+        "transport": "Ship",
+        "origins": ["China", "France", "USA"]
+    },
+    "sports_outdoors": {
+        "materials": ["Plastic", "Rubber", "Steel", "Other"],
+        "weight_range": (0.2, 10.0),
+        "transport": "Ship",
+        "origins": ["China", "Germany", "USA"]
+    },
+    "books_media": {
+        "materials": ["Paper", "Plastic", "Wood"],
+        "weight_range": (0.05, 2.0),
+        "transport": "Ship", 
+        "origins": ["China", "UK", "Germany"]
+    }
+}
+
+# Material scores (higher = better)
+MATERIAL_SCORES = {
+    "Paper": 8, "Cardboard": 8, "Wood": 7, "Glass": 6,
+    "Aluminum": 5, "Steel": 5, "Cotton": 4,
+    "Plastic": 3, "Rubber": 3, "Other": 3, "Polyester": 2
+}
+TRANSPORT_PENALTIES = {"Ship": 0, "Air": -2, "Truck": -1}
+# (minimum score, grade), best first
+SCORE_GRADES = [(7, "A+"), (6, "A"), (4, "B"), (2, "C"), (0, "D")]
+
+HIGH_RECYCLABLE = ["Paper", "Cardboard", "Glass", "Aluminum", "Steel"]
+LOW_RECYCLABLE = ["Plastic", "Rubber", "Other"]
+
+# Material emissions (kg CO2 per kg product)
+MATERIAL_EMISSION_FACTORS = {
+    "Plastic": 6.0, "Aluminum": 11.5, "Steel": 2.5, "Glass": 0.85,
+    "Paper": 1.1, "Cardboard": 1.1, "Cotton": 5.9, "Wood": 0.4,
+    "Rubber": 3.2, "Polyester": 9.5, "Other": 3.0
+}
+TRANSPORT_MULTIPLIERS = {"Air": 1.5, "Ship": 1.0, "Truck": 1.2}
+
+SIMULATED_COLUMNS = ["title", "material", "weight", "transport", "recyclability", "true_eco_score",
+                     "co2_emissions", "origin", "category", "search_term"]
+
+
+def rounded(values: pd.Series, digits: int = 2) -> pd.Series:
+    """Python's round() per value: numpy's rounding disagrees with it on near-ties"""
+    return pd.Series([round(v, digits) for v in values.tolist()], index=values.index, dtype=float)
+
+
+def eco_score_labels(material: pd.Series, weight: pd.Series, transport: pd.Series) -> pd.Series:
+    """AmazonDatasetExpander._calculate_simple_eco_score over whole columns"""
+    total = (material.map(MATERIAL_SCORES).fillna(3).astype(float)
+             + transport.map(TRANSPORT_PENALTIES).fillna(0).astype(float)
+             - np.minimum(3, weight.astype(float)))
+    grades = np.select([total >= minimum for minimum, _ in SCORE_GRADES], [grade for _, grade in SCORE_GRADES], "F")
+    return pd.Series(grades.astype(object), index=material.index)
+
+
+def recyclability_labels(material: pd.Series) -> pd.Series:
+    """AmazonDatasetExpander._get_recyclability over a whole column"""
+    labels = np.select([material.isin(HIGH_RECYCLABLE), material.isin(LOW_RECYCLABLE)], ["High", "Low"], "Medium")
+    return pd.Series(labels.astype(object), index=material.index)
+
+
+def emission_factors(material: pd.Series, transport: pd.Series) -> pd.Series:
+    """AmazonDatasetExpander._get_emission_factor over whole columns"""
+    return (material.map(MATERIAL_EMISSION_FACTORS).fillna(3.0).astype(float)
+            * transport.map(TRANSPORT_MULTIPLIERS).fillna(1.0).astype(float))
+
+
 class AmazonDatasetExpander:
     """Expands your existing Amazon scraping to build larger training dataset"""
     
@@ -71,41 +164,56 @@ class AmazonDatasetExpander:
         
         return search_urls
     
-    def collect_amazon_products_batch(self, batch_size: int = 50, delay_seconds: int = 2) -> pd.DataFrame:
-        """Collect Amazon products using your existing scraper with rate limiting"""
+    def collect_amazon_products_batch(self, batch_size: int = 50, delay_seconds: int = 2,
+                                      live: bool = False, workers: int = None) -> pd.DataFrame:
+        """
+        Collect Amazon products for `batch_size` search terms.
+
+        With live=True the search pages are scraped concurrently through the
+        scrape orchestrator; `delay_seconds` sets the per-domain token-bucket
+        rate instead of a fixed sleep after every page. Otherwise products are
+        simulated from the category defaults, which needs no pacing at all.
+        """
+        search_urls = self.generate_amazon_search_urls(batch_size)[:batch_size]
+        print(f"🤖 Starting Amazon product collection (batch size: {batch_size}, live: {live})...")
+
+        if not live:
+            collected_products = []
+            for search_info in search_urls:
+                try:
+                    collected_products.append(self._simulate_amazon_product(search_info))
+                except Exception as e:
+                    print(f"    ⚠️ Failed to simulate {search_info['search_term']}: {e}")
+            return pd.DataFrame(collected_products)
+
         try:
             # Import your existing scraper
-            from backend.scrapers.amazon.scrape_amazon_titles import scrape_amazon_product_page
+            from backend.scrapers.amazon.scrape_amazon_titles import scrape_amazon_titles, listing_pool
+            from backend.scrapers.orchestrator import DomainRateLimiter, ScrapeOrchestrator
         except ImportError:
             print("⚠️ Could not import Amazon scraper. Please check import path.")
             return pd.DataFrame()
-        
-        search_urls = self.generate_amazon_search_urls(batch_size)
-        collected_products = []
-        
-        print(f"🤖 Starting Amazon product collection (batch size: {batch_size})...")
-        print(f"⏱️ Rate limit: {delay_seconds} seconds between requests")
-        
-        for i, search_info in enumerate(search_urls[:batch_size]):
-            if i > 0 and i % 10 == 0:
-                print(f"  Progress: {i}/{batch_size} searches completed...")
-            
-            try:
-                # Use your existing scraper
-                # Note: You'll need to adapt this to search results rather than direct product URLs
-                # For now, we'll simulate the data structure your scraper returns
-                
-                product_data = self._simulate_amazon_product(search_info)
-                collected_products.append(product_data)
-                
-                # Rate limiting
-                time.sleep(delay_seconds)
-                
-            except Exception as e:
-                print(f"    ⚠️ Failed to scrape {search_info['search_term']}: {e}")
-                continue
-        
-        return pd.DataFrame(collected_products)
+
+        print(f"⏱️ Rate limit: one page per {delay_seconds} seconds per domain")
+        info_by_url = {info["url"]: info for info in search_urls}
+        max_items = max(1, search_urls[0]["expected_products"]) if search_urls else 1
+        orchestrator = ScrapeOrchestrator(
+            lambda url: scrape_amazon_titles(url, max_items=max_items),
+            workers=workers or listing_pool.size,
+            limiter=DomainRateLimiter(rate_per_min=60.0 / max(delay_seconds, 0.1)),
+        )
+
+        collected = []
+        for i, (url, new_products) in enumerate(orchestrator.stream(info_by_url), 1):
+            for product in new_products:
+                product["category"] = info_by_url[url]["category"]
+                product["search_term"] = info_by_url[url]["search_term"]
+                collected.append(product)
+            if i % 10 == 0:
+                print(f"  Progress: {i}/{len(search_urls)} searches completed...")
+
+        print(f"✅ Collected {len(collected)} unique products: {orchestrator.stats}")
+        return pd.DataFrame(collected)
     
     def _simulate_amazon_product(self, search_info: Dict) -> Dict:
         """Simulate Amazon product data in your existing format"""
@@ -113,47 +221,7 @@ class AmazonDatasetExpander:
         category = search_info["category"]
         term = search_info["search_term"]
         
-        # Category-based defaults
-        category_defaults = {
-            "electronics": {
-                "materials": ["Plastic", "Aluminum", "Steel"],
-                "weight_range": (0.1, 5.0),
-                "transport": "Air",
-                "origins": ["China", "South Korea", "Japan"]
-            },
-            "home_kitchen": {
-                "materials": ["Plastic", "Glass", "Steel", "Wood"],
-                "weight_range": (0.2, 3.0),
-                "transport": "Ship",
-                "origins": ["China", "Germany", "UK"]
-            },
-            "clothing": {
-                "materials": ["Cotton", "Polyester", "Other"],
-                "weight_range": (0.1, 2.0),
-                "transport": "Ship",
-                "origins": ["China", "Bangladesh", "Vietnam"]
-            },
-            "health_beauty": {
-                "materials": ["Plastic", "Glass", "Paper"],
-                "weight_range": (0.05, 1.0),
-                "transport": "Ship",
-                "origins": ["China", "France", "USA"]
-            },
-            "sports_outdoors": {
-                "materials": ["Plastic", "Rubber", "Steel", "Other"],
-                "weight_range": (0.2, 10.0),
-                "transport": "Ship",
-                "origins": ["China", "Germany", "USA"]
-            },
-            "books_media": {
-                "materials": ["Paper", "Plastic", "Wood"],
-                "weight_range": (0.05, 2.0),
-                "transport": "Ship", 
-                "origins": ["China", "UK", "Germany"]
-            }
-        }
-        
-        defaults = category_defaults.get(category, category_defaults["home_kitchen"])
+        defaults = CATEGORY_DEFAULTS.get(category, CATEGORY_DEFAULTS["home_kitchen"])
         
         # Generate realistic product
         material = random.choice(defaults["materials"])
@@ -176,48 +244,82 @@ class AmazonDatasetExpander:
             "search_term": term
         }
     
-    def expand_existing_dataset(self, current_csv_path: str, target_size: int = 5000) -> pd.DataFrame:
-        """Expand your existing dataset by generating more Amazon-style products"""
-        
-        # Load existing dataset to understand patterns
-        existing_df = pd.read_csv(current_csv_path)
-        print(f"📊 Current dataset size: {len(existing_df)} products")
-        
-        # Calculate how many new products to generate
-        new_products_needed = max(0, target_size - len(existing_df))
+    def simulate_products(self, count: int, rng: np.random.Generator) -> pd.DataFrame:
+        """
+        `count` simulated products as one DataFrame: the same columns and
+        distributions as _simulate_amazon_product, drawn column-wise.
+        """
+        categories = list(self.amazon_categories)
+        picked = rng.integers(len(categories), size=count)
+        weight = np.empty(count)
+        columns = {name: np.empty(count, dtype=object)
+                   for name in ("title", "material", "transport", "origin", "category", "search_term")}
+
+        for i, category in enumerate(categories):
+            rows = np.flatnonzero(picked == i)
+            if not len(rows):
+                continue
+            defaults = CATEGORY_DEFAULTS.get(category, CATEGORY_DEFAULTS["home_kitchen"])
+            terms = self.amazon_categories[category]
+            term = rng.integers(len(terms), size=len(rows))
+            columns["search_term"][rows] = np.array(terms, dtype=object)[term]
+            columns["title"][rows] = np.array([f"{t.title()} - Amazon Product" for t in terms], dtype=object)[term]
+            columns["material"][rows] = np.array(defaults["materials"], dtype=object)[
+                rng.integers(len(defaults["materials"]), size=len(rows))]
+            weight[rows] = np.round(rng.uniform(*defaults["weight_range"], size=len(rows)), 2)
+            columns["transport"][rows] = defaults["transport"]
+            columns["origin"][rows] = np.array(defaults["origins"], dtype=object)[
+                rng.integers(len(defaults["origins"]), size=len(rows))]
+            columns["category"][rows] = category
+
+        material, transport, weight = pd.Series(columns["material"]), pd.Series(columns["transport"]), pd.Series(weight)
+        return pd.DataFrame({
+            "title": columns["title"],
+            "material": material,
+            "weight": weight,
+            "transport": transport,
+            "recyclability": recyclability_labels(material),
+            "true_eco_score": eco_score_labels(material, weight, transport),
+            "co2_emissions": rounded(weight * emission_factors(material, transport)),
+            "origin": columns["origin"],
+            "category": columns["category"],
+            "search_term": columns["search_term"],
+        })
+
+    def iter_expanded_chunks(self, current_csv_path: str, target_size: int = 5000,
+                             chunk_rows: int = 50000, seed: int = None):
+        """
+        Stream the existing dataset followed by enough simulated products to
+        reach target_size, as DataFrames of at most chunk_rows rows. Only one
+        chunk is held at a time, whatever the target size.
+        """
+        # Every chunk gets the same columns (the existing ones, then the simulated-only ones),
+        # as pd.concat of the whole thing would give
+        columns = None
+        existing = 0
+        for chunk in iter_dataset(current_csv_path, chunk_rows):
+            if columns is None:
+                columns = list(chunk.columns) + [c for c in SIMULATED_COLUMNS if c not in chunk.columns]
+            existing += len(chunk)
+            yield chunk.reindex(columns=columns)
+        print(f"📊 Current dataset size: {existing} products")
+
+        new_products_needed = max(0, target_size - existing)
         print(f"🎯 Target size: {target_size}, generating {new_products_needed} new products...")
-        
         if new_products_needed == 0:
             print("✅ Dataset already at target size!")
-            return existing_df
-        
-        # Generate new products based on existing patterns
-        new_products = []
-        
-        # Analyze existing patterns
-        existing_materials = existing_df['material'].value_counts().to_dict()
-        existing_origins = existing_df['origin'].value_counts().to_dict()
-        
-        for i in range(new_products_needed):
-            if i % 500 == 0 and i > 0:
-                print(f"  Generated {i}/{new_products_needed} products...")
-            
-            # Pick a random category and search term
-            category = random.choice(list(self.amazon_categories.keys()))
-            search_term = random.choice(self.amazon_categories[category])
-            
-            search_info = {
-                "category": category,
-                "search_term": search_term
-            }
-            
-            new_product = self._simulate_amazon_product(search_info)
-            new_products.append(new_product)
-        
-        # Combine with existing data
-        new_df = pd.DataFrame(new_products)
-        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-        
+            return
+
+        rng = np.random.default_rng(seed)
+        for start in range(0, new_products_needed, chunk_rows):
+            if start:
+                print(f"  Generated {start}/{new_products_needed} products...")
+            chunk = self.simulate_products(min(chunk_rows, new_products_needed - start), rng)
+            yield chunk.reindex(columns=columns) if columns is not None else chunk
+
+    def expand_existing_dataset(self, current_csv_path: str, target_size: int = 5000) -> pd.DataFrame:
+        """Expand your existing dataset by generating more Amazon-style products"""
+        combined_df = pd.concat(list(self.iter_expanded_chunks(current_csv_path, target_size)), ignore_index=True)
         print(f"✅ Expanded dataset to {len(combined_df)} products")
         return combined_df
     
@@ -320,61 +422,32 @@ class AmazonDatasetExpander:
 
     def _calculate_simple_eco_score(self, material: str, weight: float, transport: str) -> str:
         """Calculate eco score based on material, weight, and transport"""
-        # Material scores (higher = better)
-        material_scores = {
-            "Paper": 8, "Cardboard": 8, "Wood": 7, "Glass": 6,
-            "Aluminum": 5, "Steel": 5, "Cotton": 4,
-            "Plastic": 3, "Rubber": 3, "Other": 3, "Polyester": 2
-        }
-        
-        # Transport penalty
-        transport_penalty = {"Ship": 0, "Air": -2, "Truck": -1}.get(transport, 0)
+        transport_penalty = TRANSPORT_PENALTIES.get(transport, 0)
         
         # Weight penalty (lighter is better)
         weight_penalty = min(3, weight)  # Cap at 3 points penalty
         
-        total_score = material_scores.get(material, 3) + transport_penalty - weight_penalty
+        total_score = MATERIAL_SCORES.get(material, 3) + transport_penalty - weight_penalty
         
         # Convert to letter grade
-        if total_score >= 7:
-            return "A+"
-        elif total_score >= 6:
-            return "A"
-        elif total_score >= 4:
-            return "B"
-        elif total_score >= 2:
-            return "C"
-        elif total_score >= 0:
-            return "D"
-        else:
-            return "F"
+        for minimum, grade in SCORE_GRADES:
+            if total_score >= minimum:
+                return grade
+        return "F"
     
     def _get_recyclability(self, material: str) -> str:
         """Get recyclability based on material"""
-        high_recyclable = ["Paper", "Cardboard", "Glass", "Aluminum", "Steel"]
-        low_recyclable = ["Plastic", "Rubber", "Other"]
-        
-        if material in high_recyclable:
+        if material in HIGH_RECYCLABLE:
             return "High"
-        elif material in low_recyclable:
+        elif material in LOW_RECYCLABLE:
             return "Low"
         else:
             return "Medium"
     
     def _get_emission_factor(self, material: str, transport: str) -> float:
         """Get CO2 emission factor for material and transport"""
-        # Material emissions (kg CO2 per kg product)
-        material_factors = {
-            "Plastic": 6.0, "Aluminum": 11.5, "Steel": 2.5, "Glass": 0.85,
-            "Paper": 1.1, "Cardboard": 1.1, "Cotton": 5.9, "Wood": 0.4,
-            "Rubber": 3.2, "Polyester": 9.5, "Other": 3.0
-        }
-        
-        # Transport multiplier
-        transport_multipliers = {"Air": 1.5, "Ship": 1.0, "Truck": 1.2}
-        
-        base_factor = material_factors.get(material, 3.0)
-        transport_mult = transport_multipliers.get(transport, 1.0)
+        base_factor = MATERIAL_EMISSION_FACTORS.get(material, 3.0)
+        transport_mult = TRANSPORT_MULTIPLIERS.get(transport, 1.0)
         
         return base_factor * transport_mult
 
@@ -390,7 +463,7 @@ if __name__ == "__main__":
     
     # Save expanded dataset
     output_path = "../../../common/data/csv/expanded_eco_dataset.csv"
-    expanded_df.to_csv(output_path, index=False)
+    write_dataset(expanded_df, output_path)
     
     print(f"✅ Saved {len(expanded_df)} products to {output_path}")
     print("\n📊 Dataset summary:")
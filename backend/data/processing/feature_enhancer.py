@@ -4,11 +4,97 @@ Extracts features from Amazon product titles, descriptions, and categories
 Rule-based methods using only text processing and keyword matching
 """
 import re
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 import json
+import os
+import sys
 from pathlib import Path
 
+# Add project root to path for imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.insert(0, project_root)
+
+from backend.data.storage.datasets import read_dataset, write_dataset
+from backend.utils.text_matching import compile_alternation
+
+# Rows per chunk and worker processes for enhance_amazon_dataset (workers <= 1 runs in-process)
+FEATURE_ENHANCER_CHUNK_ROWS = int(os.environ.get("FEATURE_ENHANCER_CHUNK_ROWS", "10000"))
+FEATURE_ENHANCER_WORKERS = int(os.environ.get("FEATURE_ENHANCER_WORKERS", str(os.cpu_count() or 1)))
+
+# === Rule tables shared by the per-product and the columnar paths ===
+PACKAGING_MATERIALS = {
+    'bottle': ['Plastic', 'Glass'],
+    'box': ['Cardboard', 'Paper'],
+    'bag': ['Plastic', 'Paper'],
+    'tube': ['Plastic', 'Aluminum'],
+    'can': ['Aluminum', 'Steel'],
+    'jar': ['Glass', 'Plastic'],
+    'wrap': ['Plastic'],
+    'blister': ['Plastic', 'Cardboard']
+}
+
+PACKAGING_RATIOS = {
+    'bottle': 0.15,   # Bottles add significant weight
+    'box': 0.05,      # Light cardboard
+    'bag': 0.02,      # Very light
+    'tube': 0.08,     # Moderate
+    'can': 0.12,      # Metal is heavy
+    'jar': 0.20,      # Glass is heavy
+    'wrap': 0.01,     # Minimal
+    'blister': 0.03   # Light plastic/card
+}
+
+CATEGORY_KEYWORDS = {
+    'electronics': ['phone', 'laptop', 'tablet', 'headphones', 'speaker', 'tv', 'camera'],
+    'clothing': ['shirt', 'dress', 'pants', 'shoes', 'jacket', 'sweater', 'jeans'],
+    'food': ['organic', 'snack', 'beverage', 'coffee', 'tea', 'sauce', 'oil'],
+    'home_garden': ['furniture', 'lamp', 'cushion', 'plant', 'tool', 'storage']
+}
+
+DURABILITY_KEYWORDS = {
+    'high': ['professional', 'industrial', 'heavy duty', 'lifetime'],
+    'low': ['disposable', 'single use', 'temporary', 'budget']
+}
+
+REPAIRABILITY_BASE_SCORES = {
+    'electronics': 4,
+    'clothing': 6,
+    'food': 1,
+    'home_garden': 7
+}
+MODULAR_KEYWORDS = ['modular', 'replaceable', 'spare parts', 'repair kit']
+SEALED_KEYWORDS = ['sealed', 'integrated', 'non-removable', 'disposable']
+
+LARGE_SIZE_KEYWORDS = ['large', 'xl', 'xxl', 'king size', 'queen size']
+SMALL_SIZE_KEYWORDS = ['small', 'mini', 'compact', 'travel size']
+HIGH_QUALITY_KEYWORDS = ['premium', 'professional', 'heavy duty', 'commercial grade', 'deluxe']
+LOW_QUALITY_KEYWORDS = ['budget', 'economy', 'basic']
+
+PACK_SIZE_PATTERNS = [
+    r'pack of (\d+)',
+    r'set of (\d+)', 
+    r'(\d+) pack',
+    r'(\d+) count'
+]
+
+DIMENSION_PATTERNS = [
+    r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*cm',
+    r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*inch',
+    r'(\d+\.?\d*)\s*cm\s*x\s*(\d+\.?\d*)\s*cm\s*x\s*(\d+\.?\d*)\s*cm'
+]
+
+EXPLICIT_WEIGHT_PATTERN = re.compile(r'\d+\.?\d*\s*(?:kg|g|lb|oz)')
+
+
+@lru_cache(maxsize=None)
+def _alternation(keywords):
+    return compile_alternation(keywords)
+
+
 class AmazonFeatureEnhancer:
     """Enhances Amazon product data with additional features using rule-based methods"""
     
@@ -186,6 +272,149 @@ class AmazonFeatureEnhancer:
         enhanced['weight_confidence'] = self._assess_weight_confidence(text, enhanced.get('weight', 0))
         
         return enhanced
+
+    def enhance_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Columnar enhance_amazon_product_features: the same columns, values and
+        dtypes as running it on every row and rebuilding the DataFrame, with
+        one pandas string scan per keyword group instead of Python loops.
+        """
+        out = df.reset_index(drop=True)
+        n = len(out)
+
+        def column(name, default):
+            return out[name] if name in out.columns else pd.Series([default] * n, dtype=object)
+
+        # Every feature of the title is computed once per distinct title and broadcast back by
+        # code: scraped and generated datasets repeat the same titles thousands of times.
+        # Object dtype keeps Python str.lower()/re semantics (pyarrow-backed strings use RE2).
+        raw_codes, raw_titles = pd.factorize(column('title', '').fillna(''))
+        lower_codes, titles = pd.factorize(np.array([title.lower() for title in raw_titles], dtype=object))
+        codes = lower_codes[raw_codes] if n else raw_codes
+        text = pd.Series(titles, dtype=object)
+
+        def has_any(keywords):
+            return text.str.contains(_alternation(tuple(keywords))).to_numpy(dtype=bool)[codes]
+
+        def first_label(groups, default):
+            return np.select([has_any(keywords) for keywords in groups.values()], list(groups), default).astype(object)
+
+        added = {}
+
+        # 1. Enhanced material detection
+        material = column('material', 'Other')
+        confidence = np.full(n, 0.4)
+        for name, keywords in self.material_keywords.items():
+            rows = (material == name).to_numpy(dtype=bool)
+            if rows.any():
+                matches = sum(text.str.contains(keyword, regex=False).to_numpy(dtype=int) for keyword in keywords)
+                matches = matches[codes[rows]]
+                confidence[rows] = np.select([matches >= 2, matches == 1], [0.9, 0.7], 0.4)
+        confidence[(material == 'Other').to_numpy(dtype=bool)] = 0.3
+        added['material_confidence'] = confidence
+
+        names = list(self.material_keywords)
+        mentioned = np.column_stack([
+            has_any(keywords) & (material != name).to_numpy(dtype=bool)
+            for name, keywords in self.material_keywords.items()
+        ])
+        bitmasks = mentioned.astype(np.int64) @ (1 << np.arange(len(names), dtype=np.int64))
+        by_mask = {mask: [name for bit, name in enumerate(names) if mask >> bit & 1][:2] for mask in np.unique(bitmasks)}
+        added['secondary_materials'] = [list(by_mask[mask]) for mask in bitmasks]
+
+        # 2. Packaging inference
+        packaging_type = first_label(self.packaging_keywords, 'box')
+        added['packaging_type'] = packaging_type
+        added['packaging_materials'] = [list(PACKAGING_MATERIALS.get(kind, ['Cardboard'])) for kind in packaging_type]
+        added['packaging_weight_ratio'] = pd.Series(packaging_type).map(PACKAGING_RATIOS).fillna(0.05).to_numpy()
+
+        # 3. Category-based defaults
+        category = pd.Series(first_label(CATEGORY_KEYWORDS, 'other'))
+        added['inferred_category'] = category.to_numpy()
+
+        transport_mode = category.map({
+            name: defaults['transport_mode']
+            for name, defaults in self.category_mappings.items() if 'transport_mode' in defaults
+        })
+        use_mode = (column('transport', 'Land') == 'Land').to_numpy(dtype=bool) & transport_mode.notna().to_numpy()
+        if 'transport' in out.columns:
+            out = out.copy()
+            out.loc[use_mode, 'transport'] = transport_mode[use_mode].to_numpy()
+        elif use_mode.any():
+            added['transport'] = transport_mode.where(use_mode).to_numpy(dtype=object)
+
+        recyclability = category.map({
+            name: defaults.get('recyclability', 'Medium') for name, defaults in self.category_mappings.items()
+        }).fillna('Medium')
+        if 'recyclability' in out.columns:
+            generic = (out['recyclability'] == 'Medium').to_numpy(dtype=bool)
+            out = out.copy()
+            out.loc[generic, 'recyclability'] = recyclability[generic].to_numpy()
+        else:
+            added['recyclability'] = recyclability.to_numpy(dtype=object)
+
+        # 4. Enhanced origin detection
+        brands = pd.Series([brand.lower() for brand in column('brand', '').fillna('')], dtype=object)
+        known_brands = tuple(brand for brand in self.brand_origins if isinstance(brand, str))
+        known_brand = brands.str.contains(_alternation(known_brands)).to_numpy(dtype=bool)
+        added['origin_confidence'] = np.where(
+            (column('origin', 'Other') != 'Other').to_numpy(dtype=bool), 0.8, np.where(known_brand, 0.9, 0.3)
+        )
+
+        # 5. Durability and lifecycle features
+        lifespans = {name: defaults.get('avg_lifespan_years', 3) for name, defaults in self.category_mappings.items()}
+        base_lifespan = category.map(lifespans).fillna(3).to_numpy(dtype=float)
+        durable = has_any(DURABILITY_KEYWORDS['high'])
+        short_lived = has_any(DURABILITY_KEYWORDS['low']) & ~durable
+        lifespan = np.select([durable, short_lived], [base_lifespan * 1.5, base_lifespan * 0.5], base_lifespan)
+        # Unadjusted integer bases come back as ints; the column is int64 only if every row is one
+        int_base = ~category.isin([name for name, years in lifespans.items() if not isinstance(years, int)]).to_numpy()
+        if (int_base & ~durable & ~short_lived).all():
+            lifespan = lifespan.astype(np.int64)
+        added['estimated_lifespan_years'] = lifespan
+
+        base_score = category.map(REPAIRABILITY_BASE_SCORES).fillna(5).to_numpy(dtype=np.int64)
+        modular = has_any(MODULAR_KEYWORDS)
+        sealed = has_any(SEALED_KEYWORDS) & ~modular
+        added['repairability_score'] = np.select(
+            [modular, sealed], [np.minimum(10, base_score + 2), np.maximum(1, base_score - 2)], base_score
+        )
+
+        # 6. Amazon-specific features
+        added['size_category'] = first_label({'large': LARGE_SIZE_KEYWORDS, 'small': SMALL_SIZE_KEYWORDS}, 'medium')
+        added['quality_level'] = first_label({'high': HIGH_QUALITY_KEYWORDS, 'low': LOW_QUALITY_KEYWORDS}, 'standard')
+        added['is_eco_labeled'] = has_any(self.amazon_patterns['eco_keywords'])
+        added['is_amazon_choice'] = has_any(self.amazon_patterns['amazon_choice'])
+
+        pack = pd.Series([None] * len(text), dtype=object)
+        for pattern in PACK_SIZE_PATTERNS:
+            pack = pack.fillna(text.str.extract(pattern, expand=False))
+        pack_sizes = pd.Series([int(count) if isinstance(count, str) else 1 for count in pack])
+        added['pack_size'] = pack_sizes.to_numpy()[codes]
+
+        # 7. Weight and volume estimation improvements
+        volume = np.full(len(text), 1.0)
+        found = np.zeros(len(text), dtype=bool)
+        for pattern in DIMENSION_PATTERNS:
+            dims = text.str.extract(pattern)
+            rows = dims[0].notna().to_numpy() & ~found
+            if rows.any():
+                d = np.array([[float(value) for value in row] for row in dims[rows].itertuples(index=False)])
+                if 'inch' in pattern:
+                    d = d * 2.54  # Convert to cm
+                volume[rows] = d[:, 0] * d[:, 1] * d[:, 2] / 1000  # Convert to liters
+                found |= rows
+        added['estimated_volume_l'] = volume[codes]
+
+        weight = np.array([self._weight_value(value) for value in column('weight', 0)], dtype=float)
+        added['weight_confidence'] = np.select(
+            [text.str.contains(EXPLICIT_WEIGHT_PATTERN).to_numpy(dtype=bool)[codes], weight > 0], [0.9, 0.6], 0.3
+        )
+
+        out = out.copy()
+        for name, values in added.items():
+            out[name] = values.to_numpy() if isinstance(values, pd.Series) else values
+        return out
     
     def _get_material_confidence(self, text: str, current_material: str) -> float:
         """Assess confidence in material classification"""
@@ -223,44 +452,15 @@ class AmazonFeatureEnhancer:
     
     def _infer_packaging_materials(self, text: str, packaging_type: str) -> List[str]:
         """Guess packaging materials based on type and product"""
-        packaging_defaults = {
-            'bottle': ['Plastic', 'Glass'],
-            'box': ['Cardboard', 'Paper'],
-            'bag': ['Plastic', 'Paper'],
-            'tube': ['Plastic', 'Aluminum'],
-            'can': ['Aluminum', 'Steel'],
-            'jar': ['Glass', 'Plastic'],
-            'wrap': ['Plastic'],
-            'blister': ['Plastic', 'Cardboard']
-        }
-        
-        return packaging_defaults.get(packaging_type, ['Cardboard'])
+        return list(PACKAGING_MATERIALS.get(packaging_type, ['Cardboard']))
     
     def _estimate_packaging_ratio(self, packaging_type: str) -> float:
         """Estimate packaging weight as ratio of product weight"""
-        ratios = {
-            'bottle': 0.15,   # Bottles add significant weight
-            'box': 0.05,      # Light cardboard
-            'bag': 0.02,      # Very light
-            'tube': 0.08,     # Moderate
-            'can': 0.12,      # Metal is heavy
-            'jar': 0.20,      # Glass is heavy
-            'wrap': 0.01,     # Minimal
-            'blister': 0.03   # Light plastic/card
-        }
-        
-        return ratios.get(packaging_type, 0.05)
+        return PACKAGING_RATIOS.get(packaging_type, 0.05)
     
     def _classify_product_category(self, text: str) -> str:
         """Simple category classification"""
-        category_keywords = {
-            'electronics': ['phone', 'laptop', 'tablet', 'headphones', 'speaker', 'tv', 'camera'],
-            'clothing': ['shirt', 'dress', 'pants', 'shoes', 'jacket', 'sweater', 'jeans'],
-            'food': ['organic', 'snack', 'beverage', 'coffee', 'tea', 'sauce', 'oil'],
-            'home_garden': ['furniture', 'lamp', 'cushion', 'plant', 'tool', 'storage']
-        }
-        
-        for category, keywords in category_keywords.items():
+        for category, keywords in CATEGORY_KEYWORDS.items():
             if any(keyword in text for keyword in keywords):
                 return category
         
@@ -294,51 +494,34 @@ class AmazonFeatureEnhancer:
     
     def _estimate_lifespan(self, text: str, category: str) -> float:
         """Estimate product lifespan in years"""
-        # Keyword-based adjustments
-        durability_keywords = {
-            'high': ['professional', 'industrial', 'heavy duty', 'lifetime'],
-            'low': ['disposable', 'single use', 'temporary', 'budget']
-        }
-        
         base_lifespan = self.category_mappings.get(category, {}).get('avg_lifespan_years', 3)
         
-        if any(keyword in text for keyword in durability_keywords['high']):
+        # Keyword-based adjustments
+        if any(keyword in text for keyword in DURABILITY_KEYWORDS['high']):
             return base_lifespan * 1.5
-        elif any(keyword in text for keyword in durability_keywords['low']):
+        elif any(keyword in text for keyword in DURABILITY_KEYWORDS['low']):
             return base_lifespan * 0.5
         
         return base_lifespan
     
     def _estimate_repairability(self, text: str, category: str) -> float:
         """Estimate repairability score (1-10)"""
-        base_scores = {
-            'electronics': 4,
-            'clothing': 6,
-            'food': 1,
-            'home_garden': 7
-        }
-        
-        modular_keywords = ['modular', 'replaceable', 'spare parts', 'repair kit']
-        sealed_keywords = ['sealed', 'integrated', 'non-removable', 'disposable']
+        base = REPAIRABILITY_BASE_SCORES.get(category, 5)
         
-        base = base_scores.get(category, 5)
-        
-        if any(keyword in text for keyword in modular_keywords):
+        if any(keyword in text for keyword in MODULAR_KEYWORDS):
             return min(10, base + 2)
-        elif any(keyword in text for keyword in sealed_keywords):
+        elif any(keyword in text for keyword in SEALED_KEYWORDS):
             return max(1, base - 2)
         
         return base
     
     def _detect_size_category(self, text: str) -> str:
         """Detect size category from Amazon title"""
-        size_patterns = self.amazon_patterns['size_indicators']
-        
-        for size in ['large', 'xl', 'xxl', 'king size', 'queen size']:
+        for size in LARGE_SIZE_KEYWORDS:
             if size in text:
                 return 'large'
         
-        for size in ['small', 'mini', 'compact', 'travel size']:
+        for size in SMALL_SIZE_KEYWORDS:
             if size in text:
                 return 'small'
         
@@ -346,13 +529,11 @@ class AmazonFeatureEnhancer:
     
     def _detect_quality_level(self, text: str) -> str:
         """Detect quality level from Amazon title"""
-        quality_patterns = self.amazon_patterns['quality_indicators']
-        
-        for quality in ['premium', 'professional', 'heavy duty', 'commercial grade', 'deluxe']:
+        for quality in HIGH_QUALITY_KEYWORDS:
             if quality in text:
                 return 'high'
         
-        for quality in ['budget', 'economy', 'basic']:
+        for quality in LOW_QUALITY_KEYWORDS:
             if quality in text:
                 return 'low'
         
@@ -370,17 +551,8 @@ class AmazonFeatureEnhancer:
     
     def _detect_pack_size(self, text: str) -> int:
         """Detect pack size from title"""
-        import re
-        
         # Look for pack size patterns
-        pack_patterns = [
-            r'pack of (\d+)',
-            r'set of (\d+)', 
-            r'(\d+) pack',
-            r'(\d+) count'
-        ]
-        
-        for pattern in pack_patterns:
+        for pattern in PACK_SIZE_PATTERNS:
             match = re.search(pattern, text)
             if match:
                 return int(match.group(1))
@@ -389,16 +561,8 @@ class AmazonFeatureEnhancer:
     
     def _estimate_volume_from_amazon_title(self, text: str) -> float:
         """Estimate product volume in liters from text"""
-        import re
-        
         # Look for dimension patterns
-        dimension_patterns = [
-            r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*cm',
-            r'(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*x\s*(\d+\.?\d*)\s*inch',
-            r'(\d+\.?\d*)\s*cm\s*x\s*(\d+\.?\d*)\s*cm\s*x\s*(\d+\.?\d*)\s*cm'
-        ]
-        
-        for pattern in dimension_patterns:
+        for pattern in DIMENSION_PATTERNS:
             match = re.search(pattern, text)
             if match:
                 dims = [float(match.group(i)) for i in range(1, 4)]
@@ -410,15 +574,19 @@ class AmazonFeatureEnhancer:
         
         return 1.0  # Default 1 liter
     
-    def _assess_weight_confidence(self, text: str, current_weight) -> float:
-        """Assess confidence in weight estimation"""
+    @staticmethod
+    def _weight_value(current_weight) -> float:
         # Convert weight to float if it's a string
         try:
-            weight_val = float(current_weight) if current_weight is not None else 0.0
+            return float(current_weight) if current_weight is not None else 0.0
         except (ValueError, TypeError):
-            weight_val = 0.0
+            return 0.0
+
+    def _assess_weight_confidence(self, text: str, current_weight) -> float:
+        """Assess confidence in weight estimation"""
+        weight_val = self._weight_value(current_weight)
             
-        if re.search(r'\d+\.?\d*\s*(kg|g|lb|oz)', text):
+        if EXPLICIT_WEIGHT_PATTERN.search(text):
             return 0.9  # Found explicit weight
         elif weight_val > 0:
             return 0.6  # Estimated weight
@@ -426,11 +594,34 @@ class AmazonFeatureEnhancer:
             return 0.3  # No weight info
 
 
-def enhance_amazon_dataset(input_csv: str, output_csv: str):
+_chunk_enhancer = None
+
+
+def _enhance_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # One enhancer per worker process, built on its first chunk
+    global _chunk_enhancer
+    if _chunk_enhancer is None:
+        _chunk_enhancer = AmazonFeatureEnhancer()
+    return _chunk_enhancer.enhance_frame(chunk)
+
+
+def enhance_frame_chunked(df: pd.DataFrame, chunk_rows: int = FEATURE_ENHANCER_CHUNK_ROWS,
+                          workers: int = FEATURE_ENHANCER_WORKERS) -> pd.DataFrame:
+    """enhance_frame over fixed-size row chunks, spread across a process pool when there are several"""
+    chunks = [df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows)] or [df]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_enhance_chunk, chunks))
+    else:
+        parts = [_enhance_chunk(chunk) for chunk in chunks]
+    # Mixed int/float chunks (estimated_lifespan_years) widen to float64, as one big frame would
+    return pd.concat(parts, ignore_index=True)
+
+
+def enhance_amazon_dataset(input_csv: str, output_csv: str, chunk_rows: int = FEATURE_ENHANCER_CHUNK_ROWS,
+                           workers: int = FEATURE_ENHANCER_WORKERS):
     """Enhance your existing Amazon dataset with additional features"""
-    enhancer = AmazonFeatureEnhancer()
-    
-    df = pd.read_csv(input_csv)
+    df = read_dataset(input_csv)
     
     # Fix data types to prevent errors
     if 'weight' in df.columns:
@@ -438,20 +629,10 @@ def enhance_amazon_dataset(input_csv: str, output_csv: str):
     if 'co2_emissions' in df.columns:
         df['co2_emissions'] = pd.to_numeric(df['co2_emissions'], errors='coerce').fillna(0.0)
     
-    enhanced_rows = []
-    
-    print(f"🔧 Enhancing {len(df)} Amazon products...")
-    
-    for idx, row in df.iterrows():
-        if idx % 1000 == 0:
-            print(f"  Processed {idx} rows...")
-        
-        product_dict = row.to_dict()
-        enhanced = enhancer.enhance_amazon_product_features(product_dict)
-        enhanced_rows.append(enhanced)
+    print(f"🔧 Enhancing {len(df)} Amazon products in chunks of {chunk_rows} ({workers} workers)...")
     
-    enhanced_df = pd.DataFrame(enhanced_rows)
-    enhanced_df.to_csv(output_csv, index=False)
+    enhanced_df = enhance_frame_chunked(df, chunk_rows, workers)
+    write_dataset(enhanced_df, output_csv)
     
     print(f"✅ Enhanced Amazon dataset saved to {output_csv}")
     print(f"📊 Added {len(enhanced_df.columns) - len(df.columns)} new features")
@@ -1,6 +1,18 @@
+"""
+Mock eco-product generator.
+
+Rows are produced by a generator and written to the CSV as they come, so
+memory stays flat however many products are requested. The old per-row
+time.sleep (a leftover from pacing real scraping) is gone.
+
+    python backend/data/processing/generate_dataset.py [--per-term 100]
+
+For large synthetic training sets use the streaming pipeline instead:
+python -m backend.data.processing.pipeline --help
+"""
+import argparse
 import csv
 import os
-import time
 import random
 from random import choice, uniform
 
@@ -16,7 +28,7 @@ search_terms = [
     "beanie", "necklace", "extension cord", "nail clippers", "glow sticks", "fork"
 ]
 max_products = 100
-rows = []
+COLUMNS = ["title", "material", "weight", "transport", "recyclability", "true_eco_score", "co2_emissions", "origin"]
 
 origins = ["UK", "China", "Germany", "USA", "Italy", "France", "Singapore", "Brazil", "India", "Norway", "Russia", "Japan"]
 
@@ -63,7 +75,6 @@ def mock_product():
         "Aluminum": 1.6,
         "Paper": 0.5
     }.get(material, 1.0)  # 👈 fallback for 'Other' or unexpected material
-    print("🔬 Material chosen:", material)
 
 
     transport_factor = {
@@ -94,38 +105,48 @@ def mock_product():
 # --- Generate data ---
 materials = ["Plastic", "Bamboo", "Other", "Glass", "Steel", "Cardboard", "Aluminum", "Paper",]
 
-for term in search_terms:
-    print(f"\n🔎 Searching: {term}")
-    for _ in range(max_products):
-        product = mock_product()
-        eco_score = assign_score(product["material"], product["weight"], product["transport"])
-
-        rows.append([
-            term,  # ➜ this is the new "title" field
-            product["material"],
-            product["weight"],
-            product["transport"],
-            product["recyclability"],
-            eco_score,
-            product["co2_emissions"],
-            product["origin"]
-        ])
-
-        
-        print(f"✅ Mock Eco Product ➜ {eco_score}")
-        time.sleep(random.uniform(0.1, 0.2))  # faster runs
-
-# --- Save to CSV ---
-base_dir = os.path.dirname(__file__)
-save_path = os.path.join(base_dir, "eco_dataset.csv")
-
-print(f"\n🧮 Total rows generated: {len(rows)}")
-print(f"📄 Saving to: {os.path.abspath(save_path)}")
-print("🔍 Example row with title:", rows[0])
-
-with open(save_path, "a", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(["title","material", "weight", "transport", "recyclability", "true_eco_score", "co2_emissions", "origin"])
-    writer.writerows(rows)
-
-print(f"\n✅ Saved {len(rows)} smart mock products to {save_path}")
+
+def iter_mock_rows(terms=search_terms, per_term=max_products):
+    """Yield one CSV row (in COLUMNS order) per mock product."""
+    for term in terms:
+        print(f"\n🔎 Searching: {term}")
+        for _ in range(per_term):
+            product = mock_product()
+            eco_score = assign_score(product["material"], product["weight"], product["transport"])
+            yield [
+                term,  # ➜ this is the new "title" field
+                product["material"],
+                product["weight"],
+                product["transport"],
+                product["recyclability"],
+                eco_score,
+                product["co2_emissions"],
+                product["origin"]
+            ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate mock eco products")
+    parser.add_argument("--per-term", type=int, default=max_products)
+    args = parser.parse_args()
+
+    # --- Save to CSV ---
+    base_dir = os.path.dirname(__file__)
+    save_path = os.path.join(base_dir, "eco_dataset.csv")
+    print(f"📄 Saving to: {os.path.abspath(save_path)}")
+
+    count = 0
+    with open(save_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in iter_mock_rows(per_term=args.per_term):
+            if count == 0:
+                print("🔍 Example row with title:", row)
+            writer.writerow(row)
+            count += 1
+
+    print(f"\n✅ Saved {count} smart mock products to {save_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Streaming dataset pipeline: source -> clean -> enhance -> label -> sink.
+
+generate_dataset.py kept every row in a list and the dataset expander built
+the whole expanded frame before saving it. Here a source is a generator of
+DataFrame chunks of at most chunk_rows rows. Each chunk goes through the
+chosen stages (plain DataFrame -> DataFrame functions, so they can run in
+worker processes) and is appended to the sink before the next one is read.
+At most `workers * 2` chunks are in flight, so memory depends on chunk_rows,
+not on how many rows are produced.
+
+Sources:
+    synthetic   simulated Amazon products (AmazonDatasetExpander.simulate_products)
+    csv         an existing dataset, streamed from its .arrow copy or the CSV
+    expand      an existing dataset topped up with synthetic rows to --rows
+
+Stages:
+    clean       normalise true_eco_score, drop rows with an invalid score,
+                no material or a non-numeric weight
+    enhance     AmazonFeatureEnhancer.enhance_frame (the enhanced feature columns)
+    label       fill missing recyclability, true_eco_score and co2_emissions
+                with the expander's scoring rules
+
+    python -m backend.data.processing.pipeline --source synthetic --rows 5000000 \\
+        --stages enhance --workers 4 --output common/data/csv/synthetic_training.csv
+    python -m backend.data.processing.pipeline --source expand --input common/data/csv/eco_dataset.csv \\
+        --rows 50000 --stages clean,label --output common/data/csv/expanded_eco_dataset.csv --arrow
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.insert(0, project_root)
+
+from backend.data.processing.dataset_expander import (  # noqa: E402
+    AmazonDatasetExpander, eco_score_labels, emission_factors, recyclability_labels, rounded,
+)
+from backend.data.processing.feature_enhancer import AmazonFeatureEnhancer  # noqa: E402
+from backend.data.storage.datasets import convert, iter_dataset  # noqa: E402
+
+PIPELINE_CHUNK_ROWS = int(os.environ.get("PIPELINE_CHUNK_ROWS", "50000"))
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "1"))
+
+VALID_SCORES = ["A+", "A", "B", "C", "D", "E", "F"]
+
+_expander = None
+_enhancer = None
+
+
+def _get_expander():
+    global _expander
+    if _expander is None:
+        _expander = AmazonDatasetExpander(project_root)
+    return _expander
+
+
+# --- sources -----------------------------------------------------------------
+
+def synthetic_source(rows, chunk_rows=PIPELINE_CHUNK_ROWS, seed=None):
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        yield _get_expander().simulate_products(min(chunk_rows, rows - start), rng)
+
+
+def csv_source(path, chunk_rows=PIPELINE_CHUNK_ROWS):
+    yield from iter_dataset(path, chunk_rows)
+
+
+def expand_source(path, rows, chunk_rows=PIPELINE_CHUNK_ROWS, seed=None):
+    yield from _get_expander().iter_expanded_chunks(path, rows, chunk_rows, seed)
+
+
+# --- stages --------------------------------------------------------------------
+
+def clean(chunk):
+    chunk = chunk.copy()
+    if "true_eco_score" in chunk.columns:
+        # Missing scores stay missing for the label stage; anything else must be a grade
+        score = chunk["true_eco_score"]
+        chunk["true_eco_score"] = score.where(score.isna(), score.astype(str).str.strip().str.upper())
+        chunk = chunk[chunk["true_eco_score"].isna() | chunk["true_eco_score"].isin(VALID_SCORES)]
+    if "weight" in chunk.columns:
+        chunk["weight"] = pd.to_numeric(chunk["weight"], errors="coerce")
+        chunk = chunk[chunk["weight"].notna()]
+    if "material" in chunk.columns:
+        chunk = chunk[chunk["material"].notna()]
+    return chunk
+
+
+def enhance(chunk):
+    global _enhancer
+    if _enhancer is None:
+        _enhancer = AmazonFeatureEnhancer()
+    return _enhancer.enhance_frame(chunk)
+
+
+def label(chunk):
+    chunk = chunk.copy()
+    material = chunk["material"] if "material" in chunk.columns else pd.Series("Other", index=chunk.index)
+    transport = chunk["transport"] if "transport" in chunk.columns else pd.Series("Ship", index=chunk.index)
+    weight = pd.to_numeric(chunk["weight"], errors="coerce") if "weight" in chunk.columns \
+        else pd.Series(np.nan, index=chunk.index)
+
+    filled = {
+        "recyclability": lambda: recyclability_labels(material),
+        "true_eco_score": lambda: eco_score_labels(material, weight, transport),
+        "co2_emissions": lambda: rounded(weight * emission_factors(material, transport)),
+    }
+    for column, compute in filled.items():
+        if column not in chunk.columns:
+            chunk[column] = compute()
+        elif chunk[column].isna().any():
+            chunk[column] = chunk[column].fillna(compute())
+    return chunk
+
+
+STAGES = {"clean": clean, "enhance": enhance, "label": label}
+
+
+def run_stages(chunk, stages):
+    for name in stages:
+        chunk = STAGES[name](chunk)
+    return chunk
+
+
+# --- sink ----------------------------------------------------------------------
+
+class CsvSink:
+    """
+    Appends chunks to `<path>.partial` and renames it to path on close, so
+    readers never see a half-written dataset. Columns are fixed by the first
+    chunk.
+    """
+
+    def __init__(self, path, arrow=False):
+        self.path = path
+        self.arrow = arrow
+        self.rows = 0
+        self._columns = None
+        self._tmp = f"{path}.partial"
+        self._file = None
+
+    def write(self, chunk):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self._tmp, "w", newline="", encoding="utf-8")
+            self._columns = list(chunk.columns)
+            chunk.to_csv(self._file, index=False)
+        else:
+            chunk.reindex(columns=self._columns).to_csv(self._file, index=False, header=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp, self.path)
+        if self.arrow:
+            # Loads the finished CSV once; skip --arrow for outputs that don't fit in memory
+            convert(self.path)
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp)
+
+
+# --- driver --------------------------------------------------------------------
+
+def run(source, stages, sink, workers=PIPELINE_WORKERS):
+    """Push every chunk from source through stages into sink; returns run stats."""
+    stages = tuple(stages)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    started = time.perf_counter()
+    stats = {"chunks": 0, "rows_in": 0, "rows_out": 0}
+
+    def emit(chunk):
+        stats["chunks"] += 1
+        stats["rows_out"] += len(chunk)
+        sink.write(chunk)
+
+    try:
+        if workers <= 1:
+            for chunk in source:
+                stats["rows_in"] += len(chunk)
+                emit(run_stages(chunk, stages))
+        else:
+            # Bounded window keeps chunk order and memory flat while workers stay busy
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in source:
+                    stats["rows_in"] += len(chunk)
+                    pending.append(pool.submit(run_stages, chunk, stages))
+                    if len(pending) >= workers * 2:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    stats["rows_per_second"] = round(stats["rows_out"] / stats["seconds"]) if stats["seconds"] else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream datasets through source -> stages -> CSV sink")
+    parser.add_argument("--source", choices=["synthetic", "csv", "expand"], default="synthetic")
+    parser.add_argument("--input", help="dataset CSV for the csv and expand sources")
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="rows to generate (synthetic) or the target size (expand)")
+    parser.add_argument("--stages", default="clean,enhance,label",
+                        help=f"comma-separated, in order; any of {', '.join(STAGES)} (empty for none)")
+    parser.add_argument("--output", required=True, help="CSV to write")
+    parser.add_argument("--chunk-rows", type=int, default=PIPELINE_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=PIPELINE_WORKERS)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--arrow", action="store_true", help="also write the .arrow copy of the output")
+    args = parser.parse_args()
+
+    if args.source != "synthetic" and not args.input:
+        parser.error(f"--source {args.source} needs --input")
+    if args.source == "synthetic":
+        source = synthetic_source(args.rows, args.chunk_rows, args.seed)
+    elif args.source == "csv":
+        source = csv_source(args.input, args.chunk_rows)
+    else:
+        source = expand_source(args.input, args.rows, args.chunk_rows, args.seed)
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+
+    print(f"🚚 {args.source} -> {' -> '.join(stages) or '(no stages)'} -> {args.output} "
+          f"({args.chunk_rows} rows/chunk, {args.workers} worker(s))")
+    stats = run(source, stages, CsvSink(args.output, arrow=args.arrow), args.workers)
+    print(f"✅ Wrote {stats['rows_out']} rows in {stats['chunks']} chunks: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Precomputed dashboard aggregates over eco_dataset.csv and the submission log.
+
+/api/dashboard-metrics, /insights, /api/eco-data and /api/ml-audit each ran
+pd.read_csv + dropna + value_counts on the dataset, and the dashboard also
+reloaded every submission, on every request. DashboardAggregates keeps:
+
+- dataset views (the eco-data and insights payloads, score/material counts,
+  the ml-audit dataset summary), rebuilt only when the CSV's mtime or size
+  changes;
+- submission counts and distributions, folded in incrementally from the
+  event log's tail(), so each request only reads what was appended since the
+  previous one. This includes appends from other gunicorn workers. A
+  rewrite or compaction of the log triggers one full rebuild.
+
+Each view is serialised once per version. Its ETag is derived from the
+version, so If-None-Match polling is answered with 304 without touching the
+data at all.
+"""
+import hashlib
+import os
+import threading
+from collections import Counter
+
+DATASET_COLUMNS = ["material", "true_eco_score", "co2_emissions"]
+INSIGHTS_LIMIT = 1000  # rows sent to the insights chart
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of path, or None when it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SubmissionTotals:
+    """Running counts over the submission log"""
+
+    def __init__(self):
+        self.total = 0
+        self.non_empty = 0
+        self.materials = Counter()
+        self.scores = Counter()
+
+    def add(self, submission):
+        self.total += 1
+        if submission:
+            self.non_empty += 1
+        if isinstance(submission, dict):
+            material = (submission.get("raw_input") or {}).get("material", "Unknown")
+            if material != "Unknown":
+                self.materials[material] += 1
+            predicted_label = submission.get("predicted_label", "Unknown")
+            if predicted_label != "Unknown":
+                self.scores[predicted_label] += 1
+
+
+class DashboardAggregates:
+    """Dataset views keyed on the CSV's stamp plus submission totals tailed from the event log"""
+
+    def __init__(self, dataset_path, submission_log, dumps):
+        self.dataset_path = dataset_path
+        self.submission_log = submission_log
+        self.dumps = dumps  # so cached bodies match what jsonify would send
+        self._lock = threading.RLock()
+        self._dataset_stamp = False  # never loaded (None means the CSV is missing)
+        self._dataset = {}
+        self._cursor = None
+        self._submissions = SubmissionTotals()
+        self._bodies = {}
+        self.counts = {"dataset_loads": 0, "submission_rebuilds": 0, "tailed": 0, "served": 0, "renders": 0}
+
+    # --- sources --------------------------------------------------------------
+
+    def _refresh_dataset(self):
+        stamp = file_stamp(self.dataset_path)
+        if stamp == self._dataset_stamp:
+            return
+        try:
+            self._dataset = self._load_dataset() if stamp else {}
+        except Exception as e:
+            # Served as empty until the file changes again, instead of failing every request
+            print(f"⚠️ Could not load {self.dataset_path}: {e}")
+            self._dataset = {}
+        self._dataset_stamp = stamp
+        self.counts["dataset_loads"] += 1
+
+    def _load_dataset(self):
+        from backend.data.storage.datasets import read_dataset
+
+        df = read_dataset(self.dataset_path)
+        columns = df.columns
+        scored = df.dropna(subset=["material", "true_eco_score"])
+        clean = df.dropna(subset=DATASET_COLUMNS)
+        return {
+            "eco_data": clean.to_dict(orient="records"),
+            "insights": clean[DATASET_COLUMNS].head(INSIGHTS_LIMIT).to_dict(orient="records"),
+            "total_products": len(scored),
+            "materials": Counter(scored["material"].value_counts().to_dict()),
+            "scores": Counter(scored["true_eco_score"].value_counts().to_dict()),
+            "analysis": {
+                "total_samples": len(df),
+                "unique_materials": df["material"].nunique() if "material" in columns else 0,
+                "unique_origins": df["origin"].nunique() if "origin" in columns else 0,
+                "score_distribution": df["true_eco_score"].value_counts().to_dict() if "true_eco_score" in columns else {},
+            },
+        }
+
+    def _refresh_submissions(self):
+        records, cursor = self.submission_log.tail(self._cursor)
+        if records is None:
+            # The log was rewritten (admin edit or compaction): count it again from the start
+            self._submissions = SubmissionTotals()
+            records, cursor = self.submission_log.tail(None)
+            self.counts["submission_rebuilds"] += 1
+        for record in records:
+            self._submissions.add(record)
+        self._cursor = cursor
+        self.counts["tailed"] += len(records)
+
+    def refresh(self):
+        with self._lock:
+            self._refresh_dataset()
+            self._refresh_submissions()
+
+    # --- views ----------------------------------------------------------------
+
+    def _version(self, view):
+        if view == "dashboard":
+            return (self._dataset_stamp, self._cursor)
+        return self._dataset_stamp
+
+    def _render(self, view):
+        if view == "eco_data":
+            return self._dataset.get("eco_data", [])
+        if view == "insights":
+            return self._dataset.get("insights", [])
+        if view == "dashboard":
+            return self._dashboard()
+        raise KeyError(view)
+
+    def _dashboard(self):
+        materials = self._dataset.get("materials", Counter()) + self._submissions.materials
+        scores = self._dataset.get("scores", Counter()) + self._submissions.scores
+        return {
+            "stats": {
+                "total_products": self._dataset.get("total_products", 0),
+                "total_materials": len(materials),
+                "total_predictions": self._submissions.total,
+                "recent_activity": self._submissions.non_empty,
+            },
+            "score_distribution": [
+                {"name": score, "value": count} for score, count in sorted(scores.items())
+            ],
+            "material_distribution": [
+                {"name": material, "value": count}
+                for material, count in sorted(materials.items(), key=lambda x: x[1], reverse=True)[:10]
+            ],
+        }
+
+    def body(self, view):
+        """(serialised JSON, etag) for view, rendered at most once per version."""
+        with self._lock:
+            self.refresh()
+            version = self._version(view)
+            cached = self._bodies.get(view)
+            if cached is None or cached[0] != version:
+                body = self.dumps(self._render(view))
+                etag = hashlib.sha1(f"{view}:{version}".encode()).hexdigest()
+                cached = self._bodies[view] = (version, body, etag)
+                self.counts["renders"] += 1
+            self.counts["served"] += 1
+            return cached[1], cached[2]
+
+    def dataset_analysis(self):
+        """Dataset summary for /api/ml-audit, or None when the CSV is missing."""
+        with self._lock:
+            self._refresh_dataset()
+            analysis = self._dataset.get("analysis")
+            return dict(analysis) if analysis is not None else None
+
+    def stats(self):
+        return {
+            "dataset_rows": len(self._dataset.get("eco_data", [])),
+            "submissions": self._submissions.total,
+            **self.counts,
+        }
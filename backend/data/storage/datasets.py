@@ -0,0 +1,170 @@
+"""
+Columnar copies of the CSV datasets, read through memory maps.
+
+Training, the feature enhancer, the dataset expander and the dashboard
+aggregates all re-parsed CSV text with pandas. expanded_eco_dataset.csv alone
+is 50k rows. Every CSV now gets an Arrow IPC (Feather v2) sibling:
+
+    common/data/csv/eco_dataset.csv  ->  common/data/csv/eco_dataset.arrow
+
+The .arrow file is written uncompressed, so pyarrow memory-maps it and the
+numeric columns are used straight from the page cache without being copied.
+String columns with few distinct values (material, origin, transport,
+true_eco_score, ...) are dictionary encoded: each row stores a small integer
+code and the strings are kept once. Parquet would be smaller on disk, but its
+pages have to be decompressed and decoded into new buffers on every read;
+nothing in the repo needs the size saving.
+
+The CSV stays the editable source of truth (and what the frontend and git
+diffs see). read_dataset() uses the .arrow copy while it is at least as new
+as the CSV, converting it first when it is missing or stale, and falls back to
+pandas' CSV parser when pyarrow isn't installed or the directory isn't
+writable. Either way it returns the same DataFrame. write_dataset() writes
+both files, and iter_dataset() streams either one in fixed-size chunks.
+
+    df = read_dataset(ECO_DATASET, columns=["material", "true_eco_score"])
+    python -m backend.data.storage.datasets convert [csv ...]
+
+Run tools/benchmarks/bench_datasets.py for CSV vs Arrow read times.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # CSV-only: every read parses the CSV with pandas
+    pa = feather = None
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+CSV_DIR = os.path.join(BASE_DIR, "common", "data", "csv")
+
+ECO_DATASET = os.path.join(CSV_DIR, "eco_dataset.csv")
+EXPANDED_DATASET = os.path.join(CSV_DIR, "expanded_eco_dataset.csv")
+ENHANCED_DATASET = os.path.join(CSV_DIR, "enhanced_amazon_dataset.csv")
+CANONICAL_DATASETS = [ECO_DATASET, EXPANDED_DATASET, ENHANCED_DATASET]
+
+# String columns with at most this share of distinct values are dictionary encoded
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+
+def arrow_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def is_fresh(csv_path):
+    """True if the .arrow copy exists and is at least as new as the CSV."""
+    try:
+        return os.stat(arrow_path(csv_path)).st_mtime_ns >= os.stat(csv_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def read_csv(csv_path, columns=None):
+    # low_memory=False: one dtype per column for the whole file, as the Arrow copy has
+    return pd.read_csv(csv_path, usecols=columns, low_memory=False)
+
+
+def _dictionary_encode(table):
+    for i, field in enumerate(table.schema):
+        if not (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            continue
+        column = table.column(i)
+        if len(column) and len(column.unique()) <= DICTIONARY_MAX_DISTINCT_RATIO * len(column):
+            table = table.set_column(i, field.name, column.dictionary_encode())
+    return table
+
+
+def convert(csv_path):
+    """Write the .arrow copy of csv_path and return its path."""
+    if feather is None:
+        raise RuntimeError("pyarrow is not installed")
+    # Always from the CSV text, so both files give the same dtypes (lists, mixed objects, ...)
+    table = _dictionary_encode(pa.Table.from_pandas(read_csv(csv_path), preserve_index=False))
+    path = arrow_path(csv_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return path
+
+
+def _to_pandas(table, categorical):
+    if not categorical:
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    df = table.to_pandas()
+    for name, column in zip(table.column_names, table.columns):
+        # Object-dtype strings come back with None for nulls; read_csv gives NaN
+        if column.null_count and df[name].dtype == object:
+            df[name] = df[name].where(df[name].notna(), np.nan)
+    return df
+
+
+def read_dataset(csv_path, columns=None, categorical=False):
+    """
+    Load a dataset (or just `columns` of it) by its CSV path.
+
+    categorical=True returns dictionary-encoded columns as pandas
+    Categoricals instead of strings (less memory, faster groupby, but
+    value_counts() then also lists categories with no rows).
+    """
+    if feather is not None:
+        if not is_fresh(csv_path):
+            try:
+                convert(csv_path)
+            except OSError as e:
+                print(f"⚠️ Could not write {arrow_path(csv_path)}: {e}. Reading the CSV instead.")
+        if is_fresh(csv_path):
+            table = feather.read_table(arrow_path(csv_path), columns=columns, memory_map=True)
+            return _to_pandas(table, categorical)
+    df = read_csv(csv_path, columns)
+    # usecols doesn't keep the requested order
+    return df[columns] if columns is not None else df
+
+
+def iter_dataset(csv_path, chunk_rows, columns=None):
+    """
+    Yield the dataset as DataFrames of at most chunk_rows rows, for streaming
+    over files too big to load at once. Chunks are sliced out of the memory
+    map (or parsed from the CSV chunk by chunk), so memory stays flat.
+    """
+    if feather is not None and is_fresh(csv_path):
+        table = feather.read_table(arrow_path(csv_path), columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            yield _to_pandas(pa.Table.from_batches([batch]), categorical=False)
+        return
+    for df in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows):
+        yield df[columns] if columns is not None else df
+
+
+def write_dataset(df, csv_path):
+    """Save df as csv_path plus its .arrow copy."""
+    df.to_csv(csv_path, index=False)
+    if feather is not None:
+        convert(csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CSV datasets to memory-mappable Arrow IPC files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = sub.add_parser("convert", help="write/refresh the .arrow copy of each CSV")
+    convert_cmd.add_argument("csv", nargs="*", default=CANONICAL_DATASETS,
+                             help="CSV files (default: the canonical datasets)")
+    args = parser.parse_args()
+
+    if feather is None:
+        print("❌ pyarrow is not installed")
+        sys.exit(1)
+    for csv_path in args.csv:
+        path = convert(os.path.abspath(csv_path))
+        print(f"✅ {os.path.relpath(csv_path)} ({os.path.getsize(csv_path) / 1024:.0f} KiB) -> "
+              f"{os.path.relpath(path)} ({os.path.getsize(path) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
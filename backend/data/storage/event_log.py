@@ -0,0 +1,327 @@
+"""
+Append-only NDJSON event log with a background batching writer.
+
+log_submission and save_feedback used to load the whole JSON array, append
+one record and rewrite the file inside the request. EventLog.append() only
+queues the record; a writer thread drains the queue in batches, writes each
+batch with one O_APPEND write and fsyncs it. Requests never wait on disk, and
+gunicorn workers appending to the same log are serialised by an flock on
+<path>.lock, so no write is lost.
+
+Layout on disk:
+
+    submitted_predictions.ndjson        active segment, one JSON record per line
+    submitted_predictions.ndjson.000001 rotated segments, oldest first
+    submitted_predictions.ndjson.lock   cross-process lock file
+
+The active segment is rotated once it passes max_bytes. compact() merges all
+segments into one, and rewrite(fn) does the same while passing the records
+through fn (used for admin edits, which are rare). Readers stream a consistent
+snapshot with records() and never hold the lock while the caller consumes
+them.
+
+A legacy JSON array file (the old format) is imported on first use.
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single-process locking only
+    fcntl = None
+
+EVENT_LOG_BATCH_SIZE = int(os.environ.get("EVENT_LOG_BATCH_SIZE", "256"))
+EVENT_LOG_FLUSH_INTERVAL = float(os.environ.get("EVENT_LOG_FLUSH_INTERVAL", "0.2"))
+EVENT_LOG_MAX_BYTES = int(os.environ.get("EVENT_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_FLUSH = object()
+
+
+class EventLog:
+    """One NDJSON log (active segment plus rotated segments) written by a background thread"""
+
+    def __init__(self, path, legacy_json=None, batch_size=EVENT_LOG_BATCH_SIZE,
+                 flush_interval=EVENT_LOG_FLUSH_INTERVAL, max_bytes=EVENT_LOG_MAX_BYTES):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self._thread_lock = threading.RLock()
+        self._queue = None
+        self._writer = None
+        self._pid = None
+        self.counts = {"appended": 0, "written": 0, "batches": 0, "fsyncs": 0, "rotations": 0, "errors": 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if legacy_json:
+            self._import_legacy(legacy_json)
+
+    # --- locking -------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- writing -------------------------------------------------------------
+
+    def _ensure_writer(self):
+        # Threads don't survive fork: gunicorn workers each start their own on first append
+        if self._writer is not None and self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._writer is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._run, name=f"event-log-{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def append(self, record):
+        """Queue one record; returns immediately."""
+        self._ensure_writer()
+        self.counts["appended"] += 1
+        self._queue.put(record)
+
+    def flush(self, timeout=10):
+        """Block until everything appended so far is on disk."""
+        if self._writer is None or self._pid != os.getpid():
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, tuple) and len(item) == 2 and item[0] is _FLUSH:
+                    waiters.append(item[1])
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    self.counts["errors"] += 1
+                    print(f"❌ Event log write failed for {self.path}: {e}")
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, records):
+        payload = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records).encode("utf-8")
+        with self._locked():
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+                os.fsync(fd)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            self.counts["written"] += len(records)
+            self.counts["batches"] += 1
+            self.counts["fsyncs"] += 1
+            if size >= self.max_bytes:
+                self._rotate()
+
+    # --- segments, rotation and compaction -------------------------------------
+
+    def segments(self):
+        """Rotated segment paths, oldest first (the active segment is self.path)."""
+        return sorted(p for p in glob.glob(glob.escape(self.path) + ".*") if p.rsplit(".", 1)[-1].isdigit())
+
+    def _rotate(self):
+        # Caller holds the lock
+        existing = self.segments()
+        number = int(existing[-1].rsplit(".", 1)[-1]) + 1 if existing else 1
+        os.replace(self.path, f"{self.path}.{number:06d}")
+        self.counts["rotations"] += 1
+
+    def rotate(self):
+        with self._locked():
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                self._rotate()
+
+    def rewrite(self, transform=None):
+        """
+        Merge every segment into a single active segment, passing the records
+        through transform(iterator) -> iterable first. Linear in the log size; meant for
+        compaction and rare admin edits, not the request path.
+        """
+        self.flush()
+        with self._locked():
+            sources = [*self.segments(), self.path]
+            records = self._iter_files(sources)
+            if transform is not None:
+                records = transform(records)
+            tmp = self.path + ".compact"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            for segment in sources[:-1]:
+                os.remove(segment)
+
+    def compact(self):
+        self.rewrite()
+
+    # --- reading -------------------------------------------------------------
+
+    @staticmethod
+    def _iter_files(paths):
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                yield from _parse_lines(f, path)
+
+    def records(self):
+        """
+        Stream every record, oldest first. Segment files are opened under a
+        shared lock, so rotation or compaction running meanwhile can't make
+        the reader skip or repeat records; the lock is released before the
+        first record is yielded.
+        """
+        handles = []
+        with self._locked(exclusive=False):
+            for path in [*self.segments(), self.path]:
+                try:
+                    handle = open(path, "r", encoding="utf-8")
+                except FileNotFoundError:
+                    continue
+                handle.seek(0, os.SEEK_END)
+                handles.append((handle, handle.tell(), path))
+                handle.seek(0)
+        try:
+            for handle, size, path in handles:
+                # Stop at the size seen at snapshot time; later appends belong to the next read
+                yield from _parse_lines(_bounded_lines(handle, size), path)
+        finally:
+            for handle, _, _ in handles:
+                handle.close()
+
+    def tail(self, cursor=None):
+        """
+        Records appended since cursor, plus the cursor to pass next time.
+
+        A cursor is (inode, offset) of the last file read. Rotation renames
+        the active segment without changing its inode, so reading resumes in
+        the rotated segment and carries on through the newer ones. Returns
+        (None, cursor) when the cursor's file is gone (rewrite() or compact()
+        replaced it): the caller has to start again from tail(None).
+        """
+        with self._locked(exclusive=False):
+            files = []
+            for path in [*self.segments(), self.path]:
+                try:
+                    handle = open(path, "rb")
+                except FileNotFoundError:
+                    continue
+                stat = os.fstat(handle.fileno())
+                files.append((handle, stat.st_ino, stat.st_size))
+
+        try:
+            start = 0
+            if cursor is not None:
+                inode, offset = cursor
+                start = next((i for i, (_, ino, size) in enumerate(files) if ino == inode and size >= offset), None)
+                if start is None:
+                    return None, cursor
+            records, last = [], cursor
+            for i, (handle, inode, size) in enumerate(files[start:], start):
+                offset = cursor[1] if cursor is not None and i == start else 0
+                handle.seek(offset)
+                data = handle.read(size - offset)
+                # Only complete lines: a batch being written now is picked up next time
+                end = data.rfind(b"\n") + 1
+                lines = data[:end].decode("utf-8").splitlines()
+                records.extend(_parse_lines(lines, self.path))
+                last = (inode, offset + end)
+            return records, last
+        finally:
+            for handle, _, _ in files:
+                handle.close()
+
+    def size_bytes(self):
+        return sum(os.path.getsize(p) for p in [*self.segments(), self.path] if os.path.exists(p))
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "segments": len(self.segments()) + (1 if os.path.exists(self.path) else 0),
+            "bytes": self.size_bytes(),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            **self.counts,
+        }
+
+    # --- legacy JSON import ----------------------------------------------------
+
+    def _import_legacy(self, legacy_json):
+        with self._locked():
+            if not os.path.exists(legacy_json) or os.path.exists(self.path) or self.segments():
+                return
+            try:
+                with open(legacy_json, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Could not import {legacy_json} into {self.path}: {e}")
+                return
+            tmp = self.path + ".import"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in data if isinstance(data, list) else [data]:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            print(f"📦 Imported {legacy_json} into {self.path}")
+
+
+def _bounded_lines(handle, limit):
+    read = 0
+    for line in handle:
+        read += len(line.encode("utf-8"))
+        if read > limit:
+            return
+        yield line
+
+
+def _parse_lines(lines, path):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # A torn last line from a crash mid-write; everything before it is intact
+            print(f"⚠️ Skipping unreadable line in {path}")
@@ -0,0 +1,419 @@
+"""
+SQLite-backed job queue with an in-process worker pool.
+
+/estimate_emissions used to hold a gunicorn sync worker for the whole
+Selenium scrape (tens of seconds, forever if a CAPTCHA waited on input()), so
+a few concurrent extension users were enough to use up every worker. An
+asynchronous request now only inserts a row here and gets a job id back. Worker
+threads claim queued jobs, run the handler registered for the job's kind and
+store the result. Clients poll GET /jobs/<id>, or pass a callback_url, which
+gets the finished job POSTed to it.
+
+Schema (PRAGMA user_version = 1):
+
+    jobs
+        id            uuid4 hex, returned to the client
+        kind          handler name ("estimate_emissions")
+        dedupe_key    identical requests: a second submit while one is queued or
+                      running returns the existing job (unique partial index)
+        group_key     requests sharing the expensive part (the ASIN): a worker
+                      claims every queued job of the group at once, so the
+                      handler scrapes once and scores each job
+        status        queued | running | done | failed | blocked
+        payload, result   JSON
+        error, callback_url, callback_status
+        attempts      claims so far; a running job whose lease expired (its
+                      process died) is requeued until JOB_MAX_ATTEMPTS
+        created_at, started_at, finished_at, lease_until   unix times
+
+"blocked" is terminal: the site served a CAPTCHA, and retrying from the same IP
+straight away won't help. The database is shared by every gunicorn worker on
+the host. Each process starts JOB_WORKERS threads the first time it submits
+or calls start(), and any process's workers can claim any job. Finished jobs
+are deleted after JOB_RETENTION_SECONDS.
+
+A callback_url is client input that the server will POST to. It must be
+http(s), and its host must resolve only to public addresses: loopback,
+private, link-local and other reserved ranges are refused. The exception is
+a host listed in JOB_CALLBACK_ALLOWED_HOSTS, which is trusted as is. The
+check runs on submit and again just before sending, in case DNS changed in
+between. Redirects are not followed. callback_status only reports the HTTP
+status, "error" or "rejected", so it can't be used to map the server's network.
+"""
+import contextlib
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import requests
+
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# A running job is presumed dead (and requeued) once its lease runs out
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "2"))
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", str(24 * 3600)))
+# Idle workers re-check the database this often for jobs submitted by other processes
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+JOB_CALLBACK_TIMEOUT = float(os.environ.get("JOB_CALLBACK_TIMEOUT", "5"))
+# Comma-separated callback hosts exempt from the public-address check (e.g. an internal webhook relay)
+JOB_CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.environ.get("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+}
+
+QUEUED, RUNNING, DONE, FAILED, BLOCKED = "queued", "running", "done", "failed", "blocked"
+TERMINAL = (DONE, FAILED, BLOCKED)
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,
+    kind             TEXT NOT NULL,
+    dedupe_key       TEXT,
+    group_key        TEXT,
+    status           TEXT NOT NULL,
+    payload          TEXT NOT NULL,
+    result           TEXT,
+    error            TEXT,
+    callback_url     TEXT,
+    callback_status  TEXT,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    created_at       REAL NOT NULL,
+    started_at       REAL,
+    finished_at      REAL,
+    lease_until      REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_in_flight ON jobs (kind, dedupe_key)
+    WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_group ON jobs (kind, group_key, status);
+"""
+
+PUBLIC_FIELDS = ("id", "kind", "status", "attempts", "created_at", "started_at", "finished_at",
+                 "callback_status")
+
+
+def _row_to_job(row):
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+    return job
+
+
+def check_callback_url(url, allowed_hosts=None):
+    """Raise ValueError unless url is http(s) and its host resolves only to public addresses."""
+    allowed_hosts = JOB_CALLBACK_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        raise ValueError("callback_url is not a valid URL")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if host in allowed_hosts:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError("callback_url host does not resolve")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError("callback_url must point to a public host")
+
+
+def public_view(job):
+    """The fields GET /jobs/<id> and callbacks expose (no payload, no internal keys)."""
+    view = {field: job[field] for field in PUBLIC_FIELDS}
+    if job["status"] == DONE:
+        view["result"] = job["result"]
+    elif job["status"] in (FAILED, BLOCKED):
+        view["error"] = job["error"]
+    return view
+
+
+class JobQueue:
+    """
+    submit() from request handlers, a handler per kind registered with
+    register(kind, fn). fn(jobs) gets a list of claimed jobs of one group and
+    returns one (status, value) per job, in order: (DONE, result dict) or
+    (FAILED | BLOCKED, error message). If fn raises, every job in the batch fails.
+    """
+
+    def __init__(self, path=JOB_DB_PATH, workers=JOB_WORKERS, lease_seconds=JOB_LEASE_SECONDS,
+                 max_attempts=JOB_MAX_ATTEMPTS, retention_seconds=JOB_RETENTION_SECONDS,
+                 poll_interval=JOB_POLL_INTERVAL):
+        self.path = path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._last_purge = 0.0
+        self.counts = {"submitted": 0, "coalesced": 0, "claimed": 0, "batches": 0, "requeued": 0,
+                       "callbacks_sent": 0, "callbacks_failed": 0, "handler_errors": 0, "stale_finishes": 0}
+        self.counts.update({status: 0 for status in TERMINAL})
+        self._schema_ready = False
+
+    # --- connections and transactions --------------------------------------
+
+    def _conn(self):
+        # Connections don't survive fork either: key them by pid as well as thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # isolation_level=None: transactions are opened explicitly by transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 30000")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self._schema_ready = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextlib.contextmanager
+    def transaction(self):
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front: claims from two processes never race
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    # --- producer side -------------------------------------------------------
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def submit(self, kind, payload, dedupe_key=None, group_key=None, callback_url=None):
+        """
+        Queue a job and return (job, coalesced). coalesced is True when an
+        identical job (same kind and dedupe_key) was already queued or running;
+        that job is returned instead of a new one.
+        """
+        if callback_url:
+            check_callback_url(callback_url)
+        now = time.time()
+        with self.transaction() as conn:
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND dedupe_key = ? AND status IN (?, ?)",
+                    (kind, dedupe_key, QUEUED, RUNNING),
+                ).fetchone()
+                if row is not None:
+                    self.counts["coalesced"] += 1
+                    return _row_to_job(row), True
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, group_key, status, payload, callback_url, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, dedupe_key, group_key, QUEUED, json.dumps(payload), callback_url, now),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        self.counts["submitted"] += 1
+        self.start()
+        self._wake.set()
+        return _row_to_job(row), False
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    # --- consumer side -------------------------------------------------------
+
+    def claim(self):
+        """Mark the oldest queued job and the rest of its group running; [] when idle."""
+        now = time.time()
+        with self.transaction() as conn:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return []
+            if row["group_key"] is not None:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND kind = ? AND group_key = ? ORDER BY created_at",
+                    (QUEUED, row["kind"], row["group_key"]),
+                ).fetchall()
+            else:
+                rows = [row]
+            ids = [r["id"] for r in rows]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, started_at = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                [(RUNNING, now, now + self.lease_seconds, job_id) for job_id in ids],
+            )
+            placeholders = ",".join("?" * len(ids))
+            rows = conn.execute(f"SELECT * FROM jobs WHERE id IN ({placeholders}) ORDER BY created_at", ids).fetchall()
+        self.counts["claimed"] += len(rows)
+        return [_row_to_job(r) for r in rows]
+
+    def _expire_leases(self, conn, now):
+        expired = conn.execute(
+            "SELECT id, attempts FROM jobs WHERE status = ? AND lease_until < ?", (RUNNING, now)
+        ).fetchall()
+        for row in expired:
+            if row["attempts"] >= self.max_attempts:
+                conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                             (FAILED, "worker lease expired", now, row["id"]))
+            else:
+                conn.execute("UPDATE jobs SET status = ?, lease_until = NULL WHERE id = ?", (QUEUED, row["id"]))
+                self.counts["requeued"] += 1
+
+    def finish(self, job_id, status, value=None, attempt=None):
+        """
+        Store a terminal outcome: value is the result dict for DONE, else the
+        error message. Only a job still running under the caller's claim is
+        updated (attempt is the job's attempts as claimed). If the lease ran
+        out and the job was requeued, reclaimed or failed meanwhile, nothing is
+        written and None is returned, so a late run can't overwrite the result
+        or fire the callback a second time.
+        """
+        if status not in TERMINAL:
+            raise ValueError(f"{status!r} is not a terminal status")
+        result, error = (json.dumps(value, default=str), None) if status == DONE else (None, value)
+        query = ("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL"
+                 " WHERE id = ? AND status = ?")
+        params = [status, result, error, time.time(), job_id, RUNNING]
+        if attempt is not None:
+            query += " AND attempts = ?"
+            params.append(attempt)
+        with self.transaction() as conn:
+            updated = conn.execute(query, params).rowcount
+        if not updated:
+            self.counts["stale_finishes"] += 1
+            print(f"⚠️ Job {job_id} was no longer ours to finish (lease expired); dropping the {status} outcome")
+            return None
+        self.counts[status] += 1
+        return self.get(job_id)
+
+    def run_batch(self, jobs):
+        """Run the handler for one claimed batch and store every outcome."""
+        self.counts["batches"] += 1
+        handler = self.handlers.get(jobs[0]["kind"])
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for {jobs[0]['kind']!r}")
+            outcomes = list(handler(jobs))
+            if len(outcomes) != len(jobs):
+                raise RuntimeError(f"handler returned {len(outcomes)} outcomes for {len(jobs)} jobs")
+        except Exception as e:
+            self.counts["handler_errors"] += 1
+            print(f"❌ Job handler failed for {len(jobs)} {jobs[0]['kind']} job(s): {e}")
+            outcomes = [(FAILED, str(e))] * len(jobs)
+        for job, (status, value) in zip(jobs, outcomes):
+            finished = self.finish(job["id"], status, value, attempt=job["attempts"])
+            if finished and finished["callback_url"]:
+                self._send_callback(finished)
+
+    def _send_callback(self, job):
+        # callback_status is visible to clients: keep failure details in the server log
+        try:
+            check_callback_url(job["callback_url"])
+            response = requests.post(job["callback_url"], json=public_view(job), timeout=JOB_CALLBACK_TIMEOUT,
+                                     allow_redirects=False)
+            callback_status = f"http {response.status_code}"
+            self.counts["callbacks_sent" if 200 <= response.status_code < 300 else "callbacks_failed"] += 1
+        except ValueError as e:
+            print(f"⚠️ Callback for job {job['id']} refused: {e}")
+            callback_status = "rejected"
+            self.counts["callbacks_failed"] += 1
+        except requests.RequestException as e:
+            print(f"⚠️ Callback for job {job['id']} failed: {e}")
+            callback_status = "error"
+            self.counts["callbacks_failed"] += 1
+        with self.transaction() as conn:
+            conn.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job["id"]))
+
+    def purge(self, older_than=None):
+        """Delete finished jobs older than the retention window; returns how many."""
+        cutoff = time.time() - (self.retention_seconds if older_than is None else older_than)
+        with self.transaction() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(TERMINAL))}) AND finished_at < ?",
+                (*TERMINAL, cutoff),
+            ).rowcount
+        self._last_purge = time.time()
+        return deleted
+
+    # --- worker pool ---------------------------------------------------------
+
+    def start(self):
+        """Start this process's worker threads (once per process; threads don't survive fork)."""
+        if self.workers <= 0 or (self._threads and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _work(self):
+        while True:
+            # Cleared before claiming, so a submit during the claim is not missed
+            self._wake.clear()
+            try:
+                jobs = self.claim()
+            except sqlite3.Error as e:
+                print(f"❌ Job queue claim failed: {e}")
+                jobs = []
+            if jobs:
+                try:
+                    self.run_batch(jobs)
+                except Exception as e:
+                    # Their leases expire and the jobs are retried; keep the thread alive
+                    print(f"❌ Job worker error: {e}")
+                continue
+            if time.time() - self._last_purge > 600:
+                self.purge()
+            self._wake.wait(self.poll_interval)
+
+    def run_until_idle(self):
+        """Drain the queue on the calling thread (scripts and tests); returns batches run."""
+        batches = 0
+        while True:
+            jobs = self.claim()
+            if not jobs:
+                return batches
+            self.run_batch(jobs)
+            batches += 1
+
+    def stats(self):
+        by_status = dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        alive = sum(thread.is_alive() for thread in self._threads) if self._pid == os.getpid() else 0
+        return {
+            "path": self.path,
+            "workers": self.workers,
+            "workers_alive": alive,
+            "jobs": {status: by_status.get(status, 0) for status in (QUEUED, RUNNING, *TERMINAL)},
+            "counts": dict(self.counts),
+        }
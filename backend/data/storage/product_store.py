@@ -0,0 +1,390 @@
+"""
+SQLite product store: scraped products, brand origins and learned context patterns.
+
+Replaces priority_products.json, bulk_scraped_products.json,
+cleaned_products.json and brand_locations.json, which were read whole and
+rewritten with json.dump on every update. Each update is now a single-row
+upsert, and concurrent writers (orchestrator workers, the scheduler) are
+serialised by SQLite instead of racing on the files. WAL mode lets readers
+carry on while a write is in progress.
+
+Schema (PRAGMA user_version = 1):
+
+    products          one row per (collection, asin)
+        collection    "priority" | "bulk" | "cleaned"  (the three old product files)
+        asin          ASIN, or "title:<sha1>" for rows scraped without one
+        title, brand_key, origin, confidence   indexed/queryable copies of product fields
+        data          the full product dict as JSON
+        updated_at    unix time of the last upsert
+
+    brands            one row per brand_locations entry without a product context
+        brand_key     lowercase brand
+        country, city, learned_from, confidence
+        data          the full entry as JSON ({"origin": {...}, "fulfillment": ...})
+
+    context_patterns  brand + product-type combinations learned by
+                      auto_learn_context_specific_brand ("karrimor_casual_backpack")
+        context_key   brand_key + "_" + product_context
+        brand_key, product_context, country, confidence
+        data          the full entry as JSON
+
+One-shot migration and export of the legacy JSON files:
+
+    python -m backend.data.storage.product_store import --dir . [--db products.db]
+    python -m backend.data.storage.product_store export --dir exports/
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PRODUCT_DB_PATH = os.environ.get("PRODUCT_DB_PATH", "products.db")
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    collection  TEXT NOT NULL,
+    asin        TEXT NOT NULL,
+    title       TEXT,
+    brand_key   TEXT,
+    origin      TEXT,
+    confidence  TEXT,
+    data        TEXT NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (collection, asin)
+);
+CREATE INDEX IF NOT EXISTS products_by_brand ON products (brand_key);
+CREATE INDEX IF NOT EXISTS products_by_update ON products (collection, updated_at);
+
+CREATE TABLE IF NOT EXISTS brands (
+    brand_key     TEXT PRIMARY KEY,
+    country       TEXT,
+    city          TEXT,
+    learned_from  TEXT,
+    confidence    TEXT,
+    data          TEXT NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS brands_by_country ON brands (country);
+
+CREATE TABLE IF NOT EXISTS context_patterns (
+    context_key      TEXT PRIMARY KEY,
+    brand_key        TEXT NOT NULL,
+    product_context  TEXT NOT NULL,
+    country          TEXT,
+    confidence       TEXT,
+    data             TEXT NOT NULL,
+    updated_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS context_patterns_by_brand ON context_patterns (brand_key, product_context);
+"""
+
+COLLECTIONS = ("priority", "bulk", "cleaned")
+
+# Legacy file per collection; priority was a dict keyed by ASIN, the others lists
+LEGACY_FILES = {
+    "priority": "priority_products.json",
+    "bulk": "bulk_scraped_products.json",
+    "cleaned": "cleaned_products.json",
+}
+LEGACY_BRAND_FILE = "brand_locations.json"
+
+
+def product_key(product):
+    asin = product.get("asin")
+    if asin:
+        return asin
+    title = (product.get("title") or "").strip().lower()
+    return "title:" + hashlib.sha1(title.encode("utf-8")).hexdigest()[:16]
+
+
+def _brand_key(product):
+    brand = product.get("brand") or (product.get("title") or "").split(" ")[0]
+    return brand.lower().strip() or None
+
+
+class ProductStore:
+    """One SQLite database per process group; connections are per thread"""
+
+    def __init__(self, path=PRODUCT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # --- connections and transactions --------------------------------------
+
+    def _conn(self):
+        # A connection must not be used across fork (gunicorn preloads in the
+        # master): key it by pid as well as thread. The inherited one is left unclosed.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # isolation_level=None: transactions are opened explicitly by transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA busy_timeout = 30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.depth = 0
+        return conn
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Group writes into one commit; nested uses join the outer transaction."""
+        conn = self._conn()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        # IMMEDIATE takes the write lock up front, so two writers never deadlock upgrading
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- products -----------------------------------------------------------
+
+    def _product_row(self, product, collection, now):
+        return (
+            collection,
+            product_key(product),
+            product.get("title"),
+            _brand_key(product),
+            product.get("brand_estimated_origin"),
+            product.get("confidence"),
+            json.dumps(product, default=str),
+            now,
+        )
+
+    def upsert_products(self, products, collection):
+        """Insert or replace products in one transaction; returns how many were written."""
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown product collection: {collection}")
+        now = time.time()
+        rows = [self._product_row(p, collection, now) for p in products]
+        with self.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO products (collection, asin, title, brand_key, origin, confidence, data, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (collection, asin) DO UPDATE SET
+                       title = excluded.title, brand_key = excluded.brand_key, origin = excluded.origin,
+                       confidence = excluded.confidence, data = excluded.data, updated_at = excluded.updated_at""",
+                rows,
+            )
+        return len(rows)
+
+    def upsert_product(self, product, collection):
+        self.upsert_products([product], collection)
+
+    def get_product(self, asin, collection="priority"):
+        row = self._conn().execute(
+            "SELECT data FROM products WHERE collection = ? AND asin = ?", (collection, asin)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def products(self, collection):
+        """{asin: product} for one collection, oldest first."""
+        rows = self._conn().execute(
+            "SELECT asin, data FROM products WHERE collection = ? ORDER BY updated_at, rowid", (collection,)
+        )
+        return {asin: json.loads(data) for asin, data in rows}
+
+    def products_by_brand(self, brand_key, collection=None):
+        query = "SELECT data FROM products WHERE brand_key = ?"
+        params = [brand_key]
+        if collection:
+            query += " AND collection = ?"
+            params.append(collection)
+        return [json.loads(data) for (data,) in self._conn().execute(query, params)]
+
+    def asins(self, collection):
+        rows = self._conn().execute(
+            "SELECT asin FROM products WHERE collection = ? AND asin NOT LIKE 'title:%'", (collection,)
+        )
+        return {asin for (asin,) in rows}
+
+    def count(self, collection=None):
+        if collection is None:
+            return self._conn().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM products WHERE collection = ?", (collection,)
+        ).fetchone()[0]
+
+    # --- brands and learned context patterns ----------------------------------
+
+    def save_brand_locations(self, entries):
+        """
+        Upsert brand_locations-style entries ({key: {"origin": {...}, ...}}).
+        Entries carrying a "product_context" are learned context patterns.
+        """
+        now = time.time()
+        brands, patterns = [], []
+        for key, entry in entries.items():
+            origin = entry.get("origin") or {}
+            data = json.dumps(entry, default=str)
+            context = entry.get("product_context")
+            if context:
+                brand_key = key[:-len(context) - 1] if key.endswith("_" + context) else key
+                patterns.append((key, brand_key, context, origin.get("country"), entry.get("confidence"), data, now))
+            else:
+                brands.append((key, origin.get("country"), origin.get("city"), entry.get("learned_from"),
+                               entry.get("confidence"), data, now))
+        with self.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO brands (brand_key, country, city, learned_from, confidence, data, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (brand_key) DO UPDATE SET
+                       country = excluded.country, city = excluded.city, learned_from = excluded.learned_from,
+                       confidence = excluded.confidence, data = excluded.data, updated_at = excluded.updated_at""",
+                brands,
+            )
+            conn.executemany(
+                """INSERT INTO context_patterns (context_key, brand_key, product_context, country, confidence, data, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (context_key) DO UPDATE SET
+                       brand_key = excluded.brand_key, product_context = excluded.product_context,
+                       country = excluded.country, confidence = excluded.confidence,
+                       data = excluded.data, updated_at = excluded.updated_at""",
+                patterns,
+            )
+        return len(brands) + len(patterns)
+
+    def save_brand_location(self, key, entry):
+        self.save_brand_locations({key: entry})
+
+    def get_brand(self, brand_key):
+        row = self._conn().execute("SELECT data FROM brands WHERE brand_key = ?", (brand_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_context_pattern(self, context_key):
+        row = self._conn().execute(
+            "SELECT data FROM context_patterns WHERE context_key = ?", (context_key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def context_patterns_for(self, brand_key):
+        rows = self._conn().execute(
+            "SELECT context_key, data FROM context_patterns WHERE brand_key = ?", (brand_key,)
+        )
+        return {key: json.loads(data) for key, data in rows}
+
+    def brand_locations(self):
+        """Brands and context patterns merged into the old brand_locations.json shape."""
+        conn = self._conn()
+        merged = {key: json.loads(data) for key, data in conn.execute(
+            "SELECT brand_key, data FROM brands ORDER BY updated_at, rowid")}
+        merged.update((key, json.loads(data)) for key, data in conn.execute(
+            "SELECT context_key, data FROM context_patterns ORDER BY updated_at, rowid"))
+        return merged
+
+    def is_empty(self):
+        conn = self._conn()
+        return not any(
+            conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in ("products", "brands", "context_patterns")
+        )
+
+    # --- legacy JSON import/export and backups ----------------------------------
+
+    def import_json(self, directory="."):
+        """Load whichever legacy JSON files exist in directory; returns {file: rows imported}."""
+        imported = {}
+        with self.transaction():
+            for collection, filename in LEGACY_FILES.items():
+                data = _read_json(os.path.join(directory, filename))
+                if data is None:
+                    continue
+                products = list(data.values()) if isinstance(data, dict) else data
+                imported[filename] = self.upsert_products(products, collection)
+            brands = _read_json(os.path.join(directory, LEGACY_BRAND_FILE))
+            if brands:
+                imported[LEGACY_BRAND_FILE] = self.save_brand_locations(brands)
+        return imported
+
+    def export_json(self, directory="."):
+        """Write the store back out as the legacy JSON files (for tools that still read them)."""
+        os.makedirs(directory, exist_ok=True)
+        for collection, filename in LEGACY_FILES.items():
+            products = self.products(collection)
+            _write_json(os.path.join(directory, filename),
+                        products if collection == "priority" else list(products.values()))
+        _write_json(os.path.join(directory, LEGACY_BRAND_FILE), self.brand_locations())
+        return [*LEGACY_FILES.values(), LEGACY_BRAND_FILE]
+
+    def backup(self, path):
+        """Consistent online copy of the database (safe while other threads write)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        target = sqlite3.connect(path)
+        try:
+            self._conn().backup(target)
+        finally:
+            target.close()
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def open_store(path=PRODUCT_DB_PATH, legacy_dir="."):
+    """Open the store, importing the legacy JSON files the first time it is empty."""
+    store = ProductStore(path)
+    if store.is_empty():
+        imported = store.import_json(legacy_dir)
+        if imported:
+            print(f"📦 Imported legacy JSON into {path}: {imported}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import/export the product store's legacy JSON files")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("--db", default=PRODUCT_DB_PATH, help="SQLite database path")
+    parser.add_argument("--dir", default=".", help="directory holding the JSON files")
+    args = parser.parse_args()
+
+    store = ProductStore(args.db)
+    if args.command == "import":
+        for filename, rows in store.import_json(args.dir).items():
+            print(f"✅ {filename}: {rows} rows")
+    else:
+        for filename in store.export_json(args.dir):
+            print(f"✅ Wrote {os.path.join(args.dir, filename)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Precompiled lookup tables for the pickled LabelEncoders in this directory.
+
+LabelEncoder.transform([value]) allocates arrays and runs searchsorted on every
+call, and `value in encoder.classes_` is a linear scan. At load time each
+encoder is compiled once into a frozen dict so single values encode in O(1)
+and whole columns encode with one pass over their unique values.
+"""
+import os
+from types import MappingProxyType
+
+import numpy as np
+
+ENCODERS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def normalize_feature(value, default):
+    clean = str(value or default).strip().title()
+    return default if clean.lower() == "unknown" else clean
+
+
+class EncodingTable:
+    """Frozen label -> code mapping compiled from a fitted LabelEncoder"""
+
+    __slots__ = ("name", "classes", "default", "default_code", "_codes")
+
+    def __init__(self, classes, default=None, name=None):
+        self.name = name
+        self.classes = tuple(str(c) for c in classes)
+        self._codes = MappingProxyType({label: code for code, label in enumerate(self.classes)})
+        self.default = default
+        # Matches safe_encode: unknown values fall back to the *raw* default
+        self.default_code = self._codes.get(default) if default is not None else None
+
+    @classmethod
+    def from_encoder(cls, encoder, default=None, name=None):
+        return cls(encoder.classes_, default=default, name=name)
+
+    def __contains__(self, label):
+        return label in self._codes
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __repr__(self):
+        return f"EncodingTable({self.name!r}, {len(self.classes)} classes, default={self.default!r})"
+
+    def lookup(self, value, default=None):
+        """Return the code for a value after normalize_feature, or None if unseen."""
+        return self._codes.get(normalize_feature(value, self.default if default is None else default))
+
+    def encode(self, value):
+        """Encode one value, falling back to the table default for unseen labels."""
+        code = self.lookup(value)
+        if code is None:
+            code = self._default_or_raise([value])
+        return code
+
+    def encode_many(self, values):
+        """
+        Vectorised encode: normalise and look up each distinct value once, then
+        broadcast the codes back over the column.
+        """
+        raw = np.asarray(values, dtype=object).ravel()
+        if raw.size == 0:
+            return np.empty(0, dtype=np.int64)
+        # A new array: asarray may be a view of the caller's column (read-only under pandas copy-on-write)
+        raw = np.where(np.equal(raw, None), "", raw)
+        uniques, inverse = np.unique(raw.astype(str), return_inverse=True)
+
+        unique_codes = np.empty(len(uniques), dtype=np.int64)
+        unseen = []
+        for i, value in enumerate(uniques):
+            code = self.lookup(value)
+            if code is None:
+                unseen.append(value)
+                code = -1
+            unique_codes[i] = code
+
+        if unseen:
+            unique_codes[unique_codes == -1] = self._default_or_raise(unseen)
+        return unique_codes[inverse.ravel()]
+
+    def decode(self, code):
+        return self.classes[int(code)]
+
+    def decode_many(self, codes):
+        return np.asarray(self.classes, dtype=object)[np.asarray(codes, dtype=np.int64)]
+
+    def _default_or_raise(self, unseen):
+        if self.default_code is None:
+            raise ValueError(
+                f"Unseen label(s) {sorted(set(map(str, unseen)))} for '{self.name}'. "
+                f"Available options: {list(self.classes)}"
+            )
+        return self.default_code
+
+
+def load_encoding_tables(encoders_dir=ENCODERS_DIR, defaults=None):
+    """
+    Compile every `<name>_encoder.pkl` in encoders_dir into an EncodingTable.
+    `defaults` maps encoder name -> fallback label; encoders without a default
+    raise ValueError on unseen labels, like LabelEncoder.transform does.
+    """
+    import joblib
+
+    defaults = defaults or {}
+    tables = {}
+    for filename in sorted(os.listdir(encoders_dir)):
+        if not filename.endswith("_encoder.pkl"):
+            continue
+        name = filename[: -len("_encoder.pkl")]
+        encoder = joblib.load(os.path.join(encoders_dir, filename))
+        tables[name] = EncodingTable.from_encoder(encoder, default=defaults.get(name), name=name)
+    return tables
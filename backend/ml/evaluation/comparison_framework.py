@@ -27,9 +27,11 @@ class PredictionResult:
 class AmazonComparisonFramework:
     """Framework for comparing your Amazon scraping rules vs ML approaches"""
     
-    def __init__(self, results_dir: str = "comparison_results"):
+    def __init__(self, results_dir: str = "comparison_results", encoding_tables: Dict = None):
         self.results_dir = Path(results_dir)
         self.results_dir.mkdir(exist_ok=True)
+        # Precompiled lookup tables from backend.ml.encoders.lookup (shared with the API)
+        self.encoding_tables = encoding_tables or {}
         
         self.metrics = {
             "accuracy": [],
@@ -137,6 +139,8 @@ class AmazonComparisonFramework:
                 # Predict
                 prediction_scores = model.predict([features])
                 eco_score = prediction_scores[0]
+                if "label" in self.encoding_tables:
+                    eco_score = self.encoding_tables["label"].decode(eco_score)
                 
                 # Get confidence if available
                 confidence = 0.8  # Default
@@ -345,9 +349,20 @@ class AmazonComparisonFramework:
         return recommendations
     
     def _prepare_ml_features(self, product: Dict) -> List:
-        """Prepare features for ML model (adapt to your preprocessing)"""
-        # This should match your existing feature preparation
-        # Placeholder implementation
+        """Prepare features for ML model using the same lookup tables as the API"""
+        tables = self.encoding_tables
+        if all(name in tables for name in ("material", "transport", "recycle", "origin")):
+            weight = float(product.get('weight', 1.0) or 0.0)
+            return [
+                tables["material"].encode(product.get('material')),
+                tables["transport"].encode(product.get('transport')),
+                tables["recycle"].encode(product.get('recyclability')),
+                tables["origin"].encode(product.get('origin')),
+                np.log1p(weight),
+                0 if weight < 0.5 else 1 if weight < 2 else 2 if weight < 10 else 3
+            ]
+
+        # Placeholder implementation when no encoders are supplied
         return [
             1,  # material_encoded
             2,  # transport_encoded  
@@ -587,7 +602,10 @@ def create_amazon_rule_predictor():
 
 if __name__ == "__main__":
     # Example usage with Amazon products
-    framework = AmazonComparisonFramework()
+    from backend.ml.encoders.lookup import load_encoding_tables
+    framework = AmazonComparisonFramework(encoding_tables=load_encoding_tables(defaults={
+        "material": "Other", "transport": "Land", "recycle": "Medium", "origin": "Other"
+    }))
     
     # Load Amazon test products from your dataset
     try:
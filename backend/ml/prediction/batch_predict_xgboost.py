@@ -1,8 +1,9 @@
 import pandas as pd
 import xgboost as xgb
-import joblib
 import os
 
+from backend.ml.encoders.lookup import load_encoding_tables
+
 # === Paths
 script_dir = os.path.dirname(__file__)
 model_dir = os.path.join(script_dir, "ml_model")
@@ -12,28 +13,29 @@ encoders_dir = os.path.join(model_dir, "xgb_encoders")
 model = xgb.XGBClassifier()
 model.load_model(os.path.join(model_dir, "xgb_model_optimized.json"))
 
-material_enc = joblib.load(os.path.join(encoders_dir, "material_encoder.pkl"))
-transport_enc = joblib.load(os.path.join(encoders_dir, "transport_encoder.pkl"))
-recycle_enc = joblib.load(os.path.join(encoders_dir, "recyclability_encoder.pkl"))
-origin_enc = joblib.load(os.path.join(encoders_dir, "origin_encoder.pkl"))
-label_enc = joblib.load(os.path.join(encoders_dir, "label_encoder.pkl"))
+tables = load_encoding_tables(encoders_dir)
+material_enc = tables["material"]
+transport_enc = tables["transport"]
+recycle_enc = tables["recyclability"]
+origin_enc = tables["origin"]
+label_enc = tables["label"]
 
 # === Load batch input CSV
 input_csv = os.path.join(script_dir, "xgbatch_products.csv")
 batch_df = pd.read_csv(input_csv)
 
-# === Preprocess input
-batch_df["material_encoded"] = material_enc.transform(batch_df["material"].astype(str).str.title().str.strip())
+# === Preprocess input (lookup tables normalise and raise on unseen labels)
+batch_df["material_encoded"] = material_enc.encode_many(batch_df["material"])
 batch_df["weight"] = batch_df["weight"].astype(float)
-batch_df["transport_encoded"] = transport_enc.transform(batch_df["transport"].astype(str).str.title().str.strip())
-batch_df["recycle_encoded"] = recycle_enc.transform(batch_df["recyclability"].astype(str).str.title().str.strip())
-batch_df["origin_encoded"] = origin_enc.transform(batch_df["origin"].astype(str).str.title().str.strip())
+batch_df["transport_encoded"] = transport_enc.encode_many(batch_df["transport"])
+batch_df["recycle_encoded"] = recycle_enc.encode_many(batch_df["recyclability"])
+batch_df["origin_encoded"] = origin_enc.encode_many(batch_df["origin"])
 
 X_batch = batch_df[["material_encoded", "weight", "transport_encoded", "recycle_encoded", "origin_encoded"]]
 
 # === Predict
 preds_encoded = model.predict(X_batch)
-preds_labels = label_enc.inverse_transform(preds_encoded)
+preds_labels = label_enc.decode_many(preds_encoded)
 
 # === Add predictions to dataframe
 batch_df["predicted_eco_score"] = preds_labels
@@ -0,0 +1,203 @@
+"""
+Single feature-vector builder for the eco-score model.
+
+/predict, /predict/batch and /estimate_emissions all build the model input
+through FeatureBuilder, so the title inference (packaging type, quality level,
+pack size), size category and weight binning cannot drift between routes.
+Column order is read from feature_order.json, which train_xgboost.py writes
+next to the model.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from backend.ml.encoders.lookup import normalize_feature
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+FEATURE_ORDER_PATH = os.path.join(MODELS_DIR, "feature_order.json")
+
+DEFAULT_FEATURE_ORDER = (
+    "material_encoded", "transport_encoded", "recyclability_encoded", "origin_encoded",
+    "weight_log", "weight_bin_encoded", "packaging_type_encoded", "size_category_encoded",
+    "quality_level_encoded", "pack_size", "material_confidence",
+)
+# Columns the model can still be scored on when the enhanced encoders are missing
+CORE_FEATURES = DEFAULT_FEATURE_ORDER[:6]
+
+# feature_order.json column -> EncodingTable key
+ENCODED_COLUMNS = {
+    "material_encoded": "material",
+    "transport_encoded": "transport",
+    "recyclability_encoded": "recyclability",
+    "origin_encoded": "origin",
+    "packaging_type_encoded": "packaging_type",
+    "size_category_encoded": "size_category",
+    "quality_level_encoded": "quality_level",
+}
+NUMERIC_COLUMNS = {"weight", "weight_log", "weight_bin_encoded", "pack_size", "material_confidence"}
+
+FEATURE_DISPLAY_NAMES = {
+    "material_encoded": "Material Type",
+    "transport_encoded": "Transport Mode",
+    "recyclability_encoded": "Recyclability",
+    "origin_encoded": "Origin Country",
+    "weight": "Weight",
+    "weight_log": "Weight (log)",
+    "weight_bin_encoded": "Weight Category",
+    "packaging_type_encoded": "Packaging Type",
+    "size_category_encoded": "Size Category",
+    "quality_level_encoded": "Quality Level",
+    "pack_size": "Pack Size",
+    "material_confidence": "Material Confidence",
+}
+
+# One pass over the title picks up every keyword group. Matching is plain
+# substring matching, as before ("can" also matches "canister"). An "N pack"
+# match also counts as the "pack" packaging keyword it contains.
+TITLE_PATTERN = re.compile(
+    r"(?P<pack_size>10|12|[2-68]) pack"
+    r"|(?P<bottle>bottle|jar|can)"
+    r"|(?P<box>box|pack|carton)"
+    r"|(?P<premium>premium|professional|pro|deluxe)"
+)
+
+
+def load_feature_order(path=FEATURE_ORDER_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return tuple(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read feature order from {path}: {e}. Using default order.")
+        return DEFAULT_FEATURE_ORDER
+
+
+def bin_weight(w):
+    if w < 0.5:
+        return 0
+    elif w < 2:
+        return 1
+    elif w < 10:
+        return 2
+    else:
+        return 3
+
+
+def size_category_for(weight):
+    if weight > 2.0:
+        return "large"
+    elif weight > 0.5:
+        return "medium"
+    return "small"
+
+
+def infer_title_features(title):
+    """Return (packaging_type, quality_level, pack_size) from a single scan of the title."""
+    groups = set()
+    pack_size = 1
+    for match in TITLE_PATTERN.finditer(str(title or "").lower()):
+        kind = match.lastgroup
+        if kind == "pack_size":
+            if pack_size == 1:
+                pack_size = int(match.group(kind))
+            groups.add("box")
+        else:
+            groups.add(kind)
+
+    if "bottle" in groups:
+        packaging_type = "bottle"
+    elif "box" in groups:
+        packaging_type = "box"
+    else:
+        packaging_type = "other"
+
+    quality_level = "premium" if "premium" in groups else "standard"
+    return packaging_type, quality_level, pack_size
+
+
+class FeatureBuilder:
+    """Turns normalised product inputs into model-ready feature vectors"""
+
+    def __init__(self, tables, feature_order=None):
+        """
+        tables: EncodingTable per categorical input, keyed by material,
+        transport, recyclability, origin, packaging_type, size_category and
+        quality_level. Missing enhanced tables (None) fall back to the six
+        core features, mirroring the old /predict behaviour.
+        """
+        order = tuple(feature_order or load_feature_order())
+        unknown = [c for c in order if c not in ENCODED_COLUMNS and c not in NUMERIC_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unsupported feature columns in feature order: {unknown}")
+
+        self.tables = {name: table for name, table in tables.items() if table is not None}
+        missing = [c for c in order if c in ENCODED_COLUMNS and ENCODED_COLUMNS[c] not in self.tables]
+        if missing:
+            print(f"⚠️ Missing encoders for {missing}, falling back to {len(CORE_FEATURES)} core features")
+            order = tuple(c for c in order if c in CORE_FEATURES)
+            still_missing = [c for c in order if c in ENCODED_COLUMNS and ENCODED_COLUMNS[c] not in self.tables]
+            if still_missing:
+                raise ValueError(f"No encoder available for core features {still_missing}")
+
+        self.columns = order
+        self.display_names = [FEATURE_DISPLAY_NAMES[c] for c in order]
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    def extract(self, product):
+        """Raw (unencoded) feature values for one product dict."""
+        weight = float(product.get("weight") or 0.0)
+        material = normalize_feature(product.get("material"), "Other")
+        packaging_type, quality_level, pack_size = infer_title_features(product.get("title"))
+        return {
+            "material": material,
+            "transport": product.get("transport"),
+            "recyclability": normalize_feature(product.get("recyclability"), "Medium"),
+            "origin": normalize_feature(product.get("origin"), "Other"),
+            "weight": weight,
+            "weight_log": float(np.log1p(weight)),
+            "weight_bin_encoded": bin_weight(weight),
+            "packaging_type": packaging_type,
+            "size_category": size_category_for(weight),
+            "quality_level": quality_level,
+            "pack_size": pack_size,
+            "material_confidence": 0.8 if material != "Other" else 0.3,
+        }
+
+    def encode(self, product):
+        """Ordered {column: value} for one product, with categorical columns encoded."""
+        raw = self.extract(product)
+        return {
+            column: (self.tables[ENCODED_COLUMNS[column]].encode(raw[ENCODED_COLUMNS[column]])
+                     if column in ENCODED_COLUMNS else raw[column])
+            for column in self.columns
+        }
+
+    def as_matrix(self, encoded_rows):
+        return np.ascontiguousarray(
+            [[row[c] for c in self.columns] for row in encoded_rows], dtype=np.float32
+        ).reshape(len(encoded_rows), self.n_features)
+
+    def transform(self, product):
+        """(1 x n_features) float32 matrix for a single product."""
+        return self.as_matrix([self.encode(product)])
+
+    def transform_many(self, products):
+        """
+        (N x n_features) C-contiguous float32 matrix. Categorical columns are
+        encoded with one EncodingTable.encode_many call each.
+        """
+        raws = [self.extract(p) for p in products]
+        X = np.empty((len(raws), self.n_features), dtype=np.float32)
+        if not raws:
+            return X
+        for j, column in enumerate(self.columns):
+            if column in ENCODED_COLUMNS:
+                key = ENCODED_COLUMNS[column]
+                X[:, j] = self.tables[key].encode_many([r[key] for r in raws])
+            else:
+                X[:, j] = [r[column] for r in raws]
+        return X
@@ -1,11 +1,12 @@
 import pandas as pd
 import xgboost as xgb
-import joblib
 import os
 import numpy as np
 import time
 from colorama import Fore, Style, init
 
+from backend.ml.encoders.lookup import load_encoding_tables
+
 # Initialize colorama
 init(autoreset=True)
 
@@ -17,30 +18,31 @@ booster = xgb.Booster()
 booster.load_model(os.path.join(model_dir, "xgb_model.json"))
 
 encoders_dir = os.path.join(model_dir, "xgb_encoders")
-material_enc = joblib.load(os.path.join(encoders_dir, "material_encoder.pkl"))
-transport_enc = joblib.load(os.path.join(encoders_dir, "transport_encoder.pkl"))
-recyclability_enc = joblib.load(os.path.join(encoders_dir, "recyclability_encoder.pkl"))
-origin_enc = joblib.load(os.path.join(encoders_dir, "origin_encoder.pkl"))
-label_enc = joblib.load(os.path.join(encoders_dir, "label_encoder.pkl"))
+tables = load_encoding_tables(encoders_dir)
+material_enc = tables["material"]
+transport_enc = tables["transport"]
+recyclability_enc = tables["recyclability"]
+origin_enc = tables["origin"]
+label_enc = tables["label"]
 
 # === Helper function to safely transform
-def safe_transform(encoder, value, feature_name):
-    value = value.title().strip()
-    if value not in encoder.classes_:
+def safe_transform(table, value, feature_name):
+    code = table.lookup(value)
+    if code is None:
         raise ValueError(
-            f"{Fore.RED}🚨 Invalid value '{value}' for feature '{feature_name}'.\n"
-            f"Available options: {list(encoder.classes_)}{Style.RESET_ALL}"
+            f"{Fore.RED}🚨 Invalid value '{value.title().strip()}' for feature '{feature_name}'.\n"
+            f"Available options: {list(table.classes)}{Style.RESET_ALL}"
         )
-    return encoder.transform([value])[0]
+    return code
 
 def get_user_input():
     print(f"\n{Fore.CYAN}📥 Please enter the product details for prediction:\n{Style.RESET_ALL}")
 
-    material = input(f"Enter material {list(material_enc.classes_)}: ")
+    material = input(f"Enter material {list(material_enc.classes)}: ")
     weight = float(input("Enter weight (kg): "))
-    transport = input(f"Enter transport method {list(transport_enc.classes_)}: ")
-    recyclability = input(f"Enter recyclability {list(recyclability_enc.classes_)}: ")
-    origin = input(f"Enter origin {list(origin_enc.classes_)}: ")
+    transport = input(f"Enter transport method {list(transport_enc.classes)}: ")
+    recyclability = input(f"Enter recyclability {list(recyclability_enc.classes)}: ")
+    origin = input(f"Enter origin {list(origin_enc.classes)}: ")
 
     return {
         "material": material,
@@ -73,7 +75,7 @@ def main():
         dmat_new = xgb.DMatrix(X_new)
         y_pred_probs = booster.predict(dmat_new)
         y_pred_encoded = np.argmax(y_pred_probs, axis=1)[0]
-        y_pred_label = label_enc.inverse_transform([y_pred_encoded])[0]
+        y_pred_label = label_enc.decode(y_pred_encoded)
 
         print(f"\n{Fore.GREEN}✅ Your product's Eco-Score is: {y_pred_label}{Style.RESET_ALL}\n")
 
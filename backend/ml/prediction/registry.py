@@ -0,0 +1,346 @@
+"""
+Shared registry for the eco-score model, its encoders and lookup data.
+
+Artifacts are loaded lazily on first use. Under gunicorn with preload_app the
+master loads them once before forking (see gunicorn.conf.py), so every worker
+shares the same pages copy-on-write instead of loading its own copy.
+
+Each load builds a complete ModelBundle before publishing it with a single
+reference swap. Requests that already hold the old bundle finish against it,
+and new requests pick up the new one. The registry polls artifact mtimes at
+most every `reload_interval` seconds and hot-swaps when a new model or encoder
+lands in backend/ml/models or backend/ml/encoders.
+
+With MODEL_BACKEND=numpy (the default) a loaded XGBoost model is compiled
+into a CompiledForest (tree_engine.py) and served from flat NumPy arrays;
+MODEL_BACKEND=xgboost serves the XGBClassifier itself. A model that can't be
+compiled is served through XGBoost either way.
+"""
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+from backend.ml.encoders.lookup import ENCODERS_DIR, EncodingTable
+from backend.ml.prediction.feature_builder import FeatureBuilder, MODELS_DIR, load_feature_order
+from backend.ml.prediction.tree_engine import CompiledForest
+
+try:
+    import psutil
+except ImportError:  # RSS figures are reported as None without psutil
+    psutil = None
+
+BASE_DIR = os.path.abspath(os.path.join(MODELS_DIR, "..", "..", ".."))
+MATERIAL_ENCODER_PATH = os.path.join(BASE_DIR, "backend", "ml", "ml_model", "encoders", "material_encoder.pkl")
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "30"))
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "numpy")  # numpy | xgboost
+
+# (table key, encoder file, fallback label, table name)
+BASIC_ENCODERS = (
+    ("transport", "transport_encoder.pkl", "Land", "transport"),
+    ("recyclability", "recycle_encoder.pkl", "Medium", "recycle"),
+    ("label", "label_encoder.pkl", None, "label"),
+    ("origin", "origin_encoder.pkl", "Other", "origin"),
+)
+ENHANCED_ENCODERS = (
+    ("packaging_type", "packaging_type_encoder.pkl", "box", "packaging_type"),
+    ("size_category", "size_category_encoder.pkl", "medium", "size_category"),
+    ("quality_level", "quality_level_encoder.pkl", "standard", "quality_level"),
+)
+
+
+class FallbackModel:
+    """Rule-based stand-in used when no trained model artifact can be loaded"""
+
+    def predict(self, X):
+        return [self._predict_row(row) for row in X]
+
+    def _predict_row(self, row):
+        # Simple rule-based prediction based on features
+        material_score = row[0] / 10.0  # Material encoded value
+        weight_score = min(row[4], 3.0)  # Weight log
+        transport_score = row[1] / 3.0   # Transport encoded
+
+        # Simple scoring logic
+        total_score = (material_score + weight_score + transport_score) / 3
+
+        if total_score < 0.3:
+            return 0  # A+
+        elif total_score < 0.5:
+            return 1  # A
+        elif total_score < 0.7:
+            return 2  # B
+        elif total_score < 0.9:
+            return 3  # C
+        elif total_score < 1.2:
+            return 4  # D
+        elif total_score < 1.5:
+            return 5  # E
+        else:
+            return 6  # F
+
+    def predict_proba(self, X):
+        # Return mock probabilities
+        probas = []
+        for pred in self.predict(X):
+            proba = [0.1] * 7  # 7 classes
+            proba[pred] = 0.7  # High confidence for predicted class
+            probas.append(proba)
+        return probas
+
+    @property
+    def feature_importances_(self):
+        # Mock feature importances for the 6 core features
+        return [0.25, 0.20, 0.15, 0.15, 0.15, 0.10]
+
+
+def _rss_bytes():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class ModelBundle:
+    """One immutable generation of loaded artifacts"""
+
+    def __init__(self, version):
+        self.version = version
+        self.model = None
+        self.model_source = None
+        self.backend = None
+        self.tables = {}
+        self.label_table = None
+        self.feature_builder = None
+        self.valid_scores = []
+        self.material_co2_map = {}
+        self.artifacts = []
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self.signature = ()
+
+    def _load(self, name, path, loader):
+        """Run loader(path), recording wall time and RSS growth for the artifact."""
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            value = loader(path)
+            error = None
+        except Exception as e:
+            value = None
+            error = str(e)
+        rss_after = _rss_bytes()
+        self.artifacts.append({
+            "name": name,
+            "path": os.path.relpath(path, BASE_DIR),
+            "loaded": error is None,
+            "error": error,
+            "load_ms": round((time.perf_counter() - start) * 1000, 2),
+            "rss_delta_bytes": rss_after - rss_before if rss_before is not None else None,
+            "size_bytes": os.path.getsize(path) if os.path.exists(path) else None,
+        })
+        return value, error
+
+
+def _load_xgboost(path):
+    import xgboost as xgb
+    model = xgb.XGBClassifier()
+    model.load_model(path)
+    return model
+
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _load_joblib(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _load_co2_map(path):
+    import csv
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["material"]: float(row["co2_per_kg"]) for row in csv.DictReader(f)}
+
+
+class ModelRegistry:
+    """Lazily loads, shares and hot-swaps the model bundle used by the API"""
+
+    def __init__(self, model_dir=MODELS_DIR, encoders_dir=ENCODERS_DIR,
+                 material_encoder_path=MATERIAL_ENCODER_PATH, reload_interval=RELOAD_INTERVAL,
+                 backend=MODEL_BACKEND):
+        self.model_dir = model_dir
+        self.backend = backend
+        self.encoders_dir = encoders_dir
+        self.material_encoder_path = material_encoder_path
+        self.reload_interval = reload_interval
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._reloads = 0
+        self._last_error = None
+
+    @property
+    def loaded(self):
+        return self._bundle is not None
+
+    def artifact_paths(self):
+        paths = [
+            os.path.join(self.model_dir, "xgb_model.json"),
+            os.path.join(self.model_dir, "eco_model.pkl"),
+            os.path.join(self.model_dir, "feature_order.json"),
+            os.path.join(self.model_dir, "defra_material_intensity.csv"),
+            self.material_encoder_path,
+        ]
+        paths += [os.path.join(self.encoders_dir, f) for _, f, _, _ in BASIC_ENCODERS + ENHANCED_ENCODERS]
+        return paths
+
+    def _signature(self):
+        signature = []
+        for path in self.artifact_paths():
+            try:
+                st = os.stat(path)
+                signature.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def get(self):
+        """Current bundle, loading it on first use and picking up changed artifacts."""
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._build(version=1)
+                return self._bundle
+
+        if self.reload_interval and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_interval
+            if self._signature() != bundle.signature:
+                self.reload()
+        return self._bundle
+
+    def preload(self):
+        """Load eagerly, e.g. in the gunicorn master before workers fork."""
+        return self.get()
+
+    def reload(self, force=False):
+        """
+        Rebuild the bundle and swap it in if artifacts changed (or force=True).
+        A failed rebuild keeps serving the previous bundle.
+        """
+        with self._lock:
+            current = self._bundle
+            signature = self._signature()
+            if current is not None and not force and signature == current.signature:
+                return False
+            try:
+                bundle = self._build(version=(current.version + 1) if current else 1)
+            except Exception as e:
+                self._last_error = f"{datetime.now().isoformat()}: {e}"
+                print(f"❌ Model reload failed, keeping version {current.version if current else None}: {e}")
+                return False
+            self._bundle = bundle
+            self._reloads += 1
+            print(f"🔄 Hot-swapped model bundle to version {bundle.version}")
+            return True
+
+    def _build(self, version):
+        bundle = ModelBundle(version)
+        bundle.signature = self._signature()
+        start = time.perf_counter()
+
+        # Load the enhanced XGBoost model, falling back to the pickled model
+        model_path = os.path.join(self.model_dir, "xgb_model.json")
+        model, error = bundle._load("xgb_model", model_path, _load_xgboost)
+        bundle.model_source = "xgboost"
+        if model is None:
+            print(f"⚠️ Failed to load XGBoost model: {error}")
+            pkl_path = model_path = os.path.join(self.model_dir, "eco_model.pkl")
+            model, error = bundle._load("eco_model", pkl_path, _load_pickle)
+            bundle.model_source = "pickle"
+            if model is None:
+                model, error = bundle._load("eco_model", pkl_path, _load_joblib)
+                bundle.model_source = "joblib"
+            if model is None:
+                print(f"❌ Failed to load any model: {error}")
+                print("🔄 Using fallback rule-based model")
+                model = FallbackModel()
+                bundle.model_source = "fallback"
+        bundle.model = model
+        bundle.backend = "xgboost" if hasattr(model, "get_booster") else bundle.model_source
+        if self.backend == "numpy" and hasattr(model, "get_booster"):
+            compiled, error = bundle._load("compiled_model", model_path, lambda _: CompiledForest.from_model(model))
+            if compiled is not None:
+                bundle.model, bundle.backend = compiled, "numpy"
+            else:
+                print(f"⚠️ Could not compile model for the numpy backend, serving it through XGBoost: {error}")
+        print(f"✅ Loaded model ({bundle.model_source}, backend {bundle.backend})")
+
+        # Basic encoders are required; missing ones raise like the old import-time loading did
+        tables = {}
+        material_encoder, error = bundle._load("material_encoder", self.material_encoder_path, _load_joblib)
+        if material_encoder is None:
+            raise RuntimeError(f"Could not load material encoder: {error}")
+        tables["material"] = EncodingTable.from_encoder(material_encoder, "Other", "material")
+        for key, filename, default, name in BASIC_ENCODERS:
+            encoder, error = bundle._load(f"{name}_encoder", os.path.join(self.encoders_dir, filename), _load_joblib)
+            if encoder is None:
+                raise RuntimeError(f"Could not load {filename}: {error}")
+            tables[key] = EncodingTable.from_encoder(encoder, default, name)
+
+        # Enhanced encoders for the 11-feature model are optional
+        for key, filename, default, name in ENHANCED_ENCODERS:
+            encoder, error = bundle._load(f"{name}_encoder", os.path.join(self.encoders_dir, filename), _load_joblib)
+            if encoder is None:
+                print(f"⚠️ Could not load enhanced encoder {filename}: {error}")
+            tables[key] = EncodingTable.from_encoder(encoder, default, name) if encoder is not None else None
+
+        bundle.label_table = tables.pop("label")
+        bundle.tables = tables
+        bundle.valid_scores = list(bundle.label_table.classes)
+        bundle.feature_builder = FeatureBuilder(
+            tables, load_feature_order(os.path.join(self.model_dir, "feature_order.json"))
+        )
+
+        co2_map, error = bundle._load(
+            "defra_material_intensity", os.path.join(self.model_dir, "defra_material_intensity.csv"), _load_co2_map
+        )
+        if co2_map is None:
+            print(f"⚠️ Could not load DEFRA data: {error}")
+        bundle.material_co2_map = co2_map or {}
+
+        bundle.load_seconds = round(time.perf_counter() - start, 4)
+        bundle.loaded_at = datetime.now().isoformat()
+        print(f"✅ Model bundle v{version} ready in {bundle.load_seconds}s "
+              f"({bundle.feature_builder.n_features} features, labels {bundle.valid_scores})")
+        return bundle
+
+    def health(self):
+        """Detail view for /health: per-artifact load time and resident memory."""
+        bundle = self._bundle
+        report = {
+            "loaded": bundle is not None,
+            "pid": os.getpid(),
+            "rss_bytes": _rss_bytes(),
+            "reload_interval_s": self.reload_interval,
+            "reloads": self._reloads,
+            "last_reload_error": self._last_error,
+        }
+        if bundle is not None:
+            report.update({
+                "version": bundle.version,
+                "loaded_at": bundle.loaded_at,
+                "load_seconds": bundle.load_seconds,
+                "model_source": bundle.model_source,
+                "backend": bundle.backend,
+                "feature_count": bundle.feature_builder.n_features,
+                "artifacts": bundle.artifacts,
+                "stale": self._signature() != bundle.signature,
+            })
+        return report
+
+
+model_registry = ModelRegistry()
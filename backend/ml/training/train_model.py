@@ -19,10 +19,13 @@ from sklearn.preprocessing import label_binarize
 from imblearn.over_sampling import SMOTE
 
 import os
+import sys
 
 # Get the root project directory (DSP/)
 script_dir = os.path.dirname(__file__)
 project_root = os.path.abspath(os.path.join(script_dir, "..", "..", ".."))
+sys.path.insert(0, project_root)
+from backend.data.storage.datasets import read_dataset  # noqa: E402
 
 # Paths based on new structure
 csv_path = "../../../common/data/csv/eco_dataset.csv"
@@ -35,8 +38,8 @@ os.makedirs(encoders_dir, exist_ok=True)
 
 # === Load and clean dataset ===
 column_names = ["title", "material", "weight", "transport", "recyclability", "true_eco_score", "co2_emissions", "origin"]
-df = pd.read_csv(csv_path, header=None, names=column_names, quotechar='"')
-df = df[df["true_eco_score"] != "true_eco_score"]  # drop bad header row
+df = read_dataset(csv_path, columns=column_names)
+df = df[df["true_eco_score"] != "true_eco_score"]  # drop header rows repeated inside the data
 df.dropna(subset=["material", "weight", "transport", "recyclability", "origin"], inplace=True)
 
 for col in ["material", "transport", "recyclability", "origin", "true_eco_score"]:
@@ -1,128 +1,78 @@
+"""
+XGBoost training driver for the eco-score model.
+
+Phases, each timed into training_report.json next to the model:
+
+    load        read the dataset (memory-mapped Arrow copy of the CSV)
+    encode      clean the string fields and label-encode the features
+    resample    SMOTE on the training rows of each CV fold and of the final
+                training split. Rows that are scored (CV validation rows, the
+                early-stopping fold, the test set) are never oversampled, so
+                synthetic neighbours of test rows no longer leak into the
+                training data. Resampled folds are cached on disk
+                (joblib.Memory, keyed on the data), so a rerun on unchanged
+                data skips SMOTE.
+    search      RandomizedSearchCV, or HalvingRandomSearchCV with --halving,
+                over the resampled folds. The search fans out over n_jobs
+                processes and each XGBoost fit uses one thread, so cores
+                aren't oversubscribed. A failed fit aborts the run instead of
+                being scored nan, and no model is saved without a finite
+                best CV score.
+    fit         refit the best parameters with tree_method="hist", all
+                threads and early stopping on a stratified validation fold
+                held out of the training split.
+    evaluate    accuracy, macro F1 and the classification report on the test set
+
+    python backend/ml/training/train_xgboost.py [--dataset CSV] [--halving] [--n-iter 5] [--jobs -1]
+"""
+import argparse
 import os
+import sys
+import time
 import joblib
 import numpy as np
 import pandas as pd
 import xgboost as xgb
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (registers HalvingRandomSearchCV)
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold, train_test_split
 from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, f1_score
+from sklearn.metrics import classification_report, f1_score
 from imblearn.over_sampling import SMOTE
 from collections import Counter
+from contextlib import contextmanager
 import json
 
 # === Paths ===
 script_dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(script_dir, "..", "..", "..")))
+from backend.data.storage.datasets import read_dataset  # noqa: E402
+
 csv_path = os.path.abspath(os.path.join(script_dir, "../../../common/data/csv/enhanced_amazon_dataset.csv"))
 model_dir = os.path.join(script_dir, "..", "models")
 encoders_dir = os.path.join(script_dir, "..", "encoders")
-os.makedirs(model_dir, exist_ok=True)
-os.makedirs(encoders_dir, exist_ok=True)
-
-# === Load and preprocess enhanced dataset ===
-df = pd.read_csv(csv_path)  # Load with headers
-print(f"📊 Loaded enhanced dataset with {len(df)} rows and {len(df.columns)} columns")
-print(f"📋 Columns: {list(df.columns)}")
-
-# Filter for valid eco scores and remove NaN
-df = df[df["true_eco_score"].isin(["A+", "A", "B", "C", "D", "E", "F"])].dropna(subset=["true_eco_score"])
-print(f"📊 After filtering: {len(df)} rows")
-
-# === Clean up string fields
-for col in ["material", "transport", "recyclability", "origin"]:
-    df[col] = df[col].astype(str).str.title().str.strip()
-
-# === Weight prep
-df["weight"] = pd.to_numeric(df["weight"], errors="coerce")
-df.dropna(subset=["weight"], inplace=True)
-df["weight_log"] = np.log1p(df["weight"])
-df["weight_bin"] = pd.cut(df["weight"], bins=[0, 0.5, 2, 10, 100], labels=[0, 1, 2, 3])
-
-# === Label encoding for original features
-encoders = {
-    'material': LabelEncoder(),
-    'transport': LabelEncoder(),
-    'recyclability': LabelEncoder(),
-    'origin': LabelEncoder(),
-    'label': LabelEncoder(),
-    'weight_bin': LabelEncoder()
+
+TRAIN_N_JOBS = int(os.environ.get("TRAIN_N_JOBS", "-1"))
+TRAIN_CACHE_DIR = os.environ.get("TRAIN_CACHE_DIR", os.path.join(script_dir, "..", "models", ".smote_cache"))
+EARLY_STOPPING_ROUNDS = int(os.environ.get("TRAIN_EARLY_STOPPING_ROUNDS", "30"))
+MAX_ESTIMATORS = 1000  # ceiling for the final fit; early stopping picks the actual number
+# Expected rows of each class in every training subsample of the first halving round
+HALVING_MIN_ROWS_PER_CLASS = int(os.environ.get("TRAIN_HALVING_MIN_ROWS_PER_CLASS", "30"))
+
+VALID_SCORES = ["A+", "A", "B", "C", "D", "E", "F"]
+RANDOM_STATE = 42
+
+BASE_PARAMS = {
+    "eval_metric": "mlogloss",
+    "tree_method": "hist",
+    "n_estimators": 300,
+    "max_depth": 7,
+    "learning_rate": 0.08,
+    "subsample": 0.85,
+    "colsample_bytree": 0.85,
+    "random_state": RANDOM_STATE,
 }
 
-for key in encoders:
-    col = key if key != "label" else "true_eco_score"
-    df[f"{key}_encoded"] = encoders[key].fit_transform(df[col].astype(str))
-
-# === Encode new categorical features if they exist
-if 'packaging_type' in df.columns:
-    encoders['packaging_type'] = LabelEncoder()
-    df['packaging_type_encoded'] = encoders['packaging_type'].fit_transform(df['packaging_type'].astype(str))
-
-if 'size_category' in df.columns:
-    encoders['size_category'] = LabelEncoder()
-    df['size_category_encoded'] = encoders['size_category'].fit_transform(df['size_category'].astype(str))
-
-if 'quality_level' in df.columns:
-    encoders['quality_level'] = LabelEncoder()
-    df['quality_level_encoded'] = encoders['quality_level'].fit_transform(df['quality_level'].astype(str))
-
-# === Enhanced feature selection
-feature_cols = [
-    "material_encoded",
-    "transport_encoded", 
-    "recyclability_encoded",
-    "origin_encoded",
-    "weight_log",
-    "weight_bin_encoded"
-]
-
-# Add enhanced features if they exist
-if 'packaging_type_encoded' in df.columns:
-    feature_cols.append('packaging_type_encoded')
-if 'size_category_encoded' in df.columns:
-    feature_cols.append('size_category_encoded')
-if 'quality_level_encoded' in df.columns:
-    feature_cols.append('quality_level_encoded')
-if 'pack_size' in df.columns:
-    df['pack_size'] = pd.to_numeric(df['pack_size'], errors='coerce').fillna(1)
-    feature_cols.append('pack_size')
-if 'material_confidence' in df.columns:
-    feature_cols.append('material_confidence')
-
-print(f"🎯 Using {len(feature_cols)} features: {feature_cols}")
-X = df[feature_cols].astype(float)
-y = df["label_encoded"]
-
-# === Save feature order
-with open(os.path.join(model_dir, "feature_order.json"), "w") as f:
-    json.dump(feature_cols, f)
-
-# === Balance the data
-X_balanced, y_balanced = SMOTE(random_state=42).fit_resample(X, y)
-
-# === Train/test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X_balanced, y_balanced, test_size=0.2, stratify=y_balanced, random_state=42
-)
-
-# === Class weights
-counter = Counter(y_balanced)
-total = sum(counter.values())
-class_weights = {cls: total / count for cls, count in counter.items()}
-sample_weights = [class_weights[i] for i in y_train]
-
-# === XGBoost Model + Hyperparameter Search
-base_model = xgb.XGBClassifier(
-    use_label_encoder=False,
-    eval_metric="mlogloss",
-    n_estimators=300,
-    max_depth=7,
-    learning_rate=0.08,
-    subsample=0.85,
-    colsample_bytree=0.85,
-    random_state=42
-)
-
-params = {
+PARAM_SPACE = {
     "n_estimators": [200, 300],
     "max_depth": [6, 7],
     "learning_rate": [0.05, 0.08],
@@ -130,30 +80,253 @@ params = {
     "colsample_bytree": [0.7, 0.85]
 }
 
-search = RandomizedSearchCV(base_model, params, scoring="f1_macro", n_iter=5, cv=3)
-search.fit(X_train, y_train, sample_weight=sample_weights)
-model = search.best_estimator_
-
-# === Evaluate
-y_pred = model.predict(X_test)
-acc = model.score(X_test, y_test)
-f1 = f1_score(y_test, y_pred, average="macro")
-report = classification_report(y_test, y_pred, target_names=encoders['label'].classes_, output_dict=True)
-
-print(f"✅ Accuracy: {acc:.4f}")
-print(f"✅ F1 Score: {f1:.4f}")
-
-# === Save model + encoders
-joblib.dump(model, os.path.join(model_dir, "eco_model.pkl"))
-for name, enc in encoders.items():
-    joblib.dump(enc, os.path.join(encoders_dir, f"{name}_encoder.pkl"))
-
-# === Save metrics
-with open(os.path.join(model_dir, "xgb_metrics.json"), "w") as f:
-    json.dump({
-        "accuracy": round(acc, 4),
-        "f1_score": round(f1, 4),
-        "report": report
-    }, f, indent=2)
-
-print("✅ Model, encoders, and metrics saved successfully.")
+
+class PhaseTimer:
+    """Wall-clock seconds per named phase, in run order"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        print(f"⏱️ {name}...")
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0) + time.perf_counter() - started, 3)
+            print(f"⏱️ {name}: {self.phases[name]:.2f}s")
+
+    def report(self):
+        return {"phases": self.phases, "total_seconds": round(sum(self.phases.values()), 3)}
+
+
+def encode_features(df):
+    """Clean and label-encode df; returns (X, y, encoders, feature_cols)."""
+    # Filter for valid eco scores and remove NaN
+    df = df[df["true_eco_score"].isin(VALID_SCORES)].dropna(subset=["true_eco_score"]).copy()
+    print(f"📊 After filtering: {len(df)} rows")
+
+    # === Clean up string fields
+    for col in ["material", "transport", "recyclability", "origin"]:
+        df[col] = df[col].astype(str).str.title().str.strip()
+
+    # === Weight prep
+    df["weight"] = pd.to_numeric(df["weight"], errors="coerce")
+    df.dropna(subset=["weight"], inplace=True)
+    df["weight_log"] = np.log1p(df["weight"])
+    df["weight_bin"] = pd.cut(df["weight"], bins=[0, 0.5, 2, 10, 100], labels=[0, 1, 2, 3])
+
+    # === Label encoding for original features
+    encoders = {
+        'material': LabelEncoder(),
+        'transport': LabelEncoder(),
+        'recyclability': LabelEncoder(),
+        'origin': LabelEncoder(),
+        'label': LabelEncoder(),
+        'weight_bin': LabelEncoder()
+    }
+
+    for key in encoders:
+        col = key if key != "label" else "true_eco_score"
+        df[f"{key}_encoded"] = encoders[key].fit_transform(df[col].astype(str))
+
+    # === Encode new categorical features if they exist
+    for col in ["packaging_type", "size_category", "quality_level"]:
+        if col in df.columns:
+            encoders[col] = LabelEncoder()
+            df[f"{col}_encoded"] = encoders[col].fit_transform(df[col].astype(str))
+
+    # === Enhanced feature selection
+    feature_cols = [
+        "material_encoded",
+        "transport_encoded",
+        "recyclability_encoded",
+        "origin_encoded",
+        "weight_log",
+        "weight_bin_encoded"
+    ]
+
+    # Add enhanced features if they exist
+    for col in ["packaging_type_encoded", "size_category_encoded", "quality_level_encoded"]:
+        if col in df.columns:
+            feature_cols.append(col)
+    if 'pack_size' in df.columns:
+        df['pack_size'] = pd.to_numeric(df['pack_size'], errors='coerce').fillna(1)
+        feature_cols.append('pack_size')
+    if 'material_confidence' in df.columns:
+        feature_cols.append('material_confidence')
+
+    print(f"🎯 Using {len(feature_cols)} features: {feature_cols}")
+    X = df[feature_cols].astype(float).to_numpy()
+    y = df["label_encoded"].to_numpy()
+    return X, y, encoders, feature_cols
+
+
+def smote_resample(X, y, random_state=RANDOM_STATE):
+    return SMOTE(random_state=random_state).fit_resample(X, y)
+
+
+def class_weights(y):
+    counter = Counter(y)
+    total = sum(counter.values())
+    weights = {cls: total / count for cls, count in counter.items()}
+    return np.array([weights[label] for label in y])
+
+
+def resampled_folds(X, y, cv, resample):
+    """
+    Stack the SMOTE-resampled training rows of every fold followed by the
+    original rows, and return (X_all, y_all, weights, splits) where each
+    split trains on its fold's resampled block and scores on that fold's
+    original validation rows. The search estimators never see a resampled
+    row at scoring time.
+    """
+    blocks_X, blocks_y, train_blocks = [], [], []
+    offset = 0
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=RANDOM_STATE).split(X, y))
+    for train_idx, _ in folds:
+        X_res, y_res = resample(X[train_idx], y[train_idx])
+        blocks_X.append(X_res)
+        blocks_y.append(y_res)
+        train_blocks.append(np.arange(offset, offset + len(y_res)))
+        offset += len(y_res)
+    blocks_X.append(X)
+    blocks_y.append(y)
+    splits = [(train_rows, offset + val_idx) for train_rows, (_, val_idx) in zip(train_blocks, folds)]
+    weights = np.concatenate([class_weights(block) for block in blocks_y])
+    return np.vstack(blocks_X), np.concatenate(blocks_y), weights, splits
+
+
+def halving_min_resources(y, splits, per_class=HALVING_MIN_ROWS_PER_CLASS):
+    """
+    Rows to start successive halving with. HalvingRandomSearchCV subsamples
+    each split's training rows at random, not per class. If it starts too small
+    (its default is a few rows per class), a class drops out of a subsample and
+    XGBoost refuses to fit. The resampled training blocks are balanced, so
+    start where the rarest class of the smallest block still expects per_class
+    rows; losing a class entirely is then vanishingly unlikely.
+    """
+    n_classes = len(np.unique(y))
+    rarest = min(np.bincount(y[train], minlength=n_classes).min() for train, _ in splits)
+    if rarest == 0:
+        raise ValueError("a CV training block is missing a class")
+    return min(len(y), int(np.ceil(len(y) * per_class / rarest)))
+
+
+def build_search(args, splits, y):
+    estimator = xgb.XGBClassifier(**BASE_PARAMS, n_jobs=1)
+    common = dict(scoring="f1_macro", cv=splits, n_jobs=args.jobs, refit=False, random_state=RANDOM_STATE,
+                  error_score="raise")
+    if args.halving:
+        # Successive halving: candidates start on a subsample of the rows, the best third moves on to 3x as many
+        return HalvingRandomSearchCV(estimator, PARAM_SPACE, n_candidates=args.n_iter, factor=3,
+                                     min_resources=halving_min_resources(y, splits), **common)
+    return RandomizedSearchCV(estimator, PARAM_SPACE, n_iter=args.n_iter, **common)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the XGBoost eco-score model")
+    parser.add_argument("--dataset", default=csv_path)
+    parser.add_argument("--n-iter", type=int, default=5, help="parameter candidates to try")
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=TRAIN_N_JOBS, help="search processes (-1: all cores)")
+    parser.add_argument("--halving", action="store_true", help="successive-halving search")
+    parser.add_argument("--early-stopping-rounds", type=int, default=EARLY_STOPPING_ROUNDS)
+    parser.add_argument("--no-cache", action="store_true", help="don't cache SMOTE-resampled folds")
+    args = parser.parse_args()
+
+    os.makedirs(model_dir, exist_ok=True)
+    os.makedirs(encoders_dir, exist_ok=True)
+    timer = PhaseTimer()
+    resample = smote_resample if args.no_cache else joblib.Memory(TRAIN_CACHE_DIR, verbose=0).cache(smote_resample)
+
+    # === Load and preprocess enhanced dataset ===
+    with timer.phase("load"):
+        df = read_dataset(args.dataset)  # Memory-mapped Arrow copy of the CSV
+        print(f"📊 Loaded enhanced dataset with {len(df)} rows and {len(df.columns)} columns")
+        print(f"📋 Columns: {list(df.columns)}")
+
+    with timer.phase("encode"):
+        X, y, encoders, feature_cols = encode_features(df)
+        # === Save feature order
+        with open(os.path.join(model_dir, "feature_order.json"), "w") as f:
+            json.dump(feature_cols, f)
+
+        # === Train/test split on real rows; early-stopping fold out of the training part
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, stratify=y, random_state=RANDOM_STATE
+        )
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=0.15, stratify=y_train, random_state=RANDOM_STATE
+        )
+
+    # === Balance the training data only
+    with timer.phase("resample"):
+        X_search, y_search, w_search, splits = resampled_folds(X_train, y_train, args.cv, resample)
+        X_fit_bal, y_fit_bal = resample(X_fit, y_fit)
+        print(f"⚖️ Training rows after SMOTE: {len(y_fit_bal)} (from {len(y_fit)})")
+
+    # === XGBoost Model + Hyperparameter Search
+    with timer.phase("search"):
+        search = build_search(args, splits, y_search)
+        search.fit(X_search, y_search, sample_weight=w_search)
+        if not np.isfinite(search.best_score_):
+            sys.exit(f"❌ Search found no candidate with a finite CV f1_macro ({search.best_score_}); no model saved")
+        best_params = search.best_params_
+        print(f"🏆 Best parameters: {best_params} (CV f1_macro {search.best_score_:.4f})")
+
+    with timer.phase("fit"):
+        model = xgb.XGBClassifier(**{
+            **BASE_PARAMS, **best_params,
+            "n_estimators": MAX_ESTIMATORS,
+            "early_stopping_rounds": args.early_stopping_rounds,
+            "n_jobs": os.cpu_count(),
+        })
+        model.fit(X_fit_bal, y_fit_bal, sample_weight=class_weights(y_fit_bal),
+                  eval_set=[(X_val, y_val)], verbose=False)
+        print(f"🌲 Early stopping kept {model.best_iteration + 1} of {MAX_ESTIMATORS} trees")
+
+    # === Evaluate
+    with timer.phase("evaluate"):
+        y_pred = model.predict(X_test)
+        acc = model.score(X_test, y_test)
+        f1 = f1_score(y_test, y_pred, average="macro")
+        report = classification_report(y_test, y_pred, labels=np.arange(len(encoders['label'].classes_)),
+                                       target_names=encoders['label'].classes_, output_dict=True, zero_division=0)
+
+    print(f"✅ Accuracy: {acc:.4f}")
+    print(f"✅ F1 Score: {f1:.4f}")
+
+    # === Save model + encoders
+    joblib.dump(model, os.path.join(model_dir, "eco_model.pkl"))
+    for name, enc in encoders.items():
+        joblib.dump(enc, os.path.join(encoders_dir, f"{name}_encoder.pkl"))
+
+    # === Save metrics
+    with open(os.path.join(model_dir, "xgb_metrics.json"), "w") as f:
+        json.dump({
+            "accuracy": round(acc, 4),
+            "f1_score": round(f1, 4),
+            "report": report,
+            "best_params": best_params,
+            "best_iteration": int(model.best_iteration),
+        }, f, indent=2)
+
+    with open(os.path.join(model_dir, "training_report.json"), "w") as f:
+        json.dump({
+            "dataset": os.path.abspath(args.dataset),
+            "rows": int(len(y)),
+            "search": "halving" if args.halving else "randomized",
+            "n_iter": args.n_iter,
+            "cv": args.cv,
+            "n_jobs": args.jobs,
+            **timer.report(),
+        }, f, indent=2)
+
+    print(f"⏱️ Phase timings: {timer.phases}")
+    print("✅ Model, encoders, and metrics saved successfully.")
+
+
+if __name__ == "__main__":
+    main()
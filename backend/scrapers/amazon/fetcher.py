@@ -0,0 +1,174 @@
+"""
+Tiered product-page fetcher: plain HTTP first, a real browser only when needed.
+
+Tier 1 fetches the page with a keep-alive requests.Session, parses it once
+with lxml (StaticPage) and runs the normal product extractors over it. The
+page escalates to tier 2 (the pooled Selenium browser) when the HTTP response
+is blocked, looks like a CAPTCHA, or the extracted product is missing required
+fields. Per-tier attempts, hits and escalation reasons are counted for
+/health/detail.
+
+A browser tier that still lands on a CAPTCHA raises ScrapeBlocked instead of
+waiting for someone to solve it, so callers (the job queue) can report the
+scrape as blocked rather than hang.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.scrapers.common.static_page import StaticPage
+
+HTTP_TIMEOUT = 10
+BLOCK_MARKERS = ("robot check", "captcha", "/errors/validatecaptcha", "api-services-support@amazon.com")
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+
+class ScrapeBlocked(Exception):
+    """The site served a CAPTCHA / robot check that wasn't solved; reason says which."""
+
+    def __init__(self, reason="captcha"):
+        super().__init__(f"scrape blocked: {reason}")
+        self.reason = reason
+
+
+def product_is_complete(product):
+    """A static-HTML result is good enough when it has a title, a real weight and a material."""
+    if not product or not product.get("title"):
+        return False, "missing title"
+    sources = product.get("data_sources", {})
+    if sources.get("weight_source") in (None, "none", "generic_default"):
+        return False, "missing weight"
+    if str(product.get("material_type") or "Unknown").lower() in ("unknown", "", "none"):
+        return False, "missing material"
+    return True, None
+
+
+class HttpTier:
+    """Thread-local keep-alive sessions (requests.Session is not guaranteed thread-safe)"""
+
+    def __init__(self, headers=None, timeout=HTTP_TIMEOUT, pool_maxsize=10):
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=1)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def get(self, url):
+        """Return (StaticPage or None, reason). reason is None on success."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            return None, f"http error: {type(e).__name__}"
+        if response.status_code != 200:
+            return None, f"http {response.status_code}"
+        html = response.text
+        lowered = html.lower()
+        if any(marker in lowered for marker in BLOCK_MARKERS):
+            return None, "captcha"
+        return StaticPage(html, response.url), None
+
+
+class TieredFetcher:
+    """
+    fetch(url) -> product dict or None.
+
+    extract(page, url) runs the product extractors over a DOM (a StaticPage
+    here); browser_fetch(url) is the full Selenium scrape. is_complete(product)
+    returns (ok, reason) and decides whether tier 1's result is accepted.
+    """
+
+    def __init__(self, extract, browser_fetch, is_complete=product_is_complete, http=None, http_enabled=True):
+        self.extract = extract
+        self.browser_fetch = browser_fetch
+        self.is_complete = is_complete
+        self.http = http or HttpTier()
+        self.http_enabled = http_enabled
+        self._lock = threading.Lock()
+        self.counters = {
+            "http": {"attempts": 0, "hits": 0, "seconds": 0.0},
+            "browser": {"attempts": 0, "hits": 0, "seconds": 0.0},
+        }
+        self.escalations = {}
+
+    def _record(self, tier, hit, started):
+        with self._lock:
+            stats = self.counters[tier]
+            stats["attempts"] += 1
+            stats["hits"] += int(bool(hit))
+            stats["seconds"] += time.perf_counter() - started
+
+    def _escalate(self, reason):
+        print(f"🪜 HTTP tier escalating to browser: {reason}")
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def fetch_http(self, url):
+        """Tier 1 only: (product or None, escalation reason or None)."""
+        started = time.perf_counter()
+        product, reason = None, None
+        page, reason = self.http.get(url)
+        if page is not None:
+            try:
+                product = self.extract(page, url)
+                ok, reason = self.is_complete(product)
+                if not ok:
+                    product = None
+            except Exception as e:
+                product, reason = None, f"extract error: {type(e).__name__}"
+        self._record("http", product is not None, started)
+        return product, reason
+
+    def fetch(self, url):
+        if self.http_enabled:
+            product, reason = self.fetch_http(url)
+            if product is not None:
+                product.setdefault("data_sources", {})["fetch_tier"] = "http"
+                return product
+            self._escalate(reason)
+
+        started = time.perf_counter()
+        product = None
+        try:
+            product = self.browser_fetch(url)
+        finally:
+            self._record("browser", product is not None, started)
+        if product is not None:
+            product.setdefault("data_sources", {})["fetch_tier"] = "browser"
+        return product
+
+    def stats(self):
+        with self._lock:
+            tiers = {
+                name: {
+                    "attempts": t["attempts"],
+                    "hits": t["hits"],
+                    "hit_rate": round(t["hits"] / t["attempts"], 3) if t["attempts"] else None,
+                    "mean_s": round(t["seconds"] / t["attempts"], 3) if t["attempts"] else None,
+                }
+                for name, t in self.counters.items()
+            }
+            return {
+                "http_enabled": self.http_enabled,
+                "tiers": tiers,
+                "escalations": dict(self.escalations),
+            }
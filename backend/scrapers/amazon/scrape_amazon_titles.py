@@ -8,6 +8,8 @@ import random
 import re
 import time
 from datetime import datetime
+from collections.abc import Mapping
+from types import MappingProxyType
 import difflib
 
 # Debug: print interpreter path
@@ -36,6 +38,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from backend.utils.co2_data import load_material_co2_data
+from backend.scrapers.common.driver_pool import DriverPool
+from backend.scrapers.amazon.fetcher import HttpTier, ScrapeBlocked, TieredFetcher
+from backend.scrapers.common.fixtures import wrap_driver_factory, wrap_http_tier
+from backend.scrapers.common.static_page import StaticPage
+from backend.data.storage.product_store import PRODUCT_DB_PATH, open_store
+from backend.utils.cache import MemoCache
+from backend.utils.text_matching import KeywordMatcher, compile_bank
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.webdriver import WebDriver
 from webdriver_manager.chrome import ChromeDriverManager
@@ -117,24 +126,39 @@ def safe_get(driver, url, retries=3, wait=10):
 
 
 # === PRIORITY PRODUCTS DB ===
+# Products, brand origins and learned patterns live in SQLite (backend/data/storage);
+# the legacy JSON files in the working directory are imported on first run.
+product_store = open_store(PRODUCT_DB_PATH)
+
 priority_products = {}
 try:
-    with open("priority_products.json", "r", encoding="utf-8") as f:
-        priority_products = json.load(f)
+    priority_products = product_store.products("priority")
     Log.success(f"✅ Loaded {len(priority_products)} high-accuracy products.")
-except FileNotFoundError:
-    Log.warn("priority_products.json not found. Starting with empty product DB.")
 except Exception as e:
     Log.error(f"Error loading priority product DB: {e}")
 
 
 brand_locations = {}
 try:
-    with open("brand_locations.json", "r", encoding="utf-8") as f:
-        brand_locations = json.load(f)
+    brand_locations = product_store.brand_locations()
     Log.success(f"📦 Loaded {len(brand_locations)} custom brand locations.")
 except Exception as e:
-    Log.warn(f" Could not load brand_locations.json: {e}")
+    Log.warn(f" Could not load brand locations: {e}")
+
+# Brand-origin lookups are memoised per (brand, product context). Every write to
+# brand_locations, auto-learning included, goes through save_brand_locations(),
+# which invalidates the memo.
+BRAND_ORIGIN_CACHE_SIZE = int(os.environ.get("BRAND_ORIGIN_CACHE_SIZE", "4096"))
+brand_origin_memo = MemoCache("brand_origin", BRAND_ORIGIN_CACHE_SIZE)
+
+
+def _freeze(value):
+    """Read-only copy of a nested literal: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
 # === CONFIG ===
@@ -153,6 +177,29 @@ chrome_options.add_argument(f"user-agent={random_user_agent}")
 Log.info(f"🧢 Using User-Agent: {random_user_agent}")
 
 
+# === WebDriver pools ===
+# Drivers are started on first checkout and reused across scrapes; see
+# backend/scrapers/common/driver_pool.py for health checks and recycling.
+def _new_listing_driver(slot):
+    return webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=chrome_options)
+
+
+def _new_product_page_driver(slot):
+    from undetected_chromedriver import Chrome, ChromeOptions
+    print("🚀 Launching undetected ChromeDriver...")
+    options = ChromeOptions()
+    # Folder to store persistent session/cookies; Chrome locks a profile per browser
+    options.user_data_dir = "selenium_profile" if slot == 0 else f"selenium_profile_{slot}"
+    driver = Chrome(headless=False, options=options)
+    print("✅ ChromeDriver launched successfully")
+    return driver
+
+
+# SCRAPER_FIXTURES=record|replay records pages to, or serves them from, disk
+listing_pool = DriverPool("listing", wrap_driver_factory(_new_listing_driver))
+product_page_pool = DriverPool("product_page", wrap_driver_factory(_new_product_page_driver))
+
+
 
 # === Load external brand origins CSV ===
 brand_origin_lookup = {}
@@ -275,46 +322,48 @@ amazon_fulfillment_centers = {
 }
 
 
+# Keyword-based fuzzy mapping for origin strings, in priority order
+ORIGIN_COUNTRY_KEYWORDS = {
+    "UK": ["united kingdom", "uk", "england", "scotland", "wales", "britain", "great britain"],
+    "USA": ["united states", "united states of america", "us", "usa", "america"],
+    "China": ["china", "prc", "people's republic of china"],
+    "Germany": ["germany", "deutschland"],
+    "France": ["france"],
+    "Italy": ["italy", "italia"],
+    "Japan": ["japan", "nippon"],
+    "Ireland": ["ireland", "eire"],
+    "Netherlands": ["netherlands", "holland"],
+    "Canada": ["canada"],
+    "Switzerland": ["switzerland"],
+    "Australia": ["australia"],
+    "Sweden": ["sweden"],
+    "Finland": ["finland"],
+    "Mexico": ["mexico"],
+    "Indonesia": ["indonesia"],
+    "India": ["india"],
+    "Spain": ["spain", "espana"],
+    "Poland": ["poland", "polska"],
+    "Belgium": ["belgium"],
+    "Denmark": ["denmark"],
+    "Norway": ["norway"],
+    "South Korea": ["south korea", "korea", "republic of korea"],
+    "Thailand": ["thailand"],
+    "Vietnam": ["vietnam"],
+    "Turkey": ["turkey"],
+    "Brazil": ["brazil"],
+}
+origin_country_matcher = KeywordMatcher(ORIGIN_COUNTRY_KEYWORDS)
+
+
 def fuzzy_normalize_origin(raw_origin):
     if not raw_origin:
         return "Unknown"
 
     origin = raw_origin.strip().lower()
 
-    # Keyword-based fuzzy mapping
-    fuzzy_map = {
-        "UK": ["united kingdom", "uk", "england", "scotland", "wales", "britain", "great britain"],
-        "USA": ["united states", "united states of america", "us", "usa", "america"],
-        "China": ["china", "prc", "people's republic of china"],
-        "Germany": ["germany", "deutschland"],
-        "France": ["france"],
-        "Italy": ["italy", "italia"],
-        "Japan": ["japan", "nippon"],
-        "Ireland": ["ireland", "eire"],
-        "Netherlands": ["netherlands", "holland"],
-        "Canada": ["canada"],
-        "Switzerland": ["switzerland"],
-        "Australia": ["australia"],
-        "Sweden": ["sweden"],
-        "Finland": ["finland"],
-        "Mexico": ["mexico"],
-        "Indonesia": ["indonesia"],
-        "India": ["india"],
-        "Spain": ["spain", "espana"],
-        "Poland": ["poland", "polska"],
-        "Belgium": ["belgium"],
-        "Denmark": ["denmark"],
-        "Norway": ["norway"],
-        "South Korea": ["south korea", "korea", "republic of korea"],
-        "Thailand": ["thailand"],
-        "Vietnam": ["vietnam"],
-        "Turkey": ["turkey"],
-        "Brazil": ["brazil"],
-    }
-
-    for country, keywords in fuzzy_map.items():
-        if any(keyword in origin for keyword in keywords):
-            return country.title()
+    country = origin_country_matcher.first(origin)
+    if country:
+        return country.title()
 
     return raw_origin.title()
 
@@ -707,6 +756,86 @@ def calculate_compound_recyclability(materials_list):
     
     return level, int(weighted_recyclability), description
 
+# Quality and category words used by the generic industry analysis below
+title_context_matcher = KeywordMatcher({
+    "technical": ["gore-tex", "waterproof", "breathable", "technical", "professional", "mountaineering", "expedition", "alpine"],
+    "outdoor_item": ["jacket", "shell", "boots", "gear"],
+    "casual": ["casual", "basic", "everyday", "kids", "children", "budget", "lightweight"],
+    "electronics": ["smartphone", "laptop", "computer", "electronics"],
+    "premium_electronics": ["pro", "premium", "professional", "flagship"],
+    "cookware": ["knife", "knives", "cookware", "kitchen", "cutlery"],
+    "premium_cookware": ["professional", "chef", "forged", "premium", "steel"],
+})
+
+
+# 🎯 Real-world manufacturing patterns for major multi-origin brands
+BRAND_MANUFACTURING_PATTERNS = _freeze({
+    "karrimor": {
+        # 🇬🇧 UK PREMIUM INDICATORS (Heritage technical gear)
+        "uk_indicators": {
+            "materials": ["gore-tex", "pertex", "polartec", "merino wool", "down", "windstopper"],
+            "naming": ["alpine", "summit", "pro", "technical", "expedition", "extreme", "professional"],
+            "features": ["waterproof", "breathable", "technical", "mountaineering", "expedition"],
+            "products": ["hardshell", "softshell", "technical jacket", "mountaineering boots"],
+            "confidence_boost": 0.8  # High confidence for premium indicators
+        },
+        # 🇨🇳 CHINA STANDARD INDICATORS (Mass market products)
+        "china_indicators": {
+            "materials": ["polyester", "nylon", "cotton", "canvas", "ripstop"],
+            "naming": ["metro", "urban", "city", "casual", "everyday", "basic", "kids", "junior"],
+            "features": ["lightweight", "casual", "everyday", "school", "basic", "budget"],
+            "products": ["daypack", "rucksack", "school bag", "casual", "t-shirt", "shorts"],
+            "confidence_boost": 0.7  # Good confidence for standard indicators
+        },
+        "headquarters": "UK"
+    },
+
+    "north face": {
+        "usa_indicators": ["summit", "expedition", "gore-tex", "professional", "mountaineering", "alpine"],
+        "usa_products": ["parka", "expedition", "summit"],
+        "vietnam_indicators": ["casual", "urban", "lifestyle", "hoodie", "fleece"],
+        "vietnam_products": ["hoodie", "fleece", "t-shirt", "casual"],
+        "headquarters": "USA"
+    },
+
+    "patagonia": {
+        "usa_indicators": ["technical", "climbing", "mountaineering", "expedition", "professional"],
+        "usa_products": ["hardshell", "climbing", "mountaineering"],
+        "vietnam_indicators": ["casual", "organic", "everyday", "lifestyle"],
+        "vietnam_products": ["t-shirt", "hoodie", "casual", "organic"],
+        "headquarters": "USA"
+    },
+
+    "columbia": {
+        "usa_indicators": ["omni-tech", "omni-heat", "professional", "technical", "hunting", "fishing"],
+        "usa_products": ["technical jacket", "hunting", "fishing"],
+        "vietnam_indicators": ["casual", "everyday", "kids", "basic"],
+        "vietnam_products": ["casual", "kids", "basic"],
+        "headquarters": "USA"
+    },
+
+    "timberland": {
+        "usa_indicators": ["premium", "leather", "heritage", "waterproof", "professional", "work"],
+        "usa_products": ["boots", "work boots", "premium"],
+        "china_indicators": ["casual", "sneakers", "lifestyle", "kids"],
+        "china_products": ["sneakers", "casual shoes", "kids"],
+        "headquarters": "USA"
+    },
+
+    "new balance": {
+        "usa_indicators": ["made in usa", "990", "991", "992", "993", "990v", "premium", "heritage"],
+        "usa_products": ["990", "991", "992", "heritage"],
+        "vietnam_indicators": ["fresh foam", "fuel cell", "casual", "running"],
+        "vietnam_products": ["fresh foam", "casual", "running"],
+        "headquarters": "USA"
+    }
+})
+
+
+@brand_origin_memo.memoize(lambda brand_name, product_title, product_attributes=None: (
+    brand_name, product_title.lower(),
+    *((product_attributes or {}).get(field) or "" for field in ("material_type", "style", "features", "seasons")),
+))
 def smart_context_aware_origin_detection(brand_name, product_title, product_attributes=None):
     """
     🧠 ADVANCED SMART ORIGIN DETECTION - Multi-dimensional product analysis
@@ -736,73 +865,9 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
     usage = attributes.get('usage', '').lower() if attributes.get('usage') else ''
     seasons = attributes.get('seasons', '').lower() if attributes.get('seasons') else ''
     
-    # 🎯 BRAND-SPECIFIC MANUFACTURING INTELLIGENCE
-    # Real-world manufacturing patterns for major multi-origin brands
-    brand_manufacturing_patterns = {
-        "karrimor": {
-            # 🇬🇧 UK PREMIUM INDICATORS (Heritage technical gear)
-            "uk_indicators": {
-                "materials": ["gore-tex", "pertex", "polartec", "merino wool", "down", "windstopper"],
-                "naming": ["alpine", "summit", "pro", "technical", "expedition", "extreme", "professional"],
-                "features": ["waterproof", "breathable", "technical", "mountaineering", "expedition"],
-                "products": ["hardshell", "softshell", "technical jacket", "mountaineering boots"],
-                "confidence_boost": 0.8  # High confidence for premium indicators
-            },
-            # 🇨🇳 CHINA STANDARD INDICATORS (Mass market products)
-            "china_indicators": {
-                "materials": ["polyester", "nylon", "cotton", "canvas", "ripstop"],
-                "naming": ["metro", "urban", "city", "casual", "everyday", "basic", "kids", "junior"],
-                "features": ["lightweight", "casual", "everyday", "school", "basic", "budget"],
-                "products": ["daypack", "rucksack", "school bag", "casual", "t-shirt", "shorts"],
-                "confidence_boost": 0.7  # Good confidence for standard indicators
-            },
-            "headquarters": "UK"
-        },
-        
-        "north face": {
-            "usa_indicators": ["summit", "expedition", "gore-tex", "professional", "mountaineering", "alpine"],
-            "usa_products": ["parka", "expedition", "summit"],
-            "vietnam_indicators": ["casual", "urban", "lifestyle", "hoodie", "fleece"],
-            "vietnam_products": ["hoodie", "fleece", "t-shirt", "casual"],
-            "headquarters": "USA"
-        },
-        
-        "patagonia": {
-            "usa_indicators": ["technical", "climbing", "mountaineering", "expedition", "professional"],
-            "usa_products": ["hardshell", "climbing", "mountaineering"],
-            "vietnam_indicators": ["casual", "organic", "everyday", "lifestyle"],
-            "vietnam_products": ["t-shirt", "hoodie", "casual", "organic"],
-            "headquarters": "USA"
-        },
-        
-        "columbia": {
-            "usa_indicators": ["omni-tech", "omni-heat", "professional", "technical", "hunting", "fishing"],
-            "usa_products": ["technical jacket", "hunting", "fishing"],
-            "vietnam_indicators": ["casual", "everyday", "kids", "basic"],
-            "vietnam_products": ["casual", "kids", "basic"],
-            "headquarters": "USA"
-        },
-        
-        "timberland": {
-            "usa_indicators": ["premium", "leather", "heritage", "waterproof", "professional", "work"],
-            "usa_products": ["boots", "work boots", "premium"],
-            "china_indicators": ["casual", "sneakers", "lifestyle", "kids"],
-            "china_products": ["sneakers", "casual shoes", "kids"],
-            "headquarters": "USA"
-        },
-        
-        "new balance": {
-            "usa_indicators": ["made in usa", "990", "991", "992", "993", "990v", "premium", "heritage"],
-            "usa_products": ["990", "991", "992", "heritage"],
-            "vietnam_indicators": ["fresh foam", "fuel cell", "casual", "running"],
-            "vietnam_products": ["fresh foam", "casual", "running"],
-            "headquarters": "USA"
-        }
-    }
-    
     # 🧮 ADVANCED MULTI-DIMENSIONAL ANALYSIS
-    if brand_lower in brand_manufacturing_patterns:
-        patterns = brand_manufacturing_patterns[brand_lower]
+    if brand_lower in BRAND_MANUFACTURING_PATTERNS:
+        patterns = BRAND_MANUFACTURING_PATTERNS[brand_lower]
         
         # Calculate scores for each manufacturing location
         location_scores = {}
@@ -816,7 +881,7 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
                 location_scores[location_name] = {"score": 0, "evidence": [], "location_key": location_key}
             
             location_data = patterns[location_key]
-            if isinstance(location_data, dict):
+            if isinstance(location_data, Mapping):
                 confidence_boost = location_data.get("confidence_boost", 0.5)
                 
                 # 🧪 MATERIAL ANALYSIS (High weight - materials don't lie!)
@@ -886,10 +951,11 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
                 }
     
     # 🌍 GENERIC INDUSTRY PATTERN ANALYSIS (for unknown brands)
-    
+    title_words = title_context_matcher.labels(title_lower)
+
     # Premium outdoor/technical gear → Heritage countries
-    if any(word in title_lower for word in ["gore-tex", "waterproof", "breathable", "technical", "professional", "mountaineering", "expedition", "alpine"]):
-        if any(word in title_lower for word in ["jacket", "shell", "boots", "gear"]):
+    if "technical" in title_words:
+        if "outdoor_item" in title_words:
             # European outdoor heritage
             return {
                 "country": "Germany",  # or UK, depending on brand linguistic patterns
@@ -898,7 +964,7 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
             }
     
     # Casual/lifestyle products → Cost-optimized countries
-    if any(word in title_lower for word in ["casual", "basic", "everyday", "kids", "children", "budget", "lightweight"]):
+    if "casual" in title_words:
         return {
             "country": "Vietnam",  # Vietnam is common for mid-tier manufacturing
             "confidence": "medium",
@@ -906,8 +972,8 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
         }
     
     # Electronics premium vs budget analysis
-    if any(word in title_lower for word in ["smartphone", "laptop", "computer", "electronics"]):
-        if any(word in title_lower for word in ["pro", "premium", "professional", "flagship"]):
+    if "electronics" in title_words:
+        if "premium_electronics" in title_words:
             return {
                 "country": "South Korea",  # Samsung, LG heritage
                 "confidence": "medium",
@@ -921,8 +987,8 @@ def smart_context_aware_origin_detection(brand_name, product_title, product_attr
             }
     
     # Kitchen/cookware premium analysis
-    if any(word in title_lower for word in ["knife", "knives", "cookware", "kitchen", "cutlery"]):
-        if any(word in title_lower for word in ["professional", "chef", "forged", "premium", "steel"]):
+    if "cookware" in title_words:
+        if "premium_cookware" in title_words:
             return {
                 "country": "Germany",  # German knife/cookware heritage
                 "confidence": "medium", 
@@ -973,7 +1039,7 @@ def auto_learn_context_specific_brand(brand_key, product_title, country, reasoni
                 "learned_at": datetime.now().isoformat()
             }
             
-            save_brand_locations()
+            save_brand_locations(context_key)
             print(f"🎓 CONTEXT-LEARNED: {context_key} → {country} (confidence: {confidence})")
             print(f"   📝 Context: {product_context}")
             print(f"   💡 Reasoning: {reasoning}")
@@ -1087,6 +1153,26 @@ def extract_comprehensive_product_attributes(driver, material=None, weight=None)
     return attributes
 
 
+# Product type and quality/market tier keywords for learned-context keys
+product_type_matcher = KeywordMatcher({
+    "boots": ["boots", "boot"],
+    "jacket": ["jacket", "shell", "parka", "coat"],
+    "backpack": ["backpack", "daypack", "rucksack"],
+    "sneakers": ["sneakers", "trainers", "shoes"],
+    "t_shirt": ["t-shirt", "tee", "shirt"],
+    "hoodie": ["hoodie", "sweatshirt"],
+    "knife": ["knife", "knives", "blade"],
+    "cookware": ["pan", "pot", "cookware"],
+    "smartphone": ["phone", "smartphone"],
+    "laptop": ["laptop", "computer"]
+})
+quality_tier_matcher = KeywordMatcher({
+    "premium": ["premium", "professional", "pro", "technical", "gore-tex", "waterproof"],
+    "casual": ["casual", "everyday", "basic", "lifestyle"],
+    "kids": ["kids", "children", "child", "youth"]
+})
+
+
 def extract_product_context(product_title):
     """
     Extract key product context indicators for learning
@@ -1098,39 +1184,9 @@ def extract_product_context(product_title):
     """
     title_lower = product_title.lower()
     
-    # Product type extraction
-    product_types = {
-        "boots": ["boots", "boot"],
-        "jacket": ["jacket", "shell", "parka", "coat"],
-        "backpack": ["backpack", "daypack", "rucksack"],
-        "sneakers": ["sneakers", "trainers", "shoes"],
-        "t_shirt": ["t-shirt", "tee", "shirt"],
-        "hoodie": ["hoodie", "sweatshirt"],
-        "knife": ["knife", "knives", "blade"],
-        "cookware": ["pan", "pot", "cookware"],
-        "smartphone": ["phone", "smartphone"],
-        "laptop": ["laptop", "computer"]
-    }
-    
-    # Quality/market tier extraction
-    quality_tiers = {
-        "premium": ["premium", "professional", "pro", "technical", "gore-tex", "waterproof"],
-        "casual": ["casual", "everyday", "basic", "lifestyle"],
-        "kids": ["kids", "children", "child", "youth"]
-    }
-    
-    detected_type = "generic"
-    detected_tier = "standard"
-    
-    for ptype, keywords in product_types.items():
-        if any(kw in title_lower for kw in keywords):
-            detected_type = ptype
-            break
-    
-    for tier, keywords in quality_tiers.items():
-        if any(kw in title_lower for kw in keywords):
-            detected_tier = tier
-            break
+    # Product type and quality/market tier: first listed match wins
+    detected_type = product_type_matcher.first(title_lower, "generic")
+    detected_tier = quality_tier_matcher.first(title_lower, "standard")
     
     if detected_tier != "standard":
         return f"{detected_tier}_{detected_type}"
@@ -1138,6 +1194,7 @@ def extract_product_context(product_title):
         return detected_type
 
 
+@brand_origin_memo.memoize(lambda brand_key, product_title: (brand_key, extract_product_context(product_title)))
 def check_learned_context_patterns(brand_key, product_title):
     """
     🎓 CHECK LEARNED CONTEXT PATTERNS
@@ -1220,7 +1277,7 @@ def auto_learn_brand_origin(brand_key, country, reasoning, confidence):
         # Update in-memory database
         known_brand_origins[brand_key] = country
         
-        # Save to brand_locations.json for persistence
+        # Save to the product store for persistence
         try:
             brand_locations[brand_key] = {
                 "origin": {
@@ -1233,7 +1290,7 @@ def auto_learn_brand_origin(brand_key, country, reasoning, confidence):
                 "confidence": confidence,
                 "learned_at": datetime.now().isoformat()
             }
-            save_brand_locations()
+            save_brand_locations(brand_key)
             print(f"🎓 AUTO-LEARNED: {brand_key} → {country} (confidence: {confidence})")
             print(f"   📝 Reasoning: {reasoning}")
             
@@ -1241,6 +1298,82 @@ def auto_learn_brand_origin(brand_key, country, reasoning, confidence):
             print(f"⚠️ Failed to save learned brand origin: {e}")
 
 
+# Company legal-structure suffixes (smart_detect_brand_origin, method 1)
+COMPANY_SUFFIX_ORIGINS = _freeze({
+    # German companies
+    "gmbh": {"country": "Germany", "confidence": "high", "reasoning": "German legal structure (GmbH)"},
+    "ag": {"country": "Germany", "confidence": "high", "reasoning": "German legal structure (AG)"},
+
+    # UK companies  
+    "ltd": {"country": "UK", "confidence": "medium", "reasoning": "UK legal structure (Ltd)"},
+    "limited": {"country": "UK", "confidence": "medium", "reasoning": "UK legal structure (Limited)"},
+    "plc": {"country": "UK", "confidence": "high", "reasoning": "UK legal structure (PLC)"},
+
+    # US companies
+    "inc": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (Inc)"},
+    "corp": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (Corp)"},
+    "llc": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (LLC)"},
+
+    # French companies
+    "sa": {"country": "France", "confidence": "medium", "reasoning": "French legal structure (SA)"},
+    "sarl": {"country": "France", "confidence": "high", "reasoning": "French legal structure (SARL)"},
+
+    # Italian companies
+    "spa": {"country": "Italy", "confidence": "high", "reasoning": "Italian legal structure (SpA)"},
+    "srl": {"country": "Italy", "confidence": "high", "reasoning": "Italian legal structure (Srl)"},
+
+    # Dutch companies
+    "bv": {"country": "Netherlands", "confidence": "high", "reasoning": "Dutch legal structure (BV)"},
+    "nv": {"country": "Netherlands", "confidence": "high", "reasoning": "Dutch legal structure (NV)"},
+
+    # Scandinavian companies
+    "ab": {"country": "Sweden", "confidence": "high", "reasoning": "Swedish legal structure (AB)"},
+    "oy": {"country": "Finland", "confidence": "high", "reasoning": "Finnish legal structure (Oy)"},
+    "as": {"country": "Norway", "confidence": "high", "reasoning": "Norwegian legal structure (AS)"},
+})
+
+# Brand-name linguistic patterns (method 2)
+LINGUISTIC_ORIGIN_PATTERNS = _freeze({
+    # German brand patterns
+    "Germany": {
+        "patterns": ["zwilling", "henckels", "wusthof", "fissler", "wmf", "silit", "riedel"],
+        "indicators": ["sch", "mann", "haus", "werk", "meister"],
+        "confidence": "medium"
+    },
+    # French brand patterns  
+    "France": {
+        "patterns": ["le creuset", "sabatier", "laguiole", "cristel", "mauviel"],
+        "indicators": ["le ", "la ", "des ", "chez"],
+        "confidence": "medium"
+    },
+    # Italian brand patterns
+    "Italy": {
+        "patterns": ["alessi", "bialetti", "lagostina", "ballarini"],
+        "indicators": ["ini", "etti", "allo", "esse"],
+        "confidence": "medium"
+    },
+    # Japanese brand patterns
+    "Japan": {
+        "patterns": ["global", "shun", "miyabi", "kai", "kyocera"],
+        "indicators": ["yama", "saki", "moto", "tsu"],
+        "confidence": "medium"
+    },
+    # Scandinavian patterns
+    "Sweden": {
+        "patterns": ["fiskars", "morakniv", "kosta boda"],
+        "indicators": ["ska", "berg", "ström", "son"],
+        "confidence": "medium"
+    }
+})
+
+# Domains embedded in brand names (method 6)
+DOMAIN_ORIGIN_PATTERNS = _freeze({
+    ".de": "Germany", ".fr": "France", ".it": "Italy", ".co.uk": "UK", 
+    ".jp": "Japan", ".kr": "South Korea", ".com.au": "Australia"
+})
+
+
+@brand_origin_memo.memoize(lambda brand_name, product_title="": (brand_name, product_title.lower()))
 def smart_detect_brand_origin(brand_name, product_title=""):
     """
     🧠 SMART BRAND ORIGIN DETECTION - Automatically detects brand origins using multiple strategies
@@ -1257,40 +1390,7 @@ def smart_detect_brand_origin(brand_name, product_title=""):
     brand_lower = brand_name.lower().strip()
     
     # METHOD 1: Company Legal Structure Analysis
-    company_suffixes = {
-        # German companies
-        "gmbh": {"country": "Germany", "confidence": "high", "reasoning": "German legal structure (GmbH)"},
-        "ag": {"country": "Germany", "confidence": "high", "reasoning": "German legal structure (AG)"},
-        
-        # UK companies  
-        "ltd": {"country": "UK", "confidence": "medium", "reasoning": "UK legal structure (Ltd)"},
-        "limited": {"country": "UK", "confidence": "medium", "reasoning": "UK legal structure (Limited)"},
-        "plc": {"country": "UK", "confidence": "high", "reasoning": "UK legal structure (PLC)"},
-        
-        # US companies
-        "inc": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (Inc)"},
-        "corp": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (Corp)"},
-        "llc": {"country": "USA", "confidence": "medium", "reasoning": "US legal structure (LLC)"},
-        
-        # French companies
-        "sa": {"country": "France", "confidence": "medium", "reasoning": "French legal structure (SA)"},
-        "sarl": {"country": "France", "confidence": "high", "reasoning": "French legal structure (SARL)"},
-        
-        # Italian companies
-        "spa": {"country": "Italy", "confidence": "high", "reasoning": "Italian legal structure (SpA)"},
-        "srl": {"country": "Italy", "confidence": "high", "reasoning": "Italian legal structure (Srl)"},
-        
-        # Dutch companies
-        "bv": {"country": "Netherlands", "confidence": "high", "reasoning": "Dutch legal structure (BV)"},
-        "nv": {"country": "Netherlands", "confidence": "high", "reasoning": "Dutch legal structure (NV)"},
-        
-        # Scandinavian companies
-        "ab": {"country": "Sweden", "confidence": "high", "reasoning": "Swedish legal structure (AB)"},
-        "oy": {"country": "Finland", "confidence": "high", "reasoning": "Finnish legal structure (Oy)"},
-        "as": {"country": "Norway", "confidence": "high", "reasoning": "Norwegian legal structure (AS)"},
-    }
-    
-    for suffix, data in company_suffixes.items():
+    for suffix, data in COMPANY_SUFFIX_ORIGINS.items():
         if brand_lower.endswith(suffix) or f" {suffix}" in brand_lower:
             return {
                 "country": data["country"],
@@ -1299,40 +1399,7 @@ def smart_detect_brand_origin(brand_name, product_title=""):
             }
     
     # METHOD 2: Brand Name Linguistic Analysis
-    linguistic_patterns = {
-        # German brand patterns
-        "Germany": {
-            "patterns": ["zwilling", "henckels", "wusthof", "fissler", "wmf", "silit", "riedel"],
-            "indicators": ["sch", "mann", "haus", "werk", "meister"],
-            "confidence": "medium"
-        },
-        # French brand patterns  
-        "France": {
-            "patterns": ["le creuset", "sabatier", "laguiole", "cristel", "mauviel"],
-            "indicators": ["le ", "la ", "des ", "chez"],
-            "confidence": "medium"
-        },
-        # Italian brand patterns
-        "Italy": {
-            "patterns": ["alessi", "bialetti", "lagostina", "ballarini"],
-            "indicators": ["ini", "etti", "allo", "esse"],
-            "confidence": "medium"
-        },
-        # Japanese brand patterns
-        "Japan": {
-            "patterns": ["global", "shun", "miyabi", "kai", "kyocera"],
-            "indicators": ["yama", "saki", "moto", "tsu"],
-            "confidence": "medium"
-        },
-        # Scandinavian patterns
-        "Sweden": {
-            "patterns": ["fiskars", "morakniv", "kosta boda"],
-            "indicators": ["ska", "berg", "ström", "son"],
-            "confidence": "medium"
-        }
-    }
-    
-    for country, data in linguistic_patterns.items():
+    for country, data in LINGUISTIC_ORIGIN_PATTERNS.items():
         # Direct pattern match
         if brand_lower in data["patterns"]:
             return {
@@ -1395,12 +1462,7 @@ def smart_detect_brand_origin(brand_name, product_title=""):
     # This could be implemented as a web scraping fallback for completely unknown brands
     
     # METHOD 6: Domain Analysis (if brand includes website info)
-    domain_patterns = {
-        ".de": "Germany", ".fr": "France", ".it": "Italy", ".co.uk": "UK", 
-        ".jp": "Japan", ".kr": "South Korea", ".com.au": "Australia"
-    }
-    
-    for domain, country in domain_patterns.items():
+    for domain, country in DOMAIN_ORIGIN_PATTERNS.items():
         if domain in brand_lower:
             return {
                 "country": country,
@@ -1415,6 +1477,191 @@ def smart_detect_brand_origin(brand_name, product_title=""):
     }
 
 
+# 🚀 MASSIVELY EXPANDED Brand Intelligence Database
+# Multi-location brands with product-specific manufacturing patterns
+BRAND_INTELLIGENCE = _freeze({
+    # Kitchen Appliances
+    "ninja": {
+        "headquarters": "USA",
+        "manufacturing_patterns": {
+            "kitchen appliances": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
+            "cookware": {"primary": "China", "confidence": "medium"},
+            "air fryer": {"primary": "China", "confidence": "high"},
+            "blender": {"primary": "China", "confidence": "high"},
+            "default": {"primary": "China", "confidence": "low"}
+        }
+    },
+    "instant pot": {
+        "headquarters": "Canada", 
+        "manufacturing_patterns": {
+            "pressure cooker": {"primary": "China", "confidence": "high"},
+            "air fryer": {"primary": "China", "confidence": "high"},
+            "default": {"primary": "China", "confidence": "medium"}
+        }
+    },
+    "tefal": {
+        "headquarters": "France",
+        "manufacturing_patterns": {
+            "cookware": {"primary": "France", "secondary": "China", "confidence": "medium"},
+            "small appliances": {"primary": "China", "confidence": "medium"},
+            "default": {"primary": "France", "confidence": "low"}
+        }
+    },
+    "kitchenaid": {
+        "headquarters": "USA",
+        "manufacturing_patterns": {
+            "stand mixer": {"primary": "USA", "confidence": "high"},
+            "small appliances": {"primary": "China", "confidence": "medium"},
+            "default": {"primary": "USA", "confidence": "low"}
+        }
+    },
+
+    # Electronics & Technology
+    "apple": {
+        "headquarters": "USA",
+        "manufacturing_patterns": {
+            "iphone": {"primary": "China", "secondary": "India", "confidence": "high"},
+            "macbook": {"primary": "China", "confidence": "high"},
+            "ipad": {"primary": "China", "confidence": "high"},
+            "accessories": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
+            "default": {"primary": "China", "confidence": "high"}
+        }
+    },
+    "samsung": {
+        "headquarters": "South Korea",
+        "manufacturing_patterns": {
+            "smartphone": {"primary": "South Korea", "secondary": "Vietnam", "confidence": "high"},
+            "television": {"primary": "South Korea", "secondary": "China", "confidence": "high"},
+            "appliances": {"primary": "South Korea", "secondary": "China", "confidence": "medium"},
+            "memory": {"primary": "South Korea", "confidence": "high"},
+            "default": {"primary": "South Korea", "confidence": "medium"}
+        }
+    },
+    "sony": {
+        "headquarters": "Japan",
+        "manufacturing_patterns": {
+            "playstation": {"primary": "Japan", "secondary": "China", "confidence": "high"},
+            "camera": {"primary": "Japan", "secondary": "Thailand", "confidence": "high"},
+            "television": {"primary": "Japan", "secondary": "Malaysia", "confidence": "medium"},
+            "headphones": {"primary": "China", "secondary": "Malaysia", "confidence": "medium"},
+            "default": {"primary": "Japan", "confidence": "medium"}
+        }
+    },
+    "lg": {
+        "headquarters": "South Korea",
+        "manufacturing_patterns": {
+            "television": {"primary": "South Korea", "secondary": "Indonesia", "confidence": "high"},
+            "smartphone": {"primary": "South Korea", "secondary": "Vietnam", "confidence": "medium"},
+            "appliances": {"primary": "South Korea", "secondary": "China", "confidence": "medium"},
+            "default": {"primary": "South Korea", "confidence": "medium"}
+        }
+    },
+
+    # Automotive
+    "bmw": {
+        "headquarters": "Germany",
+        "manufacturing_patterns": {
+            "car": {"primary": "Germany", "secondary": "USA", "confidence": "high"},
+            "motorcycle": {"primary": "Germany", "confidence": "high"},
+            "parts": {"primary": "Germany", "secondary": "China", "confidence": "medium"},
+            "default": {"primary": "Germany", "confidence": "high"}
+        }
+    },
+    "mercedes": {
+        "headquarters": "Germany", 
+        "manufacturing_patterns": {
+            "car": {"primary": "Germany", "secondary": "USA", "confidence": "high"},
+            "truck": {"primary": "Germany", "confidence": "high"},
+            "parts": {"primary": "Germany", "secondary": "Mexico", "confidence": "medium"},
+            "default": {"primary": "Germany", "confidence": "high"}
+        }
+    },
+    "toyota": {
+        "headquarters": "Japan",
+        "manufacturing_patterns": {
+            "car": {"primary": "Japan", "secondary": "USA", "confidence": "high"},
+            "hybrid": {"primary": "Japan", "confidence": "high"},
+            "parts": {"primary": "Japan", "secondary": "Thailand", "confidence": "medium"},
+            "default": {"primary": "Japan", "confidence": "high"}
+        }
+    },
+
+    # Fashion & Apparel
+    "nike": {
+        "headquarters": "USA",
+        "manufacturing_patterns": {
+            "shoes": {"primary": "Vietnam", "secondary": "China", "confidence": "high"},
+            "clothing": {"primary": "Vietnam", "secondary": "Indonesia", "confidence": "high"},
+            "accessories": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
+            "default": {"primary": "Vietnam", "confidence": "high"}
+        }
+    },
+    "adidas": {
+        "headquarters": "Germany",
+        "manufacturing_patterns": {
+            "shoes": {"primary": "Vietnam", "secondary": "Indonesia", "confidence": "high"},
+            "clothing": {"primary": "China", "secondary": "Vietnam", "confidence": "high"},
+            "accessories": {"primary": "China", "confidence": "medium"},
+            "default": {"primary": "Vietnam", "confidence": "high"}
+        }
+    },
+
+    # Tools & Equipment
+    "bosch": {
+        "headquarters": "Germany",
+        "manufacturing_patterns": {
+            "power tools": {"primary": "Germany", "secondary": "China", "confidence": "high"},
+            "automotive": {"primary": "Germany", "confidence": "high"},
+            "appliances": {"primary": "Germany", "secondary": "Turkey", "confidence": "medium"},
+            "default": {"primary": "Germany", "confidence": "high"}
+        }
+    },
+    "dewalt": {
+        "headquarters": "USA",
+        "manufacturing_patterns": {
+            "power tools": {"primary": "USA", "secondary": "Mexico", "confidence": "high"},
+            "accessories": {"primary": "China", "confidence": "medium"},
+            "default": {"primary": "USA", "confidence": "medium"}
+        }
+    },
+    "zwilling": {
+        "headquarters": "Germany",
+        "manufacturing_patterns": {
+            "knives": {"primary": "Germany", "confidence": "high"},
+            "cookware": {"primary": "Germany", "secondary": "China", "confidence": "high"},
+            "kitchen tools": {"primary": "Germany", "confidence": "high"},
+            "scissors": {"primary": "Germany", "confidence": "high"},
+            "default": {"primary": "Germany", "confidence": "high"}
+        }
+    },
+
+    # Home & Garden
+    "ikea": {
+        "headquarters": "Sweden",
+        "manufacturing_patterns": {
+            "furniture": {"primary": "China", "secondary": "Poland", "confidence": "high"},
+            "textiles": {"primary": "China", "secondary": "India", "confidence": "medium"},
+            "kitchenware": {"primary": "China", "confidence": "medium"},
+            "default": {"primary": "China", "confidence": "high"}
+        }
+    },
+    "dyson": {
+        "headquarters": "UK",
+        "manufacturing_patterns": {
+            "vacuum": {"primary": "Malaysia", "secondary": "Philippines", "confidence": "high"},
+            "hair care": {"primary": "Malaysia", "confidence": "high"},
+            "air purifier": {"primary": "Malaysia", "confidence": "high"},
+            "default": {"primary": "Malaysia", "confidence": "high"}
+        }
+    }
+})
+# Per brand: the first listed product type found in the title wins
+brand_product_type_matchers = {
+    brand: KeywordMatcher(list(info["manufacturing_patterns"])) for brand, info in BRAND_INTELLIGENCE.items()
+}
+
+
+@brand_origin_memo.memoize(lambda brand_name, product_title="", product_category="": (brand_name, product_title.lower()))
 def get_brand_intelligent_origin(brand_name, product_title="", product_category=""):
     """
     Use brand intelligence combined with product context for smarter origin detection
@@ -1423,196 +1670,15 @@ def get_brand_intelligent_origin(brand_name, product_title="", product_category=
     brand_lower = brand_name.lower().strip()
     title_lower = product_title.lower()
     
-    # 🚀 MASSIVELY EXPANDED Brand Intelligence Database
-    # Multi-location brands with product-specific manufacturing patterns
-    brand_intelligence = {
-        # Kitchen Appliances
-        "ninja": {
-            "headquarters": "USA",
-            "manufacturing_patterns": {
-                "kitchen appliances": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
-                "cookware": {"primary": "China", "confidence": "medium"},
-                "air fryer": {"primary": "China", "confidence": "high"},
-                "blender": {"primary": "China", "confidence": "high"},
-                "default": {"primary": "China", "confidence": "low"}
-            }
-        },
-        "instant pot": {
-            "headquarters": "Canada", 
-            "manufacturing_patterns": {
-                "pressure cooker": {"primary": "China", "confidence": "high"},
-                "air fryer": {"primary": "China", "confidence": "high"},
-                "default": {"primary": "China", "confidence": "medium"}
-            }
-        },
-        "tefal": {
-            "headquarters": "France",
-            "manufacturing_patterns": {
-                "cookware": {"primary": "France", "secondary": "China", "confidence": "medium"},
-                "small appliances": {"primary": "China", "confidence": "medium"},
-                "default": {"primary": "France", "confidence": "low"}
-            }
-        },
-        "kitchenaid": {
-            "headquarters": "USA",
-            "manufacturing_patterns": {
-                "stand mixer": {"primary": "USA", "confidence": "high"},
-                "small appliances": {"primary": "China", "confidence": "medium"},
-                "default": {"primary": "USA", "confidence": "low"}
-            }
-        },
-        
-        # Electronics & Technology
-        "apple": {
-            "headquarters": "USA",
-            "manufacturing_patterns": {
-                "iphone": {"primary": "China", "secondary": "India", "confidence": "high"},
-                "macbook": {"primary": "China", "confidence": "high"},
-                "ipad": {"primary": "China", "confidence": "high"},
-                "accessories": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
-                "default": {"primary": "China", "confidence": "high"}
-            }
-        },
-        "samsung": {
-            "headquarters": "South Korea",
-            "manufacturing_patterns": {
-                "smartphone": {"primary": "South Korea", "secondary": "Vietnam", "confidence": "high"},
-                "television": {"primary": "South Korea", "secondary": "China", "confidence": "high"},
-                "appliances": {"primary": "South Korea", "secondary": "China", "confidence": "medium"},
-                "memory": {"primary": "South Korea", "confidence": "high"},
-                "default": {"primary": "South Korea", "confidence": "medium"}
-            }
-        },
-        "sony": {
-            "headquarters": "Japan",
-            "manufacturing_patterns": {
-                "playstation": {"primary": "Japan", "secondary": "China", "confidence": "high"},
-                "camera": {"primary": "Japan", "secondary": "Thailand", "confidence": "high"},
-                "television": {"primary": "Japan", "secondary": "Malaysia", "confidence": "medium"},
-                "headphones": {"primary": "China", "secondary": "Malaysia", "confidence": "medium"},
-                "default": {"primary": "Japan", "confidence": "medium"}
-            }
-        },
-        "lg": {
-            "headquarters": "South Korea",
-            "manufacturing_patterns": {
-                "television": {"primary": "South Korea", "secondary": "Indonesia", "confidence": "high"},
-                "smartphone": {"primary": "South Korea", "secondary": "Vietnam", "confidence": "medium"},
-                "appliances": {"primary": "South Korea", "secondary": "China", "confidence": "medium"},
-                "default": {"primary": "South Korea", "confidence": "medium"}
-            }
-        },
-        
-        # Automotive
-        "bmw": {
-            "headquarters": "Germany",
-            "manufacturing_patterns": {
-                "car": {"primary": "Germany", "secondary": "USA", "confidence": "high"},
-                "motorcycle": {"primary": "Germany", "confidence": "high"},
-                "parts": {"primary": "Germany", "secondary": "China", "confidence": "medium"},
-                "default": {"primary": "Germany", "confidence": "high"}
-            }
-        },
-        "mercedes": {
-            "headquarters": "Germany", 
-            "manufacturing_patterns": {
-                "car": {"primary": "Germany", "secondary": "USA", "confidence": "high"},
-                "truck": {"primary": "Germany", "confidence": "high"},
-                "parts": {"primary": "Germany", "secondary": "Mexico", "confidence": "medium"},
-                "default": {"primary": "Germany", "confidence": "high"}
-            }
-        },
-        "toyota": {
-            "headquarters": "Japan",
-            "manufacturing_patterns": {
-                "car": {"primary": "Japan", "secondary": "USA", "confidence": "high"},
-                "hybrid": {"primary": "Japan", "confidence": "high"},
-                "parts": {"primary": "Japan", "secondary": "Thailand", "confidence": "medium"},
-                "default": {"primary": "Japan", "confidence": "high"}
-            }
-        },
-        
-        # Fashion & Apparel
-        "nike": {
-            "headquarters": "USA",
-            "manufacturing_patterns": {
-                "shoes": {"primary": "Vietnam", "secondary": "China", "confidence": "high"},
-                "clothing": {"primary": "Vietnam", "secondary": "Indonesia", "confidence": "high"},
-                "accessories": {"primary": "China", "secondary": "Vietnam", "confidence": "medium"},
-                "default": {"primary": "Vietnam", "confidence": "high"}
-            }
-        },
-        "adidas": {
-            "headquarters": "Germany",
-            "manufacturing_patterns": {
-                "shoes": {"primary": "Vietnam", "secondary": "Indonesia", "confidence": "high"},
-                "clothing": {"primary": "China", "secondary": "Vietnam", "confidence": "high"},
-                "accessories": {"primary": "China", "confidence": "medium"},
-                "default": {"primary": "Vietnam", "confidence": "high"}
-            }
-        },
-        
-        # Tools & Equipment
-        "bosch": {
-            "headquarters": "Germany",
-            "manufacturing_patterns": {
-                "power tools": {"primary": "Germany", "secondary": "China", "confidence": "high"},
-                "automotive": {"primary": "Germany", "confidence": "high"},
-                "appliances": {"primary": "Germany", "secondary": "Turkey", "confidence": "medium"},
-                "default": {"primary": "Germany", "confidence": "high"}
-            }
-        },
-        "dewalt": {
-            "headquarters": "USA",
-            "manufacturing_patterns": {
-                "power tools": {"primary": "USA", "secondary": "Mexico", "confidence": "high"},
-                "accessories": {"primary": "China", "confidence": "medium"},
-                "default": {"primary": "USA", "confidence": "medium"}
-            }
-        },
-        "zwilling": {
-            "headquarters": "Germany",
-            "manufacturing_patterns": {
-                "knives": {"primary": "Germany", "confidence": "high"},
-                "cookware": {"primary": "Germany", "secondary": "China", "confidence": "high"},
-                "kitchen tools": {"primary": "Germany", "confidence": "high"},
-                "scissors": {"primary": "Germany", "confidence": "high"},
-                "default": {"primary": "Germany", "confidence": "high"}
-            }
-        },
-        
-        # Home & Garden
-        "ikea": {
-            "headquarters": "Sweden",
-            "manufacturing_patterns": {
-                "furniture": {"primary": "China", "secondary": "Poland", "confidence": "high"},
-                "textiles": {"primary": "China", "secondary": "India", "confidence": "medium"},
-                "kitchenware": {"primary": "China", "confidence": "medium"},
-                "default": {"primary": "China", "confidence": "high"}
-            }
-        },
-        "dyson": {
-            "headquarters": "UK",
-            "manufacturing_patterns": {
-                "vacuum": {"primary": "Malaysia", "secondary": "Philippines", "confidence": "high"},
-                "hair care": {"primary": "Malaysia", "confidence": "high"},
-                "air purifier": {"primary": "Malaysia", "confidence": "high"},
-                "default": {"primary": "Malaysia", "confidence": "high"}
-            }
-        }
-    }
-    
-    if brand_lower in brand_intelligence:
-        brand_info = brand_intelligence[brand_lower]
-        patterns = brand_info["manufacturing_patterns"]
+    if brand_lower in BRAND_INTELLIGENCE:
+        patterns = BRAND_INTELLIGENCE[brand_lower]["manufacturing_patterns"]
         
-        # Try to match product category/type
+        # Try to match product category/type (first listed type in the title wins)
         best_match = None
-        for product_type, location_info in patterns.items():
-            if product_type in title_lower:
-                best_match = location_info
-                reasoning = f"Brand {brand_name} + product type '{product_type}' → {location_info['primary']}"
-                break
+        product_type = brand_product_type_matchers[brand_lower].first(title_lower)
+        if product_type:
+            best_match = patterns[product_type]
+            reasoning = f"Brand {brand_name} + product type '{product_type}' → {best_match['primary']}"
         
         if not best_match:
             best_match = patterns.get("default", {"primary": "Unknown", "confidence": "unknown"})
@@ -2065,7 +2131,7 @@ def is_high_confidence(product):
         product.get("asin") is not None
     )
 
-def maybe_add_to_priority(product, priority_db, save_path="priority_products.json"):
+def maybe_add_to_priority(product, priority_db, store=None):
     asin = product.get("asin")
     if not asin or asin in priority_db:
         return False
@@ -2074,10 +2140,9 @@ def maybe_add_to_priority(product, priority_db, save_path="priority_products.jso
         product["confidence"] = "High"
         priority_db[asin] = product
 
-        with open(save_path, "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
+        (store or product_store).upsert_product(product, "priority")
         
-        Log.success(f"🔐 Added {asin} to priority_products.json")
+        Log.success(f"🔐 Added {asin} to priority products")
         return True
     
     return False
@@ -2095,14 +2160,9 @@ def extract_asin(url):
     return match.group(1) if match else None
 
 
-def extract_weight(text):
-    if not text:
-        return None
-
-    text = text.lower()
-
-    # 1. Special handling for Product/Package Dimensions format: "45.01 x 30 x 19.99 cm; 0.6 g"
-    dims_patterns = [
+# === Precompiled patterns for the text extractors ===
+# 1. Special handling for Product/Package Dimensions format: "45.01 x 30 x 19.99 cm; 0.6 g"
+WEIGHT_DIMENSION_PATTERNS = compile_bank([
         r"(?:product|package)\s*dimensions?\s*:?\s*[\d\s.x×*cm;]+;\s*([\d.]+)\s*g",
         r"[\d.]+\s*x\s*[\d.]+\s*x\s*[\d.]+\s*cm;\s*([\d.]+)\s*g",
         r"dimensions?\s*:?\s*[\d\s.x×*cm;]+;\s*([\d.]+)\s*g",
@@ -2111,27 +2171,89 @@ def extract_weight(text):
         r"product\s+dimensions\s*[:\s]+[\d\s.x×*cm;,]+[;,]\s*([\d.]+)\s*g",
         # Even more flexible - just look for dimensions followed by weight
         r"[\d.]+\s*[x×]\s*[\d.]+\s*[x×]\s*[\d.]+\s*cm[;,\s]+([\d.]+)\s*g\b"
-    ]
-    
-    for pattern in dims_patterns:
-        dims_match = re.search(pattern, text, re.IGNORECASE)
+], re.IGNORECASE)
+WEIGHT_KG_PATTERN = re.compile(r"([\d.]+)\s?(kg|kilogram|kilograms)")
+WEIGHT_G_PATTERN = re.compile(r"([\d.]+)\s?(g|grams?|gramme?s?)\b")
+WEIGHT_FIELD_PATTERN = re.compile(r"(?:weight|item weight)\s*:?\s*([\d.]+)\s*(kg|g|grams?)")
+
+# Material field patterns, in the order extract_material tries them
+SPECIFIC_MATERIAL_FIELD_PATTERNS = compile_bank([
+    r"sole material\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"outer material\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"upper material\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"lining material\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"main material\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"primary material\s*:?\s*([a-zA-Z\s\-,]+)"
+], re.IGNORECASE)
+GENERAL_MATERIAL_FIELD_PATTERNS = compile_bank([
+    r"material composition\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"fabric type\s*:?\s*([a-zA-Z\s\-,]+)",
+    r"material\s*:?\s*([a-zA-Z\s\-,]+)"
+], re.IGNORECASE)
+MATERIAL_TYPE_PATTERN = re.compile(r"material type\s*:?\s*(.+?)(?:\n|$)", re.IGNORECASE)
+MATERIAL_PERCENTAGE_PATTERN = re.compile(r"(\d+)%\s*([a-z]+)", re.IGNORECASE)
+CONSTRUCTION_PATTERN = re.compile(r"construction\s*:?\s*([a-z\s\-]+)", re.IGNORECASE)
+FIRST_WORD_PATTERN = re.compile(r"([a-z]+)", re.IGNORECASE)
+GENERAL_MATERIAL_PATTERN = re.compile(r"(?:material|made of|composition)[\s:]+([a-z\s\-]+)", re.IGNORECASE)
+TRAILING_PUNCTUATION = re.compile(r'[,;.].*$')
+TRAILING_CONJUNCTION = re.compile(r'\s+(and|or|with|plus).*$', re.IGNORECASE)
+
+# 5. Direct material keywords, first listed wins
+material_keyword_matcher = KeywordMatcher(["plastic", "rubber", "leather", "cotton", "polyester", "nylon",
+                                           "metal", "steel", "aluminum", "wood", "glass", "ceramic", "silicone"])
+
+# Origin statements in free-text blobs (extract_product_details)
+origin_blob_trigger_matcher = KeywordMatcher(["country of origin", "made in", "manufacturer"])
+ORIGIN_BLOB_PATTERNS = compile_bank([
+    r"country\s+of\s+origin[:\s]*([a-zA-Z\s,]+)",  # "Country of origin: Vietnam"
+    r"origin[:\s]*([a-zA-Z\s,]+)",  # "Origin: Vietnam"
+    r"made\s+in[:\s]*([a-zA-Z\s,]+)",  # "Made in Vietnam"
+    r"manufacturer(?:ed)?\s+in[:\s]*([a-zA-Z\s,]+)",  # "Manufactured in Vietnam"
+    r"product\s+of[:\s]*([a-zA-Z\s,]+)"  # "Product of Vietnam"
+], re.IGNORECASE)
+ORIGIN_TRAILING_WORDS = re.compile(r'\s+(and|or|the|other|countries|regions?).*$', re.IGNORECASE)
+
+# Broader second pass when the first found nothing
+origin_blob_fallback_matcher = KeywordMatcher(["country of origin", "made in", "product of", "manufactured in",
+                                               "origin:", "vietnam", "china", "germany", "usa"])
+ORIGIN_BLOB_FALLBACK_PATTERNS = compile_bank([
+    r"country\s+of\s+origin[:\s]*([a-zA-Z\s,]+)",
+    r"made\s+in[:\s]*([a-zA-Z\s,]+)",
+    r"product\s+of[:\s]*([a-zA-Z\s,]+)",
+    r"manufactured\s+in[:\s]*([a-zA-Z\s,]+)",
+    r"origin[:\s]*([a-zA-Z\s,]+)",
+    # Direct country match when keywords like 'vietnam' appear
+    r"\b(vietnam|china|germany|usa|japan|france|italy|uk|united kingdom|thailand|indonesia)\b"
+], re.IGNORECASE)
+ORIGIN_FALLBACK_TRAILING_WORDS = re.compile(r'\s+(and|or|the|other|countries|regions?|etc).*$', re.IGNORECASE)
+
+
+def extract_weight(text):
+    if not text:
+        return None
+
+    text = text.lower()
+
+    # 1. Weight given after Product/Package Dimensions
+    for pattern in WEIGHT_DIMENSION_PATTERNS:
+        dims_match = pattern.search(text)
         if dims_match:
             weight_grams = float(dims_match.group(1))
             print(f"⚖️ Found weight in dimensions: {weight_grams}g")
             return round(weight_grams / 1000, 3)
 
     # 2. Match kg first (also handles "kilogram" or "kilograms")  
-    kg_match = re.search(r"([\d.]+)\s?(kg|kilogram|kilograms)", text)
+    kg_match = WEIGHT_KG_PATTERN.search(text)
     if kg_match:
         return round(float(kg_match.group(1)), 3)
 
     # 3. Match grams (more flexible pattern)
-    g_match = re.search(r"([\d.]+)\s?(g|grams?|gramme?s?)\b", text)
+    g_match = WEIGHT_G_PATTERN.search(text)
     if g_match:
         return round(float(g_match.group(1)) / 1000, 3)
 
     # 4. Weight field with value
-    weight_match = re.search(r"(?:weight|item weight)\s*:?\s*([\d.]+)\s*(kg|g|grams?)", text)
+    weight_match = WEIGHT_FIELD_PATTERN.search(text)
     if weight_match:
         weight_val = float(weight_match.group(1))
         unit = weight_match.group(2)
@@ -2204,23 +2326,13 @@ def extract_material(text):
     text = text.lower()
     
     # 1. Priority extraction from specific Amazon material fields (highest priority)
-    specific_material_fields = [
-        r"sole material\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"outer material\s*:?\s*([a-zA-Z\s\-,]+)", 
-        r"upper material\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"lining material\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"main material\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"primary material\s*:?\s*([a-zA-Z\s\-,]+)"
-    ]
-    
-    # Check specific materials first (highest priority)
-    for field_pattern in specific_material_fields:
-        field_match = re.search(field_pattern, text, re.IGNORECASE)
+    for field_pattern in SPECIFIC_MATERIAL_FIELD_PATTERNS:
+        field_match = field_pattern.search(text)
         if field_match:
             raw_material = field_match.group(1).strip()
             # Clean up the material value
-            raw_material = re.sub(r'[,;.].*$', '', raw_material).strip()
-            raw_material = re.sub(r'\s+(and|or|with|plus).*$', '', raw_material, flags=re.IGNORECASE).strip()
+            raw_material = TRAILING_PUNCTUATION.sub('', raw_material).strip()
+            raw_material = TRAILING_CONJUNCTION.sub('', raw_material).strip()
             
             # Prioritize specific materials over generic ones
             material = normalize_material(raw_material)
@@ -2229,19 +2341,13 @@ def extract_material(text):
                 return material
     
     # 1.5. Check general material composition fields (medium priority)
-    general_material_fields = [
-        r"material composition\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"fabric type\s*:?\s*([a-zA-Z\s\-,]+)",
-        r"material\s*:?\s*([a-zA-Z\s\-,]+)"
-    ]
-    
     composition_material = None
-    for field_pattern in general_material_fields:
-        field_match = re.search(field_pattern, text, re.IGNORECASE)
+    for field_pattern in GENERAL_MATERIAL_FIELD_PATTERNS:
+        field_match = field_pattern.search(text)
         if field_match:
             raw_material = field_match.group(1).strip()
-            raw_material = re.sub(r'[,;.].*$', '', raw_material).strip()
-            raw_material = re.sub(r'\s+(and|or|with|plus).*$', '', raw_material, flags=re.IGNORECASE).strip()
+            raw_material = TRAILING_PUNCTUATION.sub('', raw_material).strip()
+            raw_material = TRAILING_CONJUNCTION.sub('', raw_material).strip()
             
             material = normalize_material(raw_material)
             if material and material != "Unknown":
@@ -2250,36 +2356,34 @@ def extract_material(text):
                 break
 
     # 2. Handle detailed material compositions like "59% RUBBER, 16% POLYESTER, 7% TPU, 18% FOAM"
-    material_comp_match = re.search(r"material type\s*:?\s*(.+?)(?:\n|$)", text, re.IGNORECASE)
+    material_comp_match = MATERIAL_TYPE_PATTERN.search(text)
     if material_comp_match:
         comp_text = material_comp_match.group(1).strip()
         # Extract primary material (highest percentage)
-        percentage_matches = re.findall(r"(\d+)%\s*([a-z]+)", comp_text, re.IGNORECASE)
+        percentage_matches = MATERIAL_PERCENTAGE_PATTERN.findall(comp_text)
         if percentage_matches:
             # Find material with highest percentage
             primary_material = max(percentage_matches, key=lambda x: int(x[0]))
             return primary_material[1].title()
     
     # 3. Extract from construction field
-    construction_match = re.search(r"construction\s*:?\s*([a-z\s\-]+)", text, re.IGNORECASE)
+    construction_match = CONSTRUCTION_PATTERN.search(text)
     if construction_match:
         material = construction_match.group(1).strip()
         # Extract first material word
-        first_material = re.search(r"([a-z]+)", material, re.IGNORECASE)
+        first_material = FIRST_WORD_PATTERN.search(material)
         if first_material:
             return first_material.group(1).title()
     
     # 4. General material extraction (original logic)
-    general_match = re.search(r"(?:material|made of|composition)[\s:]+([a-z\s\-]+)", text, re.IGNORECASE)
+    general_match = GENERAL_MATERIAL_PATTERN.search(text)
     if general_match:
         return general_match.group(1).strip().title()
     
     # 5. Direct material keywords
-    material_keywords = ["plastic", "rubber", "leather", "cotton", "polyester", "nylon", 
-                        "metal", "steel", "aluminum", "wood", "glass", "ceramic", "silicone"]
-    for keyword in material_keywords:
-        if keyword in text:
-            return keyword.title()
+    keyword = material_keyword_matcher.first(text)
+    if keyword:
+        return keyword.title()
     
     # 6. Return composition material as fallback if found
     if composition_material:
@@ -2457,7 +2561,7 @@ def resolve_brand_origin(brand_key, title_fallback=None):
                 },
                 "fulfillment": "UK"
             }
-            save_brand_locations()
+            save_brand_locations(brand_key)
             Log.success(f"🧠 Intelligent detection: {brand_key} → {country} (confidence: {intelligent_result['confidence']:.2f}, source: {intelligent_result['source']})")
             return country, city
         
@@ -2472,7 +2576,7 @@ def resolve_brand_origin(brand_key, title_fallback=None):
                 },
                 "fulfillment": "UK"
             }
-            save_brand_locations()
+            save_brand_locations(brand_key)
             Log.success(f"📦 Basic estimation from title: {brand_key} → {guessed_country}")
             return guessed_country, guessed_city
 
@@ -2505,11 +2609,12 @@ def infer_fulfillment_country(url, sold_by_text=""):
         return "USA"
     return "UK"  # fallback default
 
-def save_brand_locations():
-    global brand_locations
-    with open("brand_locations.json", "w", encoding="utf-8") as f:
-        json.dump(brand_locations, f, indent=2)
-        Log.success(f"📦 Saved updated brand_locations.json with {len(brand_locations)} entries.")
+def save_brand_locations(*brand_keys):
+    """Upsert the given brand_locations entries (all of them if none are given) into the product store."""
+    brand_origin_memo.invalidate()  # learned knowledge changed; memoised origins may be stale
+    keys = brand_keys or list(brand_locations)
+    product_store.save_brand_locations({key: brand_locations[key] for key in keys})
+    Log.success(f"📦 Saved {len(keys)} brand location(s); {len(brand_locations)} known.")
 
 def safe_save_brand_origin(brand_key, country, city="Unknown"):
     if not country or country.lower() == "unknown":
@@ -2526,66 +2631,70 @@ def safe_save_brand_origin(brand_key, country, city="Unknown"):
             },
             "fulfillment": "UK"
         }
-        save_brand_locations()
+        save_brand_locations(brand_key)
         Log.success(f"📦 Inferred and saved origin for {brand_key}: {country}")
 
 
 def enrich_brand_location(brand_name, example_url):
-    global brand_locations
+    with listing_pool.driver() as driver:
+        _enrich_brand_location(driver, brand_name, example_url)
 
-    
-    driver = webdriver.Chrome(service=Service("C:/Users/jamie/OneDrive/Documents/University/ComputerScience/Year3/DigitalSP/DSProject/Tools/chromedriver-win64/chromedriver.exe"), options=chrome_options)
+
+def _enrich_brand_location(driver, brand_name, example_url):
     driver.get(example_url)
+    enrich_brand_location_from_page(driver, brand_name)
 
-    try:
-        text_blobs = []
-        legacy_specs = []
 
-        # Try pulling merchant info or description
-        try:
-            merchant = driver.find_element(By.ID, "merchant-info").text
-            text_blobs.append(merchant)
-        except:
-            pass
+def enrich_brand_location_from_page(driver, brand_name):
+    """Infer a brand's origin from a product page that is already loaded (live or static)."""
+    global brand_locations
 
-        try:
-            desc = driver.find_element(By.ID, "productDescription").text
-            text_blobs.append(desc)
-        except:
-            pass
+    text_blobs = []
+    legacy_specs = []
 
-        try:
-            bullets = driver.find_elements(By.CSS_SELECTOR, "#feature-bullets li")
-            text_blobs += [b.text for b in bullets]
-        except:
-            pass
+    # Try pulling merchant info or description
+    try:
+        merchant = driver.find_element(By.ID, "merchant-info").text
+        text_blobs.append(merchant)
+    except:
+        pass
 
-        for blob in text_blobs:
-            blob = blob.lower()
-            if "made in" in blob or "manufactured in" in blob:
-                match = re.search(r"(made|manufactured)\s+in\s+([a-z\s,]+)", blob)
-                if match:
-                    location = match.group(2).strip().title()
-                    country = location.split(",")[-1].strip()
-                    city = location.split(",")[0].strip() if "," in location else "Unknown"
-
-                    print(f"🔍 Guessed: {brand_name} → {city}, {country}")
-
-                    brand_locations[brand_name] = {
-                        "origin": {
-                            "country": country,
-                            "city": city
-                        },
-                        "fulfillment": "UK"
-                    }
-                     # 🚀 Save it instantly
-                    save_brand_locations()
-                    return
+    try:
+        desc = driver.find_element(By.ID, "productDescription").text
+        text_blobs.append(desc)
+    except:
+        pass
 
-        print(f"❌ No location found for: {brand_name}")
+    try:
+        bullets = driver.find_elements(By.CSS_SELECTOR, "#feature-bullets li")
+        text_blobs += [b.text for b in bullets]
+    except:
+        pass
+
+    for blob in text_blobs:
+        blob = blob.lower()
+        if "made in" in blob or "manufactured in" in blob:
+            match = re.search(r"(made|manufactured)\s+in\s+([a-z\s,]+)", blob)
+            if match:
+                location = match.group(2).strip().title()
+                country = location.split(",")[-1].strip()
+                city = location.split(",")[0].strip() if "," in location else "Unknown"
+
+                print(f"🔍 Guessed: {brand_name} → {city}, {country}")
+
+                brand_locations[brand_name] = {
+                    "origin": {
+                        "country": country,
+                        "city": city
+                    },
+                    "fulfillment": "UK"
+                }
+                 # 🚀 Save it instantly
+                save_brand_locations(brand_name)
+                return
+
+    print(f"❌ No location found for: {brand_name}")
 
-    finally:
-        driver.quit()
 
 # Example enrichment script
 # Ensure the unrecognized_brands.txt file exists before reading
@@ -2626,19 +2735,10 @@ def finalize_product_entry(product):
 
     # Save to cleaned products
     try:
-        cleaned_path = "cleaned_products.json"
-        if os.path.exists(cleaned_path):
-            with open(cleaned_path, "r", encoding="utf-8") as f:
-                cleaned = json.load(f)
-        else:
-            cleaned = []
-
-        cleaned.append(product)
-        with open(cleaned_path, "w", encoding="utf-8") as f:
-            json.dump(cleaned, f, indent=2)
-        Log.success("🧽 Product added to cleaned_products.json")
+        product_store.upsert_product(product, "cleaned")
+        Log.success("🧽 Product added to cleaned products")
     except Exception as e:
-        Log.warn(f"⚠️ Could not write to cleaned_products.json: {e}")
+        Log.warn(f"⚠️ Could not write to cleaned products: {e}")
 
     # Save to priority products if high quality
     maybe_add_to_priority(product, priority_products)
@@ -2648,21 +2748,19 @@ for brand in brands_to_enrich:
     if brand in example_urls:
         enrich_brand_location(brand, example_urls[brand])
 
-# ✅ Save to JSON here, after loop is complete
-with open("brand_locations.json", "w", encoding="utf-8") as f:
-    json.dump(brand_locations, f, indent=2)
-    Log.success(f"📦 Saved updated brand_locations.json with {len(brand_locations)} entries.")
+# Each enrichment above saved its own brand as it was found
+
+
+packaging_recyclability_matcher = KeywordMatcher({
+    "High": ["100% recyclable", "fully recyclable", "recyclable packaging"],
+    "Medium": ["partially recycled", "made from recycled", "recycled content"],
+    "Low": ["not recyclable", "non-recyclable", "plastic packaging"],
+})
 
 
 def extract_recyclability(text_blobs):
     full_text = " ".join(text_blobs).lower()
-    if any(kw in full_text for kw in ["100% recyclable", "fully recyclable", "recyclable packaging"]):
-        return "High"
-    elif any(kw in full_text for kw in ["partially recycled", "made from recycled", "recycled content"]):
-        return "Medium"
-    elif any(kw in full_text for kw in ["not recyclable", "non-recyclable", "plastic packaging"]):
-        return "Low"
-    return "Unknown"
+    return packaging_recyclability_matcher.first(full_text, "Unknown")
 
 def is_invalid_brand(candidate):
     candidate = candidate.lower()
@@ -2673,19 +2771,18 @@ def is_invalid_brand(candidate):
     )
 
 def scrape_amazon_titles(url, max_items=100, enrich=False):
-    import undetected_chromedriver as uc
-    from common.data.brand_origin_resolver import get_brand_origin, get_brand_origin_intelligent
+    with listing_pool.lease() as lease:
+        return _scrape_amazon_titles(lease, url, max_items, enrich)
 
-    options = uc.ChromeOptions()
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--headless")
 
-    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=chrome_options)
+def _scrape_amazon_titles(lease, url, max_items, enrich):
+    from common.data.brand_origin_resolver import get_brand_origin, get_brand_origin_intelligent
 
+    driver = lease.driver
     if not safe_get(driver, url):
         Log.error(f"🛑 Giving up on URL: {url}")
+        # Repeated blocks: start the next scrape from a fresh browser session
+        lease.mark_unhealthy("blocked")
         return []
 
     try:
@@ -2694,11 +2791,12 @@ def scrape_amazon_titles(url, max_items=100, enrich=False):
         )
     except:
         Log.error("❌ Could not find product containers.")
-        driver.quit()
         return []
 
     time.sleep(2)
-    product_elements = driver.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin]")
+    # Read the rendered grid once; the per-card lookups below then run locally
+    page = StaticPage.from_driver(driver)
+    product_elements = page.find_elements(By.CSS_SELECTOR, "div.s-main-slot div[data-asin]")
     print(f"🔍 Found {len(product_elements)} items")
 
     products = []
@@ -2805,7 +2903,6 @@ def scrape_amazon_titles(url, max_items=100, enrich=False):
         except Exception as e:
             Log.warn(f"⚠️ Skipping product due to error: {e}")
 
-    driver.quit()
     return products
 
 
@@ -2813,7 +2910,50 @@ def scrape_amazon_titles(url, max_items=100, enrich=False):
 import os
 
 #IS_DOCKER = os.environ.get('IS_DOCKER', 'false').lower() == 'true'
+# Material vocabularies for the text-blob inference in extract_product_details.
+# High-specificity materials (exact material names), most specific first
+HIGH_PRIORITY_MATERIAL_KEYWORDS = {
+    "Steel": ["stainless steel", "inox", "steel"],
+    "Aluminium": ["aluminium", "aluminum"],
+    "Glass": ["borosilicate", "glass"],
+    "Silicone": ["silicone"],
+    "Cotton": ["cotton"],
+    "Bamboo": ["bamboo"],
+    "Rubber": ["rubber"]
+}
+# Low-specificity materials (generic terms that can be misleading)
+LOW_PRIORITY_MATERIAL_KEYWORDS = {
+    "Plastic": ["plastic", "polypropylene", "pp", "polyethylene", "pet"],
+    "Paper": ["paper", "paperboard"],
+    "Cardboard": ["cardboard", "carton"],
+    "Fabric": ["fabric", "cloth", "textile", "canvas"],
+    "Wood": ["wood", "wooden"]
+}
+high_priority_material_matcher = KeywordMatcher(HIGH_PRIORITY_MATERIAL_KEYWORDS)
+low_priority_material_matcher = KeywordMatcher(LOW_PRIORITY_MATERIAL_KEYWORDS)
+all_material_keyword_matcher = KeywordMatcher({**HIGH_PRIORITY_MATERIAL_KEYWORDS, **LOW_PRIORITY_MATERIAL_KEYWORDS})
+category_material_matcher = KeywordMatcher({
+    "Paper": ["card", "board game", "book", "journal", "notebook", "diary", "pad"],
+    "Plastic": ["tablet", "tub", "bottle", "container", "cap", "case", "lid", "pouch", "tube"],
+    "Glass": ["jar", "flask", "mason"],
+    "Fabric": ["bag", "tote", "backpack"],
+    "Steel": ["thermos", "cutlery", "knife", "fork", "bottle opener"],
+})
+
+PRODUCT_TITLE_SELECTORS = [
+    (By.ID, "productTitle"),
+    (By.CSS_SELECTOR, "#title span"),
+    (By.CSS_SELECTOR, "span#productTitle"),
+    (By.CSS_SELECTOR, "h1.a-size-large span")
+]
+
+
 def scrape_amazon_product_page(amazon_url, fallback=False):
+    """
+    Scrape one product page. Plain HTTP is tried first and the pooled browser
+    is only used when that fails or leaves required fields empty (see
+    backend/scrapers/amazon/fetcher.py).
+    """
     print("🧪 Inside scraper function, fallback mode is:", fallback)
 
     # CHECK FALLBACK MODE FIRST - before any network calls
@@ -2831,843 +2971,819 @@ def scrape_amazon_product_page(amazon_url, fallback=False):
             "carbon_kg": None
         }
 
-    driver = None
-    
-    # Network-safe Chrome instantiation with fallback
-    try:
-        print("🚀 Launching undetected ChromeDriver...")
-        from undetected_chromedriver import Chrome, ChromeOptions
-        options = ChromeOptions()
-        options.user_data_dir = "selenium_profile"  # Folder to store persistent session/cookies
-        driver = Chrome(headless=False, options=options)
-        print("✅ ChromeDriver launched successfully")
-        
-    except Exception as chrome_error:
-        print(f"❌ ChromeDriver failed to launch: {chrome_error}")
-        print("🔄 Falling back to mock data due to network/driver issues...")
-        return {
-            "title": "Product (Network Fallback)",
-            "origin": "Unknown", 
-            "weight_kg": 0.5,
-            "dimensions_cm": [15, 10, 5],
-            "material_type": "Unknown",
-            "recyclability": "Medium",
-            "eco_score_ml": "C",
-            "transport_mode": "Ship",
-            "carbon_kg": None
-        }
-    
-    try:
+    asin = extract_asin(amazon_url)
+    if asin in priority_products:
+        Log.success("🎯 Using locked metadata for high-accuracy product.")
+        return priority_products[asin]
 
+    product = product_fetcher.fetch(amazon_url)
+    # The browser tier stores its own results; only HTTP-tier products need finalising here
+    if product and product.get("data_sources", {}).get("fetch_tier") == "http":
+        finalize_product_entry(product)
+    return product
 
-        print("🌐 Navigating to page:", amazon_url)
-        driver.get(amazon_url)
-        driver.implicitly_wait(5)
-        
-        text_blobs = [] 
-        legacy_specs = [] 
-        
-        
- # === 🛡️ Bot detection handling ===
-        page = driver.page_source.lower()
-        if "robot check" in page or "captcha" in page:
-            print("🛑 CAPTCHA detected! Saving screenshot...")
 
-            driver.save_screenshot("captcha_screenshot.png")
-            print("📸 Saved screenshot as captcha_screenshot.png")
-            print("🧍 Please solve the CAPTCHA in the Chrome window.")
-            input("✅ Press Enter here once you've solved the CAPTCHA and see the product page...")
+def extract_product_details(driver, amazon_url):
+    """
+    Run the product extractors over a loaded page. `driver` is a live
+    WebDriver or a StaticPage; only DOM reads are used.
+    """
+    text_blobs = []
+    legacy_specs = []
 
-            print("🔁 Retrying scrape after CAPTCHA solve...")
+    # Parse title (the browser tier has already waited for it to render)
+    title = None
+    for by, selector in PRODUCT_TITLE_SELECTORS:
+        try:
+            title = driver.find_element(by, selector).text.strip()
+            break
+        except:
+            continue
 
-            # Re-fetch page content after manual solve
-            page = driver.page_source.lower()
-            if "robot check" in page or "captcha" in page:
-                print("❌ CAPTCHA still present after retry. Giving up.")
-                return None
+    if not title:
+        print(f"❌ Failed to extract product title for: {amazon_url}")
+        return None
 
+    asin = extract_asin(amazon_url)
 
-        # Bot detection check
-        page = driver.page_source.lower()
-        if "robot check" in page or "captcha" in page:
-            print("🛑 Blocked by CAPTCHA / bot check.")
-            return None
+    try:
+        brand = driver.find_element(By.ID, "bylineInfo").text.strip()
+    except:
+        brand = title.split()[0]
 
-        print("🖱️ Simulating scroll + click...")
-        try:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.3);")
-            time.sleep(random.uniform(1, 2))
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.7);")
-            time.sleep(random.uniform(1.5, 2.5))
-        except Exception as e:
-            print(f"⚠️ Scroll simulation failed: {e}")
+    def normalize_brand(brand_raw):
+        return brand_raw.lower().replace("visit the", "").replace("store", "").strip()
 
-        # Try to expand spec blocks
-        try:
-            expandable = driver.find_elements(By.CSS_SELECTOR, ".a-expander-header")
-            if expandable:
-                random.choice(expandable).click()
-                time.sleep(random.uniform(1, 2))
-        except:
-            pass
+    # Use it like this:
+    brand_name = normalize_brand(brand)
+    brand_key = brand_name  # already normalized
 
-        # Hover over title
-        try:
-            hover_target = driver.find_element(By.ID, "productTitle")
-            webdriver.ActionChains(driver).move_to_element(hover_target).perform()
-            time.sleep(random.uniform(0.5, 1.2))
-        except:
-            pass
-
-        # Wait and parse title
-        title = None
-        selectors = [
-            (By.ID, "productTitle"),
-            (By.CSS_SELECTOR, "#title span"),
-            (By.CSS_SELECTOR, "span#productTitle"),
-            (By.CSS_SELECTOR, "h1.a-size-large span")
-        ]
-        for by, selector in selectors:
-            try:
-                WebDriverWait(driver, 10).until(EC.presence_of_element_located((by, selector)))
-                title = driver.find_element(by, selector).text.strip()
-                break
-            except:
-                continue
+    print("🧾 Raw brand text:", brand_name)
 
-        if not title:
-            print(f"❌ Failed to extract product title for: {amazon_url}")
-            return None
-
-        asin = extract_asin(amazon_url)
-        if asin in priority_products:
-            Log.success("🎯 Using locked metadata for high-accuracy product.")
-            return priority_products[asin]
-
-        try:
-            brand = driver.find_element(By.ID, "bylineInfo").text.strip()
-        except:
-            brand = title.split()[0]
-
-        def normalize_brand(brand_raw):
-            return brand_raw.lower().replace("visit the", "").replace("store", "").strip()
-
-        # Use it like this:
-        brand_name = normalize_brand(brand)
-        brand_key = brand_name  # already normalized
-
-        print("🧾 Raw brand text:", brand_name)
 
+    if brand_key not in brand_origin_lookup and brand_key not in known_brand_origins:
+        # Ensure the file exists
+        if not os.path.exists("unrecognized_brands.txt"):
+            with open("unrecognized_brands.txt", "w", encoding="utf-8") as f:
+                f.write("")  # create an empty file
 
-        if brand_key not in brand_origin_lookup and brand_key not in known_brand_origins:
-            # Ensure the file exists
-            if not os.path.exists("unrecognized_brands.txt"):
-                with open("unrecognized_brands.txt", "w", encoding="utf-8") as f:
-                    f.write("")  # create an empty file
+        with open("unrecognized_brands.txt", "a", encoding="utf-8") as log:
+            log.write(f"{brand_name}\n")
+
+    if brand_key not in brand_locations:
+        # The product page is already loaded; no need for a second browser
+        enrich_brand_location_from_page(driver, brand_name)
+
+    # === ORIGIN PRIORITY: Structured page data > unstructured page > brand DB > defaults
+    origin_country = "Unknown"
+    origin_city = "Unknown"
+    origin_source = "Unknown"
+    origin_confidence = "unknown"
+
+    # STEP 1: Extract from structured Amazon sections FIRST (highest priority)
+    origin_data = extract_origin_from_structured_data(driver)
+    if origin_data["found"]:
+        origin_country = origin_data["country"]
+        origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+        origin_source = "structured_page_data"
+        origin_confidence = "high"
+        print(f"🎯 HIGH CONFIDENCE origin from structured data: {origin_country}")
+    
+    # STEP 2: High-confidence brand intelligence (NEW: Elevated Priority)
+    elif origin_country in ["Unknown", "Other", None, ""]:
+        print("🧠 Trying high-confidence brand intelligence first...")
+        brand_intel = get_brand_intelligent_origin(brand_key, title)
+        
+        if brand_intel["confidence"] in ["high", "medium"] and brand_intel["country"] != "Unknown":
+            origin_country = brand_intel["country"]
+            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+            origin_source = "brand_intelligence_priority"
+            origin_confidence = brand_intel["confidence"]
+            print(f"🎯 HIGH-CONFIDENCE brand intelligence: {brand_intel['reasoning']}")
+            
+            # 🚀 AUTO-LEARN: Save successful detection to known_brand_origins for future use
+            if brand_intel["confidence"] in ["high", "medium"]:
+                auto_learn_brand_origin(brand_key, origin_country, brand_intel["reasoning"], brand_intel["confidence"])
+        
+        # STEP 3: Only try unstructured extraction if no high-confidence brand data
+        elif origin_country in ["Unknown", "Other", None, ""]:
 
-            with open("unrecognized_brands.txt", "a", encoding="utf-8") as log:
-                log.write(f"{brand_name}\n")
+            # 1. Try to extract origin from page blobs
+            for blob in text_blobs:
+                legacy_specs = []
+                if origin_blob_trigger_matcher.search(blob):
+                    for pattern in ORIGIN_BLOB_PATTERNS:
+                        match = pattern.search(blob)
+                        if match:
+                            raw_origin = match.group(1).strip()
+                            # Clean up common trailing words
+                            raw_origin = ORIGIN_TRAILING_WORDS.sub('', raw_origin)
+                            if raw_origin.lower() not in ["no", "not specified", "unknown", "", "n/a"]:
+                                origin_country = fuzzy_normalize_origin(raw_origin)
+                                origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+                                origin_source = "blob_match"
+                                print(f"📍 Extracted origin from blob: '{raw_origin}' → {origin_country} (pattern: {pattern.pattern})")
+                                break
+                
+                if origin_country not in ["Unknown", "Other", None, ""]:
+                    break
 
-        if brand_key not in brand_locations:
-            enrich_brand_location(brand_name, amazon_url)
+        # 1.5 Check legacy tech specs
+        if origin_country in ["Unknown", "Other", None, ""]:
+            try:
+                for i in range(len(legacy_specs) - 1):
+                    label = legacy_specs[i].text.lower().strip()
+                    value = legacy_specs[i + 1].text.strip()
+                    if "country of origin" in label:
+                        origin_country = fuzzy_normalize_origin(value)
+                        origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+                        origin_source = "techspec_origin"
+                        print(f"📍 Found origin in tech spec: {value} → {origin_country}")
+                        break
+            except Exception as e:
+                Log.warn(f"⚠️ Error checking tech spec for origin: {e}")
+                
+        # 1.5.2 Extended blob fallback: broader keyword match
+        if origin_country in ["Unknown", "Other", None, ""]:
+            for blob in text_blobs:
+                if origin_blob_fallback_matcher.search(blob.lower()):
+                    for pattern in ORIGIN_BLOB_FALLBACK_PATTERNS:
+                        match = pattern.search(blob)
+                        if match:
+                            raw_origin = match.group(1).strip()
+                            # Clean up trailing words and punctuation
+                            raw_origin = ORIGIN_FALLBACK_TRAILING_WORDS.sub('', raw_origin)
+                            raw_origin = TRAILING_PUNCTUATION.sub('', raw_origin).strip()
+                            
+                            if raw_origin and raw_origin.lower() not in ["unknown", "not specified", "", "n/a", "other"]:
+                                origin_country = fuzzy_normalize_origin(raw_origin)
+                                origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+                                origin_source = "blob_fallback"
+                                print(f"🌍 Extracted origin from extended blob: '{raw_origin}' → {origin_country} (pattern: {pattern.pattern})")
+                                break
+                    if origin_country not in ["Unknown", "Other", None, ""]:
+                        break
 
-        # === ORIGIN PRIORITY: Structured page data > unstructured page > brand DB > defaults
-        origin_country = "Unknown"
-        origin_city = "Unknown"
-        origin_source = "Unknown"
-        origin_confidence = "unknown"
 
-        # STEP 1: Extract from structured Amazon sections FIRST (highest priority)
-        origin_data = extract_origin_from_structured_data(driver)
-        if origin_data["found"]:
-            origin_country = origin_data["country"]
-            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-            origin_source = "structured_page_data"
-            origin_confidence = "high"
-            print(f"🎯 HIGH CONFIDENCE origin from structured data: {origin_country}")
-        
-        # STEP 2: High-confidence brand intelligence (NEW: Elevated Priority)
-        elif origin_country in ["Unknown", "Other", None, ""]:
-            print("🧠 Trying high-confidence brand intelligence first...")
+        # 2. Fallback: brand DB, but only if page didn’t already give a specific origin
+        if origin_country in ["Unknown", "Other", None, ""]:
+            print("⚠️ No page origin data found - using brand intelligence...")
             brand_intel = get_brand_intelligent_origin(brand_key, title)
             
-            if brand_intel["confidence"] in ["high", "medium"] and brand_intel["country"] != "Unknown":
+            if brand_intel["country"] != "Unknown":
                 origin_country = brand_intel["country"]
                 origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                origin_source = "brand_intelligence_priority"
+                origin_source = "brand_intelligence"
                 origin_confidence = brand_intel["confidence"]
-                print(f"🎯 HIGH-CONFIDENCE brand intelligence: {brand_intel['reasoning']}")
+                print(f"🧠 Brand intelligence: {brand_intel['reasoning']}")
+            else:
+                # 🚀 SMART CONTEXT-AWARE DETECTION (before generic database fallback)
+                print(f"🔍 Attempting smart context-aware detection for {brand_key}...")
                 
-                # 🚀 AUTO-LEARN: Save successful detection to known_brand_origins for future use
-                if brand_intel["confidence"] in ["high", "medium"]:
-                    auto_learn_brand_origin(brand_key, origin_country, brand_intel["reasoning"], brand_intel["confidence"])
-            
-            # STEP 3: Only try unstructured extraction if no high-confidence brand data
-            elif origin_country in ["Unknown", "Other", None, ""]:
-
-                # 1. Try to extract origin from page blobs
-                for blob in text_blobs:
-                    legacy_specs = []
-                    if any(kw in blob for kw in ["country of origin", "made in", "manufacturer"]):
-                        # Enhanced regex patterns for different Amazon formats
-                        origin_patterns = [
-                            r"country\s+of\s+origin[:\s]*([a-zA-Z\s,]+)",  # "Country of origin: Vietnam"
-                            r"origin[:\s]*([a-zA-Z\s,]+)",  # "Origin: Vietnam"
-                            r"made\s+in[:\s]*([a-zA-Z\s,]+)",  # "Made in Vietnam"
-                            r"manufacturer(?:ed)?\s+in[:\s]*([a-zA-Z\s,]+)",  # "Manufactured in Vietnam"
-                            r"product\s+of[:\s]*([a-zA-Z\s,]+)"  # "Product of Vietnam"
-                        ]
-                        
-                        for pattern in origin_patterns:
-                            match = re.search(pattern, blob, re.IGNORECASE)
-                            if match:
-                                raw_origin = match.group(1).strip()
-                                # Clean up common trailing words
-                                raw_origin = re.sub(r'\s+(and|or|the|other|countries|regions?).*$', '', raw_origin, flags=re.IGNORECASE)
-                                if raw_origin.lower() not in ["no", "not specified", "unknown", "", "n/a"]:
-                                    origin_country = fuzzy_normalize_origin(raw_origin)
-                                    origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                                    origin_source = "blob_match"
-                                    print(f"📍 Extracted origin from blob: '{raw_origin}' → {origin_country} (pattern: {pattern})")
-                                    break
-                    
-                    if origin_country not in ["Unknown", "Other", None, ""]:
-                        break
-
-            # 1.5 Check legacy tech specs
-            if origin_country in ["Unknown", "Other", None, ""]:
-                try:
-                    for i in range(len(legacy_specs) - 1):
-                        label = legacy_specs[i].text.lower().strip()
-                        value = legacy_specs[i + 1].text.strip()
-                        if "country of origin" in label:
-                            origin_country = fuzzy_normalize_origin(value)
-                            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                            origin_source = "techspec_origin"
-                            print(f"📍 Found origin in tech spec: {value} → {origin_country}")
-                            break
-                except Exception as e:
-                    Log.warn(f"⚠️ Error checking tech spec for origin: {e}")
-                    
-            # 1.5.2 Extended blob fallback: broader keyword match
-            if origin_country in ["Unknown", "Other", None, ""]:
-                for blob in text_blobs:
-                    if any(kw in blob.lower() for kw in ["country of origin", "made in", "product of", "manufactured in", "origin:", "vietnam", "china", "germany", "usa"]):
-                        # Better patterns for different origin formats
-                        origin_patterns = [
-                            r"country\s+of\s+origin[:\s]*([a-zA-Z\s,]+)",
-                            r"made\s+in[:\s]*([a-zA-Z\s,]+)",
-                            r"product\s+of[:\s]*([a-zA-Z\s,]+)",
-                            r"manufactured\s+in[:\s]*([a-zA-Z\s,]+)",
-                            r"origin[:\s]*([a-zA-Z\s,]+)",
-                            # Direct country match when keywords like 'vietnam' appear
-                            r"\b(vietnam|china|germany|usa|japan|france|italy|uk|united kingdom|thailand|indonesia)\b"
-                        ]
-                        
-                        for pattern in origin_patterns:
-                            match = re.search(pattern, blob, re.IGNORECASE)
-                            if match:
-                                raw_origin = match.group(1).strip()
-                                # Clean up trailing words and punctuation
-                                raw_origin = re.sub(r'\s+(and|or|the|other|countries|regions?|etc).*$', '', raw_origin, flags=re.IGNORECASE)
-                                raw_origin = re.sub(r'[,;.].*$', '', raw_origin).strip()
-                                
-                                if raw_origin and raw_origin.lower() not in ["unknown", "not specified", "", "n/a", "other"]:
-                                    origin_country = fuzzy_normalize_origin(raw_origin)
-                                    origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                                    origin_source = "blob_fallback"
-                                    print(f"🌍 Extracted origin from extended blob: '{raw_origin}' → {origin_country} (pattern: {pattern})")
-                                    break
-                        if origin_country not in ["Unknown", "Other", None, ""]:
-                            break
-
-
-            # 2. Fallback: brand DB, but only if page didn’t already give a specific origin
-            if origin_country in ["Unknown", "Other", None, ""]:
-                print("⚠️ No page origin data found - using brand intelligence...")
-                brand_intel = get_brand_intelligent_origin(brand_key, title)
+                # STEP 1: Check for previously learned context-specific patterns
+                learned_result = check_learned_context_patterns(brand_key, title)
+                if learned_result["country"] != "Unknown":
+                    smart_result = learned_result
+                    print(f"🎓 Using learned context pattern: {learned_result['reasoning']}")
+                else:
+                    # STEP 2: Run fresh smart detection with comprehensive product attributes
+                    product_attrs = extract_comprehensive_product_attributes(driver, None, None)
+                    smart_result = smart_context_aware_origin_detection(brand_key, title, product_attrs)
                 
-                if brand_intel["country"] != "Unknown":
-                    origin_country = brand_intel["country"]
+                if smart_result["country"] != "Unknown" and smart_result["confidence"] in ["medium", "high"]:
+                    origin_country = smart_result["country"]
                     origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                    origin_source = "brand_intelligence"
-                    origin_confidence = brand_intel["confidence"]
-                    print(f"🧠 Brand intelligence: {brand_intel['reasoning']}")
-                else:
-                    # 🚀 SMART CONTEXT-AWARE DETECTION (before generic database fallback)
-                    print(f"🔍 Attempting smart context-aware detection for {brand_key}...")
+                    origin_source = "smart_context_detection"
+                    origin_confidence = smart_result["confidence"]
+                    print(f"🎯 Smart detection success: {smart_result['reasoning']}")
                     
-                    # STEP 1: Check for previously learned context-specific patterns
-                    learned_result = check_learned_context_patterns(brand_key, title)
-                    if learned_result["country"] != "Unknown":
-                        smart_result = learned_result
-                        print(f"🎓 Using learned context pattern: {learned_result['reasoning']}")
-                    else:
-                        # STEP 2: Run fresh smart detection with comprehensive product attributes
-                        product_attrs = extract_comprehensive_product_attributes(driver, None, None)
-                        smart_result = smart_context_aware_origin_detection(brand_key, title, product_attrs)
+                    # 🎓 AUTO-LEARN: Save context-specific detection
+                    auto_learn_context_specific_brand(brand_key, title, origin_country, smart_result["reasoning"], smart_result["confidence"])
                     
-                    if smart_result["country"] != "Unknown" and smart_result["confidence"] in ["medium", "high"]:
-                        origin_country = smart_result["country"]
-                        origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                        origin_source = "smart_context_detection"
-                        origin_confidence = smart_result["confidence"]
-                        print(f"🎯 Smart detection success: {smart_result['reasoning']}")
-                        
-                        # 🎓 AUTO-LEARN: Save context-specific detection
-                        auto_learn_context_specific_brand(brand_key, title, origin_country, smart_result["reasoning"], smart_result["confidence"])
-                        
-                    else:
-                        # Final fallback to generic brand DB (only if smart detection fails)
-                        db_origin_country, db_origin_city = resolve_brand_origin(brand_key, title)
-                        origin_country = db_origin_country
-                        origin_city = db_origin_city
-                        origin_source = "brand_db_generic"
-                        origin_confidence = "low"
-                        print(f"📚 Generic brand fallback (smart detection failed): {brand_key} → {origin_country}")
-            else:
-                print(f"🛡️ Preserving explicit product origin: {origin_country} (source: {origin_source})")
+                else:
+                    # Final fallback to generic brand DB (only if smart detection fails)
+                    db_origin_country, db_origin_city = resolve_brand_origin(brand_key, title)
+                    origin_country = db_origin_country
+                    origin_city = db_origin_city
+                    origin_source = "brand_db_generic"
+                    origin_confidence = "low"
+                    print(f"📚 Generic brand fallback (smart detection failed): {brand_key} → {origin_country}")
+        else:
+            print(f"🛡️ Preserving explicit product origin: {origin_country} (source: {origin_source})")
 
-            # 3. Fallback: title guess
-            if origin_country in ["Unknown", "Other", None, ""] and origin_source not in ["brand_db", "blob_match", "techspec_origin"]:
-                origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                origin_source = "title_guess"
-                print(f"🧠 Fallback origin estimate from title: {guess}")
-            else:
-                print(f"🚫 Skipping fallback origin guess — origin already resolved from {origin_source}")
+        # 3. Fallback: title guess
+        if origin_country in ["Unknown", "Other", None, ""] and origin_source not in ["brand_db", "blob_match", "techspec_origin"]:
+            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+            origin_source = "title_guess"
+            print(f"🧠 Fallback origin estimate from title: {guess}")
+        else:
+            print(f"🚫 Skipping fallback origin guess — origin already resolved from {origin_source}")
 
 
-            # 4. Final fallback: shipping panel
-            if origin_country in ["Unknown", "Other", None, ""]:
-                guess = extract_shipping_origin(driver)
-                if guess:
-                    origin_country = fuzzy_normalize_origin(guess)
-                    origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                    origin_source = "shipping_panel"
-                    print(f"🚚 Inferred origin from shipping panel: {guess}")
-                    
-            # 🛡️ Final fallback override guard to protect brand DB origin
-            if origin_source == "brand_db":
-                origin_country = known_brand_origins.get(brand_key, origin_country)
+        # 4. Final fallback: shipping panel
+        if origin_country in ["Unknown", "Other", None, ""]:
+            guess = extract_shipping_origin(driver)
+            if guess:
+                origin_country = fuzzy_normalize_origin(guess)
                 origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                print(f"🛡️ Protected origin override — sticking with brand DB: {origin_country}")
+                origin_source = "shipping_panel"
+                print(f"🚚 Inferred origin from shipping panel: {guess}")
+                
+        # 🛡️ Final fallback override guard to protect brand DB origin
+        if origin_source == "brand_db":
+            origin_country = known_brand_origins.get(brand_key, origin_country)
+            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+            print(f"🛡️ Protected origin override — sticking with brand DB: {origin_country}")
 
-            # Apply intelligent validation before finalizing
-            validated_origin, validated_city, validated_source, validated_confidence = apply_validation_to_origin_detection(
-                origin_country, origin_source, brand_key, title
-            )
-            
-            origin_country = validated_origin
-            origin_city = validated_city 
-            origin_source = validated_source
-            origin_confidence = validated_confidence
-            
-            print(f"🎯 Final validated origin: {origin_country} (source: {origin_source}, confidence: {origin_confidence})")
+        # Apply intelligent validation before finalizing
+        validated_origin, validated_city, validated_source, validated_confidence = apply_validation_to_origin_detection(
+            origin_country, origin_source, brand_key, title
+        )
+        
+        origin_country = validated_origin
+        origin_city = validated_city 
+        origin_source = validated_source
+        origin_confidence = validated_confidence
+        
+        print(f"🎯 Final validated origin: {origin_country} (source: {origin_source}, confidence: {origin_confidence})")
 
-            # 🛡️ Final override protection
-            if asin in priority_products:
-                origin_country = priority_products[asin].get("brand_estimated_origin", origin_country)
-                origin_city = priority_products[asin].get("origin_city", origin_city)
-                print(f"🔒 Restored origin from priority DB: {origin_country}")
+        # 🛡️ Final override protection
+        if asin in priority_products:
+            origin_country = priority_products[asin].get("brand_estimated_origin", origin_country)
+            origin_city = priority_products[asin].get("origin_city", origin_city)
+            print(f"🔒 Restored origin from priority DB: {origin_country}")
 
-        else:
-            print(f"🌍 Skipping all fallbacks — origin already set to: {origin_country} (source: {origin_source})")
+    else:
+        print(f"🌍 Skipping all fallbacks — origin already set to: {origin_country} (source: {origin_source})")
 
 
-        # === STRUCTURED DATA EXTRACTION (HIGH PRIORITY) ===
-        # Extract weight with confidence tracking
-        weight_data = extract_weight_from_structured_data(driver)
-        if weight_data["found"]:
-            weight = weight_data["weight_kg"]
-            weight_confidence = "high"
-            weight_source = weight_data["method"]
-            print(f"⚖️ HIGH CONFIDENCE weight: {weight}kg (source: {weight_source})")
-        else:
-            weight = None
-            weight_confidence = "unknown"
-            weight_source = "none"
-        
-        # Extract materials with multi-material support
-        materials_data = extract_materials_from_structured_data(driver)
-        if materials_data["found"]:
-            all_materials = materials_data["materials"]
-            primary_material = materials_data["primary_material"]
-            material_confidence = "high" if any(m["confidence"] == "high" for m in all_materials) else "medium"
-            material_source = materials_data["method"]
-            
-            # Log all materials found
-            material_names = [m["name"] for m in all_materials]
-            print(f"🧬 {material_confidence.upper()} CONFIDENCE materials: {', '.join(material_names)} (primary: {primary_material})")
-            material_breakdown = [f"{m['name']} ({m['weight']:.1%})" for m in all_materials]
-            print(f"📊 Material breakdown: {material_breakdown}")
-            
-            material = primary_material  # For backwards compatibility
-        else:
-            all_materials = []
-            primary_material = None
-            material = None
-            material_confidence = "unknown"
-            material_source = "none"
-        
-        # Extract dimensions (keep existing logic for now)
-        dimensions = None
-        recyclability = None
-        recyclability_percentage = 30  # Default fallback
-        recyclability_desc = "Recyclability assessment pending"
+    # === STRUCTURED DATA EXTRACTION (HIGH PRIORITY) ===
+    # Extract weight with confidence tracking
+    weight_data = extract_weight_from_structured_data(driver)
+    if weight_data["found"]:
+        weight = weight_data["weight_kg"]
+        weight_confidence = "high"
+        weight_source = weight_data["method"]
+        print(f"⚖️ HIGH CONFIDENCE weight: {weight}kg (source: {weight_source})")
+    else:
+        weight = None
+        weight_confidence = "unknown"
+        weight_source = "none"
+    
+    # Extract materials with multi-material support
+    materials_data = extract_materials_from_structured_data(driver)
+    if materials_data["found"]:
+        all_materials = materials_data["materials"]
+        primary_material = materials_data["primary_material"]
+        material_confidence = "high" if any(m["confidence"] == "high" for m in all_materials) else "medium"
+        material_source = materials_data["method"]
+        
+        # Log all materials found
+        material_names = [m["name"] for m in all_materials]
+        print(f"🧬 {material_confidence.upper()} CONFIDENCE materials: {', '.join(material_names)} (primary: {primary_material})")
+        material_breakdown = [f"{m['name']} ({m['weight']:.1%})" for m in all_materials]
+        print(f"📊 Material breakdown: {material_breakdown}")
+        
+        material = primary_material  # For backwards compatibility
+    else:
+        all_materials = []
+        primary_material = None
+        material = None
+        material_confidence = "unknown"
+        material_source = "none"
+    
+    # Extract dimensions (keep existing logic for now)
+    dimensions = None
+    recyclability = None
+    recyclability_percentage = 30  # Default fallback
+    recyclability_desc = "Recyclability assessment pending"
+    try:
+        text_blobs = []
+        legacy_specs = []
+
+        bullets = driver.find_elements(By.CSS_SELECTOR, "#detailBullets_feature_div li")
+        kv_rows = driver.find_elements(By.CSS_SELECTOR, "table.a-keyvalue tr")
+        desc = driver.find_elements(By.ID, "productDescription")
+
+        # ✅ Safe default + attempt to assign if possible
+        legacy_specs = []
         try:
-            text_blobs = []
-            legacy_specs = []
+            legacy_specs = driver.find_elements(By.CSS_SELECTOR, "#productDetails_techSpec_section_1 td")
+        except:
+            pass
 
-            bullets = driver.find_elements(By.CSS_SELECTOR, "#detailBullets_feature_div li")
-            kv_rows = driver.find_elements(By.CSS_SELECTOR, "table.a-keyvalue tr")
-            desc = driver.find_elements(By.ID, "productDescription")
+        # 📦 Now collect all into text_blobs
+        text_blobs += [b.text.strip().lower() for b in bullets]
+        text_blobs += [r.text.strip().lower() for r in kv_rows]
+        text_blobs += [l.text.strip().lower() for l in legacy_specs]
+        text_blobs += [d.text.strip().lower() for d in desc]
 
-            # ✅ Safe default + attempt to assign if possible
-            legacy_specs = []
-            try:
-                legacy_specs = driver.find_elements(By.CSS_SELECTOR, "#productDetails_techSpec_section_1 td")
-            except:
-                pass
+        print("🔍 Starting to parse text blobs for product details...")
 
-            # 📦 Now collect all into text_blobs
-            text_blobs += [b.text.strip().lower() for b in bullets]
-            text_blobs += [r.text.strip().lower() for r in kv_rows]
-            text_blobs += [l.text.strip().lower() for l in legacy_specs]
-            text_blobs += [d.text.strip().lower() for d in desc]
+        
+        origin_already_saved = False  # ✅ Add this before the loop
+        
+        bullets = driver.find_elements(By.CSS_SELECTOR, "#detailBullets_feature_div li")
+        kv_rows = driver.find_elements(By.CSS_SELECTOR, "table.a-keyvalue tr")
+        desc = driver.find_elements(By.ID, "productDescription")
 
-            print("🔍 Starting to parse text blobs for product details...")
+        text_blobs += [b.text.strip().lower() for b in bullets]
+        text_blobs += [r.text.strip().lower() for r in kv_rows]
+        text_blobs += [d.text.strip().lower() for d in desc]
 
-            
-            origin_already_saved = False  # ✅ Add this before the loop
-            
-            bullets = driver.find_elements(By.CSS_SELECTOR, "#detailBullets_feature_div li")
-            kv_rows = driver.find_elements(By.CSS_SELECTOR, "table.a-keyvalue tr")
-            desc = driver.find_elements(By.ID, "productDescription")
+        # ✅ PRESERVE high-confidence material data from structured extraction
+        if not material:  # Only set if not already detected
+            material = None
+            material_source = "Unknown"
 
-            text_blobs += [b.text.strip().lower() for b in bullets]
-            text_blobs += [r.text.strip().lower() for r in kv_rows]
-            text_blobs += [d.text.strip().lower() for d in desc]
+        for blob in text_blobs:
+            legacy_specs = []
+            if not weight and any(kw in blob for kw in ["weight", "weighs", "item weight", "product weight"]):
+                extracted_weight = extract_weight(blob)
+                if extracted_weight:
+                    weight = extracted_weight
+                    print(f"⚖️ Extracted weight: {weight} kg")
 
-            # ✅ PRESERVE high-confidence material data from structured extraction
-            if not material:  # Only set if not already detected
-                material = None
-                material_source = "Unknown"
+            if not weight:
+                extracted_weight = extract_weight(title)
+                if extracted_weight:
+                    weight = extracted_weight
+                    print(f"⚠️ Extracted from title fallback: {weight} kg")
 
-            for blob in text_blobs:
-                legacy_specs = []
-                if not weight and any(kw in blob for kw in ["weight", "weighs", "item weight", "product weight"]):
-                    extracted_weight = extract_weight(blob)
-                    if extracted_weight:
-                        weight = extracted_weight
-                        print(f"⚖️ Extracted weight: {weight} kg")
-
-                if not weight:
-                    extracted_weight = extract_weight(title)
-                    if extracted_weight:
-                        weight = extracted_weight
-                        print(f"⚠️ Extracted from title fallback: {weight} kg")
-
-                if not dimensions:
-                    extracted_dimensions = extract_dimensions(blob)
-                    if extracted_dimensions:
-                        dimensions = extracted_dimensions
-                        print(f"📦 Extracted dimensions: {dimensions} cm")
-
-
-              
-
-                # === MATERIAL INFERENCE LOGIC ===
-                def infer_material(title, text_blobs, asin=None):
-                    material = None
-                    material_source = "Unknown"
-
-                    # Flatten and lowercase all text blobs
-                    all_text = " ".join(text_blobs).lower()
-                    title = title.lower()
-
-                    # 1. PRIORITIZED keyword match (specific materials first)
-                    # High-specificity materials (exact material names)
-                    high_priority_keywords = {
-                        "Steel": ["stainless steel", "inox", "steel"],  # Most specific first
-                        "Aluminium": ["aluminium", "aluminum"],
-                        "Glass": ["borosilicate", "glass"],
-                        "Silicone": ["silicone"],
-                        "Cotton": ["cotton"],
-                        "Bamboo": ["bamboo"],
-                        "Rubber": ["rubber"]
-                    }
-                    
-                    # Low-specificity materials (generic terms that can be misleading)
-                    low_priority_keywords = {
-                        "Plastic": ["plastic", "polypropylene", "pp", "polyethylene", "pet"],
-                        "Paper": ["paper", "paperboard"],
-                        "Cardboard": ["cardboard", "carton"],
-                        "Fabric": ["fabric", "cloth", "textile", "canvas"],
-                        "Wood": ["wood", "wooden"]
-                    }
-
-                    # Try high-priority keywords first
-                    for mat, terms in high_priority_keywords.items():
-                        if any(kw in all_text for kw in terms):
-                            material = mat
-                            material_source = "text_blob_match_high_priority"
-                            print(f"🎯 High-priority material match: {material} (found: {[kw for kw in terms if kw in all_text]})")
-                            break
-                    
-                    # Only try low-priority if no high-priority match found
-                    if not material:
-                        for mat, terms in low_priority_keywords.items():
-                            if any(kw in all_text for kw in terms):
-                                material = mat
-                                material_source = "text_blob_match_low_priority"
-                                print(f"⚠️ Low-priority material match: {material} (found: {[kw for kw in terms if kw in all_text]})")
-                                break
+            if not dimensions:
+                extracted_dimensions = extract_dimensions(blob)
+                if extracted_dimensions:
+                    dimensions = extracted_dimensions
+                    print(f"📦 Extracted dimensions: {dimensions} cm")
 
-                    # 2. Fuzzy fallback using title (combine both priority levels)
-                    if not material or material.lower() == "unknown":
-                        all_keywords = {**high_priority_keywords, **low_priority_keywords}
-                        for mat, terms in all_keywords.items():
-                            if any(kw in title for kw in terms):
-                                material = mat
-                                material_source = "title_fuzzy"
-                                break
 
-                    # 3. Category heuristics
-                    category_keywords = {
-                        "Paper": ["card", "board game", "book", "journal", "notebook", "diary", "pad"],
-                        "Plastic": ["tablet", "tub", "bottle", "container", "cap", "case", "lid", "pouch", "tube"],
-                        "Glass": ["jar", "flask", "mason"],
-                        "Fabric": ["bag", "tote", "backpack"],
-                        "Steel": ["thermos", "cutlery", "knife", "fork", "bottle opener"],
-                    }
-                    if not material or material.lower() == "unknown":
-                        for mat, keywords in category_keywords.items():
-                            if any(word in title for word in keywords):
-                                material = mat
-                                material_source = "category_guess"
-                                break
+          
 
-                    # 4. Similar ASIN lookup (if priority DB available)
-                    if not material and asin and asin in priority_products:
-                        trusted_product = priority_products[asin]
-                        mat = trusted_product.get("material_type")
-                        if mat and mat.lower() not in ["unknown", ""]:
-                            material = mat
-                            material_source = "trusted_db"
-
-                    # 5. Final fallback
-                    if not material:
-                        material = "Unknown"
-                        material_source = "default"
-
-                    return material, material_source
-
-                # ✅ CONFIDENCE-BASED material detection with validation
-                if not material or material_source in ["Unknown", "none"]:
-                    fallback_material, fallback_source = infer_material(title, text_blobs, asin)
-                    if fallback_material and fallback_material != "Unknown":
-                        material = fallback_material
-                        material_source = fallback_source
-                        print(f"🧬 Fallback material detection: {material} (source: {material_source})")
+            # === MATERIAL INFERENCE LOGIC ===
+            def infer_material(title, text_blobs, asin=None):
+                material = None
+                material_source = "Unknown"
+
+                # Flatten and lowercase all text blobs
+                all_text = " ".join(text_blobs).lower()
+                title = title.lower()
+
+                # 1. PRIORITIZED keyword match (specific materials first)
+                # Try high-priority keywords first
+                mat = high_priority_material_matcher.first(all_text)
+                if mat:
+                    material = mat
+                    material_source = "text_blob_match_high_priority"
+                    print(f"🎯 High-priority material match: {material} (found: {high_priority_material_matcher.matched_keywords(all_text, mat)})")
+
+                # Only try low-priority if no high-priority match found
+                if not material:
+                    mat = low_priority_material_matcher.first(all_text)
+                    if mat:
+                        material = mat
+                        material_source = "text_blob_match_low_priority"
+                        print(f"⚠️ Low-priority material match: {material} (found: {low_priority_material_matcher.matched_keywords(all_text, mat)})")
+
+                # 2. Fuzzy fallback using title (combine both priority levels)
+                if not material or material.lower() == "unknown":
+                    mat = all_material_keyword_matcher.first(title)
+                    if mat:
+                        material = mat
+                        material_source = "title_fuzzy"
+
+                # 3. Category heuristics
+                if not material or material.lower() == "unknown":
+                    mat = category_material_matcher.first(title)
+                    if mat:
+                        material = mat
+                        material_source = "category_guess"
+
+                # 4. Similar ASIN lookup (if priority DB available)
+                if not material and asin and asin in priority_products:
+                    trusted_product = priority_products[asin]
+                    mat = trusted_product.get("material_type")
+                    if mat and mat.lower() not in ["unknown", ""]:
+                        material = mat
+                        material_source = "trusted_db"
+
+                # 5. Final fallback
+                if not material:
+                    material = "Unknown"
+                    material_source = "default"
+
+                return material, material_source
+
+            # ✅ CONFIDENCE-BASED material detection with validation
+            if not material or material_source in ["Unknown", "none"]:
+                fallback_material, fallback_source = infer_material(title, text_blobs, asin)
+                if fallback_material and fallback_material != "Unknown":
+                    material = fallback_material
+                    material_source = fallback_source
+                    print(f"🧬 Fallback material detection: {material} (source: {material_source})")
+            else:
+                # 🔍 VALIDATION: Check for contradictions with fallback detection
+                fallback_material, fallback_source = infer_material(title, text_blobs, asin)
+                if fallback_material and fallback_material != "Unknown" and fallback_material != material:
+                    print(f"⚠️ MATERIAL CONTRADICTION DETECTED:")
+                    print(f"   High-confidence: {material} (source: {material_source})")
+                    print(f"   Text blob guess: {fallback_material} (source: {fallback_source})")
+                    print(f"   🛡️ PRESERVING high-confidence data: {material}")
                 else:
-                    # 🔍 VALIDATION: Check for contradictions with fallback detection
-                    fallback_material, fallback_source = infer_material(title, text_blobs, asin)
-                    if fallback_material and fallback_material != "Unknown" and fallback_material != material:
-                        print(f"⚠️ MATERIAL CONTRADICTION DETECTED:")
-                        print(f"   High-confidence: {material} (source: {material_source})")
-                        print(f"   Text blob guess: {fallback_material} (source: {fallback_source})")
-                        print(f"   🛡️ PRESERVING high-confidence data: {material}")
-                    else:
-                        print(f"✅ Material consistency validated: {material} (source: {material_source})")
+                    print(f"✅ Material consistency validated: {material} (source: {material_source})")
 
-                    
+                
 
-                # === RECYCLABILITY ESTIMATION ===
-                material_recyclability_map = {
-                    "plastic": "Medium",
-                    "glass": "High",
-                    "aluminium": "High",
-                    "steel": "High",
-                    "paper": "Medium",
-                    "cardboard": "Medium",
-                    "fabric": "Low",
-                    "cotton": "Low",
-                    "bamboo": "Low",
-                    "wood": "Low"
-                }
+            # === RECYCLABILITY ESTIMATION ===
+            material_recyclability_map = {
+                "plastic": "Medium",
+                "glass": "High",
+                "aluminium": "High",
+                "steel": "High",
+                "paper": "Medium",
+                "cardboard": "Medium",
+                "fabric": "Low",
+                "cotton": "Low",
+                "bamboo": "Low",
+                "wood": "Low"
+            }
 
-                # Skip smart recyclability here - will be done after loop completes
+            # Skip smart recyclability here - will be done after loop completes
 
 
 
-                # ✅ Save brand origin only ONCE
-                if not origin_already_saved:
-                    safe_save_brand_origin(brand_key, origin_country, origin_city)
-                    origin_already_saved = True
+            # ✅ Save brand origin only ONCE
+            if not origin_already_saved:
+                safe_save_brand_origin(brand_key, origin_country, origin_city)
+                origin_already_saved = True
 
-                if weight and dimensions and material and origin_country:
-                    print("✅ All key details found.")
-                    break
-                
-                
-            # === MATERIAL FALLBACK LOGIC ===
-            # Only try text-based material extraction if structured extraction failed
-            if not material:
-                print("⚠️ No material found in structured data - trying text blob extraction...")
-                for blob in text_blobs:
-                    if any(kw in blob for kw in ["material", "sole", "outer", "fabric"]):
-                        extracted_material = extract_material(blob)
-                        if extracted_material and extracted_material != "Unknown":
-                            material = extracted_material
-                            material_confidence = "medium"
-                            material_source = "text_blob_fallback"
-                            print(f"🧬 MEDIUM CONFIDENCE material from text: {material}")
-                            break
+            if weight and dimensions and material and origin_country:
+                print("✅ All key details found.")
+                break
             
-            # Don't guess materials - better to be honest about uncertainty
-            if not material:
-                material = "Unknown"
-                material_confidence = "unknown"
-                material_source = "none_found"
-                print(f"🧬 No material information found - setting as Unknown")
-
-            # === COMPOUND RECYCLABILITY CALCULATION ===
-            # Calculate recyclability based on all materials found (compound analysis)
-            if all_materials:
-                recyclability_level, recyclability_percentage, recyclability_desc = calculate_compound_recyclability(all_materials)
-                recyclability = recyclability_level
-                
-                # Adjust confidence based on material confidence
-                if material_confidence == "high":
-                    recyclability_confidence = "high"
-                elif material_confidence == "medium":
-                    recyclability_confidence = "medium"
-                else:
-                    recyclability_confidence = "low"
-                    
-                print(f"♻️ Compound recyclability analysis: {recyclability} ({recyclability_percentage}%) - {recyclability_desc} [confidence: {recyclability_confidence}]")
-            elif material and material != "Unknown":
-                # Fallback to single material calculation
-                recyclability_level, recyclability_percentage, recyclability_desc = calculate_smart_recyclability(material)
-                recyclability = recyclability_level
-                recyclability_confidence = "medium"
-                print(f"♻️ Single material recyclability: {material} → {recyclability} ({recyclability_percentage}%) - {recyclability_desc}")
-            else:
-                # No material data available
-                recyclability = "Unknown"
-                recyclability_percentage = 0
-                recyclability_desc = "Cannot assess recyclability without material identification"
-                recyclability_confidence = "unknown"
-                print(f"♻️ Cannot calculate recyclability - no material data available")
-
-        except Exception as e:
-            print("⚠️ Extraction error:", e)
-
-        # === INTELLIGENT FALLBACKS (only when structured extraction fails) ===
-        # Weight fallback: Only use generic fallback if NO weight found anywhere
-        if not weight:
-            print("⚠️ No weight found in structured data - trying text blob extraction...")
-            # Try old extraction method as fallback
+            
+        # === MATERIAL FALLBACK LOGIC ===
+        # Only try text-based material extraction if structured extraction failed
+        if not material:
+            print("⚠️ No material found in structured data - trying text blob extraction...")
             for blob in text_blobs:
-                if any(kw in blob for kw in ["weight", "weighs", "item weight"]):
-                    extracted_weight = extract_weight(blob)
-                    if extracted_weight:
-                        weight = extracted_weight
-                        weight_confidence = "medium"
-                        weight_source = "text_blob_fallback"
-                        print(f"⚖️ MEDIUM CONFIDENCE weight from text: {weight}kg")
+                if any(kw in blob for kw in ["material", "sole", "outer", "fabric"]):
+                    extracted_material = extract_material(blob)
+                    if extracted_material and extracted_material != "Unknown":
+                        material = extracted_material
+                        material_confidence = "medium"
+                        material_source = "text_blob_fallback"
+                        print(f"🧬 MEDIUM CONFIDENCE material from text: {material}")
                         break
         
-        # Final weight fallback: Only use 1kg default if absolutely nothing found
-        if not weight:
-            print("⚠️ No weight found anywhere - using category-based fallback")
-            # TODO: Could implement category-specific defaults here
-            weight = 1.0
-            weight_confidence = "low"
-            weight_source = "generic_default"
+        # Don't guess materials - better to be honest about uncertainty
+        if not material:
+            material = "Unknown"
+            material_confidence = "unknown"
+            material_source = "none_found"
+            print(f"🧬 No material information found - setting as Unknown")
 
-        # ✅ Only use shipping panel if origin is still unknown
-        if origin_country in ["Unknown", "Other", None, ""]:
-            guess = extract_shipping_origin(driver)
-            if guess:
-                origin_country = fuzzy_normalize_origin(guess)
-                origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
-                origin_source = "shipping_panel"
-                print(f"🚚 Inferred origin from shipping panel: {guess}")
-        else:
-            print(f"🛡️ Protected origin: {origin_country} (source: {origin_source})")
-
-
-        # 🌍 GLOBAL DISTANCE CALCULATION - Flexible destination support
-        # Default to UK for backwards compatibility, but system supports any destination
-        destination_country = "UK"  # TODO: Make this configurable based on user location
-        
-        distance_info = calculate_global_distance(origin_country, destination_country)
-        distance = distance_info["distance_km"]
-        transport_mode = get_optimal_transport_mode(distance_info)
-        
-        print(f"🌍 Global routing: {distance_info['origin_city']} → {distance_info['destination_city']} ({distance} km, {transport_mode}, {distance_info['route_type']})")
-
-        
-
-        # === ✅ Fuzzy corrections for material and origin (place it HERE)
-        if material:
-            mat = material.lower()
-            if "plastic" in mat:
-                material = "Plastic"
-            elif "glass" in mat:
-                material = "Glass"
-            elif "alum" in mat:
-                material = "Aluminium"
-            elif "steel" in mat:
-                material = "Steel"
-            elif "paper" in mat:
-                material = "Paper"
-            elif "cardboard" in mat:
-                material = "Cardboard"
-
-        if origin_country:
-            orig = origin_country.lower()
-            if "china" in orig:
-                origin_country = "China"
-            elif "united kingdom" in orig or "uk" in orig:
-                origin_country = "UK"
-            elif "usa" in orig or "united states" in orig:
-                origin_country = "USA"
-            elif "germany" in orig:
-                origin_country = "Germany"
-            elif "france" in orig:
-                origin_country = "France"
-            elif "italy" in orig:
-                origin_country = "Italy"
-
-
-        # 🔒 Final override if product is in trusted DB
-        if asin in priority_products:
-            trusted = priority_products[asin]
-            origin_country = trusted.get("brand_estimated_origin", origin_country)
-            origin_city = trusted.get("origin_city", origin_city)
-            print(f"🔒 Final override from priority DB: {origin_country}")
+        # === COMPOUND RECYCLABILITY CALCULATION ===
+        # Calculate recyclability based on all materials found (compound analysis)
+        if all_materials:
+            recyclability_level, recyclability_percentage, recyclability_desc = calculate_compound_recyclability(all_materials)
+            recyclability = recyclability_level
             
-        # === DATA PROVENANCE SUMMARY ===
-        print("\n🔍 === EXTRACTION SUMMARY ===")
-        print(f"📍 Origin: {origin_country} (source: {origin_source}, confidence: {origin_confidence})")
-        print(f"⚖️ Weight: {weight}kg (source: {weight_source}, confidence: {weight_confidence})")  
-        
-        # Enhanced material summary
-        if all_materials and len(all_materials) > 1:
-            material_summary = f"Primary: {primary_material} | All: {', '.join([m['name'] for m in all_materials])}"
-            print(f"🧬 Materials: {material_summary} (source: {material_source}, confidence: {material_confidence})")
+            # Adjust confidence based on material confidence
+            if material_confidence == "high":
+                recyclability_confidence = "high"
+            elif material_confidence == "medium":
+                recyclability_confidence = "medium"
+            else:
+                recyclability_confidence = "low"
+                
+            print(f"♻️ Compound recyclability analysis: {recyclability} ({recyclability_percentage}%) - {recyclability_desc} [confidence: {recyclability_confidence}]")
+        elif material and material != "Unknown":
+            # Fallback to single material calculation
+            recyclability_level, recyclability_percentage, recyclability_desc = calculate_smart_recyclability(material)
+            recyclability = recyclability_level
+            recyclability_confidence = "medium"
+            print(f"♻️ Single material recyclability: {material} → {recyclability} ({recyclability_percentage}%) - {recyclability_desc}")
         else:
-            print(f"🧬 Material: {material} (source: {material_source}, confidence: {material_confidence})")
-        
-        print(f"♻️ Recyclability: {recyclability} ({recyclability_percentage}%) - {recyclability_desc}")
-        print("================================\n")
+            # No material data available
+            recyclability = "Unknown"
+            recyclability_percentage = 0
+            recyclability_desc = "Cannot assess recyclability without material identification"
+            recyclability_confidence = "unknown"
+            print(f"♻️ Cannot calculate recyclability - no material data available")
+
+    except Exception as e:
+        print("⚠️ Extraction error:", e)
+
+    # === INTELLIGENT FALLBACKS (only when structured extraction fails) ===
+    # Weight fallback: Only use generic fallback if NO weight found anywhere
+    if not weight:
+        print("⚠️ No weight found in structured data - trying text blob extraction...")
+        # Try old extraction method as fallback
+        for blob in text_blobs:
+            if any(kw in blob for kw in ["weight", "weighs", "item weight"]):
+                extracted_weight = extract_weight(blob)
+                if extracted_weight:
+                    weight = extracted_weight
+                    weight_confidence = "medium"
+                    weight_source = "text_blob_fallback"
+                    print(f"⚖️ MEDIUM CONFIDENCE weight from text: {weight}kg")
+                    break
+    
+    # Final weight fallback: Only use 1kg default if absolutely nothing found
+    if not weight:
+        print("⚠️ No weight found anywhere - using category-based fallback")
+        # TODO: Could implement category-specific defaults here
+        weight = 1.0
+        weight_confidence = "low"
+        weight_source = "generic_default"
+
+    # ✅ Only use shipping panel if origin is still unknown
+    if origin_country in ["Unknown", "Other", None, ""]:
+        guess = extract_shipping_origin(driver)
+        if guess:
+            origin_country = fuzzy_normalize_origin(guess)
+            origin_city = origin_hubs.get(origin_country, {}).get("city", "Unknown")
+            origin_source = "shipping_panel"
+            print(f"🚚 Inferred origin from shipping panel: {guess}")
+    else:
+        print(f"🛡️ Protected origin: {origin_country} (source: {origin_source})")
+
+
+    # 🌍 GLOBAL DISTANCE CALCULATION - Flexible destination support
+    # Default to UK for backwards compatibility, but system supports any destination
+    destination_country = "UK"  # TODO: Make this configurable based on user location
+    
+    distance_info = calculate_global_distance(origin_country, destination_country)
+    distance = distance_info["distance_km"]
+    transport_mode = get_optimal_transport_mode(distance_info)
+    
+    print(f"🌍 Global routing: {distance_info['origin_city']} → {distance_info['destination_city']} ({distance} km, {transport_mode}, {distance_info['route_type']})")
+
+    
+
+    # === ✅ Fuzzy corrections for material and origin (place it HERE)
+    if material:
+        mat = material.lower()
+        if "plastic" in mat:
+            material = "Plastic"
+        elif "glass" in mat:
+            material = "Glass"
+        elif "alum" in mat:
+            material = "Aluminium"
+        elif "steel" in mat:
+            material = "Steel"
+        elif "paper" in mat:
+            material = "Paper"
+        elif "cardboard" in mat:
+            material = "Cardboard"
+
+    if origin_country:
+        orig = origin_country.lower()
+        if "china" in orig:
+            origin_country = "China"
+        elif "united kingdom" in orig or "uk" in orig:
+            origin_country = "UK"
+        elif "usa" in orig or "united states" in orig:
+            origin_country = "USA"
+        elif "germany" in orig:
+            origin_country = "Germany"
+        elif "france" in orig:
+            origin_country = "France"
+        elif "italy" in orig:
+            origin_country = "Italy"
+
+
+    # 🔒 Final override if product is in trusted DB
+    if asin in priority_products:
+        trusted = priority_products[asin]
+        origin_country = trusted.get("brand_estimated_origin", origin_country)
+        origin_city = trusted.get("origin_city", origin_city)
+        print(f"🔒 Final override from priority DB: {origin_country}")
+        
+    # === DATA PROVENANCE SUMMARY ===
+    print("\n🔍 === EXTRACTION SUMMARY ===")
+    print(f"📍 Origin: {origin_country} (source: {origin_source}, confidence: {origin_confidence})")
+    print(f"⚖️ Weight: {weight}kg (source: {weight_source}, confidence: {weight_confidence})")  
+    
+    # Enhanced material summary
+    if all_materials and len(all_materials) > 1:
+        material_summary = f"Primary: {primary_material} | All: {', '.join([m['name'] for m in all_materials])}"
+        print(f"🧬 Materials: {material_summary} (source: {material_source}, confidence: {material_confidence})")
+    else:
+        print(f"🧬 Material: {material} (source: {material_source}, confidence: {material_confidence})")
+    
+    print(f"♻️ Recyclability: {recyclability} ({recyclability_percentage}%) - {recyclability_desc}")
+    print("================================\n")
 
-        # 🌍 Calculate global distances using the new flexible system
-        destination_country = "UK"  # TODO: Make configurable based on user location
-        distance_info = calculate_global_distance(origin_country, destination_country)
-        distance_origin_to_uk = distance_info["distance_km"]
-        distance_uk_to_user = 100  # TODO: Calculate based on user's actual location
+    # 🌍 Calculate global distances using the new flexible system
+    destination_country = "UK"  # TODO: Make configurable based on user location
+    distance_info = calculate_global_distance(origin_country, destination_country)
+    distance_origin_to_uk = distance_info["distance_km"]
+    distance_uk_to_user = 100  # TODO: Calculate based on user's actual location
 
-        # === Now build your product dict (after fuzzy fixes)
+    # === Now build your product dict (after fuzzy fixes)
+    
+    # === CO2 emissions estimate using material_co2_map
+    co2_emissions = None
+    if material and weight:
+        co2_emissions = round(material_co2_map.get(material.lower(), 2.0) * weight, 2)
         
-        # === CO2 emissions estimate using material_co2_map
-        co2_emissions = None
-        if material and weight:
-            co2_emissions = round(material_co2_map.get(material.lower(), 2.0) * weight, 2)
-            
+    
         
-            
 
-        # === Calculate overall confidence based on data sources ===
-        confidence_scores = {
-            "high": 3,
-            "medium": 2, 
-            "low": 1,
-            "unknown": 0
+    # === Calculate overall confidence based on data sources ===
+    confidence_scores = {
+        "high": 3,
+        "medium": 2, 
+        "low": 1,
+        "unknown": 0
+    }
+    
+    total_confidence = (
+        confidence_scores.get(origin_confidence, 0) +
+        confidence_scores.get(weight_confidence, 0) +
+        confidence_scores.get(material_confidence, 0)
+    ) / 3
+    
+    if total_confidence >= 2.5:
+        overall_confidence = "High"
+    elif total_confidence >= 1.5:
+        overall_confidence = "Medium"
+    elif total_confidence >= 0.5:
+        overall_confidence = "Low"
+    else:
+        overall_confidence = "Estimated"
+
+    product = {
+        "asin": asin,
+        "title": title,
+        "brand_estimated_origin": origin_country,
+        "origin_city": origin_city,
+        "distance_origin_to_uk": distance_origin_to_uk,
+        "distance_uk_to_user": 100,
+        "estimated_weight_kg": round(weight * 1.05, 2),
+        "raw_product_weight_kg": weight,
+        "dimensions_cm": dimensions,
+        "material_type": material,  # Keep for backwards compatibility
+        "co2_emissions": None,
+        "recyclability": recyclability,
+        "recyclability_percentage": recyclability_percentage,
+        "recyclability_description": recyclability_desc,
+        "transport_mode": transport_mode,
+        "co2_emissions": co2_emissions,
+        "confidence": overall_confidence,
+        # === NEW: Enhanced material information ===
+        "materials": {
+            "primary_material": primary_material or material,
+            "all_materials": [{"name": m["name"], "weight": m["weight"]} for m in all_materials] if all_materials else [],
+            "material_count": len(all_materials) if all_materials else (1 if material != "Unknown" else 0)
+        },
+        # === NEW: Data provenance metadata ===
+        "data_sources": {
+            "origin_source": origin_source,
+            "origin_confidence": origin_confidence,
+            "weight_source": weight_source,
+            "weight_confidence": weight_confidence,
+            "material_source": material_source,
+            "material_confidence": material_confidence
         }
+    }
+    
+    
+    return product
+
+
+    # 🌍 Add comprehensive distance fields using global calculation system
+    destination_country = "UK"  # TODO: Make configurable based on user location
+    distance_info = calculate_global_distance(origin_country, destination_country)
+    
+    product["distance_origin_to_uk"] = distance_info["distance_km"]
+    product["distance_uk_to_user"] = 100  # TODO: Calculate based on actual user location
+    product["transport_mode"] = get_optimal_transport_mode(distance_info)
+    product["route_type"] = distance_info["route_type"]
+    
+    print(f"🌍 Global distances: {distance_info['origin_city']} → {distance_info['destination_city']} = {distance_info['distance_km']} km ({distance_info['route_type']}, {product['transport_mode']})")
+
+
+    print("✅ Scraped product:", product["title"])
+    print(f"🎯 Returning final origin: {origin_country} (source: {origin_source})")
+    return product
+
+
+
+
+# SCRAPER_CAPTCHA_PROMPT=1 lets a local run at a terminal pause for a manual
+# CAPTCHA solve; otherwise a CAPTCHA raises ScrapeBlocked straight away.
+SCRAPER_CAPTCHA_PROMPT = os.environ.get("SCRAPER_CAPTCHA_PROMPT", "0") == "1"
+
+
+def scrape_product_page_with_browser(amazon_url):
+    lease = None
+    
+    # Network-safe Chrome checkout from the pool, with fallback
+    try:
+        lease = product_page_pool.checkout()
+        driver = lease.driver
         
-        total_confidence = (
-            confidence_scores.get(origin_confidence, 0) +
-            confidence_scores.get(weight_confidence, 0) +
-            confidence_scores.get(material_confidence, 0)
-        ) / 3
-        
-        if total_confidence >= 2.5:
-            overall_confidence = "High"
-        elif total_confidence >= 1.5:
-            overall_confidence = "Medium"
-        elif total_confidence >= 0.5:
-            overall_confidence = "Low"
-        else:
-            overall_confidence = "Estimated"
-
-        product = {
-            "asin": asin,
-            "title": title,
-            "brand_estimated_origin": origin_country,
-            "origin_city": origin_city,
-            "distance_origin_to_uk": distance_origin_to_uk,
-            "distance_uk_to_user": 100,
-            "estimated_weight_kg": round(weight * 1.05, 2),
-            "raw_product_weight_kg": weight,
-            "dimensions_cm": dimensions,
-            "material_type": material,  # Keep for backwards compatibility
-            "co2_emissions": None,
-            "recyclability": recyclability,
-            "recyclability_percentage": recyclability_percentage,
-            "recyclability_description": recyclability_desc,
-            "transport_mode": transport_mode,
-            "co2_emissions": co2_emissions,
-            "confidence": overall_confidence,
-            # === NEW: Enhanced material information ===
-            "materials": {
-                "primary_material": primary_material or material,
-                "all_materials": [{"name": m["name"], "weight": m["weight"]} for m in all_materials] if all_materials else [],
-                "material_count": len(all_materials) if all_materials else (1 if material != "Unknown" else 0)
-            },
-            # === NEW: Data provenance metadata ===
-            "data_sources": {
-                "origin_source": origin_source,
-                "origin_confidence": origin_confidence,
-                "weight_source": weight_source,
-                "weight_confidence": weight_confidence,
-                "material_source": material_source,
-                "material_confidence": material_confidence
-            }
+    except Exception as chrome_error:
+        print(f"❌ ChromeDriver failed to launch: {chrome_error}")
+        print("🔄 Falling back to mock data due to network/driver issues...")
+        return {
+            "title": "Product (Network Fallback)",
+            "origin": "Unknown", 
+            "weight_kg": 0.5,
+            "dimensions_cm": [15, 10, 5],
+            "material_type": "Unknown",
+            "recyclability": "Medium",
+            "eco_score_ml": "C",
+            "transport_mode": "Ship",
+            "carbon_kg": None
         }
-        
-        
-        # ✅ Now process + store it
-        finalize_product_entry(product)
-        return product
+    
+    try:
 
 
-        # 🌍 Add comprehensive distance fields using global calculation system
-        destination_country = "UK"  # TODO: Make configurable based on user location
-        distance_info = calculate_global_distance(origin_country, destination_country)
-        
-        product["distance_origin_to_uk"] = distance_info["distance_km"]
-        product["distance_uk_to_user"] = 100  # TODO: Calculate based on actual user location
-        product["transport_mode"] = get_optimal_transport_mode(distance_info)
-        product["route_type"] = distance_info["route_type"]
-        
-        print(f"🌍 Global distances: {distance_info['origin_city']} → {distance_info['destination_city']} = {distance_info['distance_km']} km ({distance_info['route_type']}, {product['transport_mode']})")
+        print("🌐 Navigating to page:", amazon_url)
+        driver.get(amazon_url)
+        driver.implicitly_wait(5)
 
+ # === 🛡️ Bot detection handling ===
+        page = driver.page_source.lower()
+        if "robot check" in page or "captcha" in page:
+            print("🛑 CAPTCHA detected! Saving screenshot...")
 
-        print("✅ Scraped product:", product["title"])
-        print(f"🎯 Returning final origin: {origin_country} (source: {origin_source})")
-        return product
+            driver.save_screenshot("captcha_screenshot.png")
+            print("📸 Saved screenshot as captcha_screenshot.png")
+            # Only a local run at a terminal can wait for a person; the API must not block
+            if SCRAPER_CAPTCHA_PROMPT and sys.stdin is not None and sys.stdin.isatty():
+                print("🧍 Please solve the CAPTCHA in the Chrome window.")
+                input("✅ Press Enter here once you've solved the CAPTCHA and see the product page...")
 
+                print("🔁 Retrying scrape after CAPTCHA solve...")
 
+                # Re-fetch page content after manual solve
+                page = driver.page_source.lower()
+            if "robot check" in page or "captcha" in page:
+                print("❌ CAPTCHA not solved. Giving up.")
+                lease.mark_unhealthy("captcha")
+                raise ScrapeBlocked("captcha")
+
+        print("🖱️ Simulating scroll + click...")
+        try:
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.3);")
+            time.sleep(random.uniform(1, 2))
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.7);")
+            time.sleep(random.uniform(1.5, 2.5))
+        except Exception as e:
+            print(f"⚠️ Scroll simulation failed: {e}")
+
+        # Try to expand spec blocks
+        try:
+            expandable = driver.find_elements(By.CSS_SELECTOR, ".a-expander-header")
+            if expandable:
+                random.choice(expandable).click()
+                time.sleep(random.uniform(1, 2))
+        except:
+            pass
+
+        # Hover over title
+        try:
+            hover_target = driver.find_element(By.ID, "productTitle")
+            webdriver.ActionChains(driver).move_to_element(hover_target).perform()
+            time.sleep(random.uniform(0.5, 1.2))
+        except:
+            pass
+
+        # Wait for the title to render before reading the page
+        try:
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "#productTitle, #title span, h1.a-size-large span")
+            ))
+        except:
+            pass
+
+        # Extract from one snapshot instead of a WebDriver round trip per lookup
+        product = extract_product_details(StaticPage.from_driver(driver), amazon_url)
+        if product is None:
+            return None
+
+        # ✅ Now process + store it
+        finalize_product_entry(product)
+        return product
 
     finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+        if lease:
+            product_page_pool.checkin(lease)
+
+
+# Static HTML first, pooled browser on block/CAPTCHA or missing fields.
+# SCRAPER_HTTP_FIRST=0 goes straight to the browser.
+product_fetcher = TieredFetcher(
+    extract_product_details,
+    scrape_product_page_with_browser,
+    http=wrap_http_tier(HttpTier()),
+    http_enabled=os.environ.get("SCRAPER_HTTP_FIRST", "1") != "0",
+)
 
 
 
@@ -3683,14 +3799,11 @@ if __name__ == "__main__":
     all_products = []
 
     # Load priority DB
-    priority_path = "priority_products.json"
-    try:
-        with open(priority_path, "r", encoding="utf-8") as f:
-            priority_db = json.load(f)
-            Log.success(f"🔐 Loaded {len(priority_db)} priority products.")
-    except:
-        priority_db = {}
-        Log.warn("No existing priority_products.json, starting fresh.")
+    priority_db = product_store.products("priority")
+    if priority_db:
+        Log.success(f"🔐 Loaded {len(priority_db)} priority products.")
+    else:
+        Log.warn("No existing priority products, starting fresh.")
 
     # Define search terms
     search_terms = [
@@ -3719,41 +3832,39 @@ if __name__ == "__main__":
     ]
 
 
-    for term in search_terms:
-        for page in range(1, 3):
-            url = f"https://www.amazon.co.uk/s?k={term}&page={page}"
-            Log.info(f"Scraping: {url}")
-            products = scrape_amazon_titles(url, max_items=50)
+    # Pages are scraped concurrently; per-domain token buckets replace the
+    # fixed anti-bot pauses and ASINs are de-duplicated across workers.
+    from backend.scrapers.orchestrator import CallbackSink, ScrapeOrchestrator
 
-            new_products = []
-            for p in products:
-                asin = p.get("asin")
-                if asin and asin not in all_asins:
-                    all_asins.add(asin)
-                    new_products.append(p)
-            
-            #
+    def save_new_product(p, source_url):
+        all_products.append(p)
+        if maybe_add_to_priority(p, priority_db):
+            Log.success(f"⭐ Added high-confidence product: {p.get('asin')}")
 
-            if new_products:
-                all_products.extend(new_products)
-                Log.success(f"➕ {len(new_products)} new products")
+        # ✅ Checkpoint every 25 new products (priority products are stored as they're added)
+        if len(all_products) % 25 == 0:
+            product_store.upsert_products(all_products[-25:], "bulk")
+            Log.info(f"📥 Saved checkpoint: {len(all_products)} total")
 
-                for p in new_products:
-                    asin = p.get("asin")
-                    maybe_add_to_priority(p, priority_db)
-                    Log.success(f"⭐ Added high-confidence product: {asin}")
-
-                # ✅ Save after each batch of new products
-                with open(priority_path, "w", encoding="utf-8") as f:
-                    json.dump(priority_db, f, indent=2)
-                    Log.success(f"✅ Saved {len(priority_db)} total trusted products.")
-
-                with open("scraped_products_tmp.json", "w", encoding="utf-8") as f:
-                    json.dump(all_products, f, indent=2)
-                    Log.info(f"📥 Saved checkpoint: {len(all_products)} total")
+    urls = [
+        f"https://www.amazon.co.uk/s?k={term}&page={page}"
+        for term in search_terms
+        for page in range(1, 3)
+    ]
+    orchestrator = ScrapeOrchestrator(
+        lambda url: scrape_amazon_titles(url, max_items=50),
+        workers=listing_pool.size,
+        sink=CallbackSink(save_new_product),
+        seen_asins=all_asins,
+    )
+    summary = orchestrator.run(urls)
+    Log.info(f"📊 Scrape summary: {summary}")
 
+    Log.success(f"✅ {len(priority_db)} total trusted products in {product_store.path}.")
 
-        time.sleep(random.uniform(2.5, 4.5))  # anti-bot pause
+    with open("scraped_products_tmp.json", "w", encoding="utf-8") as f:
+        json.dump(all_products, f, indent=2)
+        Log.info(f"📥 Saved checkpoint: {len(all_products)} total")
 
     # ✅ ✅ NOW PROCESS THE PRODUCTS
     unique_products = {p["asin"]: p for p in all_products}.values()
@@ -3785,6 +3896,7 @@ if __name__ == "__main__":
             writer.writerows(cleaned_products)
             print(f"📄 Saved structured training data to {csv_path}")
 
+    product_store.upsert_products(unique_products, "bulk")
     save_products_to_json(list(unique_products), "bulk_scraped_products.json")
 
 
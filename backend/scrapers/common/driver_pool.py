@@ -0,0 +1,290 @@
+"""
+Bounded pool of warm Selenium WebDrivers shared by the scrapers.
+
+Starting Chrome dominates per-product scrape time, so drivers are created once
+and reused. Each checkout health-checks the driver. A driver is retired (quit
+and replaced on demand) once it has served `max_pages` pages, has been alive
+for `max_age` seconds, its browser process tree grows past `max_rss_mb`, or a
+caller marks it unhealthy (e.g. after hitting a CAPTCHA).
+
+    with product_page_pool.lease() as lease:
+        lease.driver.get(url)
+        ...
+
+Drivers never cross a fork: a pool used in a forked gunicorn worker drops the
+parent's idle drivers and starts its own.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # memory-based recycling is skipped without psutil
+    psutil = None
+
+POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "2"))
+POOL_MAX_PAGES = int(os.environ.get("SCRAPER_POOL_MAX_PAGES", "50"))
+POOL_MAX_AGE = float(os.environ.get("SCRAPER_POOL_MAX_AGE", "1800"))
+POOL_MAX_RSS_MB = float(os.environ.get("SCRAPER_POOL_MAX_RSS_MB", "1500"))
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get("SCRAPER_POOL_CHECKOUT_TIMEOUT", "120"))
+
+# name -> DriverPool, for /health/detail and shutdown
+POOLS = {}
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no driver becomes available within the checkout timeout"""
+
+
+class Lease:
+    """A checked-out driver plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, driver, slot):
+        self.driver = driver
+        self.slot = slot
+        self.created_at = time.monotonic()
+        self.pages = 0
+        self.unhealthy_reason = None
+
+    def mark_unhealthy(self, reason):
+        """Retire this driver when it is returned (blocked session, crashed tab, ...)."""
+        self.unhealthy_reason = reason
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created_at
+
+
+def _browser_rss_mb(driver):
+    """Resident memory of the chromedriver process and every browser process it spawned."""
+    if psutil is None:
+        return None
+    try:
+        pid = getattr(driver, "browser_pid", None) or driver.service.process.pid
+        root = psutil.Process(pid)
+        procs = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class _Stat:
+    """Count/total/max plus a window of recent samples for percentiles"""
+
+    def __init__(self, window=500):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_s": round(self.total / self.count, 4) if self.count else 0.0,
+            "p95_s": round(p95, 4),
+            "max_s": round(self.max, 4),
+        }
+
+
+class DriverPool:
+    """Bounded checkout/return pool of WebDrivers built by `factory(slot)`"""
+
+    def __init__(self, name, factory, size=POOL_SIZE, max_pages=POOL_MAX_PAGES, max_age=POOL_MAX_AGE,
+                 max_rss_mb=POOL_MAX_RSS_MB, checkout_timeout=POOL_CHECKOUT_TIMEOUT):
+        self.name = name
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.max_rss_mb = max_rss_mb
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._free_slots = list(range(self.size))
+        self._pid = os.getpid()
+
+        self.wait_times = _Stat()
+        self.lifetimes = _Stat()
+        self.counters = {"created": 0, "create_errors": 0, "checkouts": 0, "timeouts": 0, "recycled": 0}
+        self.retire_reasons = {}
+
+        POOLS[name] = self
+
+    # --- checkout / return -------------------------------------------------
+
+    def checkout(self, timeout=None):
+        """Borrow a healthy driver, starting one if the pool has a free slot."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            with self._cond:
+                self._after_fork()
+                while not self._idle and not self._free_slots:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        raise PoolExhausted(f"No '{self.name}' driver available after {timeout}s")
+                    self._cond.wait(remaining)
+                lease = self._idle.pop() if self._idle else None
+                slot = None if lease else self._free_slots.pop()
+
+            if lease is None:
+                lease = self._create(slot)
+            elif not self._is_healthy(lease):
+                self._retire(lease, "failed health check")
+                continue
+
+            self.wait_times.add(time.monotonic() - started)
+            self.counters["checkouts"] += 1
+            return lease
+
+    def checkin(self, lease):
+        """Return a driver; it is retired instead if it is due for recycling."""
+        lease.pages += 1
+        reason = lease.unhealthy_reason or self._recycle_reason(lease)
+        if reason:
+            self._retire(lease, reason)
+            return
+        with self._cond:
+            if os.getpid() != self._pid:
+                return
+            self._idle.append(lease)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        lease = self.checkout(timeout)
+        try:
+            yield lease
+        except BaseException:
+            lease.mark_unhealthy(lease.unhealthy_reason or "error during scrape")
+            raise
+        finally:
+            self.checkin(lease)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Shorthand for callers that only need the driver itself."""
+        with self.lease(timeout) as lease:
+            yield lease.driver
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def warm(self, count=None):
+        """Start up to `count` idle drivers ahead of demand (default: fill the pool)."""
+        count = self.size if count is None else count
+        started = []
+        for _ in range(count):
+            with self._cond:
+                self._after_fork()
+                if not self._free_slots:
+                    break
+                slot = self._free_slots.pop()
+            try:
+                started.append(self._create(slot))
+            except Exception as e:
+                print(f"⚠️ Could not warm '{self.name}' driver: {e}")
+                break
+        for lease in started:
+            lease.pages -= 1  # warm-up isn't a served page
+            self.checkin(lease)
+        return len(started)
+
+    def shutdown(self):
+        with self._cond:
+            # A forked worker exiting must not quit the drivers it inherited from the master
+            self._after_fork()
+            idle, self._idle = self._idle, []
+        for lease in idle:
+            self._retire(lease, "shutdown")
+
+    def _create(self, slot):
+        try:
+            driver = self.factory(slot)
+        except Exception:
+            self.counters["create_errors"] += 1
+            with self._cond:
+                self._free_slots.append(slot)
+                self._cond.notify()
+            raise
+        self.counters["created"] += 1
+        return Lease(driver, slot)
+
+    def _retire(self, lease, reason):
+        self.counters["recycled"] += 1
+        self.retire_reasons[reason] = self.retire_reasons.get(reason, 0) + 1
+        self.lifetimes.add(lease.age)
+        try:
+            lease.driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            if os.getpid() == self._pid:
+                self._free_slots.append(lease.slot)
+                self._cond.notify()
+
+    def _after_fork(self):
+        # Chrome sessions belong to the parent process; start fresh in a forked child
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._free_slots = list(range(self.size))
+
+    # --- health ------------------------------------------------------------
+
+    def _is_healthy(self, lease):
+        try:
+            lease.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _recycle_reason(self, lease):
+        if self.max_pages and lease.pages >= self.max_pages:
+            return "max pages"
+        if self.max_age and lease.age >= self.max_age:
+            return "max age"
+        if self.max_rss_mb:
+            rss = _browser_rss_mb(lease.driver)
+            if rss is not None and rss >= self.max_rss_mb:
+                return "memory growth"
+        return None
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            in_use = self.size - idle - len(self._free_slots)
+        return {
+            "size": self.size,
+            "idle": idle,
+            "in_use": in_use,
+            **self.counters,
+            "retire_reasons": dict(self.retire_reasons),
+            "wait": self.wait_times.summary(),
+            "driver_lifetime": self.lifetimes.summary(),
+        }
+
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in POOLS.items()}
+
+
+@atexit.register
+def shutdown_all():
+    for pool in list(POOLS.values()):
+        pool.shutdown()
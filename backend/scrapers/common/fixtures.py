@@ -0,0 +1,224 @@
+"""
+Record/replay of scraped pages as gzip-compressed HTML fixtures.
+
+With SCRAPER_FIXTURES=record every page the scraper loads (HTTP tier or
+browser) is also written to SCRAPER_FIXTURE_DIR. With SCRAPER_FIXTURES=replay
+nothing touches the network: the HTTP tier and both driver pools serve the
+recorded pages back through StaticPage, so the whole extraction path runs
+offline and deterministically (tools/benchmarks builds on this).
+SCRAPER_FIXTURE_LATENCY adds that many seconds to every replayed page load,
+standing in for the network when load-testing the API.
+
+    store = FixtureStore("tools/benchmarks/fixtures")
+    store.save(url, html)
+    page = StaticPage(store.load(url), url)
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from backend.scrapers.common.static_page import StaticPage
+from backend.scrapers.orchestrator import normalize_url
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+FIXTURE_MODE = os.environ.get("SCRAPER_FIXTURES", "").lower() or None  # None, "record" or "replay"
+FIXTURE_DIR = os.environ.get("SCRAPER_FIXTURE_DIR", os.path.join(REPO_ROOT, "tools", "benchmarks", "fixtures"))
+FIXTURE_LATENCY = float(os.environ.get("SCRAPER_FIXTURE_LATENCY", "0"))
+
+_ASIN = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+
+
+class FixtureMissing(KeyError):
+    """Replay mode was asked for a page that was never recorded"""
+
+
+def page_kind(url):
+    return "product" if _ASIN.search(url) else "search"
+
+
+class FixtureStore:
+    """
+    A directory of <kind>-<id>.html.gz files plus index.json mapping each
+    normalised URL to its file. Product pages are keyed by ASIN so tracking
+    parameters and slugs don't create duplicates.
+    """
+
+    def __init__(self, root=FIXTURE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def key(self, url):
+        match = _ASIN.search(url)
+        return f"asin:{match.group(1)}" if match else normalize_url(url)
+
+    def _filename(self, key, kind):
+        ident = key[5:] if key.startswith("asin:") else hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return f"{kind}-{ident}.html.gz"
+
+    def save(self, url, html, kind=None):
+        kind = kind or page_kind(url)
+        key = self.key(url)
+        filename = self._filename(key, kind)
+        os.makedirs(self.root, exist_ok=True)
+        # mtime=0 keeps re-recordings of an unchanged page byte-identical
+        with gzip.GzipFile(os.path.join(self.root, filename), "wb", compresslevel=9, mtime=0) as f:
+            f.write(html.encode("utf-8"))
+        with self._lock:
+            self.index[key] = {
+                "file": filename,
+                "url": url,
+                "kind": kind,
+                "bytes": len(html),
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.index_path)
+        return filename
+
+    def load(self, url):
+        entry = self.index.get(self.key(url))
+        if entry is None:
+            raise FixtureMissing(url)
+        with gzip.open(os.path.join(self.root, entry["file"]), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def entries(self, kind=None):
+        """[(url, entry)] in a stable order, optionally only one kind of page."""
+        return sorted(
+            ((e["url"], e) for e in self.index.values() if kind is None or e["kind"] == kind),
+            key=lambda item: item[1]["file"],
+        )
+
+    def __contains__(self, url):
+        return self.key(url) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+
+# === HTTP tier stand-ins (same get(url) -> (page, reason) contract as fetcher.HttpTier) ===
+
+class RecordingHttpTier:
+    def __init__(self, http, store):
+        self.http = http
+        self.store = store
+
+    def get(self, url):
+        page, reason = self.http.get(url)
+        if page is not None:
+            self.store.save(url, page.page_source)
+        return page, reason
+
+
+class ReplayHttpTier:
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, url):
+        if FIXTURE_LATENCY:
+            time.sleep(FIXTURE_LATENCY)
+        try:
+            return StaticPage(self.store.load(url), url), None
+        except FixtureMissing:
+            return None, "fixture missing"
+
+
+# === Driver stand-ins ===
+
+class RecordingDriver:
+    """Wraps a real WebDriver and saves the page source after every get()"""
+
+    def __init__(self, driver, store):
+        self._driver = driver
+        self._store = store
+
+    def get(self, url):
+        self._driver.get(url)
+        try:
+            self._store.save(url, self._driver.page_source)
+        except Exception as e:
+            print(f"⚠️ Could not record fixture for {url}: {e}")
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class ReplayDriver:
+    """
+    Offline WebDriver: get(url) loads the recorded page and DOM reads go to a
+    StaticPage. Scrolling, clicks and screenshots are no-ops.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.page = StaticPage("<html></html>", "about:blank")
+        self.pages_loaded = 0
+
+    def get(self, url):
+        if FIXTURE_LATENCY:
+            time.sleep(FIXTURE_LATENCY)
+        self.page = StaticPage(self.store.load(url), url)
+        self.pages_loaded += 1
+
+    @property
+    def page_source(self):
+        return self.page.page_source
+
+    @property
+    def current_url(self):
+        return self.page.current_url
+
+    @property
+    def title(self):
+        return self.page.title
+
+    def find_element(self, by="id", value=None):
+        return self.page.find_element(by, value)
+
+    def find_elements(self, by="id", value=None):
+        return self.page.find_elements(by, value)
+
+    def execute_script(self, script, *args):
+        # The pool's health check runs "return 1"
+        return 1 if script.strip() == "return 1" else None
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def save_screenshot(self, path):
+        return False
+
+    def quit(self):
+        pass
+
+
+# === Wiring (used where the scraper builds its pools and fetcher) ===
+
+def wrap_driver_factory(factory, mode=FIXTURE_MODE, store=None):
+    """Return a pool factory that records through, or replaces, `factory`."""
+    if mode not in ("record", "replay"):
+        return factory
+    store = store or FixtureStore()
+    if mode == "replay":
+        return lambda slot: ReplayDriver(store)
+    return lambda slot: RecordingDriver(factory(slot), store)
+
+
+def wrap_http_tier(http, mode=FIXTURE_MODE, store=None):
+    if mode not in ("record", "replay"):
+        return http
+    store = store or FixtureStore()
+    if mode == "replay":
+        return ReplayHttpTier(store)
+    return RecordingHttpTier(http, store)
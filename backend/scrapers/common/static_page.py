@@ -0,0 +1,214 @@
+"""
+Read-only, WebDriver-shaped view over static HTML, parsed once with lxml.
+
+The product-page extractors in scrape_amazon_titles.py only read the DOM:
+find_element(s) with By.ID / CSS_SELECTOR / TAG_NAME / XPATH, `.text`,
+get_attribute() and page_source. StaticPage implements that subset, so the
+same extractors run unchanged over HTML fetched with requests (or a snapshot
+of a live browser page) without a WebDriver round trip per lookup.
+
+    page = StaticPage.from_driver(driver)   # one page_source call
+    rows = page.find_elements(By.CSS_SELECTOR, "table.a-keyvalue tr")
+"""
+import re
+import time
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+
+from backend.utils.logging.logger import get_logger
+
+try:
+    from selenium.common.exceptions import NoSuchElementException
+except ImportError:
+    class NoSuchElementException(Exception):
+        pass
+
+# Elements whose text a browser never renders
+_NON_RENDERED = {"script", "style", "noscript", "template", "head", "title", "meta", "link"}
+# Elements that start a new line in rendered text
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody", "thead",
+    "tfoot", "tr", "ul",
+}
+_CELL_TAGS = {"td", "th"}
+_SPACES = re.compile(r"[ \t\r\f\v ‎‏]+")
+
+log = get_logger("scraper")
+
+_selector_cache = {}
+
+
+def _css(selector):
+    compiled = _selector_cache.get(selector)
+    if compiled is None:
+        compiled = _selector_cache[selector] = CSSSelector(selector)
+    return compiled
+
+
+def rendered_text(element):
+    """
+    Approximate Selenium's WebElement.text: skip scripts/styles and hidden
+    nodes, break lines at block elements, separate table cells with spaces
+    and collapse runs of whitespace.
+    """
+    parts = []
+
+    def walk(el):
+        tag = el.tag if isinstance(el.tag, str) else ""
+        if tag in _NON_RENDERED or el.get("hidden") is not None or el.get("aria-hidden") == "true" \
+                or "display:none" in (el.get("style") or "").replace(" ", ""):
+            if el.tail:
+                parts.append(el.tail)
+            return
+        if tag in _BLOCK_TAGS:
+            parts.append("\n")
+        elif tag in _CELL_TAGS:
+            parts.append(" ")
+        if el.text:
+            parts.append(el.text)
+        for child in el:
+            walk(child)
+        if tag in _BLOCK_TAGS:
+            parts.append("\n")
+        if el.tail:
+            parts.append(el.tail)
+
+    tail, element.tail = element.tail, None
+    try:
+        walk(element)
+    finally:
+        element.tail = tail
+
+    lines = (_SPACES.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class _Finder:
+    """find_element(s) over an lxml root, mirroring the selenium By strategies"""
+
+    _root = None
+
+    def _query(self, by, value):
+        by = str(by).lower()
+        root = self._root
+        if by == "id":
+            return root.xpath(".//*[@id=$v]", v=value)
+        if by == "css selector":
+            return _css(value)(root)
+        if by == "tag name":
+            return list(root.iter(value))[1:] if root.tag == value else list(root.iter(value))
+        if by == "class name":
+            return _css(f".{value}")(root)
+        if by == "name":
+            return root.xpath(".//*[@name=$v]", v=value)
+        if by == "xpath":
+            return [el for el in root.xpath(value) if hasattr(el, "tag")]
+        if by in ("link text", "partial link text"):
+            links = root.iter("a")
+            if by == "link text":
+                return [a for a in links if rendered_text(a) == value]
+            return [a for a in links if value in rendered_text(a)]
+        raise ValueError(f"Unsupported locator strategy: {by}")
+
+    def find_elements(self, by="id", value=None):
+        return [StaticElement(el) for el in self._query(by, value)]
+
+    def find_element(self, by="id", value=None):
+        matches = self._query(by, value)
+        if not matches:
+            raise NoSuchElementException(f"No element matches {by}={value!r}")
+        return StaticElement(matches[0])
+
+
+# Attributes Selenium returns as resolved absolute URLs
+_URL_ATTRIBUTES = {"href", "src"}
+
+
+class StaticElement(_Finder):
+    __slots__ = ("_root", "_text")
+
+    def __init__(self, element):
+        self._root = element
+        self._text = None
+
+    @property
+    def tag_name(self):
+        return self._root.tag
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = rendered_text(self._root)
+        return self._text
+
+    def get_attribute(self, name):
+        if name in ("textContent", "innerText"):
+            return self.text
+        if name == "innerHTML":
+            return (self._root.text or "") + "".join(
+                lxml.html.tostring(child, encoding="unicode") for child in self._root
+            )
+        if name == "outerHTML":
+            return lxml.html.tostring(self._root, encoding="unicode", with_tail=False)
+        value = self._root.get(name)
+        if value is not None and name in _URL_ATTRIBUTES:
+            value = urljoin(self._root.base_url or "", value)
+        return value
+
+    def click(self):
+        pass
+
+    def is_displayed(self):
+        return True
+
+
+class StaticPage(_Finder):
+    """
+    A parsed HTML document that quacks like a (read-only) WebDriver.
+    Page-level lookups are memoised: extractors that query the same section
+    share the elements and their computed text.
+    """
+
+    def __init__(self, html, url=None):
+        self.page_source = html
+        self.current_url = url
+        self._root = lxml.html.document_fromstring(html or "<html></html>", base_url=url)
+        self._found = {}
+
+    @classmethod
+    def from_driver(cls, driver):
+        """Snapshot a live WebDriver's current DOM with a single round trip."""
+        started = time.perf_counter()
+        html = driver.page_source
+        page = cls(html, driver.current_url)
+        log.debug("📸 DOM snapshot: %s KiB in %.0fms", len(html) // 1024, 1000 * (time.perf_counter() - started))
+        return page
+
+    def find_elements(self, by="id", value=None):
+        key = (by, value)
+        found = self._found.get(key)
+        if found is None:
+            found = self._found[key] = super().find_elements(by, value)
+        return list(found)
+
+    def find_element(self, by="id", value=None):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"No element matches {by}={value!r}")
+        return found[0]
+
+    @property
+    def title(self):
+        titles = self._root.xpath("//title")
+        return _SPACES.sub(" ", titles[0].text_content()).strip() if titles else ""
+
+    def execute_script(self, script, *args):
+        # No JavaScript on a static page; interactions become no-ops
+        return None
+
+    def implicitly_wait(self, seconds):
+        pass
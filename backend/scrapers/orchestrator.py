@@ -0,0 +1,304 @@
+"""
+Concurrent scrape orchestrator.
+
+Runs a scrape function over many URLs with N worker threads (Selenium is I/O
+bound, and each worker holds one pooled driver while it scrapes). Requests to
+each Amazon domain are paced by a token bucket instead of fixed sleeps, URLs
+and ASINs are de-duplicated across workers, and every new product is passed
+to a sink as soon as its page finishes.
+
+    orchestrator = ScrapeOrchestrator(scrape_amazon_titles, workers=4,
+                                      sink=JsonlSink("scraped_products.jsonl"))
+    summary = orchestrator.run(urls)
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SCRAPE_WORKERS = int(os.environ.get("SCRAPE_WORKERS", os.environ.get("SCRAPER_POOL_SIZE", "2")))
+# Sustained page loads per minute per domain, and how many may burst at once
+SCRAPE_RATE_PER_MIN = float(os.environ.get("SCRAPE_RATE_PER_MIN", "12"))
+SCRAPE_BURST = int(os.environ.get("SCRAPE_BURST", "2"))
+
+# Query parameters that change which products a page lists; everything else
+# (ref, qid, crid, sprefix, ...) is tracking noise and is dropped for dedupe
+MEANINGFUL_PARAMS = {"k", "page", "i", "rh", "s", "node"}
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k in MEANINGFUL_PARAMS)
+    path = parts.path.split("/ref=")[0].rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return seconds until one is."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, stop_event=None):
+        """Block until a token is taken. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if delay == 0.0:
+                return waited
+            # A little jitter keeps workers from waking in lockstep
+            delay += random.uniform(0, min(1.0, delay * 0.1))
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise InterruptedError("orchestrator stopped")
+            else:
+                time.sleep(delay)
+            waited += delay
+
+
+class DomainRateLimiter:
+    """One TokenBucket per host (amazon.co.uk, amazon.com, ...)"""
+
+    def __init__(self, rate_per_min=SCRAPE_RATE_PER_MIN, burst=SCRAPE_BURST):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        domain = urlsplit(url).netloc.lower()
+        if domain.startswith("www."):
+            domain = domain[4:]
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = self._buckets[domain] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def acquire(self, url, stop_event=None):
+        return self.bucket(url).acquire(stop_event)
+
+
+class SeenSet:
+    """Thread-safe membership set used to claim URLs and ASINs exactly once"""
+
+    def __init__(self, initial=()):
+        self._items = set(initial)
+        self._lock = threading.Lock()
+
+    def claim(self, item):
+        """True the first time an item is seen, False afterwards."""
+        with self._lock:
+            if item in self._items:
+                return False
+            self._items.add(item)
+            return True
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+# === Sinks ===
+# A sink is any object with write(product, source_url) and close().
+
+class JsonlSink:
+    """Append each product as one JSON line and flush, so partial runs are never lost"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, product, source_url):
+        line = json.dumps(product, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class CallbackSink:
+    """Call fn(product, source_url) for every new product, serialised by a lock"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self._lock = threading.Lock()
+
+    def write(self, product, source_url):
+        with self._lock:
+            self.fn(product, source_url)
+
+    def close(self):
+        pass
+
+
+class ListSink:
+    def __init__(self):
+        self.products = []
+        self._lock = threading.Lock()
+
+    def write(self, product, source_url):
+        with self._lock:
+            self.products.append(product)
+
+    def close(self):
+        pass
+
+
+class ScrapeOrchestrator:
+    """Fan URLs out to worker threads with per-domain pacing and cross-worker dedupe"""
+
+    def __init__(self, scrape_fn, workers=SCRAPE_WORKERS, sink=None, limiter=None,
+                 seen_urls=(), seen_asins=(), on_error=None):
+        """
+        scrape_fn(url) returns a list of product dicts (scrape_amazon_titles)
+        or a single product dict / None (scrape_amazon_product_page).
+        on_error(url, exc) is called for URLs whose scrape raised.
+        """
+        self.scrape_fn = scrape_fn
+        self.workers = max(1, workers)
+        self.sink = sink or ListSink()
+        self.limiter = limiter or DomainRateLimiter()
+        self.seen_urls = SeenSet(normalize_url(u) for u in seen_urls)
+        self.seen_asins = SeenSet(seen_asins)
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "urls_submitted": 0, "urls_skipped": 0, "urls_scraped": 0, "urls_failed": 0,
+            "products_seen": 0, "products_new": 0, "duplicate_asins": 0,
+            "rate_limit_wait_s": 0.0, "scrape_s": 0.0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def stop(self):
+        """Ask workers to finish their current page and stop taking new URLs."""
+        self._stop.set()
+
+    def _scrape_one(self, url):
+        if self._stop.is_set():
+            return []
+        try:
+            self._count("rate_limit_wait_s", self.limiter.acquire(url, self._stop))
+        except InterruptedError:
+            return []
+
+        started = time.monotonic()
+        try:
+            result = self.scrape_fn(url)
+        except Exception as e:
+            self._count("urls_failed")
+            print(f"❌ Scrape failed for {url}: {e}")
+            if self.on_error:
+                self.on_error(url, e)
+            return []
+        finally:
+            self._count("scrape_s", time.monotonic() - started)
+        self._count("urls_scraped")
+
+        if result is None:
+            products = []
+        elif isinstance(result, dict):
+            products = [result]
+        else:
+            products = list(result)
+
+        new = []
+        for product in products:
+            self._count("products_seen")
+            asin = product.get("asin")
+            if asin and not self.seen_asins.claim(asin):
+                self._count("duplicate_asins")
+                continue
+            self.sink.write(product, url)
+            new.append(product)
+        self._count("products_new", len(new))
+        return new
+
+    def _claim_urls(self, urls):
+        for url in urls:
+            self._count("urls_submitted")
+            if self.seen_urls.claim(normalize_url(url)):
+                yield url
+            else:
+                self._count("urls_skipped")
+
+    def stream(self, urls):
+        """
+        Yield (url, new_products) as each page finishes, in completion order.
+        Results are also written to the sink.
+        """
+        results = queue.Queue()
+        done = object()
+
+        def work(url):
+            try:
+                results.put((url, self._scrape_one(url)))
+            finally:
+                results.put(done)
+
+        claimed = list(self._claim_urls(urls))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape") as executor:
+            for url in claimed:
+                executor.submit(work, url)
+            remaining = len(claimed)
+            try:
+                while remaining:
+                    item = results.get()
+                    if item is done:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                # Consumer stopped early: let in-flight pages finish, skip the rest
+                if remaining:
+                    self.stop()
+
+    def run(self, urls):
+        """Scrape every URL and return the run statistics."""
+        started = time.monotonic()
+        try:
+            for url, new_products in self.stream(urls):
+                if new_products:
+                    print(f"➕ {len(new_products)} new products from {url}")
+        finally:
+            self.sink.close()
+        summary = dict(self.stats)
+        summary["elapsed_s"] = round(time.monotonic() - started, 2)
+        summary["rate_limit_wait_s"] = round(summary["rate_limit_wait_s"], 2)
+        summary["scrape_s"] = round(summary["scrape_s"], 2)
+        return summary
@@ -1,14 +1,12 @@
 import time
 import random
-import json
 import os
 import csv
 from datetime import datetime
-from amazon.scrape_amazon_titles import scrape_amazon_titles, is_high_confidence, Log
+from amazon.scrape_amazon_titles import scrape_amazon_titles, is_high_confidence, Log, listing_pool, product_store
+from orchestrator import CallbackSink, ScrapeOrchestrator
 
 # === CONFIG ===
-priority_path = "priority_products.json"
-bulk_path = "bulk_scraped_products.json"
 log_path = "logs/scheduler_log.txt"
 backup_dir = "backups"
 search_terms_csv = "search_terms.csv"
@@ -16,6 +14,7 @@ failed_urls_path = "failed_urls.txt"
 blocked_urls_path = "blocked_urls.txt"
 retry_tracker_path = "blocked_urls_retry.txt"
 pages_per_term = 2  # You can increase this later
+urls_per_round = 6  # Pages scraped concurrently per round
 sleep_between_jobs = (600, 1200)  # 10–20 mins
 backup_every_n_loops = 5
 
@@ -36,17 +35,9 @@ if not search_terms:
     ]
 
 # === LOAD DBs ===
-priority_db = {}
-if os.path.exists(priority_path):
-    with open(priority_path, "r", encoding="utf-8") as f:
-        priority_db = json.load(f)
-
-bulk_db = []
-if os.path.exists(bulk_path):
-    with open(bulk_path, "r", encoding="utf-8") as f:
-        bulk_db = json.load(f)
-
-existing_asins = {p["asin"] for p in bulk_db if p.get("asin")}
+# Products live in the scraper's SQLite store; each round upserts only its new rows
+priority_db = product_store.products("priority")
+existing_asins = product_store.asins("bulk")
 seen_urls = set()
 loop_count = 0
 
@@ -60,7 +51,7 @@ def log(msg):
         f.write(line)
         
 
-def maybe_add_to_priority(product, priority_db, priority_path):
+def maybe_add_to_priority(product, priority_db):
     asin = product.get("asin")
     if not asin or asin in priority_db:
         return False
@@ -68,9 +59,8 @@ def maybe_add_to_priority(product, priority_db, priority_path):
     if is_high_confidence(product):
         product["confidence"] = "High"
         priority_db[asin] = product
-        with open(priority_path, "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
-        Log.success(f"🔐 Added {asin} to priority_products.json")
+        product_store.upsert_product(product, "priority")
+        Log.success(f"🔐 Added {asin} to priority products")
         return True
     return False
 
@@ -115,68 +105,85 @@ def move_to_retry_tracker(url):
 
 retry_queue = load_failed_urls()
 
-# === MAIN LOOP ===
-while True:
-    retry_mode = False
+# Start a browser up front; scrape_amazon_titles reuses pooled drivers between jobs
+listing_pool.warm(1)
+
+# === URL SELECTION ===
+def next_url():
+    """Pick the next URL to try; returns (url, retry_mode)."""
     blocked_urls = load_blocked_urls()
     if blocked_urls and random.random() < 0.5:  # try blocked URLs sometimes
         url = random.choice(blocked_urls)
         log(f"⚠️ Retrying previously blocked URL: {url}")
-        retry_mode = True
-    else:
-        term = random.choice(search_terms)
-        page = random.randint(1, pages_per_term)
-        url = f"https://www.amazon.co.uk/s?k={term}&page={page}"
-    
+        return url, True
+
     # Retry logic
-    if not retry_mode and retry_queue:
+    if retry_queue:
         url = retry_queue.pop()
         log(f"♻️ Retrying failed URL: {url}")
+        return url, False
 
+    term = random.choice(search_terms)
+    page = random.randint(1, pages_per_term)
+    return f"https://www.amazon.co.uk/s?k={term}&page={page}", False
 
-    if url in seen_urls:
-        log("⚠️ Already tried this URL, skipping.")
-        continue
-    seen_urls.add(url)
 
-    log(f"🌐 Scraping: {url}")
-    try:
-        scraped = scrape_amazon_titles(url, max_items=30)
-    except Exception as e:
-        log(f"❌ Error scraping {url}: {e}")
+# === MAIN LOOP ===
+# Each round scrapes a batch of pages concurrently through the orchestrator:
+# per-domain token buckets pace requests and ASINs are de-duplicated across workers.
+while True:
+    batch, retry_urls = [], set()
+    for _ in range(urls_per_round * 3):
+        if len(batch) >= urls_per_round:
+            break
+        url, retry_mode = next_url()
+        if url in seen_urls:
+            log("⚠️ Already tried this URL, skipping.")
+            continue
+        seen_urls.add(url)
+        batch.append(url)
         if retry_mode:
-            move_to_retry_tracker(url)
-        else:
-            save_failed_url(url)
-        time.sleep(10)
-        continue
-
-
+            retry_urls.add(url)
 
     new_bulk = []
     new_priority = 0
+    productive_urls = set()
 
-    for product in scraped:
-        asin = product.get("asin")
-        if not asin or asin in existing_asins:
-            continue
-
-        existing_asins.add(asin)
+    def on_product(product, source_url):
+        global new_priority
+        # The orchestrator de-duplicates by ASIN but passes ASIN-less products through; the bulk DB doesn't want them
+        if not product.get("asin"):
+            return
         new_bulk.append(product)
-
-        if maybe_add_to_priority(product, priority_db, priority_path):
+        productive_urls.add(source_url)
+        if maybe_add_to_priority(product, priority_db):
             new_priority += 1
 
-    if new_bulk:
-        remove_url_from_failed(url)
-        bulk_db.extend(new_bulk)
-        log(f"➕ Added {len(new_bulk)} new products. {new_priority} high-confidence.")
+    def on_error(url, e):
+        log(f"❌ Error scraping {url}: {e}")
+        if url in retry_urls:
+            move_to_retry_tracker(url)
+        else:
+            save_failed_url(url)
 
-        with open(bulk_path, "w", encoding="utf-8") as f:
-            json.dump(bulk_db, f, indent=2)
+    for url in batch:
+        log(f"🌐 Scraping: {url}")
+    orchestrator = ScrapeOrchestrator(
+        lambda url: scrape_amazon_titles(url, max_items=30),
+        workers=listing_pool.size,
+        sink=CallbackSink(on_product),
+        seen_asins=existing_asins,
+        on_error=on_error,
+    )
+    summary = orchestrator.run(batch)
+    log(f"📊 Round summary: {summary}")
+    existing_asins.update(p["asin"] for p in new_bulk if p.get("asin"))
 
-        with open(priority_path, "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
+    if new_bulk:
+        for url in productive_urls:
+            remove_url_from_failed(url)
+        product_store.upsert_products(new_bulk, "bulk")
+        log(f"➕ Added {len(new_bulk)} new products. {new_priority} high-confidence.")
 
     else:
         log("🤷 No new unique products found.")
@@ -184,12 +191,8 @@ while True:
     # 🔁 Periodic Backup
     loop_count += 1
     if loop_count % backup_every_n_loops == 0:
-        os.makedirs(backup_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(f"{backup_dir}/bulk_{timestamp}.json", "w", encoding="utf-8") as f:
-            json.dump(bulk_db, f, indent=2)
-        with open(f"{backup_dir}/priority_{timestamp}.json", "w", encoding="utf-8") as f:
-            json.dump(priority_db, f, indent=2)
+        product_store.backup(f"{backup_dir}/products_{timestamp}.db")
         log("💾 Backup created.")
 
     # 💤 Sleep before next round
@@ -0,0 +1,284 @@
+"""
+Two-tier result cache: an in-process LRU in front of an optional Redis tier.
+
+Entries are fresh for `ttl` seconds and may then be served stale for another
+`stale_ttl` seconds while a background thread refreshes them
+(stale-while-revalidate). Concurrent misses on the same key share one fetch,
+and its outcome: a fetch that fails or returns something uncacheable is
+handed to every waiting caller rather than repeated by each of them.
+Redis is used only when REDIS_URL is set and the server is reachable; if
+Redis errors at any point the cache carries on with the in-process tier.
+
+MemoCache is the in-process-only variant for deterministic lookups: results
+are kept until the knowledge behind them changes and invalidate() is called.
+"""
+import copy
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+PRODUCT_CACHE_TTL = float(os.environ.get("PRODUCT_CACHE_TTL", str(6 * 3600)))
+PRODUCT_CACHE_STALE_TTL = float(os.environ.get("PRODUCT_CACHE_STALE_TTL", str(24 * 3600)))
+PRODUCT_CACHE_SIZE = int(os.environ.get("PRODUCT_CACHE_SIZE", "1024"))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+HIT, STALE, MISS = "hit", "stale", "miss"
+
+
+class LRUTier:
+    """Size-bounded in-process tier; entries are (stored_at, value)"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisTier:
+    """Shared tier across workers/hosts; values are stored as JSON with a server-side expiry"""
+
+    def __init__(self, url, namespace):
+        import redis
+
+        self.namespace = namespace
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client.ping()
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["stored_at"], payload["value"]
+
+    def set(self, key, entry, expire_seconds):
+        stored_at, value = entry
+        payload = json.dumps({"stored_at": stored_at, "value": value}, default=str)
+        self.client.set(self._key(key), payload, ex=max(1, int(expire_seconds)))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+
+class TieredCache:
+    """LRU + optional Redis cache with TTL and stale-while-revalidate"""
+
+    def __init__(self, namespace, ttl=PRODUCT_CACHE_TTL, stale_ttl=PRODUCT_CACHE_STALE_TTL,
+                 maxsize=PRODUCT_CACHE_SIZE, redis_url=REDIS_URL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.local = LRUTier(maxsize)
+        self.remote = None
+        if redis_url:
+            try:
+                self.remote = RedisTier(redis_url, namespace)
+                print(f"✅ Redis cache tier enabled for '{namespace}'")
+            except Exception as e:
+                print(f"⚠️ Redis unavailable for '{namespace}' cache, using in-process tier only: {e}")
+
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.counts = {HIT: 0, STALE: 0, MISS: 0, "remote_hits": 0, "refreshes": 0, "refresh_errors": 0}
+
+    # --- tiers -------------------------------------------------------------
+
+    def _remote_call(self, method, *args):
+        if self.remote is None:
+            return None
+        try:
+            return getattr(self.remote, method)(*args)
+        except Exception as e:
+            print(f"⚠️ Redis {method} failed, disabling Redis tier: {e}")
+            self.remote = None
+            return None
+
+    def _lookup(self, key):
+        entry = self.local.get(key)
+        if entry is None:
+            entry = self._remote_call("get", key)
+            if entry is not None:
+                self.counts["remote_hits"] += 1
+                self.local.set(key, entry)
+        return entry
+
+    def _state(self, entry):
+        if entry is None:
+            return MISS
+        age = time.time() - entry[0]
+        if age <= self.ttl:
+            return HIT
+        if age <= self.ttl + self.stale_ttl:
+            return STALE
+        return MISS
+
+    def get(self, key):
+        """Return (value, state); value is None when state is MISS."""
+        entry = self._lookup(key)
+        state = self._state(entry)
+        return (entry[1] if state != MISS else None), state
+
+    def set(self, key, value):
+        entry = (time.time(), value)
+        self.local.set(key, entry)
+        self._remote_call("set", key, entry, self.ttl + self.stale_ttl)
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        self._remote_call("delete", key)
+
+    # --- read-through ------------------------------------------------------
+
+    def get_or_fetch(self, key, fetch, cacheable=None):
+        """
+        Return (value, state). Fresh entries are returned as-is; stale entries
+        are returned immediately and refreshed in the background; misses call
+        fetch() once per key even under concurrent requests. Results for which
+        cacheable(value) is false are returned but not stored.
+        """
+        value, state = self.get(key)
+        self.counts[state] += 1
+        if state == HIT:
+            return value, state
+        if state == STALE:
+            self._refresh_async(key, fetch, cacheable)
+            return value, state
+        return self._fetch_once(key, fetch, cacheable), state
+
+    def _fetch_once(self, key, fetch, cacheable):
+        with self._inflight_lock:
+            outcome = self._inflight.get(key)
+            leader = outcome is None
+            if leader:
+                outcome = self._inflight[key] = Future()
+
+        if not leader:
+            # The leader's value or exception, cached or not: a scrape that was
+            # just blocked or came back incomplete isn't retried N times at once
+            return outcome.result()
+
+        try:
+            value = fetch()
+            if cacheable is None or cacheable(value):
+                self.set(key, value)
+        except BaseException as e:
+            outcome.set_exception(e)
+            raise
+        else:
+            outcome.set_result(value)
+            return value
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _refresh_async(self, key, fetch, cacheable):
+        with self._inflight_lock:
+            if key in self._inflight:
+                return
+
+        def refresh():
+            try:
+                self._fetch_once(key, fetch, cacheable)
+                self.counts["refreshes"] += 1
+            except Exception as e:
+                self.counts["refresh_errors"] += 1
+                print(f"⚠️ Background refresh failed for {self.namespace}:{key}: {e}")
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
+
+    def stats(self):
+        return {
+            "namespace": self.namespace,
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "evictions": self.local.evictions,
+            "ttl_s": self.ttl,
+            "stale_ttl_s": self.stale_ttl,
+            "redis": self.remote is not None,
+            **self.counts,
+        }
+
+
+class MemoCache:
+    """
+    Bounded LRU memo for functions whose results only change when the data
+    they read is rewritten. Keys are (function name, *key(args)); cached
+    values are shallow-copied in and out so callers can mutate what they get.
+    invalidate() drops every entry, and a result computed while an
+    invalidation happened is returned but not stored.
+    """
+
+    def __init__(self, namespace, maxsize):
+        self.namespace = namespace
+        self.local = LRUTier(maxsize)
+        self.generation = 0
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def memoize(self, key):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                cache_key = (fn.__name__, *key(*args, **kwargs))
+                entry = self.local.get(cache_key)
+                if entry is not None:
+                    self.counts["hits"] += 1
+                    return copy.copy(entry[1])
+                self.counts["misses"] += 1
+                generation = self.generation
+                value = fn(*args, **kwargs)
+                if generation == self.generation:
+                    self.local.set(cache_key, (time.time(), copy.copy(value)))
+                return value
+            wrapper.cache = self
+            return wrapper
+        return decorate
+
+    def invalidate(self):
+        self.generation += 1
+        self.local.clear()
+        self.counts["invalidations"] += 1
+
+    def stats(self):
+        lookups = self.counts["hits"] + self.counts["misses"]
+        return {
+            "namespace": self.namespace,
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "evictions": self.local.evictions,
+            "hit_rate": round(self.counts["hits"] / lookups, 3) if lookups else None,
+            **self.counts,
+        }
@@ -0,0 +1,305 @@
+"""
+Logging facade, per-request phase timing, Prometheus metrics and an
+on-demand sampling profiler for the API.
+
+Logging. The request paths used to print() every scraped field and every
+model feature on every request. get_logger(name) returns a Logger with
+debug / info / success / warning / error. Methods below LOG_LEVEL are
+replaced by a no-op when the logger is created, so a disabled call does no
+formatting and no I/O. Pass arguments %-style (log.debug("weight %s", w)) so
+nothing is formatted before the call. Guard dumps with
+`if log.debug_enabled:`; that skips their loops too. LOG_LEVEL defaults to
+info when FLASK_ENV=production and to debug otherwise.
+
+Timing. begin_request() starts a RequestTimer for the current request
+(a contextvar, so it follows threads and asyncio tasks). `with span("scrape"):`
+adds the block's time to the request's phase of that name. finish() records
+
+    api_requests_total{route,method,status}           counter
+    api_request_duration_seconds{route}               histogram
+    api_phase_duration_seconds{route,phase}           histogram
+
+and returns a Server-Timing header, which browser dev tools show per phase.
+Spans outside a request (job worker threads) are recorded with
+route="background". metrics.render() is the /metrics body in Prometheus
+text format. Values are per process; under gunicorn every worker keeps its
+own.
+
+Profiling. With PROFILING=1 a request sent with an X-Profile: 1 header is
+sampled every PROFILE_INTERVAL seconds by a background thread reading the
+request thread's stack. The folded stacks (flamegraph.pl / speedscope
+format) are written to PROFILE_DIR. The X-Profile-File response header gives
+the file name only, not the server path. This needs a thread per request,
+i.e. the Flask app.
+"""
+import contextlib
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+LOG_LEVEL = (os.environ.get("LOG_LEVEL") or ("info" if os.environ.get("FLASK_ENV") == "production" else "debug")).lower()
+PROFILING = os.environ.get("PROFILING", "0") == "1"
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.002"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Seconds; the scrape phase needs the long tail
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# --- logging -----------------------------------------------------------------
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class Logger:
+    """print()-based, like the rest of the app, with levels fixed at creation"""
+
+    def __init__(self, name, level=LOG_LEVEL):
+        self.name = name
+        self.level = LEVELS.get(level, DEBUG) if isinstance(level, str) else level
+        self.debug_enabled = self.level <= DEBUG
+        for method, threshold in (("debug", DEBUG), ("info", INFO), ("success", INFO), ("warning", WARNING)):
+            if self.level > threshold:
+                setattr(self, method, _noop)
+        self.warn = self.warning
+
+    @staticmethod
+    def _emit(msg, args):
+        print(msg % args if args else msg)
+
+    def debug(self, msg, *args):
+        self._emit(msg, args)
+
+    def info(self, msg, *args):
+        self._emit(msg, args)
+
+    def success(self, msg, *args):
+        self._emit(msg, args)
+
+    def warning(self, msg, *args):
+        self._emit(msg, args)
+
+    def error(self, msg, *args):
+        self._emit(msg, args)
+
+
+_loggers = {}
+
+
+def get_logger(name):
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = Logger(name)
+    return logger
+
+
+# --- metrics -------------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}" if labels else ""
+
+
+class Metrics:
+    """
+    Counters and histograms keyed by (name, sorted labels), rendered in the
+    Prometheus text format. add_collector(fn) adds metrics computed at scrape
+    time: fn() returns [(name, type, help, [(labels dict, value)])].
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, labels=None, value=1.0):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(b), s, c)) for key, (b, s, c) in self._histograms.items())
+
+        def header(name, default_kind):
+            kind, help_text = self._help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        seen = None
+        for (name, labels), value in counters:
+            if name != seen:
+                header(name, "counter")
+                seen = name
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        seen = None
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            if name != seen:
+                header(name, "histogram")
+                seen = name
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collect, '__name__', collect)} failed: {_escape(e)}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("api_requests_total", "counter", "Requests handled, by route template, method and status")
+metrics.describe("api_request_duration_seconds", "histogram", "Request wall time, by route template")
+metrics.describe("api_phase_duration_seconds", "histogram",
+                 "Time spent in one phase (parse, scrape, geocode, encode, predict, log) of a request")
+metrics.describe("api_profiles_total", "counter", "Requests sampled by the profiler")
+
+
+# --- profiling -------------------------------------------------------------------
+
+class SamplingProfiler:
+    """Samples one thread's stack every interval seconds from a background thread."""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def write(self, route, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{os.getpid()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+# --- request timing ----------------------------------------------------------------
+
+_current = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self, profile=False):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.profiler = SamplingProfiler(threading.get_ident()).start() if profile else None
+        self.finished = False
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def finish(self, route, method, status):
+        """Record the request; returns the response headers to add."""
+        if self.finished:
+            return {}
+        self.finished = True
+        if _current.get() is self:
+            _current.set(None)
+        total = time.perf_counter() - self.started
+        metrics.inc("api_requests_total", {"route": route, "method": method, "status": str(status)})
+        metrics.observe("api_request_duration_seconds", total, {"route": route})
+        for phase, seconds in self.phases.items():
+            metrics.observe("api_phase_duration_seconds", seconds, {"route": route, "phase": phase})
+
+        timings = [f"{phase};dur={1000 * seconds:.2f}" for phase, seconds in self.phases.items()]
+        headers = {"Server-Timing": ", ".join([*timings, f"total;dur={1000 * total:.2f}"])}
+        if self.profiler is not None:
+            samples = sum(self.profiler.stop().values())
+            path = self.profiler.write(route)
+            metrics.inc("api_profiles_total", {"route": route})
+            headers.update({"X-Profile-File": os.path.basename(path), "X-Profile-Samples": str(samples)})
+        return headers
+
+
+def begin_request(profile_header=None):
+    """Start timing the current request; profile_header is the X-Profile value, if any."""
+    timer = RequestTimer(profile=PROFILING and profile_header not in (None, "", "0"))
+    _current.set(timer)
+    return timer
+
+
+def current_timer():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def span(phase):
+    """Time the block as `phase` of the current request (or of background work)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timer = _current.get()
+        if timer is not None:
+            timer.add(phase, elapsed)
+        else:
+            metrics.observe("api_phase_duration_seconds", elapsed, {"route": "background", "phase": phase})
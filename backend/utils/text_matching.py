@@ -0,0 +1,156 @@
+"""
+Shared text-matching engine for the scraper's extraction helpers.
+
+KeywordMatcher replaces the `for label, keywords in vocab.items(): if any(kw in
+text ...)` loops. A vocabulary ({label: [keywords]}, in priority order) is
+compiled once into a single trie-shaped regular expression, so a title is
+scanned once, in C, whatever the size of the vocabulary. Results are the same
+as the substring loops: every keyword occurring anywhere in the text is
+reported, including overlapping ones ("us" inside "australia").
+
+The scan costs roughly the same per character however many keywords there
+are, while str.__contains__ costs roughly the same per keyword however long
+the text is. Past SCAN_CHARS_PER_KEYWORD characters per keyword the matcher
+therefore switches to plain substring checks (without the generator overhead
+of the old any() loops).
+
+Patterns used by the extractors are compiled at import with compile_bank()
+instead of going through re's pattern cache on every call. compile_alternation()
+gives the same trie regex for a plain keyword list, for pandas column scans.
+
+    materials = KeywordMatcher({"Steel": ["stainless steel", "steel"], "Glass": ["glass"]})
+    materials.first("stainless steel flask")   # -> "Steel"
+    materials.labels("glass jar, steel lid")    # -> {"Glass", "Steel"}
+
+Run tools/benchmarks/bench_text_matching.py for the before/after numbers.
+"""
+import re
+
+_END = ""
+# Text longer than this many characters per keyword is matched with `in` instead of the scan
+SCAN_CHARS_PER_KEYWORD = 8
+
+
+def compile_bank(patterns, flags=0):
+    """Compile a list of regex strings once, keeping their order."""
+    return [re.compile(pattern, flags) for pattern in patterns]
+
+
+def compile_alternation(keywords, flags=0):
+    """
+    One trie-shaped regex matching any of keywords (literal substrings), for
+    vectorised column scans such as Series.str.contains(pattern).
+    """
+    keywords = [keyword for keyword in keywords if keyword]
+    return re.compile(_trie_pattern(_build_trie(keywords)) if keywords else "(?!)", flags)
+
+
+def _build_trie(keywords):
+    root = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    return root
+
+
+def _trie_pattern(node):
+    # Children start with distinct characters, so at most one branch can match;
+    # a terminal node with children is an optional (greedy) suffix, which makes
+    # the regex prefer the longest keyword at each position.
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in node.items() if char != _END]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if _END in node else body
+
+
+class KeywordMatcher:
+    """One compiled automaton per vocabulary; matching is case-sensitive (lower() the text first)"""
+
+    def __init__(self, vocabulary):
+        if not isinstance(vocabulary, dict):
+            # A plain keyword list: each keyword is its own label, in list order
+            vocabulary = {keyword: [keyword] for keyword in vocabulary}
+        self.vocabulary = {label: list(keywords) for label, keywords in vocabulary.items()}
+        self.priority = {label: rank for rank, label in enumerate(self.vocabulary)}
+        self._ranked = list(self.vocabulary)
+
+        labels_by_keyword = {}
+        for label, keywords in self.vocabulary.items():
+            for keyword in keywords:
+                if keyword:
+                    labels_by_keyword.setdefault(keyword, set()).add(label)
+        keywords = sorted(labels_by_keyword)
+        self._keywords = keywords
+        self._scan_limit = SCAN_CHARS_PER_KEYWORD * len(keywords)
+        # (keyword, rank) in priority order for the substring path
+        self._by_priority = [
+            (keyword, rank) for rank, label in enumerate(self._ranked)
+            for keyword in self.vocabulary[label] if keyword
+        ]
+
+        # The regex reports only the longest keyword starting at each position;
+        # every shorter keyword that is a prefix of it occurs there as well.
+        self._prefixes = {}
+        self._best_rank = {}
+        for keyword in keywords:
+            found = [k for k in keywords if keyword.startswith(k)]
+            labels = frozenset(label for k in found for label in labels_by_keyword[k])
+            self._prefixes[keyword] = (frozenset(found), labels)
+            self._best_rank[keyword] = min(self.priority[label] for label in labels)
+
+        pattern = _trie_pattern(_build_trie(keywords)) if keywords else "(?!)"
+        self._any = re.compile(pattern)
+        self._scan = re.compile(f"(?=({pattern}))")
+
+    def search(self, text):
+        """True if any keyword occurs in text."""
+        if not text:
+            return False
+        if len(text) > self._scan_limit:
+            for keyword in self._keywords:
+                if keyword in text:
+                    return True
+            return False
+        return self._any.search(text) is not None
+
+    def keywords(self, text):
+        """Every keyword that occurs in text."""
+        if not text:
+            return set()
+        if len(text) > self._scan_limit:
+            return {keyword for keyword in self._keywords if keyword in text}
+        found = set()
+        for keyword in self._scan.findall(text):
+            found |= self._prefixes[keyword][0]
+        return found
+
+    def labels(self, text):
+        """Every label with at least one keyword in text."""
+        if not text:
+            return set()
+        if len(text) > self._scan_limit:
+            return {self._ranked[rank] for keyword, rank in self._by_priority if keyword in text}
+        found = set()
+        for keyword in self._scan.findall(text):
+            found |= self._prefixes[keyword][1]
+        return found
+
+    def first(self, text, default=None):
+        """The highest-priority label present in text, like the dict-order any() loops."""
+        if not text:
+            return default
+        if len(text) > self._scan_limit:
+            for keyword, rank in self._by_priority:
+                if keyword in text:
+                    return self._ranked[rank]
+            return default
+        rank = min(map(self._best_rank.__getitem__, self._scan.findall(text)), default=None)
+        return default if rank is None else self._ranked[rank]
+
+    def matched_keywords(self, text, label):
+        """Keywords of one label that occur in text (for logging what matched)."""
+        found = self.keywords(text)
+        return [keyword for keyword in self.vocabulary[label] if keyword in found]
@@ -0,0 +1,149 @@
+"""
+Candidate index for fuzzy brand lookup.
+
+EnhancedBrandResolver.fuzzy_match_brand used to normalise every known brand and
+run SequenceMatcher against all of them on every call. BrandIndex keeps each
+brand's normalised key (computed once, on insert) and three inverted indexes:
+
+- padded character bigrams -> key length -> brands, for plain similarity matches
+- words longer than two letters -> brands, for the exact-word bonus
+- acronyms -> brands, for the abbreviation bonus
+
+candidates() returns a superset of the brands that can reach the threshold
+(lowered by whatever bonus a brand is eligible for), so scoring only those
+gives the same answer as the full scan:
+
+    ratio = 2 * matches / total  and  matches <= LCS, so
+    ratio >= t  implies  D = total - 2 * LCS <= (1 - t) * total
+
+where D (the insert/delete distance) has the same parity as total. Along an
+LCS alignment each deleted character breaks at most two of the padded
+bigrams and each insertion at most one, so the two keys share at least
+total / 2 + 1 - 1.5 * D bigrams, and 2 * min_len / total bounds the ratio from
+the lengths alone. Postings are split by key length so each admissible
+length is counted against its own bound, and brands failing either bound are
+never scored. Below
+t = 0.75 the bigram bound stops excluding anything on its own, so lower
+thresholds simply score every brand.
+"""
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Callable, Iterable, List
+
+# Similarity bonuses applied by EnhancedBrandResolver.fuzzy_match_brand
+WORD_MATCH_BONUS = 0.15
+ACRONYM_BONUS = 0.20
+
+# Float slack so rounding in the bounds can only let extra candidates through
+_EPSILON = 1e-9
+
+# Pad characters can't appear in a normalised key (only \w and spaces survive)
+_START, _END = "\x02", "\x03"
+
+
+def bigrams(key: str) -> List[str]:
+    padded = f"{_START}{key}{_END}"
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+def significant_words(key: str) -> set:
+    return {word for word in key.split() if len(word) > 2}
+
+
+def acronym(key: str) -> str:
+    return "".join(word[0] for word in key.split() if word)
+
+
+class BrandIndex:
+    """Normalised keys plus bigram/word/acronym postings, built once and extended on insert"""
+
+    def __init__(self, normalize: Callable[[str], str], brands: Iterable[str] = ()):
+        self.normalize = normalize
+        self.brands: List[str] = []   # id -> brand as stored in the database
+        self.keys: List[str] = []     # id -> normalised key
+        self._ids = {}
+        self._grams = defaultdict(lambda: defaultdict(list))  # bigram -> key length -> ids
+        self._words = defaultdict(list)
+        self._acronyms = defaultdict(list)
+        for brand in brands:
+            self.add(brand)
+
+    def add(self, brand: str) -> None:
+        """Index a brand learned at runtime (no-op if it is already indexed)."""
+        if brand in self._ids:
+            return
+        brand_id = len(self.brands)
+        key = self.normalize(brand)
+        self._ids[brand] = brand_id
+        self.brands.append(brand)
+        self.keys.append(key)
+        # Repeated bigrams are posted repeatedly; counts then over- rather than under-estimate
+        for gram in bigrams(key):
+            self._grams[gram][len(key)].append(brand_id)
+        for word in significant_words(key):
+            self._words[word].append(brand_id)
+        if key:
+            self._acronyms[acronym(key)].append(brand_id)
+
+    def __len__(self) -> int:
+        return len(self.brands)
+
+    def __contains__(self, brand: str) -> bool:
+        return brand in self._ids
+
+    def candidates(self, target_key: str, threshold: float) -> List[int]:
+        """Ids (in insertion order) of every brand that could score >= threshold against target_key."""
+        if 2 * threshold < 1.5:
+            return list(range(len(self.brands)))
+
+        target_len = len(target_key)
+        target_grams = bigrams(target_key)
+        multiplicity = Counter(target_grams)
+        found = set()
+
+        # Brands eligible for a bonus only need a correspondingly lower ratio; there are few of them
+        bonus = defaultdict(float)
+        for word in significant_words(target_key):
+            for brand_id in self._words.get(word, ()):
+                bonus[brand_id] = WORD_MATCH_BONUS
+        for brand_id in self._acronyms.get(target_key, ()):
+            bonus[brand_id] += ACRONYM_BONUS
+        for brand_id, extra in bonus.items():
+            known_key = self.keys[brand_id]
+            needed = threshold - extra
+            if _length_admissible(target_len, len(known_key), needed):
+                required = _required_shared(target_len, len(known_key), needed)
+                if required <= 0 or _shared_bigrams(multiplicity, known_key) >= required:
+                    found.add(brand_id)
+
+        # Everything else needs the full threshold, one key length at a time
+        longest = int(target_len * (2 - threshold) / threshold) + 1
+        for known_len in range(longest + 1):
+            if not _length_admissible(target_len, known_len, threshold):
+                continue
+            required = _required_shared(target_len, known_len, threshold)
+            counts = Counter(chain.from_iterable(
+                self._grams[gram].get(known_len, ()) for gram in target_grams if gram in self._grams
+            ))
+            found.update([brand_id for brand_id, shared in counts.items() if shared >= required])
+
+        return sorted(found)
+
+
+def _shared_bigrams(target_multiplicity: Counter, known_key: str) -> int:
+    known = Counter(bigrams(known_key))
+    return sum(min(count, known[gram]) for gram, count in target_multiplicity.items())
+
+
+def _length_admissible(target_len: int, known_len: int, needed: float) -> bool:
+    # ratio <= 2 * min_len / total; two empty keys are identical (SequenceMatcher scores them 1.0)
+    total = target_len + known_len
+    return total == 0 or 2 * min(target_len, known_len) >= (needed - _EPSILON) * total
+
+
+def _required_shared(target_len: int, known_len: int, needed: float) -> int:
+    total = target_len + known_len
+    max_distance = int((1 - needed) * total + _EPSILON)
+    max_distance -= (max_distance - total) % 2
+    # ceil((total + 2 - 3 * D) / 2)
+    return -(-(total + 2 - 3 * max_distance) // 2)
@@ -4,6 +4,8 @@ import re
 from difflib import SequenceMatcher
 from typing import Dict, List, Tuple, Optional
 
+from common.data.brand_index import BrandIndex, WORD_MATCH_BONUS, ACRONYM_BONUS
+
 # === CONFIG ===
 BRAND_ORIGIN_JSON = os.path.join(os.path.dirname(__file__), "json", "brand_orign_data.json")  # Note: keeping existing typo
 
@@ -34,6 +36,7 @@ class EnhancedBrandResolver:
         self.industry_patterns = self._build_industry_patterns()
         self.origin_keywords = self._build_origin_keywords()
         self.learning_cache = {}
+        self.brand_index = BrandIndex(self._normalize_brand_name, self.exact_matches.keys())
     
     def _load_brand_data(self) -> Dict:
         """Load existing brand data with error handling"""
@@ -107,19 +110,24 @@ class EnhancedBrandResolver:
         best_match = None
         best_score = 0.0
         
-        for known_brand in self.exact_matches.keys():
-            known_clean = self._normalize_brand_name(known_brand)
-            
-            # Multiple similarity algorithms
-            similarity = SequenceMatcher(None, target_clean, known_clean).ratio()
+        # Only brands the index says could reach the threshold are scored
+        index = self.brand_index
+        for brand_id in index.candidates(target_clean, threshold):
+            known_brand, known_clean = index.brands[brand_id], index.keys[brand_id]
             
-            # Bonus scoring for exact word matches
+            # Bonus scoring for exact word matches and common abbreviations
+            bonus = 0.0
             if self._has_exact_word_match(target_clean, known_clean):
-                similarity += 0.15
-            
-            # Bonus for common abbreviations
+                bonus += WORD_MATCH_BONUS
             if self._is_common_abbreviation(target_clean, known_clean):
-                similarity += 0.20
+                bonus += ACRONYM_BONUS
+            
+            # quick_ratio() bounds ratio() from above; skip brands that can't win
+            matcher = SequenceMatcher(None, target_clean, known_clean)
+            upper = matcher.quick_ratio() + bonus
+            if upper < threshold or upper <= best_score:
+                continue
+            similarity = matcher.ratio() + bonus
                 
             if similarity >= threshold and similarity > best_score:
                 best_match = known_brand
@@ -388,4 +396,5 @@ def update_brand_origin(brand, country, city="Unknown"):
     brand = brand.lower().strip()
     data = load_brand_origin_data()
     data[brand] = {"country": country.title(), "city": city.title()}
+    _enhanced_resolver.brand_index.add(brand)
     save_brand_origin_data(data)
@@ -0,0 +1,24 @@
+"""
+Gunicorn settings for the Flask API (used by Procfile and render.yaml).
+
+preload_app imports backend.api.app once in the master, and when_ready loads
+the model bundle and heavy modules before any worker is forked. Workers then
+share those pages copy-on-write instead of each loading their own copy.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def when_ready(server):
+    from backend.api.app import warm_up
+
+    bundle = warm_up()
+    server.log.info(f"Preloaded model bundle v{bundle.version} in {bundle.load_seconds}s")
+    # Move everything loaded so far out of the GC's tracked generations so
+    # collections in the workers don't write to (and un-share) those pages.
+    gc.freeze()
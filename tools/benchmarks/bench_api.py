@@ -0,0 +1,215 @@
+"""
+Load and latency benchmark for the Flask API.
+
+Drives four scenarios against two targets and reports throughput and
+p50/p95/p99 latency per scenario:
+
+    predict     POST /predict, bodies sampled from common/data/csv/eco_dataset.csv
+                and the raw inputs in submitted_predictions.json
+    estimate    POST /estimate_emissions for the recorded product pages, scraped
+                from fixtures (SCRAPER_FIXTURES=replay) with the product cache
+                off, and fixture postcodes
+    dashboard   GET /api/dashboard-metrics
+    insights    GET /insights
+
+    inprocess   backend.api.app through the Flask test client on --clients
+                threads: app time only, no sockets or server
+    http        a local gunicorn (gunicorn.conf.py, --workers processes) over
+                HTTP with --clients concurrent connections, or the server at
+                --url if given
+
+Nothing touches the network: see loadgen.offline_env. The report (--json) is
+plain JSON with sorted keys. Diff two releases' reports directly, or pass
+--baseline to fail (exit 1) when a scenario's p95 latency grew by more than
+--max-regression.
+
+Usage:
+    python tools/benchmarks/bench_api.py [--targets inprocess,http] [--scenarios predict,estimate]
+        [--requests 500] [--clients 8] [--workers 2] [--json report.json]
+    python tools/benchmarks/bench_api.py --json new.json --baseline release.json --max-regression 0.25
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from loadgen import (  # noqa: E402
+    drive_http, estimate_requests, get_requests, offline_env, predict_requests, start_server, stop_server,
+    summarise,
+)
+
+REPORT_VERSION = 1
+SCENARIOS = {
+    "predict": predict_requests,
+    "estimate": estimate_requests,
+    "dashboard": lambda count, seed: get_requests("/api/dashboard-metrics", count),
+    "insights": lambda count, seed: get_requests("/insights", count),
+}
+
+
+def drive_inprocess(app, requests, clients):
+    """Like loadgen.drive_http, through one Flask test client per thread."""
+    lock = threading.Lock()
+    pending = iter(requests)
+    latencies, status_codes = [], Counter()
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            method, path, body = item
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = time.perf_counter() - started
+            with lock:
+                status_codes[str(response.status_code)] += 1
+                if response.status_code < 400:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(latencies, status_codes, 0, time.perf_counter() - started)
+
+
+def run_inprocess(args, workdir):
+    # The app reads its settings at import and writes its logs to the working directory
+    os.environ.update(offline_env(workdir, args.latency, "inprocess"))
+    os.chdir(workdir)
+    with open(os.path.join(workdir, "inprocess.log"), "w") as log, contextlib.redirect_stdout(log):
+        from backend.api.app import app, warm_up
+        warm_up()
+        return run_scenarios(args, lambda requests: drive_inprocess(app, requests, args.clients),
+                             lambda requests: drive_inprocess(app, requests, 1))
+
+
+def run_http(args, workdir):
+    if args.url:
+        return run_scenarios(args, lambda requests: drive_http(args.url, requests, args.clients, args.timeout),
+                             lambda requests: drive_http(args.url, requests, 1, args.timeout))
+    process, base, log = start_server("flask", args.workers, workdir, latency=args.latency)
+    try:
+        return run_scenarios(args, lambda requests: drive_http(base, requests, args.clients, args.timeout),
+                             lambda requests: drive_http(base, requests, 1, args.timeout))
+    finally:
+        stop_server(process, log)
+
+
+def run_scenarios(args, drive, warm_up):
+    results = {}
+    for name in args.scenarios:
+        # Warm-up requests first, so lazy imports and first-use caches are not timed
+        warm_up(SCENARIOS[name](args.warmup, args.seed + 1))
+        results[name] = drive(SCENARIOS[name](args.requests, args.seed))
+        print(f"   {name:<10} {results[name]['rps']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.__stdout__)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+
+def compare(report, baseline, max_regression):
+    regressions = []
+    for target, scenarios in report["targets"].items():
+        for name, current in scenarios.items():
+            base = baseline.get("targets", {}).get(target, {}).get(name)
+            if not base or not base.get("p95_ms") or current.get("p95_ms") is None:
+                continue
+            change = current["p95_ms"] / base["p95_ms"] - 1
+            if change > max_regression:
+                regressions.append(f"{target}/{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms (+{change:.0%})")
+            if current["errors"] + current["timeouts"] > base["errors"] + base["timeouts"]:
+                regressions.append(f"{target}/{name}: {current['errors']} errors, {current['timeouts']} timeouts "
+                                   f"(baseline {base['errors']}, {base['timeouts']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--targets", default="inprocess,http", help="comma-separated: inprocess, http")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per scenario first")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients (threads or connections)")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for the http target")
+    parser.add_argument("--url", help="drive this running server for the http target instead of starting gunicorn")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every replayed page load")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per HTTP request (s)")
+    parser.add_argument("--seed", type=int, default=0, help="payload sampling seed")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed p95 slowdown per scenario vs the baseline (0.25 = 25%%)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory (logs, databases)")
+    args = parser.parse_args()
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    # run_inprocess() changes directory; resolve paths against the caller's cwd first
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    workdir = tempfile.mkdtemp(prefix="bench_api_")
+    print(f"🗂️ Logs and scratch files in {workdir}")
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "keep", "targets")}
+    report = {"version": REPORT_VERSION, "environment": environment(), "settings": settings, "targets": {}}
+    runners = {"inprocess": run_inprocess, "http": run_http}
+    try:
+        for target in [t.strip() for t in args.targets.split(",") if t.strip()]:
+            print(f"🚀 {target}: {args.requests} requests per scenario, {args.clients} clients")
+            report["targets"][target] = runners[target](args, workdir)
+    finally:
+        os.chdir(REPO_ROOT)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    columns = ("ok", "errors", "timeouts", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"{'target':<11}{'scenario':<11}" + "".join(f"{c:>9}" for c in columns))
+    for target, scenarios in report["targets"].items():
+        for name, stats in scenarios.items():
+            print(f"{target:<11}{name:<11}" + "".join(f"{str(stats[c]):>9}" for c in columns))
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"💾 Wrote {json_path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("❌ Performance regressions:")
+            for line in regressions:
+                print("   " + line)
+            sys.exit(1)
+        print("✅ No scenario regressed beyond the allowed threshold")
+
+
+if __name__ == "__main__":
+    main()
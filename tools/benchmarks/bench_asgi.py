@@ -0,0 +1,117 @@
+"""
+Load test: the Flask app under gunicorn sync workers vs the ASGI app under uvicorn.
+
+Starts each server on a local port with the same number of worker processes,
+offline: scrapes are replayed from tools/benchmarks/fixtures with
+SCRAPER_FIXTURE_LATENCY seconds per page load standing in for Amazon, postcodes
+come from the pgeocode fixture, and the product cache is off so every estimate
+scrapes. Then, per server:
+
+    predict     --clients concurrent clients POST /predict, --requests in total
+    estimate    the same against /estimate_emissions (each request waits on a scrape)
+    idle        --idle connections are opened and left half-sent (an extension
+                tab that never finishes its request), then /predict is timed
+                one request at a time; requests that get no answer within
+                --timeout seconds count as timeouts
+
+and reports throughput, p50/p95/p99 latency and errors for each scenario.
+
+Usage:
+    python tools/benchmarks/bench_asgi.py [--workers 2] [--clients 32] [--requests 128]
+        [--latency 0.5] [--idle 64] [--modes flask,asgi] [--json out.json]
+
+Servers write their logs and scratch databases to a temporary directory,
+printed at the start; pass --keep to leave it behind.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from loadgen import (  # noqa: E402
+    drive_http, drive_http_async, estimate_requests, predict_requests, start_server, stop_server,
+)
+
+
+async def idle_scenario(base, idle, probes, timeout):
+    host, port = base.rsplit("/", 1)[-1].split(":")
+    writers = []
+    for _ in range(idle):
+        try:
+            _, writer = await asyncio.open_connection(host, int(port))
+            # A request line and no end of headers: the server waits for the rest
+            writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\n")
+            await writer.drain()
+            writers.append(writer)
+        except OSError:
+            break
+    await asyncio.sleep(0.5)
+    try:
+        result = await drive_http_async(base, predict_requests(probes, seed=1), 1, timeout)
+    finally:
+        for writer in writers:
+            writer.close()
+    result["idle_connections"] = len(writers)
+    return result
+
+
+def run_mode(mode, args, workdir):
+    process, base, log = start_server(mode, args.workers, workdir, latency=args.latency)
+    try:
+        results = {}
+        # Warm-up requests so lazy imports are not timed
+        drive_http(base, predict_requests(args.workers * 2), 1, args.timeout)
+        drive_http(base, estimate_requests(1), 1, args.timeout)
+        results["predict"] = drive_http(base, predict_requests(args.requests), args.clients, args.timeout)
+        results["estimate"] = drive_http(base, estimate_requests(args.requests), args.clients, args.timeout)
+        results["idle"] = asyncio.run(idle_scenario(base, args.idle, args.probes, args.timeout))
+        return results
+    finally:
+        stop_server(process, log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask/gunicorn vs ASGI/uvicorn load test")
+    parser.add_argument("--modes", default="flask,asgi")
+    parser.add_argument("--workers", type=int, default=2, help="server processes in both modes")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=128, help="requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per replayed page load")
+    parser.add_argument("--idle", type=int, default=64, help="half-open connections in the idle scenario")
+    parser.add_argument("--probes", type=int, default=10, help="/predict requests timed in the idle scenario")
+    parser.add_argument("--timeout", type=float, default=10.0, help="client timeout per request (s)")
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--keep", action="store_true", help="keep the server logs and databases")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_asgi_")
+    print(f"🗂️ Server logs and scratch files in {workdir}")
+    report = {"settings": {k: v for k, v in vars(args).items() if k not in ("json", "keep")}, "modes": {}}
+    try:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            print(f"🚀 {mode}: {args.workers} worker(s), {args.clients} clients, {args.requests} requests/scenario")
+            report["modes"][mode] = run_mode(mode, args, workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    columns = ("ok", "errors", "timeouts", "rps", "p50_ms", "p95_ms", "p99_ms")
+    print(f"{'mode':<8}{'scenario':<10}" + "".join(f"{c:>10}" for c in columns))
+    for mode, scenarios in report["modes"].items():
+        for scenario, stats in scenarios.items():
+            print(f"{mode:<8}{scenario:<10}" + "".join(f"{str(stats[c]):>10}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
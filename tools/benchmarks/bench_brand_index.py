@@ -0,0 +1,143 @@
+"""
+Fuzzy brand lookup: BrandIndex candidates vs the old full SequenceMatcher scan.
+
+Builds a synthetic brand database of --brands names (pronounceable words, some
+with corporate suffixes, multi-word names and acronyms), then for --queries
+lookups checks that EnhancedBrandResolver.fuzzy_match_brand returns exactly
+what the linear scan returned, and times both.
+
+Queries are a mix of misspelled known brands, known brands with suffixes
+added, acronyms of multi-word brands and unrelated words.
+
+Usage:
+    python tools/benchmarks/bench_brand_index.py [--brands 100000] [--queries 300]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from difflib import SequenceMatcher
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from common.data.brand_index import BrandIndex  # noqa: E402
+from common.data.brand_origin_resolver import EnhancedBrandResolver  # noqa: E402
+
+CONSONANTS = "bcdfghjklmnprstvwxz"
+VOWELS = "aeiouy"
+SUFFIXES = ["", "", "", " ltd", " inc", " gmbh", " co", " corporation"]
+
+
+def word(rng):
+    syllables = (rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(["", "", "n", "r", "s", "x"])
+                 for _ in range(rng.randint(2, 4)))
+    return "".join(syllables)
+
+
+def brand_name(rng):
+    return " ".join(word(rng) for _ in range(rng.choice([1, 1, 1, 2, 2, 3]))) + rng.choice(SUFFIXES)
+
+
+def misspell(rng, text):
+    chars = list(text)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        op = rng.choice(["drop", "swap", "sub"])
+        if op == "drop" and len(chars) > 3:
+            del chars[i]
+        elif op == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def queries_for(rng, brands, count):
+    queries = []
+    for _ in range(count):
+        known = rng.choice(brands)
+        kind = rng.choice(["typo", "suffix", "acronym", "unknown"])
+        if kind == "typo":
+            queries.append(misspell(rng, known))
+        elif kind == "suffix":
+            queries.append(known + rng.choice([" ltd", " inc.", " gmbh"]))
+        elif kind == "acronym" and " " in known:
+            queries.append("".join(w[0] for w in known.split()))
+        else:
+            queries.append(brand_name(rng))
+    return queries
+
+
+def linear_fuzzy_match(resolver, target_brand, threshold=0.75):
+    """fuzzy_match_brand as it was before BrandIndex."""
+    target_clean = resolver._normalize_brand_name(target_brand)
+    best_match, best_score = None, 0.0
+    for known_brand in resolver.exact_matches.keys():
+        known_clean = resolver._normalize_brand_name(known_brand)
+        similarity = SequenceMatcher(None, target_clean, known_clean).ratio()
+        if resolver._has_exact_word_match(target_clean, known_clean):
+            similarity += 0.15
+        if resolver._is_common_abbreviation(target_clean, known_clean):
+            similarity += 0.20
+        if similarity >= threshold and similarity > best_score:
+            best_match, best_score = known_brand, similarity
+    return (best_match, best_score) if best_match else None
+
+
+def timed(fn, items):
+    results, seconds = [], []
+    for item in items:
+        started = time.perf_counter()
+        results.append(fn(item))
+        seconds.append(time.perf_counter() - started)
+    return results, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy brand lookup benchmark")
+    parser.add_argument("--brands", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--linear-queries", type=int, default=30,
+                        help="queries also run through the (slow) linear scan for equivalence")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        resolver = EnhancedBrandResolver()
+    brands = list(dict.fromkeys(brand_name(rng) for _ in range(args.brands)))
+    resolver.exact_matches = {brand: {"country": "Unknown", "city": "Unknown"} for brand in brands}
+
+    started = time.perf_counter()
+    resolver.brand_index = BrandIndex(resolver._normalize_brand_name, resolver.exact_matches)
+    build_s = time.perf_counter() - started
+
+    queries = queries_for(rng, brands, args.queries)
+    indexed, indexed_s = timed(resolver.fuzzy_match_brand, queries)
+
+    sample = queries[:args.linear_queries]
+    linear, linear_s = timed(lambda q: linear_fuzzy_match(resolver, q), sample)
+    mismatches = [(q, a, b) for q, a, b in zip(sample, indexed, linear) if a != b]
+    if mismatches:
+        print(f"❌ {len(mismatches)} lookups differ from the linear scan, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    def describe(seconds):
+        ordered = sorted(seconds)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        return f"median {1000 * statistics.median(seconds):8.3f} ms   p95 {1000 * p95:8.3f} ms"
+
+    hits = sum(result is not None for result in indexed)
+    print(f"📊 {len(brands)} brands, index built in {build_s:.2f}s, {hits}/{len(queries)} queries matched")
+    print(f"indexed ({len(queries)} queries)   {describe(indexed_s)}")
+    print(f"linear  ({len(sample)} queries)    {describe(linear_s)}")
+    print(f"✅ {len(sample)} lookups identical to the linear scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Read-time benchmark: pandas CSV parsing vs the memory-mapped Arrow copies.
+
+For each canonical dataset (backend/data/storage/datasets.py) this times
+
+    csv             pd.read_csv, what every reader used to do
+    arrow           read_dataset(): mmap + to_pandas, same DataFrame
+    arrow 3 cols    read_dataset(columns=[material, true_eco_score, origin])
+    arrow cat.      read_dataset(categorical=True): codes stay dictionary encoded
+
+and checks that the CSV and Arrow frames are identical before any timing is
+reported. The .arrow files are written to a scratch directory, never next to
+the repo's CSVs.
+
+Usage:
+    python tools/benchmarks/bench_datasets.py [--repeat 5] [csv ...]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+import pandas as pd  # noqa: E402
+
+from backend.data.storage import datasets  # noqa: E402
+
+SUBSET = ["material", "true_eco_score", "origin"]
+
+
+def median_ms(fn, repeat):
+    fn()  # warm-up: page cache and imports
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return 1000 * statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV vs Arrow dataset read times")
+    parser.add_argument("csv", nargs="*", default=datasets.CANONICAL_DATASETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if datasets.feather is None:
+        print("❌ pyarrow is not installed")
+        sys.exit(1)
+
+    scratch = tempfile.mkdtemp(prefix="bench_datasets_")
+    try:
+        print(f"📊 median of {args.repeat} reads")
+        print(f"{'dataset':<30}{'rows':>7}{'CSV KiB':>9}{'Arrow KiB':>11}"
+              f"{'csv ms':>9}{'arrow ms':>10}{'3 cols ms':>11}{'cat. ms':>9}{'speedup':>9}")
+        for source in args.csv:
+            csv_path = os.path.join(scratch, os.path.basename(source))
+            shutil.copy(source, csv_path)
+            datasets.convert(csv_path)
+
+            expected = datasets.read_csv(csv_path)
+            pd.testing.assert_frame_equal(expected, datasets.read_dataset(csv_path))
+            pd.testing.assert_frame_equal(expected[SUBSET], datasets.read_dataset(csv_path, columns=SUBSET))
+
+            csv_ms = median_ms(lambda: pd.read_csv(csv_path), args.repeat)
+            arrow_ms = median_ms(lambda: datasets.read_dataset(csv_path), args.repeat)
+            subset_ms = median_ms(lambda: datasets.read_dataset(csv_path, columns=SUBSET), args.repeat)
+            cat_ms = median_ms(lambda: datasets.read_dataset(csv_path, categorical=True), args.repeat)
+            print(f"{os.path.basename(source):<30}{len(expected):>7}"
+                  f"{os.path.getsize(csv_path) / 1024:>9.0f}{os.path.getsize(datasets.arrow_path(csv_path)) / 1024:>11.0f}"
+                  f"{csv_ms:>9.2f}{arrow_ms:>10.2f}{subset_ms:>11.2f}{cat_ms:>9.2f}{csv_ms / arrow_ms:>8.1f}x")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Offline scraper benchmark over recorded HTML fixtures.
+
+Replays every fixture in the store (see backend/scrapers/common/fixtures.py)
+through the real extraction code and reports pages/sec plus per-step time
+and allocations:
+
+    parse               StaticPage(html)               lxml parse of the page
+    origin_structured   extract_origin_from_structured_data
+    weight_structured   extract_weight_from_structured_data
+    materials_structured extract_materials_from_structured_data
+    origin_chain        get_brand_intelligent_origin   brand -> origin resolution
+    product_page        extract_product_details        the whole product extraction
+    search_page         _scrape_amazon_titles          listing page -> products
+
+Record fixtures from live pages with
+
+    SCRAPER_FIXTURES=record python backend/scrapers/amazon/scrape_amazon_titles.py
+
+The checked-in fixtures are small hand-written pages covering the common
+Amazon layouts (detail bullets, key/value tables, tech specs, search grid);
+record real pages for representative absolute numbers.
+
+Usage:
+    python tools/benchmarks/bench_scraper.py [--repeat 5] [--json out.json]
+    python tools/benchmarks/bench_scraper.py --baseline base.json --max-regression 0.25
+
+peak KiB is the Python-heap peak traced by tracemalloc during one call;
+lxml's own C allocations are not included.
+
+With --baseline the exit status is 1 when any step's median time per page is
+more than --max-regression slower than the baseline, so CI can gate on it.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("SCRAPER_FIXTURES", "replay")
+
+
+def load_scraper():
+    """
+    Import the scraper from a scratch working directory: it reads and writes
+    its JSON state files relative to the cwd, so a benchmark run never
+    touches the repo's copies and always starts from the same empty state.
+    """
+    os.chdir(tempfile.mkdtemp(prefix="bench_scraper_"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend.scrapers.amazon.scrape_amazon_titles as scraper
+    # Pacing sleeps are politeness towards Amazon, not work; skip them offline
+    scraper.time = types.SimpleNamespace(**{**vars(time), "sleep": lambda seconds: None})
+    return scraper
+
+
+def measure(fn, repeat):
+    """Median wall time and peak traced allocation (bytes) of fn()."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()  # warm-up: caches, auto-learned brands and selector compilation settle here
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def page_identity(scraper, page):
+    title = page.find_element(scraper.By.ID, "productTitle").text.strip()
+    try:
+        brand = page.find_element(scraper.By.ID, "bylineInfo").text.strip()
+    except Exception:
+        brand = title.split()[0]
+    brand = brand.lower().replace("visit the", "").replace("store", "").strip()
+    return brand, title
+
+
+def run(store_dir, repeat):
+    from backend.scrapers.common.driver_pool import Lease
+    from backend.scrapers.common.fixtures import FixtureStore, ReplayDriver
+    from backend.scrapers.common.static_page import StaticPage
+
+    scraper = load_scraper()
+    store = FixtureStore(store_dir)
+    samples = {}
+
+    def add(step, seconds, peak):
+        entry = samples.setdefault(step, {"seconds": [], "peak_bytes": []})
+        entry["seconds"].append(seconds)
+        entry["peak_bytes"].append(peak)
+
+    for url, _ in store.entries("product"):
+        html = store.load(url)
+        add("parse", *measure(lambda: StaticPage(html, url), repeat))
+        page = StaticPage(html, url)
+        brand, title = page_identity(scraper, page)
+        add("origin_structured", *measure(lambda: scraper.extract_origin_from_structured_data(page), repeat))
+        add("weight_structured", *measure(lambda: scraper.extract_weight_from_structured_data(page), repeat))
+        add("materials_structured", *measure(lambda: scraper.extract_materials_from_structured_data(page), repeat))
+        add("origin_chain", *measure(lambda: scraper.get_brand_intelligent_origin(brand, title), repeat))
+        # Parse included: this is the full per-page cost of the HTTP tier
+        add("product_page", *measure(lambda: scraper.extract_product_details(StaticPage(html, url), url), repeat))
+
+    driver = ReplayDriver(store)
+    for url, _ in store.entries("search"):
+        lease = Lease(driver, slot=0)
+        add("search_page", *measure(lambda: scraper._scrape_amazon_titles(lease, url, 100, False), repeat))
+
+    report = {"repeat": repeat, "fixtures": len(store), "steps": {}}
+    for step, entry in samples.items():
+        total = sum(entry["seconds"])
+        report["steps"][step] = {
+            "pages": len(entry["seconds"]),
+            "ms_per_page": round(1000 * total / len(entry["seconds"]), 3),
+            "pages_per_s": round(len(entry["seconds"]) / total, 1) if total else None,
+            "peak_kib": round(max(entry["peak_bytes"]) / 1024, 1),
+        }
+    return report
+
+
+def compare(report, baseline, max_regression):
+    regressions = []
+    for step, current in report["steps"].items():
+        base = baseline.get("steps", {}).get(step)
+        if not base or not base["ms_per_page"]:
+            continue
+        change = current["ms_per_page"] / base["ms_per_page"] - 1
+        if change > max_regression:
+            regressions.append(f"{step}: {base['ms_per_page']}ms -> {current['ms_per_page']}ms (+{change:.0%})")
+    return regressions
+
+
+def main():
+    from backend.scrapers.common.fixtures import FIXTURE_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="fixture directory")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per page and step")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed slowdown per step vs the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # run() changes directory; resolve paths against the caller's cwd first
+    fixtures = os.path.abspath(args.fixtures)
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    report = run(fixtures, args.repeat)
+
+    print(f"📊 {report['fixtures']} fixtures, median of {args.repeat} runs")
+    print(f"{'step':<22}{'pages':>6}{'ms/page':>10}{'pages/s':>10}{'peak KiB':>10}")
+    for step, s in report["steps"].items():
+        print(f"{step:<22}{s['pages']:>6}{s['ms_per_page']:>10}{s['pages_per_s']:>10}{s['peak_kib']:>10}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("❌ Performance regressions:")
+            for line in regressions:
+                print("   " + line)
+            sys.exit(1)
+        print("✅ No step regressed beyond the allowed threshold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Micro-benchmarks for the text extractors on the eco_dataset.csv titles.
+
+Each extractor is timed against the implementation it replaced (inline
+re.search calls and `any(kw in text ...)` loops, kept below as legacy_*), and
+every output is checked to be identical before any timing is reported.
+
+normalize_material keeps its if/elif chain: on one-word material names that
+beats a single scan, so it has no row here.
+
+Inputs per row: the title, the origin column, and a
+"<title> material: <material> item weight: <weight> kg" blob for the
+field extractors. Recyclability runs on page-sized text: 25 joined blobs.
+
+Usage:
+    python tools/benchmarks/bench_text_matching.py [--repeat 5] [--csv path]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_scraper import REPO_ROOT, load_scraper  # noqa: E402
+
+DATASET = os.path.join(REPO_ROOT, "common", "data", "csv", "eco_dataset.csv")
+
+
+# === Legacy implementations (as they were before backend/utils/text_matching.py) ===
+
+LEGACY_FUZZY_MAP = {
+    "UK": ["united kingdom", "uk", "england", "scotland", "wales", "britain", "great britain"],
+    "USA": ["united states", "united states of america", "us", "usa", "america"],
+    "China": ["china", "prc", "people's republic of china"],
+    "Germany": ["germany", "deutschland"], "France": ["france"], "Italy": ["italy", "italia"],
+    "Japan": ["japan", "nippon"], "Ireland": ["ireland", "eire"], "Netherlands": ["netherlands", "holland"],
+    "Canada": ["canada"], "Switzerland": ["switzerland"], "Australia": ["australia"], "Sweden": ["sweden"],
+    "Finland": ["finland"], "Mexico": ["mexico"], "Indonesia": ["indonesia"], "India": ["india"],
+    "Spain": ["spain", "espana"], "Poland": ["poland", "polska"], "Belgium": ["belgium"],
+    "Denmark": ["denmark"], "Norway": ["norway"],
+    "South Korea": ["south korea", "korea", "republic of korea"], "Thailand": ["thailand"],
+    "Vietnam": ["vietnam"], "Turkey": ["turkey"], "Brazil": ["brazil"],
+}
+
+
+def legacy_fuzzy_normalize_origin(raw_origin):
+    if not raw_origin:
+        return "Unknown"
+    origin = raw_origin.strip().lower()
+    fuzzy_map = dict(LEGACY_FUZZY_MAP)  # the dict literal was rebuilt on every call
+    for country, keywords in fuzzy_map.items():
+        if any(keyword in origin for keyword in keywords):
+            return country.title()
+    return raw_origin.title()
+
+
+def legacy_extract_weight(text):
+    if not text:
+        return None
+    text = text.lower()
+    dims_patterns = [
+        r"(?:product|package)\s*dimensions?\s*:?\s*[\d\s.x×*cm;]+;\s*([\d.]+)\s*g",
+        r"[\d.]+\s*x\s*[\d.]+\s*x\s*[\d.]+\s*cm;\s*([\d.]+)\s*g",
+        r"dimensions?\s*:?\s*[\d\s.x×*cm;]+;\s*([\d.]+)\s*g",
+        r"[\d.]+\s*x\s*[\d.]+\s*x\s*[\d.]+\s*cm[;,]\s*([\d.]+)\s*g",
+        r"product\s+dimensions\s*[:\s]+[\d\s.x×*cm;,]+[;,]\s*([\d.]+)\s*g",
+        r"[\d.]+\s*[x×]\s*[\d.]+\s*[x×]\s*[\d.]+\s*cm[;,\s]+([\d.]+)\s*g\b"
+    ]
+    for pattern in dims_patterns:
+        m = re.search(pattern, text, re.IGNORECASE)
+        if m:
+            return round(float(m.group(1)) / 1000, 3)
+    m = re.search(r"([\d.]+)\s?(kg|kilogram|kilograms)", text)
+    if m:
+        return round(float(m.group(1)), 3)
+    m = re.search(r"([\d.]+)\s?(g|grams?|gramme?s?)\b", text)
+    if m:
+        return round(float(m.group(1)) / 1000, 3)
+    m = re.search(r"(?:weight|item weight)\s*:?\s*([\d.]+)\s*(kg|g|grams?)", text)
+    if m:
+        return round(float(m.group(1)) if m.group(2) == "kg" else float(m.group(1)) / 1000, 3)
+    return None
+
+
+def legacy_extract_material(text, normalize_material):
+    if not text:
+        return None
+    text = text.lower()
+    for field_pattern in [r"sole material\s*:?\s*([a-zA-Z\s\-,]+)", r"outer material\s*:?\s*([a-zA-Z\s\-,]+)",
+                          r"upper material\s*:?\s*([a-zA-Z\s\-,]+)", r"lining material\s*:?\s*([a-zA-Z\s\-,]+)",
+                          r"main material\s*:?\s*([a-zA-Z\s\-,]+)", r"primary material\s*:?\s*([a-zA-Z\s\-,]+)"]:
+        m = re.search(field_pattern, text, re.IGNORECASE)
+        if m:
+            raw = re.sub(r'[,;.].*$', '', m.group(1).strip()).strip()
+            raw = re.sub(r'\s+(and|or|with|plus).*$', '', raw, flags=re.IGNORECASE).strip()
+            material = normalize_material(raw)
+            if material and material != "Unknown":
+                return material
+    composition_material = None
+    for field_pattern in [r"material composition\s*:?\s*([a-zA-Z\s\-,]+)", r"fabric type\s*:?\s*([a-zA-Z\s\-,]+)",
+                          r"material\s*:?\s*([a-zA-Z\s\-,]+)"]:
+        m = re.search(field_pattern, text, re.IGNORECASE)
+        if m:
+            raw = re.sub(r'[,;.].*$', '', m.group(1).strip()).strip()
+            raw = re.sub(r'\s+(and|or|with|plus).*$', '', raw, flags=re.IGNORECASE).strip()
+            material = normalize_material(raw)
+            if material and material != "Unknown":
+                composition_material = material
+                break
+    m = re.search(r"material type\s*:?\s*(.+?)(?:\n|$)", text, re.IGNORECASE)
+    if m:
+        pct = re.findall(r"(\d+)%\s*([a-z]+)", m.group(1).strip(), re.IGNORECASE)
+        if pct:
+            return max(pct, key=lambda x: int(x[0]))[1].title()
+    m = re.search(r"construction\s*:?\s*([a-z\s\-]+)", text, re.IGNORECASE)
+    if m:
+        first = re.search(r"([a-z]+)", m.group(1).strip(), re.IGNORECASE)
+        if first:
+            return first.group(1).title()
+    m = re.search(r"(?:material|made of|composition)[\s:]+([a-z\s\-]+)", text, re.IGNORECASE)
+    if m:
+        return m.group(1).strip().title()
+    for keyword in ["plastic", "rubber", "leather", "cotton", "polyester", "nylon",
+                    "metal", "steel", "aluminum", "wood", "glass", "ceramic", "silicone"]:
+        if keyword in text:
+            return keyword.title()
+    return composition_material
+
+
+def legacy_category_material(title):
+    category_keywords = {
+        "Paper": ["card", "board game", "book", "journal", "notebook", "diary", "pad"],
+        "Plastic": ["tablet", "tub", "bottle", "container", "cap", "case", "lid", "pouch", "tube"],
+        "Glass": ["jar", "flask", "mason"],
+        "Fabric": ["bag", "tote", "backpack"],
+        "Steel": ["thermos", "cutlery", "knife", "fork", "bottle opener"],
+    }
+    for mat, keywords in category_keywords.items():
+        if any(word in title for word in keywords):
+            return mat
+    return None
+
+
+def legacy_origin_blob_trigger(blob):
+    return any(kw in blob.lower() for kw in ["country of origin", "made in", "product of", "manufactured in",
+                                             "origin:", "vietnam", "china", "germany", "usa"])
+
+
+def legacy_recyclability(text):
+    if any(kw in text for kw in ["100% recyclable", "fully recyclable", "recyclable packaging"]):
+        return "High"
+    elif any(kw in text for kw in ["partially recycled", "made from recycled", "recycled content"]):
+        return "Medium"
+    elif any(kw in text for kw in ["not recyclable", "non-recyclable", "plastic packaging"]):
+        return "Low"
+    return "Unknown"
+
+
+def load_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text extractor micro-benchmarks")
+    parser.add_argument("--csv", default=DATASET)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = load_rows(os.path.abspath(args.csv))
+    scraper = load_scraper()
+
+    titles = [r["title"].lower() for r in rows]
+    origins = [r["origin"] for r in rows]
+    blobs = [f"{r['title']} material: {r['material']} item weight: {r['weight']} kg" for r in rows]
+    # extract_recyclability sees all of a page's bullets and description joined together
+    pages = [" ".join(blobs[i:i + 25]).lower() for i in range(0, len(blobs), 25)]
+
+    cases = [
+        ("fuzzy_normalize_origin", origins, legacy_fuzzy_normalize_origin, scraper.fuzzy_normalize_origin),
+        ("fuzzy_normalize_origin (titles)", titles, legacy_fuzzy_normalize_origin, scraper.fuzzy_normalize_origin),
+        ("extract_material", blobs, lambda text: legacy_extract_material(text, scraper.normalize_material),
+         scraper.extract_material),
+        ("extract_weight", blobs, legacy_extract_weight, scraper.extract_weight),
+        ("category material (titles)", titles, legacy_category_material, scraper.category_material_matcher.first),
+        ("origin blob trigger", blobs, legacy_origin_blob_trigger, scraper.origin_blob_fallback_matcher.search),
+        ("packaging recyclability (pages)", pages, legacy_recyclability,
+         lambda text: scraper.packaging_recyclability_matcher.first(text, "Unknown")),
+    ]
+
+    print(f"📊 {len(rows)} rows from {os.path.relpath(args.csv, REPO_ROOT)}, best of {args.repeat}")
+    print(f"{'extractor':<34}{'legacy µs':>11}{'new µs':>9}{'speedup':>9}")
+    for name, inputs, legacy, new in cases:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mismatches = [x for x in inputs if legacy(x) != new(x)]
+            old_s = min(timeit.repeat(lambda: [legacy(x) for x in inputs], number=1, repeat=args.repeat))
+            new_s = min(timeit.repeat(lambda: [new(x) for x in inputs], number=1, repeat=args.repeat))
+        if mismatches:
+            print(f"❌ {name}: {len(mismatches)} outputs differ, e.g. {mismatches[0]!r}")
+            sys.exit(1)
+        per_old, per_new = 1e6 * old_s / len(inputs), 1e6 * new_s / len(inputs)
+        print(f"{name:<34}{per_old:>11.2f}{per_new:>9.2f}{old_s / new_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Inference benchmark: XGBClassifier vs the NumPy tree engine (CompiledForest).
+
+Times scoring one row (the /predict path) and 10k rows (/predict/batch) with
+
+    xgb predict+proba   model.predict(X) then model.predict_proba(X), the old API path
+    xgb proba           model.predict_proba(X) alone
+    numpy walk          CompiledForest.predict_proba(X), NumPy walk for any batch size
+    engine              CompiledForest as the registry serves it: NumPy walk up to
+                        TREE_ENGINE_MAX_ROWS rows, Booster.inplace_predict beyond
+
+and checks that the probabilities agree before reporting any timing.
+
+The model is backend/ml/models/xgb_model.json, else eco_model.pkl, else (for a
+checkout without trained artifacts) a stand-in of the same shape as the
+training driver produces: 11 features, 7 classes, 300 rounds of depth-7 trees.
+
+Usage:
+    python tools/benchmarks/bench_tree_engine.py [--model PATH] [--repeat 200] [--rows 10000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import xgboost as xgb  # noqa: E402
+
+from backend.ml.prediction.tree_engine import CompiledForest  # noqa: E402
+
+MODELS_DIR = os.path.join(REPO_ROOT, "backend", "ml", "models")
+TOLERANCE = 1e-5
+
+
+def load_model(path):
+    if path is None:
+        for candidate in ("xgb_model.json", "eco_model.pkl"):
+            if os.path.exists(os.path.join(MODELS_DIR, candidate)):
+                path = os.path.join(MODELS_DIR, candidate)
+                break
+    if path is None:
+        print("⚠️ No trained model found; training a stand-in (11 features, 7 classes, 300 x depth 7)")
+        rng = np.random.default_rng(0)
+        X = rng.integers(0, 12, size=(20000, 11)).astype(float)
+        y = (X[:, 0] + X[:, 1] * 0.5 + rng.normal(size=len(X))).astype(int) % 7
+        model = xgb.XGBClassifier(n_estimators=300, max_depth=7, tree_method="hist")
+        return model.fit(X, y), "stand-in"
+    if path.endswith(".json"):
+        model = xgb.XGBClassifier()
+        model.load_model(path)
+        return model, os.path.relpath(path, REPO_ROOT)
+    return joblib.load(path), os.path.relpath(path, REPO_ROOT)
+
+
+def median_us(fn, repeat):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return 1e6 * statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XGBoost vs NumPy tree engine latency")
+    parser.add_argument("--model")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    model, source = load_model(args.model)
+    started = time.perf_counter()
+    compiled = CompiledForest.from_model(model)
+    compile_ms = 1000 * (time.perf_counter() - started)
+    walk_only = CompiledForest.from_model(model)
+    walk_only.booster = None
+    print(f"🌲 {source}: {compiled.stats()} (compiled in {compile_ms:.0f} ms)")
+
+    rng = np.random.default_rng(1)
+    batch = rng.integers(0, 12, size=(args.rows, compiled.n_features)).astype(float)
+    batch[rng.random(batch.shape) < 0.02] = np.nan
+    single = [list(batch[0])]  # the API hands the model a list of lists
+
+    expected = np.asarray(model.predict_proba(batch))
+    difference = max(np.abs(expected - walk_only.predict_proba(batch)).max(),
+                     np.abs(expected - compiled.predict_proba(batch)).max())
+    agree = (model.predict(batch) == walk_only.predict(batch)).mean()
+    print(f"🔍 max |proba difference| {difference:.2e}, labels agree on {agree:.2%} of {args.rows} rows")
+    if difference > TOLERANCE:
+        print(f"❌ Probabilities differ by more than {TOLERANCE}")
+        sys.exit(1)
+
+    cases = [
+        ("xgb predict+proba", lambda X: (model.predict(X), model.predict_proba(X))),
+        ("xgb proba", model.predict_proba),
+        ("numpy walk", walk_only.predict_proba),
+        ("engine", compiled.predict_proba),
+    ]
+    print(f"{'backend':<20}{'1 row µs':>12}{f'{args.rows} rows ms':>16}")
+    baseline = None
+    for name, fn in cases:
+        one = median_us(lambda: fn(single), args.repeat)
+        many = median_us(lambda: fn(batch), max(3, args.repeat // 20)) / 1000
+        baseline = baseline or (one, many)
+        print(f"{name:<20}{one:>12.0f}{many:>16.1f}   ({baseline[0] / one:.1f}x / {baseline[1] / many:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Shared pieces of the API load tests (bench_api.py, bench_asgi.py).
+
+    offline_env     environment for a server that never touches the network:
+                    scrapes replay tools/benchmarks/fixtures (optionally with
+                    SCRAPER_FIXTURE_LATENCY per page), postcodes come from the
+                    pgeocode fixture, the product cache is off so every estimate
+                    scrapes, and databases go to a scratch directory
+    start_server    gunicorn (Flask) or uvicorn (ASGI) on a free local port
+    *_requests      workloads as (method, path, json body) tuples; /predict
+                    bodies are sampled from common/data/csv/eco_dataset.csv and
+                    the raw inputs in submitted_predictions.json
+    drive_http      closed-loop load over HTTP with N concurrent clients
+                    (drive_http_async inside a running event loop)
+    summarise       throughput, status codes and p50/p95/p99 latency
+"""
+import asyncio
+import csv
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FIXTURES = os.path.join(REPO_ROOT, "tools", "benchmarks", "fixtures")
+DATASET_PATH = os.path.join(REPO_ROOT, "common", "data", "csv", "eco_dataset.csv")
+SUBMISSIONS_PATH = os.path.join(REPO_ROOT, "submitted_predictions.json")
+
+# eco_dataset.csv says "Land" where the API's transport modes say "Truck"
+TRANSPORT_MODES = {"Air": "Air", "Ship": "Ship", "Sea": "Ship", "Land": "Truck", "Truck": "Truck"}
+ORIGIN_DISTANCES_KM = (400, 1200, 3500, 8000, 12000)
+
+
+# --- servers -----------------------------------------------------------------
+
+def offline_env(workdir, latency=0.0, tag="server"):
+    return {
+        "SCRAPER_FIXTURES": "replay",
+        "SCRAPER_FIXTURE_LATENCY": str(latency),
+        "PGEOCODE_DATA_DIR": os.path.join(FIXTURES, "pgeocode"),
+        "PRODUCT_CACHE_TTL": "0",
+        "PRODUCT_CACHE_STALE_TTL": "0",
+        "JOB_DB_PATH": os.path.join(workdir, f"jobs-{tag}.db"),
+        "PRODUCT_DB_PATH": os.path.join(workdir, f"products-{tag}.db"),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(mode, port, workers):
+    if mode == "flask":
+        return [sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_ROOT, "gunicorn.conf.py"),
+                "--bind", f"127.0.0.1:{port}", "backend.api.app:app"]
+    return [sys.executable, "-m", "uvicorn", "backend.api.asgi:app", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+
+
+def start_server(mode, workers, workdir, latency=0.0, startup_timeout=180):
+    """Start mode ("flask" | "asgi") offline; returns (process, base_url, log file)."""
+    port = free_port()
+    env = {**os.environ, **offline_env(workdir, latency, mode),
+           "PYTHONPATH": REPO_ROOT, "WEB_CONCURRENCY": str(workers)}
+    log = open(os.path.join(workdir, f"{mode}.log"), "w")
+    process = subprocess.Popen(server_command(mode, port, workers), cwd=workdir, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with {process.returncode}; see {log.name}")
+        try:
+            if httpx.get(base + "/health", timeout=2).status_code == 200:
+                return process, base, log
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not come up; see {log.name}")
+
+
+def stop_server(process, log):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    log.close()
+
+
+# --- workloads -----------------------------------------------------------------
+
+def _as_float(value, default=0.5):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def predict_inputs():
+    """Every realistic /predict input we have: dataset rows plus submitted predictions."""
+    inputs = []
+    with open(DATASET_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            inputs.append({
+                "title": row.get("title") or "Manual Submission",
+                "material": row.get("material"),
+                "weight": _as_float(row.get("weight")),
+                "transport": row.get("transport"),
+                "recyclability": row.get("recyclability"),
+                "origin": (row.get("origin") or "Other").title(),
+            })
+    if os.path.exists(SUBMISSIONS_PATH):
+        with open(SUBMISSIONS_PATH, encoding="utf-8") as f:
+            for submission in json.load(f):
+                raw = submission.get("raw_input") or {}
+                inputs.append({"title": submission.get("title", "Manual Submission"), **raw,
+                               "weight": _as_float(raw.get("weight"))})
+    return inputs
+
+
+def predict_requests(count, seed=0):
+    rng = random.Random(seed)
+    inputs = predict_inputs()
+    requests = []
+    for _ in range(count):
+        body = dict(rng.choice(inputs))
+        body["distance_origin_to_uk"] = rng.choice(ORIGIN_DISTANCES_KM)
+        mode = TRANSPORT_MODES.get(body.get("transport"))
+        if mode and rng.random() < 0.5:
+            body["override_transport_mode"] = mode
+        requests.append(("POST", "/predict", body))
+    return requests
+
+
+def estimate_requests(count, seed=0):
+    """/estimate_emissions bodies for the recorded product pages and fixture postcodes."""
+    from backend.scrapers.common.fixtures import FixtureStore
+
+    rng = random.Random(seed)
+    urls = [url for url, _ in FixtureStore(FIXTURES).entries("product")]
+    with open(os.path.join(FIXTURES, "pgeocode", "GB.txt"), newline="", encoding="utf-8") as f:
+        districts = [row["postal_code"] for row in csv.DictReader(f)]
+    return [
+        ("POST", "/estimate_emissions", {
+            "amazon_url": rng.choice(urls),
+            "postcode": f"{rng.choice(districts)} {rng.randint(1, 9)}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}"
+                        f"{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}",
+            "include_packaging": rng.random() < 0.8,
+        })
+        for _ in range(count)
+    ]
+
+
+def get_requests(path, count):
+    return [("GET", path, None)] * count
+
+
+# --- measurement -----------------------------------------------------------------
+
+def summarise(latencies, status_codes, timeouts, seconds):
+    """latencies of the successful (< 400) requests, in seconds."""
+    ordered = sorted(latencies)
+
+    def percentile(q):
+        return round(1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else None
+
+    return {
+        "requests": sum(status_codes.values()) + timeouts,
+        "ok": len(ordered),
+        "errors": sum(status_codes.values()) - len(ordered),
+        "timeouts": timeouts,
+        "status_codes": dict(sorted(status_codes.items())),
+        "seconds": round(seconds, 3),
+        "rps": round(len(ordered) / seconds, 1) if seconds else None,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(1000 * ordered[-1], 2) if ordered else None,
+        "mean_ms": round(1000 * statistics.fmean(ordered), 2) if ordered else None,
+    }
+
+
+async def drive_http_async(base, requests, clients, timeout=30.0):
+    latencies, status_codes, timeouts = [], Counter(), 0
+    pending = iter(requests)
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, timeout=timeout, limits=limits) as client:
+        async def loop():
+            nonlocal timeouts
+            for method, path, body in pending:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                except httpx.TimeoutException:
+                    timeouts += 1
+                    continue
+                except httpx.HTTPError:
+                    status_codes["connection error"] += 1
+                    continue
+                status_codes[str(response.status_code)] += 1
+                if response.status_code < 400:
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(loop() for _ in range(clients)))
+    return summarise(latencies, status_codes, timeouts, time.perf_counter() - started)
+
+
+def drive_http(base, requests, clients, timeout=30.0):
+    """Send requests with `clients` concurrent connections, each sending its next request as soon as one returns."""
+    return asyncio.run(drive_http_async(base, requests, clients, timeout))